@@ -8,7 +8,8 @@ const app = new cdk.App();
 // Get environment from context (defaults to dev)
 const environment = app.node.tryGetContext('environment') || 'dev';
 
-// Environment-specific configuration
+// Environment-specific configuration. mediaListingIndexes is raised by one
+// per deploy until it reaches 3 (see MEDIA_LISTING_INDEXES).
 const envConfig = {
   dev: {
     account: process.env.CDK_DEFAULT_ACCOUNT,
@@ -17,6 +18,7 @@ const envConfig = {
     subdomain: 'dev',
     rootDomainAliases: undefined as string[] | undefined,
     alarmEmail: process.env.ALARM_EMAIL, // Optional: Set via environment variable
+    mediaListingIndexes: 1,
   },
   staging: {
     account: process.env.CDK_DEFAULT_ACCOUNT,
@@ -25,6 +27,7 @@ const envConfig = {
     subdomain: 'staging',
     rootDomainAliases: undefined as string[] | undefined,
     alarmEmail: process.env.ALARM_EMAIL,
+    mediaListingIndexes: 1,
   },
   prod: {
     account: process.env.CDK_DEFAULT_ACCOUNT,
@@ -33,6 +36,7 @@ const envConfig = {
     subdomain: undefined, // No subdomain for prod (uses root)
     rootDomainAliases: ['celestium.life', 'www.celestium.life'],
     alarmEmail: process.env.ALARM_EMAIL,
+    mediaListingIndexes: 1,
   },
 };
 
@@ -48,6 +52,7 @@ new ServerlessCmsStack(app, `ServerlessCmsStack-${environment}`, {
   subdomain: config.subdomain,
   rootDomainAliases: config.rootDomainAliases,
   alarmEmail: config.alarmEmail,
+  mediaListingIndexes: config.mediaListingIndexes,
   tags: {
     Environment: environment,
     Project: 'ServerlessCMS',
@@ -137,6 +137,7 @@ describe('useMediaList', () => {
     const mockResponse: MediaListResponse = {
       items: [mockMedia],
       last_key: {
+        uploaded_at: 1234567890,
         id: 'media-1',
       },
     };
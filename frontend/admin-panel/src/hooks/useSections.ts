@@ -4,6 +4,7 @@ import {
   deleteSection,
   getSection,
   getSections,
+  reorderSections,
   updateSection,
 } from '../services/sectionService';
 import type {
@@ -49,6 +50,18 @@ export const useUpdateSection = () => {
   });
 };
 
+export const useReorderSections = () => {
+  const queryClient = useQueryClient();
+
+  return useMutation({
+    mutationFn: ({ parentId, ids }: { parentId: string; ids: string[] }) =>
+      reorderSections(parentId, ids),
+    onSuccess: () => {
+      queryClient.invalidateQueries({ queryKey: ['sections'] });
+    },
+  });
+};
+
 export const useDeleteSection = () => {
   const queryClient = useQueryClient();
 
@@ -10,6 +10,8 @@ import {
   Media,
   MediaUpdate,
   MediaListResponse,
+  MediaType,
+  MediaUploadSession,
   User,
   UserUpdate,
   Plugin,
@@ -21,6 +23,18 @@ import type { BackupJob, BackupSchedule } from '../types/backup';
 
 const MEDIA_CDN_URL = import.meta.env.VITE_MEDIA_CDN_URL || '';
 
+// Files above this size upload straight to S3 through a multipart session
+// instead of being posted through the API.
+const DIRECT_UPLOAD_THRESHOLD = 5 * 1024 * 1024;
+const UPLOAD_PART_CONCURRENCY = 4;
+
+async function sha256Hex(file: File): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest))
+    .map((byte) => byte.toString(16).padStart(2, '0'))
+    .join('');
+}
+
 /**
  * Recursively rewrite S3 media URLs to CloudFront CDN URLs.
  * Handles the case where the backend returns raw S3 URLs instead of CDN URLs.
@@ -189,6 +203,10 @@ class ApiClient {
 
   // Media API methods
   async uploadMedia(file: File, metadata?: Record<string, string>): Promise<Media> {
+    if (file.size > DIRECT_UPLOAD_THRESHOLD) {
+      return this.uploadMediaMultipart(file);
+    }
+
     const formData = new FormData();
     formData.append('file', file);
     if (metadata) {
@@ -203,6 +221,34 @@ class ApiClient {
     return response.data;
   }
 
+  /**
+   * Upload a file directly to S3 through a multipart upload session.
+   * Parts are PUT to presigned URLs, then the session is finalized, which
+   * verifies size and checksum and creates the media record.
+   */
+  async uploadMediaMultipart(file: File): Promise<Media> {
+    const { data: session } = await this.client.post<MediaUploadSession>('/media/uploads', {
+      filename: file.name,
+      content_type: file.type || undefined,
+      size: file.size,
+      sha256: await sha256Hex(file),
+    });
+
+    // Presigned URLs carry their own auth, so parts skip the API client
+    const uploader = axios.create();
+    const pending = [...session.parts];
+    const worker = async () => {
+      for (let part = pending.shift(); part; part = pending.shift()) {
+        const start = (part.part_number - 1) * session.part_size;
+        await uploader.put(part.url, file.slice(start, start + session.part_size));
+      }
+    };
+    await Promise.all(Array.from({ length: UPLOAD_PART_CONCURRENCY }, worker));
+
+    const response = await this.client.post<Media>(`/media/uploads/${session.session_id}/complete`);
+    return response.data;
+  }
+
   async getMedia(id: string): Promise<Media> {
     const response = await this.client.get<Media>(`/media/${id}`);
     return response.data;
@@ -217,7 +263,14 @@ class ApiClient {
     await this.client.delete(`/media/${id}`);
   }
 
-  async listMedia(params?: { limit?: number; last_key?: string; search?: string }): Promise<MediaListResponse> {
+  async listMedia(params?: {
+    limit?: number;
+    last_key?: string;
+    search?: string;
+    type?: MediaType;
+    uploaded_by?: string;
+    order?: 'asc' | 'desc';
+  }): Promise<MediaListResponse> {
     const response = await this.client.get<MediaListResponse>('/media', { params });
     return response.data;
   }
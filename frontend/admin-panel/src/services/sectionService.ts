@@ -49,6 +49,26 @@ export async function updateSection(id: string, data: UpdateSectionRequest): Pro
   return response.data;
 }
 
+export interface SectionOrderEntry {
+  id: string;
+  sort_order: number;
+}
+
+/**
+ * Reorder the children of a section (use 'ROOT' for top-level sections).
+ * ids must list every child, and each id receives its index as sort_order
+ * in a single transaction. Parents with more than 100 children cannot be
+ * reordered.
+ */
+export async function reorderSections(parentId: string, ids: string[]): Promise<SectionOrderEntry[]> {
+  const response = await axios.put<{ parent_id: string; items: SectionOrderEntry[] }>(
+    `${BASE_URL}/sections/${parentId}/reorder`,
+    { ids },
+    { headers: { 'Content-Type': 'application/json', ...getAuthHeaders() } },
+  );
+  return response.data.items;
+}
+
 export async function deleteSection(id: string): Promise<void> {
   await axios.delete(`${BASE_URL}/sections/${id}`, {
     headers: getAuthHeaders(),
@@ -24,6 +24,8 @@ export interface Content {
   author_name?: string;
   status: ContentStatus;
   featured_image?: string;
+  /** S3 key of featured_image when it is a media library file */
+  featured_image_key?: string;
   metadata: ContentMetadata;
   section_id?: string;
   created_at: number;
@@ -27,6 +27,18 @@ export interface Media {
   metadata?: MediaMetadata;
   uploaded_by: string;
   uploaded_at: number;
+  /** Thumbnail processing state; absent on media uploaded before it existed */
+  status?: 'processing' | 'ready' | 'failed';
+  /** SHA-256 of the file; media with the same hash share one stored file */
+  content_hash?: string;
+  /** Media library family of mime_type */
+  media_type?: MediaType;
+  /** BlurHash placeholder, set with the thumbnails */
+  blurhash?: string;
+  /** Hex colors, most common first */
+  dominant_colors?: string[];
+  /** Width divided by height */
+  aspect_ratio?: number;
 }
 
 export interface MediaUpload {
@@ -38,8 +50,27 @@ export interface MediaUpdate {
   metadata: MediaMetadata;
 }
 
+export interface MediaUploadPart {
+  part_number: number;
+  url: string;
+}
+
+export interface MediaUploadSession {
+  session_id: string;
+  filename: string;
+  size: number;
+  part_size: number;
+  part_count: number;
+  expires_at: number;
+  uploaded_parts: { part_number: number; size: number }[];
+  parts: MediaUploadPart[];
+}
+
+export type MediaType = 'image' | 'video' | 'audio' | 'document';
+
 export interface MediaListResponse {
   items: Media[];
-  last_key?: Record<string, string>;
+  /** Keyset cursor: the uploaded_at and id of the page's last item */
+  last_key?: { uploaded_at: number; id: string } | null;
   total_count?: number;
 }
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
-import { fetchSectionByPath, fetchSectionPosts, SectionPostsResponse } from '../services/sectionService';
+import { fetchSectionPage, SectionPostsResponse } from '../services/sectionService';
 import { SectionTreeNode } from '../../../shared/sections/types';
 import { PostCard } from '../components/PostCard';
 import { BlogContent } from '../components/BlogContent';
@@ -18,7 +18,17 @@ export const BlogSectionPage = () => {
   const [isLoadingPosts, setIsLoadingPosts] = useState(false);
   const [notFound, setNotFound] = useState(false);
 
-  // Fetch section by path
+  // Start from the first page when navigating to another section
+  const [loadedPath, setLoadedPath] = useState(sectionPath);
+  if (loadedPath !== sectionPath) {
+    setLoadedPath(sectionPath);
+    setSection(null);
+    setPostsResponse(null);
+    setPage(1);
+    setIsLoading(true);
+  }
+
+  // Fetch the section, a page of its posts and its landing page in one request
   useEffect(() => {
     if (!sectionPath) {
       setNotFound(true);
@@ -26,39 +36,31 @@ export const BlogSectionPage = () => {
       return;
     }
 
-    setIsLoading(true);
+    let cancelled = false;
     setNotFound(false);
-    setSection(null);
-    setPostsResponse(null);
-    setPage(1);
+    setIsLoadingPosts(true);
 
-    fetchSectionByPath(sectionPath)
+    fetchSectionPage(sectionPath, page)
       .then((data) => {
-        setSection(data);
-        setIsLoading(false);
+        if (cancelled) return;
+        setSection(data.section);
+        setPostsResponse(data);
       })
       .catch((err) => {
-        if (err?.response?.status === 404) {
+        if (!cancelled && err?.response?.status === 404) {
           setNotFound(true);
         }
-        setIsLoading(false);
-      });
-  }, [sectionPath]);
-
-  // Fetch posts when section or page changes
-  useEffect(() => {
-    if (!section) return;
-
-    setIsLoadingPosts(true);
-    fetchSectionPosts(section.id, page)
-      .then((data) => {
-        setPostsResponse(data);
-        setIsLoadingPosts(false);
       })
-      .catch(() => {
+      .finally(() => {
+        if (cancelled) return;
+        setIsLoading(false);
         setIsLoadingPosts(false);
       });
-  }, [section, page]);
+
+    return () => {
+      cancelled = true;
+    };
+  }, [sectionPath, page]);
 
   // 404 state
   if (!isLoading && notFound) {
@@ -23,6 +23,10 @@ export interface SectionPostsResponse {
   landing_page?: LandingPage;
 }
 
+export interface SectionPageResponse extends SectionPostsResponse {
+  section: SectionTreeNode;
+}
+
 /**
  * Fetch the full section tree (unauthenticated).
  * The API may return a raw array or { items: [...] } wrapper.
@@ -53,3 +57,16 @@ export async function fetchSectionPosts(sectionId: string, page: number = 1): Pr
   });
   return response.data;
 }
+
+/**
+ * Fetch everything a section page renders in one request (unauthenticated):
+ * the section resolved from its path, a page of posts and the landing page.
+ * @param path - Slash-separated slug path, e.g. "technology/web-development"
+ * @param page - Page number (1-indexed)
+ */
+export async function fetchSectionPage(path: string, page: number = 1): Promise<SectionPageResponse> {
+  const response = await client.get<SectionPageResponse>(`/public/sections/page/${path}`, {
+    params: { page },
+  });
+  return response.data;
+}
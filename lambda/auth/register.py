@@ -13,8 +13,9 @@ from botocore.exceptions import ClientError
 # Add parent directory to path for shared imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from shared.email import send_email
+from shared.mailer import queue_email
 from shared.middleware import require_setting
+from shared.rate_limit import RateLimiter
 
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
@@ -32,6 +33,12 @@ PASSWORD_MIN_LENGTH = 8
 PASSWORD_PATTERN = re.compile(r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{8,}$')
 EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
+# Rate limiting: 5 registrations per hour per IP
+RATE_LIMIT_WINDOW = 3600  # 1 hour in seconds
+RATE_LIMIT_MAX = 5
+
+rate_limiter = RateLimiter('register', RATE_LIMIT_MAX, RATE_LIMIT_WINDOW)
+
 
 def validate_email(email: str) -> bool:
     """Validate email format."""
@@ -65,6 +72,19 @@ def handler(event, context):
                 'body': json.dumps({'error': str(e)})
             }
         
+        source_ip = event.get('requestContext', {}).get('identity', {}).get('sourceIp', 'unknown')
+        rate_limit = rate_limiter.check(source_ip)
+        if not rate_limit.allowed:
+            logger.warning(f"Registration rate limit exceeded for IP: {source_ip}")
+            return {
+                'statusCode': 429,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Retry-After': str(rate_limit.retry_after),
+                },
+                'body': json.dumps({'error': 'Too many registration attempts. Please try again later.'})
+            }
+        
         body = json.loads(event['body'])
         email = body.get('email', '').strip().lower()
         password = body.get('password', '')
@@ -158,19 +178,11 @@ def handler(event, context):
                 }
             )
             
-            # Send welcome email
+            # Queue welcome email
             try:
-                send_email(
-                    to_email=email,
-                    subject='Welcome to Celestium CMS',
-                    template='welcome',
-                    template_data={
-                        'name': name,
-                        'email': email
-                    }
-                )
+                queue_email('welcome', [email], user_name=name)
             except Exception as e:
-                logger.error(f"Failed to send welcome email: {str(e)}")
+                logger.error(f"Failed to queue welcome email: {str(e)}")
                 # Don't fail registration if email fails
             
             logger.info(f"User registered successfully: {email}")
@@ -12,6 +12,8 @@ from botocore.exceptions import ClientError
 # Add parent directory to path for shared imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+from shared.rate_limit import RateLimiter
+
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
@@ -19,10 +21,30 @@ cognito = boto3.client('cognito-idp')
 
 USER_POOL_ID = os.environ['USER_POOL_ID']
 
+# Rate limiting: 10 verification attempts per 15 minutes per IP, against
+# guessing verification codes
+RATE_LIMIT_WINDOW = 900  # 15 minutes in seconds
+RATE_LIMIT_MAX = 10
+
+rate_limiter = RateLimiter('verify-email', RATE_LIMIT_MAX, RATE_LIMIT_WINDOW)
+
 
 def handler(event, context):
     """Handle email verification."""
     try:
+        source_ip = event.get('requestContext', {}).get('identity', {}).get('sourceIp', 'unknown')
+        rate_limit = rate_limiter.check(source_ip)
+        if not rate_limit.allowed:
+            logger.warning(f"Email verification rate limit exceeded for IP: {source_ip}")
+            return {
+                'statusCode': 429,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Retry-After': str(rate_limit.retry_after),
+                },
+                'body': json.dumps({'error': 'Too many verification attempts. Please try again later.'})
+            }
+        
         body = json.loads(event['body'])
         email = body.get('email', '').strip().lower()
         verification_code = body.get('code', '').strip()
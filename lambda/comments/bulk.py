@@ -0,0 +1,120 @@
+"""
+Moderate many comments at once (approve, reject, spam, delete)
+"""
+import json
+import time
+from typing import Any, Dict
+from shared.db import CommentRepository
+from shared.logger import create_logger
+from shared.auth import require_auth
+
+MAX_BULK_COMMENTS = 500
+
+# Bulk actions and the status each sets (delete removes the comments)
+ACTIONS = {
+    'approve': 'approved',
+    'reject': 'rejected',
+    'spam': 'spam',
+    'pending': 'pending',
+    'delete': None,
+}
+
+# CORS headers
+CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+}
+
+comment_repo = CommentRepository()
+
+
+def _error(status_code: int, message: str) -> Dict[str, Any]:
+    return {
+        'statusCode': status_code,
+        'headers': CORS_HEADERS,
+        'body': json.dumps({'error': message})
+    }
+
+
+@require_auth(roles=['admin', 'editor'])
+def handler(event: Dict[str, Any], context: Any, user_id: str, role: str) -> Dict[str, Any]:
+    """
+    Apply one moderation action to many comments
+
+    POST /api/v1/comments/bulk
+    Body: {"ids": ["comment-id", ...], "action": "approve"}
+
+    action is one of approve, reject, spam, pending or delete, and at most
+    MAX_BULK_COMMENTS ids are accepted. Comments are read with BatchGetItem
+    and updated or deleted in TransactWriteItems chunks together with the
+    comment counts of their content items, and the comment cache of each
+    affected content item is invalidated once.
+    """
+    log = create_logger(event, context, user_id=user_id, user_role=role)
+
+    try:
+        try:
+            body = json.loads(event.get('body') or '{}')
+        except json.JSONDecodeError:
+            return _error(400, 'Invalid JSON in request body')
+
+        if not isinstance(body, dict):
+            return _error(400, 'Request body must be an object')
+
+        action = body.get('action')
+        if action not in ACTIONS:
+            return _error(400, f'Invalid action. Must be one of: {", ".join(ACTIONS)}')
+
+        comment_ids = body.get('ids')
+        if not isinstance(comment_ids, list) or not comment_ids or not all(
+            isinstance(comment_id, str) and comment_id for comment_id in comment_ids
+        ):
+            return _error(400, 'ids must be a non-empty list of comment IDs')
+        comment_ids = list(dict.fromkeys(comment_ids))
+        if len(comment_ids) > MAX_BULK_COMMENTS:
+            return _error(400, f'At most {MAX_BULK_COMMENTS} comments can be moderated at once')
+
+        comments = [
+            comment for comment in comment_repo.get_by_ids(comment_ids)
+            if comment.get('content_id')
+        ]
+        # Migrated comments can be named by their old UUID id
+        found = {comment['id'] for comment in comments}
+        found.update(comment['legacy_id'] for comment in comments if comment.get('legacy_id'))
+
+        new_status = ACTIONS[action]
+        if new_status is None:
+            comment_repo.delete_batch(comments)
+        else:
+            comment_repo.moderate_batch(comments, {
+                'status': new_status,
+                'updated_at': int(time.time()),
+                'moderated_by': user_id
+            })
+
+            newly_spam = sum(1 for comment in comments if comment.get('status') != 'spam')
+            if new_status == 'spam' and newly_spam:
+                log.metric('CommentSpamDetected', newly_spam, 'Count')
+
+        content_ids = sorted({comment['content_id'] for comment in comments})
+        log.info(f"Bulk {action} of {len(comments)} comments",
+                action=action,
+                count=len(comments),
+                content_count=len(content_ids))
+
+        return {
+            'statusCode': 200,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({
+                'action': action,
+                'updated': [comment_id for comment_id in comment_ids if comment_id in found],
+                'not_found': [comment_id for comment_id in comment_ids if comment_id not in found],
+                'content_ids': content_ids,
+            })
+        }
+
+    except Exception as e:
+        log.error(f"Error moderating comments: {str(e)}",
+                 error=str(e),
+                 error_type=type(e).__name__)
+        return _error(500, 'Failed to moderate comments')
@@ -4,13 +4,14 @@ Create a new comment with validation, sanitization, and rate limiting
 import json
 import os
 import time
-import uuid
 import html
 from decimal import Decimal
 from typing import Any, Dict
-from shared.db import get_dynamodb_resource
+from shared.db import CommentRepository, get_dynamodb_resource, new_comment_id
 from shared.logger import create_logger
-from shared.middleware import require_setting, check_setting
+from shared.mailer import queue_notification
+from shared.middleware import require_setting, check_setting, get_cached_settings
+from shared.rate_limit import RateLimiter
 
 COMMENTS_TABLE = os.environ['COMMENTS_TABLE']
 CONTENT_TABLE = os.environ['CONTENT_TABLE']
@@ -19,6 +20,9 @@ CONTENT_TABLE = os.environ['CONTENT_TABLE']
 RATE_LIMIT_WINDOW = 3600  # 1 hour in seconds
 RATE_LIMIT_MAX = 5
 
+rate_limiter = RateLimiter('comments', RATE_LIMIT_MAX, RATE_LIMIT_WINDOW)
+comment_repo = CommentRepository()
+
 # CORS headers
 CORS_HEADERS = {
     'Content-Type': 'application/json',
@@ -87,16 +91,23 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # - Otherwise, check rate limit
         should_check_rate_limit = not (captcha_enabled and captcha_verified)
         
-        if should_check_rate_limit and not check_rate_limit(source_ip, log):
-            log.warning(f"Rate limit exceeded for IP: {source_ip}")
-            return {
-                'statusCode': 429,
-                'headers': CORS_HEADERS,
-                'body': json.dumps({
-                    'error': 'Rate limit exceeded',
-                    'message': 'Rate limit exceeded. Maximum 5 comments per hour.'
-                })
-            }
+        if should_check_rate_limit:
+            rate_limit = rate_limiter.check(source_ip)
+            if not rate_limit.allowed:
+                log.warning(f"Rate limit exceeded for IP: {source_ip}")
+                return {
+                    'statusCode': 429,
+                    'headers': {
+                        **CORS_HEADERS,
+                        'Retry-After': str(rate_limit.retry_after),
+                        'X-RateLimit-Limit': str(RATE_LIMIT_MAX),
+                        'X-RateLimit-Remaining': '0',
+                    },
+                    'body': json.dumps({
+                        'error': 'Rate limit exceeded',
+                        'message': f'Rate limit exceeded. Maximum {RATE_LIMIT_MAX} comments per hour.'
+                    })
+                }
         
         # Parse request body
         body = json.loads(event.get('body', '{}'))
@@ -192,8 +203,6 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         # Verify parent comment exists if provided
         if parent_id:
-            from shared.db import CommentRepository
-            comment_repo = CommentRepository()
             parent_comment = comment_repo.get_by_id(parent_id)
             if not parent_comment:
                 return {
@@ -204,6 +213,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         'message': 'Parent comment not found'
                     })
                 }
+            # A migrated parent may be named by its old UUID id
+            parent_id = parent_comment['id']
         
         # Sanitize input to prevent XSS
         sanitized_name = html.escape(author_name)
@@ -214,13 +225,14 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         moderation_enabled = check_setting('comment_moderation_enabled', True)  # Default to true
         comment_status = 'pending' if moderation_enabled else 'approved'
         
-        # Create comment
-        comment_id = str(uuid.uuid4())
+        # Create comment (the id carries created_at, see new_comment_id)
         created_at = int(time.time())
+        comment_id = new_comment_id(created_at)
         
         comment = {
             'id': comment_id,
             'content_id': content_id,
+            'content_created_at': content['created_at'],
             'author_name': sanitized_name,
             'author_email': sanitized_email,
             'comment_text': sanitized_text,
@@ -231,15 +243,36 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'updated_at': created_at,
         }
         
-        # Save to DynamoDB
-        comments_table = dynamodb.Table(COMMENTS_TABLE)
-        comments_table.put_item(Item=comment)
+        # Save to DynamoDB and count it on the content item (approved
+        # comments also bump the thread version)
+        comment_repo.create(comment)
         
         log.info(f"Created comment {comment_id} for content {content_id} with status {comment_status}", 
                 comment_id=comment_id, content_id=content_id, status=comment_status)
         
+        # Notify moderators; notifications queued close together are sent
+        # as one digest per recipient
+        recipients = [
+            address.strip()
+            for address in str(get_cached_settings().get('comment_notification_email') or '').split(',')
+            if address.strip()
+        ]
+        if recipients:
+            try:
+                queue_notification(
+                    'comment_notification',
+                    recipients,
+                    commenter_name=sanitized_name,
+                    commenter_email=sanitized_email,
+                    content_title=content.get('title', ''),
+                    comment_text=sanitized_text,
+                    comment_id=comment_id
+                )
+            except Exception as e:
+                log.error(f"Failed to queue comment notification: {str(e)}")
+        
         # Return comment without sensitive data
-        response_comment = {k: v for k, v in comment.items() if k not in ['ip_address', 'author_email']}
+        response_comment = {k: v for k, v in comment.items() if k not in ['ip_address', 'author_email', 'content_created_at']}
         if moderation_enabled:
             response_comment['message'] = 'Comment submitted successfully. It will appear after moderation.'
         else:
@@ -267,34 +300,3 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'headers': CORS_HEADERS,
             'body': json.dumps({'error': 'Failed to create comment'})
         }
-
-
-def check_rate_limit(ip_address: str, log) -> bool:
-    """
-    Check if IP address has exceeded rate limit
-    Returns True if within limit, False if exceeded
-    """
-    try:
-        dynamodb = get_dynamodb_resource()
-        table = dynamodb.Table(COMMENTS_TABLE)
-        
-        # Query comments from this IP in the last hour
-        current_time = int(time.time())
-        cutoff_time = current_time - RATE_LIMIT_WINDOW
-        
-        response = table.scan(
-            FilterExpression='ip_address = :ip AND created_at > :cutoff',
-            ExpressionAttributeValues={
-                ':ip': ip_address,
-                ':cutoff': cutoff_time
-            }
-        )
-        
-        comment_count = len(response.get('Items', []))
-        
-        return comment_count < RATE_LIMIT_MAX
-        
-    except Exception as e:
-        log.error(f"Error checking rate limit: {str(e)}", error=str(e))
-        # Allow comment on error to avoid blocking legitimate users
-        return True
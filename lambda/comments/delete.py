@@ -50,7 +50,9 @@ def handler(event: Dict[str, Any], context: Any, user_id: str, role: str) -> Dic
             }
         
         # Delete comment using composite key
-        comment_repo.delete(comment_id, created_at=comment['created_at'])
+        # comment['id'] differs from comment_id for migrated comments
+        # looked up by their old UUID id
+        comment_repo.delete(comment['id'], created_at=comment['created_at'])
         
         log.info(f"Deleted comment {comment_id} by user {user_id}")
         
@@ -9,6 +9,7 @@ Routes (public, no auth):
 
 Routes (admin, authenticated):
   GET    /comments               -> list all comments (moderation)
+  POST   /comments/bulk          -> moderate many comments
   PUT    /comments/{id}          -> update/moderate comment
   DELETE /comments/{id}          -> delete comment
 """
@@ -33,6 +34,9 @@ def handler(event, context):
             return list_handler(event, context)
 
         elif http_method == 'POST':
+            if path.rstrip('/').endswith('/comments/bulk'):
+                from bulk import handler as bulk_handler
+                return bulk_handler(event, context)
             from create import handler as create_handler
             return create_handler(event, context)
 
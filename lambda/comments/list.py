@@ -6,11 +6,18 @@ import os
 from decimal import Decimal
 from typing import Any, Dict, Optional
 from boto3.dynamodb.conditions import Key, Attr
-from shared.db import get_dynamodb_resource
+from shared.db import CommentRepository, get_dynamodb_resource
 from shared.logger import create_logger
 
+try:
+    from threads import get_comment_threads, paginate_threads
+except ImportError:
+    from comments.threads import get_comment_threads, paginate_threads
+
 COMMENTS_TABLE = os.environ['COMMENTS_TABLE']
 
+comment_repo = CommentRepository()
+
 
 def decimal_to_int(obj):
     """Convert Decimal objects to int for JSON serialization."""
@@ -30,8 +37,12 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Query params:
     - content_id: Filter by content ID (public endpoint)
     - status: Filter by status (moderation endpoint)
-    - limit: Number of results per page (default 50, max 100)
+    - limit: Number of results per page (default 50, max 100); threads per
+      page when listing by content ID
     - last_key: Pagination token
+    
+    Listing by content ID returns approved comments as threads with nested
+    replies (see threads.py).
     """
     log = create_logger(event, context)
     
@@ -58,6 +69,42 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             except json.JSONDecodeError:
                 log.warning(f"Invalid last_key format: {last_key_str}")
         
+        # Public endpoint - approved comments of a content item as threads
+        if content_id:
+            if exclusive_start_key is not None and not (
+                isinstance(exclusive_start_key, dict) and {'id', 'created_at'} <= set(exclusive_start_key)
+            ):
+                return {
+                    'statusCode': 400,
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*',
+                    },
+                    'body': json.dumps({'error': 'Invalid last_key'})
+                }
+            
+            tree = get_comment_threads(comment_repo, content_id)
+            threads, next_key = paginate_threads(tree['threads'], limit, exclusive_start_key)
+            result = {
+                'comments': threads,
+                'count': len(threads),
+                'total_threads': len(tree['threads']),
+                'total_comments': tree['total_comments'],
+            }
+            if next_key:
+                result['last_key'] = json.dumps(next_key)
+            
+            log.info(f"Listed {len(threads)} comment threads for content {content_id}")
+            
+            return {
+                'statusCode': 200,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                },
+                'body': json.dumps(result)
+            }
+        
         # Build query parameters
         query_params = {
             'Limit': limit,
@@ -67,16 +114,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if exclusive_start_key:
             query_params['ExclusiveStartKey'] = exclusive_start_key
         
-        # Query by content_id or status
-        if content_id:
-            # Public endpoint - list comments for a specific content item
-            # Only show approved comments
-            query_params['IndexName'] = 'content_id-created_at-index'
-            query_params['KeyConditionExpression'] = Key('content_id').eq(content_id)
-            query_params['FilterExpression'] = Attr('status').eq('approved')
-            response = table.query(**query_params)
-            
-        elif status:
+        # Query by status
+        if status:
             # Moderation endpoint - list comments by status
             # Requires authentication (checked by API Gateway)
             query_params['IndexName'] = 'status-created_at-index'
@@ -86,25 +125,19 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         else:
             # List all comments (moderation endpoint)
             # Requires authentication
-            response = table.scan(**{
+            scan_params = {
                 'Limit': limit,
-                'ExclusiveStartKey': exclusive_start_key
-            } if exclusive_start_key else {'Limit': limit})
+                'FilterExpression': Attr('entity_type').not_exists(),
+            }
+            if exclusive_start_key:
+                scan_params['ExclusiveStartKey'] = exclusive_start_key
+            response = table.scan(**scan_params)
         
         items = response.get('Items', [])
         
         # Convert Decimals to int for JSON serialization
         items = decimal_to_int(items)
         
-        # Remove sensitive fields from public listing (before building tree)
-        if content_id:
-            # Public endpoint - remove sensitive data
-            items = [{k: v for k, v in item.items() if k not in ['author_email', 'ip_address']} for item in items]
-        
-        # Build threaded structure if listing by content_id
-        if content_id:
-            items = build_comment_tree(items)
-        
         # Prepare response
         result = {
             'comments': items,
@@ -137,23 +170,3 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'error': 'Failed to list comments'})
         }
 
-
-def build_comment_tree(comments: list) -> list:
-    """
-    Build threaded comment structure with parent-child relationships
-    """
-    # Create lookup dict
-    comment_dict = {c['id']: {**c, 'replies': []} for c in comments}
-    
-    # Build tree
-    root_comments = []
-    for comment in comments:
-        parent_id = comment.get('parent_id')
-        if parent_id and parent_id in comment_dict:
-            # Add as reply to parent
-            comment_dict[parent_id]['replies'].append(comment_dict[comment['id']])
-        else:
-            # Top-level comment
-            root_comments.append(comment_dict[comment['id']])
-    
-    return root_comments
@@ -0,0 +1,131 @@
+"""
+Threaded comment trees for the public comment listing.
+
+The approved comments of a content item are read oldest first from the
+content_id-created_at-index and assembled into a tree in one pass, since a
+reply is always created after its parent. Threads (top-level comments with
+their replies) are listed newest first and replies oldest first. Replies
+whose parent is not approved are shown as threads of their own.
+
+Trees are cached in the warm container keyed by content id and the content
+item's thread version, which CommentRepository bumps whenever an approved
+comment is created, moderated or deleted. A read costs one GetItem for the
+version while the cached tree is current, and the full query otherwise.
+"""
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+# Trees kept per warm container, least recently used evicted first
+CACHE_SIZE = 256
+# Upper bound on a cached tree's age, should a version bump have failed
+CACHE_TTL = 300
+
+# Fields never returned by the public listing
+PRIVATE_FIELDS = ('author_email', 'ip_address', 'content_created_at')
+
+_tree_cache: 'OrderedDict[Tuple[str, int], Dict[str, Any]]' = OrderedDict()
+
+
+def _public_comment(comment: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: int(value) if isinstance(value, Decimal) else value
+        for key, value in comment.items()
+        if key not in PRIVATE_FIELDS
+    }
+
+
+def build_comment_tree(comments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Build threads in one pass over comments sorted oldest first.
+
+    Returns:
+        Top-level comments, newest first, each with nested 'replies'
+    """
+    nodes = {}
+    threads = []
+    # Replies stored in the same second as their parent can come first
+    unresolved = []
+    for comment in comments:
+        node = {**_public_comment(comment), 'replies': []}
+        parent = nodes.get(comment.get('parent_id'))
+        nodes[node['id']] = node
+        if parent is not None:
+            parent['replies'].append(node)
+        elif comment.get('parent_id'):
+            unresolved.append(node)
+        else:
+            threads.append(node)
+
+    for node in unresolved:
+        parent = nodes.get(node['parent_id'])
+        if parent is not None and parent is not node:
+            parent['replies'].append(node)
+        else:
+            threads.append(node)
+
+    threads.sort(key=lambda node: (node['created_at'], node['id']), reverse=True)
+    return threads
+
+
+def get_comment_threads(comment_repo, content_id: str) -> Dict[str, Any]:
+    """
+    Return the comment tree of a content item, from the cache if current.
+
+    Returns:
+        Dict with 'threads' (see build_comment_tree) and 'total_comments'
+    """
+    version = comment_repo.get_thread_version(content_id)
+    cache_key = (content_id, version)
+    now = time.time()
+
+    cached = _tree_cache.get(cache_key)
+    if cached and now - cached['cached_at'] < CACHE_TTL:
+        _tree_cache.move_to_end(cache_key)
+        return cached
+
+    comments = comment_repo.list_approved_by_content(content_id)
+    entry = {
+        'threads': build_comment_tree(comments),
+        'total_comments': len(comments),
+        'cached_at': now,
+    }
+
+    # Older versions of this content item's tree are no longer current
+    for key in [key for key in _tree_cache if key[0] == content_id]:
+        del _tree_cache[key]
+    _tree_cache[cache_key] = entry
+    while len(_tree_cache) > CACHE_SIZE:
+        _tree_cache.popitem(last=False)
+
+    return entry
+
+
+def paginate_threads(
+    threads: List[Dict[str, Any]],
+    limit: int,
+    last_key: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Return a page of threads and the key of the next page.
+
+    Pages start after the thread identified by last_key ({id, created_at}),
+    so new threads do not shift later pages.
+    """
+    start = 0
+    if last_key:
+        position = (last_key['created_at'], last_key['id'])
+        while start < len(threads) and (threads[start]['created_at'], threads[start]['id']) >= position:
+            start += 1
+
+    page = threads[start:start + limit]
+    next_key = None
+    if start + limit < len(threads):
+        next_key = {'id': page[-1]['id'], 'created_at': page[-1]['created_at']}
+    return page, next_key
+
+
+def clear_thread_cache() -> None:
+    """Clear the cached comment trees."""
+    _tree_cache.clear()
@@ -94,8 +94,10 @@ def handler(event: Dict[str, Any], context: Any, user_id: str, role: str) -> Dic
         # Update status
         updated_at = int(time.time())
         
+        # comment['id'] differs from comment_id for migrated comments
+        # looked up by their old UUID id
         comment_repo.update(
-            comment_id,
+            comment['id'],
             {
                 'status': new_status,
                 'updated_at': updated_at,
@@ -21,13 +21,19 @@ try:
         validate_section_assignment,
         compute_section_path_ids,
         validate_content_markdown,
+        sync_section_post_counts,
     )
 except ImportError:
     from content.section_helpers import (
         validate_section_assignment,
         compute_section_path_ids,
         validate_content_markdown,
+        sync_section_post_counts,
     )
+try:
+    from media_helpers import resolve_media_urls, sync_media_usage
+except ImportError:
+    from content.media_helpers import resolve_media_urls, sync_media_usage
 import boto3
 
 
@@ -250,6 +256,9 @@ def handler(event, context, user_id, role):
                      duration_ms=plugin_duration)
             # Continue even if plugin fails
         
+        # Store media references as S3 key plus CDN URL
+        content_item = resolve_media_urls(content_item)
+        
         # Save to database
         db_start = time.time()
         result = content_repo.create(content_item)
@@ -258,6 +267,20 @@ def handler(event, context, user_id, role):
         log.metric('dynamodb_write_duration', db_duration, 'Milliseconds',
                   operation='create')
         
+        try:
+            sync_section_post_counts(None, result)
+        except Exception as e:
+            log.warning('Failed to update section post counts',
+                       content_id=content_id,
+                       error=str(e))
+        
+        try:
+            sync_media_usage(None, result)
+        except Exception as e:
+            log.warning('Failed to update media usage',
+                       content_id=content_id,
+                       error=str(e))
+        
         total_duration = (time.time() - start_time) * 1000
         log.metric('content_create_total_duration', total_duration, 'Milliseconds',
                   content_type=content_type,
@@ -12,6 +12,14 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from shared.auth import require_auth
 from shared.db import ContentRepository
 from shared.plugins import PluginManager
+try:
+    from section_helpers import sync_section_post_counts
+except ImportError:
+    from content.section_helpers import sync_section_post_counts
+try:
+    from media_helpers import sync_media_usage
+except ImportError:
+    from content.media_helpers import sync_media_usage
 from boto3.dynamodb.conditions import Attr
 
 
@@ -101,6 +109,16 @@ def handler(event, context, user_id, role):
         # Delete from database
         content_repo.delete(content_id, created_at)
         
+        try:
+            sync_section_post_counts(existing_content, None)
+        except Exception as e:
+            print(f"Failed to update section post counts: {e}")
+        
+        try:
+            sync_media_usage(existing_content, None)
+        except Exception as e:
+            print(f"Failed to update media usage: {e}")
+        
         return {
             'statusCode': 200,
             'headers': {
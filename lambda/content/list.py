@@ -12,8 +12,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from boto3.dynamodb.conditions import Attr
 
+from shared.auth import extract_user_from_event
 from shared.db import ContentRepository, UserRepository
-from shared.s3 import convert_s3_url_to_cdn
 
 
 content_repo = ContentRepository()
@@ -188,9 +188,18 @@ def handler(event, context):
                         user_cache[author_id] = 'Unknown Author'
                 
                 item['author_name'] = user_cache[author_id]
-            
-            # Convert S3 URLs to CloudFront CDN URLs
-            _convert_content_urls(item)
+        
+        # Comment counts are kept on the content items as comments are
+        # created, moderated and deleted; uncommented items have none yet.
+        # The moderation queue size is only shown to moderators.
+        user_info = extract_user_from_event(event)
+        is_moderator = bool(user_info) and user_info[1] in ('admin', 'editor')
+        for item in items:
+            item.setdefault('approved_comment_count', 0)
+            if is_moderator:
+                item.setdefault('pending_comment_count', 0)
+            else:
+                item.pop('pending_comment_count', None)
         
         # Prepare response
         response_data = {
@@ -236,25 +245,3 @@ def handler(event, context):
                 'message': str(e)
             })
         }
-
-
-def _convert_content_urls(content: dict) -> None:
-    """Convert S3 URLs to CloudFront CDN URLs in content metadata."""
-    # Convert featured_image
-    if content.get('featured_image'):
-        content['featured_image'] = convert_s3_url_to_cdn(content['featured_image'])
-    
-    # Convert media items in metadata
-    metadata = content.get('metadata', {})
-    if isinstance(metadata, dict):
-        media_items = metadata.get('media', [])
-        if isinstance(media_items, list):
-            for item in media_items:
-                if isinstance(item, dict) and item.get('s3_url'):
-                    item['s3_url'] = convert_s3_url_to_cdn(item['s3_url'])
-                    # Also convert thumbnails if present
-                    thumbnails = item.get('thumbnails', {})
-                    if isinstance(thumbnails, dict):
-                        for size, url in thumbnails.items():
-                            if url:
-                                thumbnails[size] = convert_s3_url_to_cdn(url)
@@ -0,0 +1,68 @@
+"""
+Media helpers for content Lambda functions.
+
+Resolves the media URLs stored on content and keeps the media usage reverse
+index in the media table in step with content writes.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+# Add parent directory to path for imports
+current_directory = os.path.dirname(os.path.abspath(__file__))
+lambda_directory = os.path.dirname(current_directory)
+
+if lambda_directory not in sys.path:
+    sys.path.insert(0, lambda_directory)
+
+from shared.db import MediaRepository
+from shared.media_urls import resolve_content_media_urls
+from shared.media_usage import media_usage_changes
+from shared.s3 import MEDIA_BUCKET, get_object_url
+
+
+_media_repository: MediaRepository | None = None
+
+
+def _get_media_repository() -> MediaRepository:
+    """Get a cached MediaRepository instance."""
+    global _media_repository
+
+    if _media_repository is None:
+        _media_repository = MediaRepository()
+
+    return _media_repository
+
+
+def resolve_media_urls(content: dict) -> dict:
+    """
+    Store media URLs on a content item or update as S3 key plus CDN URL.
+
+    Args:
+        content: Content item, or the updates of a content update.
+
+    Returns:
+        A copy with featured_image_key set and the media URLs resolved for
+        the current MEDIA_CDN_URL. Only URLs of the media bucket or the
+        current CDN are resolved.
+    """
+    return resolve_content_media_urls(
+        content, get_object_url, MEDIA_BUCKET, [os.environ.get("MEDIA_CDN_URL", "")]
+    )
+
+
+def sync_media_usage(before: dict | None, after: dict | None) -> None:
+    """
+    Update the media usage index for a content create, update or delete.
+
+    Args:
+        before: Content item before the write, or None on create.
+        after: Content item after the write, or None on delete.
+    """
+    added, removed = media_usage_changes(before, after)
+
+    if added or removed:
+        content_id = (after or before)["id"]
+        _get_media_repository().adjust_media_usage(content_id, added, removed)
@@ -17,10 +17,7 @@ if lambda_directory not in sys.path:
     sys.path.insert(0, lambda_directory)
 
 from shared.sections_db import SectionRepository
-try:
-    from shared.section_service import ROOT_PARENT_ID, build_path
-except ImportError:
-    from sections.service import ROOT_PARENT_ID, build_path
+from shared.section_service import ROOT_PARENT_ID, build_path, post_count_deltas
 
 
 MAX_CONTENT_MARKDOWN_LENGTH = 500_000
@@ -100,6 +97,21 @@ def compute_section_path_ids(section: dict) -> list[str]:
     return path_ids
 
 
+def sync_section_post_counts(before: dict | None, after: dict | None) -> None:
+    """
+    Update section post counters for a content create, update or delete.
+
+    Args:
+        before: Content item before the write, or None on create.
+        after: Content item after the write, or None on delete.
+    """
+    sections_repository = _get_sections_repository()
+    deltas = post_count_deltas(before, after, sections_repository)
+
+    if deltas:
+        sections_repository.adjust_post_counts(deltas)
+
+
 def validate_content_markdown(
     content_markdown: str | None,
 ) -> tuple[bool, str | None]:
@@ -18,13 +18,19 @@ try:
         validate_section_assignment,
         compute_section_path_ids,
         validate_content_markdown,
+        sync_section_post_counts,
     )
 except ImportError:
     from content.section_helpers import (
         validate_section_assignment,
         compute_section_path_ids,
         validate_content_markdown,
+        sync_section_post_counts,
     )
+try:
+    from media_helpers import resolve_media_urls, sync_media_usage
+except ImportError:
+    from content.media_helpers import resolve_media_urls, sync_media_usage
 from boto3.dynamodb.conditions import Attr
 
 
@@ -249,10 +255,23 @@ def handler(event, context, user_id, role):
             print(f"Plugin hook error: {e}")
             # Continue even if plugin fails
         
+        # Store media references as S3 key plus CDN URL
+        updates = resolve_media_urls(updates)
+        
         # Update in database
         created_at = existing_content.get('created_at')
         result = content_repo.update(content_id, created_at, updates)
         
+        try:
+            sync_section_post_counts(existing_content, result)
+        except Exception as e:
+            print(f"Failed to update section post counts: {e}")
+        
+        try:
+            sync_media_usage(existing_content, result)
+        except Exception as e:
+            print(f"Failed to update media usage: {e}")
+        
         return {
             'statusCode': 200,
             'headers': {
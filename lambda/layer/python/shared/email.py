@@ -113,17 +113,16 @@ def send_email(
         raise
 
 
-def send_welcome_email(user_email: str, user_name: str, temporary_password: Optional[str] = None) -> Dict:
+def render_welcome_email(user_name: str, temporary_password: Optional[str] = None) -> Dict[str, str]:
     """
-    Send a welcome email to a new user.
+    Render the welcome email for a new user.
     
     Args:
-        user_email: User's email address
         user_name: User's display name
         temporary_password: Optional temporary password for new users
     
     Returns:
-        Dict containing the SES response
+        Dict with subject, body_text and body_html
     """
     subject = "Welcome to Celestium CMS"
     
@@ -183,25 +182,37 @@ Celestium CMS Team
 </html>
 """
     
+    return {'subject': subject, 'body_text': body_text, 'body_html': body_html}
+
+
+def send_welcome_email(user_email: str, user_name: str, temporary_password: Optional[str] = None) -> Dict:
+    """
+    Send a welcome email to a new user.
+    
+    Args:
+        user_email: User's email address
+        user_name: User's display name
+        temporary_password: Optional temporary password for new users
+    
+    Returns:
+        Dict containing the SES response
+    """
     return send_email(
         to_addresses=[user_email],
-        subject=subject,
-        body_text=body_text,
-        body_html=body_html
+        **render_welcome_email(user_name, temporary_password)
     )
 
 
-def send_password_reset_email(user_email: str, user_name: str, reset_code: str) -> Dict:
+def render_password_reset_email(user_name: str, reset_code: str) -> Dict[str, str]:
     """
-    Send a password reset email with verification code.
+    Render the password reset email with verification code.
     
     Args:
-        user_email: User's email address
         user_name: User's display name
         reset_code: Password reset verification code
     
     Returns:
-        Dict containing the SES response
+        Dict with subject, body_text and body_html
     """
     subject = "Password Reset Request - Celestium CMS"
     
@@ -235,27 +246,43 @@ Celestium CMS Team
 </html>
 """
     
+    return {'subject': subject, 'body_text': body_text, 'body_html': body_html}
+
+
+def send_password_reset_email(user_email: str, user_name: str, reset_code: str) -> Dict:
+    """
+    Send a password reset email with verification code.
+    
+    Args:
+        user_email: User's email address
+        user_name: User's display name
+        reset_code: Password reset verification code
+    
+    Returns:
+        Dict containing the SES response
+    """
     return send_email(
         to_addresses=[user_email],
-        subject=subject,
-        body_text=body_text,
-        body_html=body_html
+        **render_password_reset_email(user_name, reset_code)
     )
 
 
-def send_comment_notification_email(
-    admin_email: str,
+def _comment_preview(comment_text: str) -> str:
+    """Truncate a comment for notification emails."""
+    return comment_text[:200] + '...' if len(comment_text) > 200 else comment_text
+
+
+def render_comment_notification_email(
     commenter_name: str,
     commenter_email: str,
     content_title: str,
     comment_text: str,
     comment_id: str
-) -> Dict:
+) -> Dict[str, str]:
     """
-    Send a notification email to admin when a new comment is posted.
+    Render the notification sent to admins when a new comment is posted.
     
     Args:
-        admin_email: Administrator's email address
         commenter_name: Name of the person who commented
         commenter_email: Email of the person who commented
         content_title: Title of the content that was commented on
@@ -263,12 +290,11 @@ def send_comment_notification_email(
         comment_id: ID of the comment for moderation
     
     Returns:
-        Dict containing the SES response
+        Dict with subject, body_text and body_html
     """
     subject = f"New Comment on '{content_title}'"
     
-    # Truncate comment if too long
-    comment_preview = comment_text[:200] + '...' if len(comment_text) > 200 else comment_text
+    comment_preview = _comment_preview(comment_text)
     
     body_text = f"""
 A new comment has been posted on '{content_title}'.
@@ -302,25 +328,105 @@ Celestium CMS
 </html>
 """
     
+    return {'subject': subject, 'body_text': body_text, 'body_html': body_html}
+
+
+def render_comment_digest_email(comments: List[Dict[str, str]]) -> Dict[str, str]:
+    """
+    Render one notification for several new comments.
+    
+    Args:
+        comments: Keyword arguments of render_comment_notification_email,
+            one dict per comment
+    
+    Returns:
+        Dict with subject, body_text and body_html
+    """
+    admin_url = os.environ.get('ADMIN_URL', 'https://admin.celestium.life')
+    subject = f"{len(comments)} New Comments"
+    
+    body_text = f"""
+{len(comments)} new comments have been posted.
+"""
+    items_html = ""
+    for comment in comments:
+        comment_preview = _comment_preview(comment['comment_text'])
+        body_text += f"""
+On '{comment['content_title']}', {comment['commenter_name']} ({comment['commenter_email']}) wrote:
+{comment_preview}
+"""
+        items_html += f"""
+    <h3>On '{comment['content_title']}'</h3>
+    <p><strong>Commenter:</strong> {comment['commenter_name']} ({comment['commenter_email']})</p>
+    <blockquote style="border-left: 3px solid #ccc; padding-left: 10px; color: #666;">
+        {comment_preview}
+    </blockquote>
+"""
+    
+    body_text += f"""
+Moderate these comments:
+{admin_url}/comments
+
+Best regards,
+Celestium CMS
+"""
+    
+    body_html = f"""
+<html>
+<head></head>
+<body>
+    <h2>New Comments Posted</h2>
+    <p>{len(comments)} new comments have been posted.</p>
+{items_html}
+    <p><a href="{admin_url}/comments">Moderate these comments</a></p>
+    <p>Best regards,<br>Celestium CMS</p>
+</body>
+</html>
+"""
+    
+    return {'subject': subject, 'body_text': body_text, 'body_html': body_html}
+
+
+def send_comment_notification_email(
+    admin_email: str,
+    commenter_name: str,
+    commenter_email: str,
+    content_title: str,
+    comment_text: str,
+    comment_id: str
+) -> Dict:
+    """
+    Send a notification email to admin when a new comment is posted.
+    
+    Args:
+        admin_email: Administrator's email address
+        commenter_name: Name of the person who commented
+        commenter_email: Email of the person who commented
+        content_title: Title of the content that was commented on
+        comment_text: The comment text
+        comment_id: ID of the comment for moderation
+    
+    Returns:
+        Dict containing the SES response
+    """
     return send_email(
         to_addresses=[admin_email],
-        subject=subject,
-        body_text=body_text,
-        body_html=body_html
+        **render_comment_notification_email(
+            commenter_name, commenter_email, content_title, comment_text, comment_id
+        )
     )
 
 
-def send_user_registration_email(user_email: str, user_name: str, verification_code: str) -> Dict:
+def render_user_registration_email(user_name: str, verification_code: str) -> Dict[str, str]:
     """
-    Send an email verification link to a newly registered user.
+    Render the email verification message for a newly registered user.
     
     Args:
-        user_email: User's email address
         user_name: User's display name
         verification_code: Email verification code
     
     Returns:
-        Dict containing the SES response
+        Dict with subject, body_text and body_html
     """
     subject = "Verify Your Email - Celestium CMS"
     
@@ -361,9 +467,22 @@ Celestium CMS Team
 </html>
 """
     
+    return {'subject': subject, 'body_text': body_text, 'body_html': body_html}
+
+
+def send_user_registration_email(user_email: str, user_name: str, verification_code: str) -> Dict:
+    """
+    Send an email verification link to a newly registered user.
+    
+    Args:
+        user_email: User's email address
+        user_name: User's display name
+        verification_code: Email verification code
+    
+    Returns:
+        Dict containing the SES response
+    """
     return send_email(
         to_addresses=[user_email],
-        subject=subject,
-        body_text=body_text,
-        body_html=body_html
+        **render_user_registration_email(user_name, verification_code)
     )
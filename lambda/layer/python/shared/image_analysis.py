@@ -0,0 +1,172 @@
+"""
+Image analysis for media placeholders.
+
+Computes what a client needs to lay out and paint an image before it loads:
+a BlurHash placeholder, the dominant colors and the aspect ratio. Everything
+works on an already decoded Pillow image, which is downscaled first, so the
+analysis adds no decode of its own to the media pipeline.
+"""
+
+import math
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+BLURHASH_COMPONENTS = (4, 3)
+BLURHASH_SAMPLE_SIZE = 32
+DOMINANT_COLOR_COUNT = 5
+DOMINANT_COLOR_SAMPLE_SIZE = 64
+
+# EXIF orientations 5-8 rotate the image by 90 degrees
+EXIF_ORIENTATION_TAG = 0x0112
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+_BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+def get_orientation(img) -> int:
+    """Return the EXIF orientation of an opened image, 1 if it has none."""
+    try:
+        return int(img.getexif().get(EXIF_ORIENTATION_TAG, 1))
+    except Exception:
+        return 1
+
+
+def oriented_size(img) -> Tuple[int, int]:
+    """Return an opened image's (width, height) as displayed, without decoding it."""
+    width, height = img.size
+    if get_orientation(img) in TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def aspect_ratio(width: int, height: int) -> Optional[Decimal]:
+    """Return width / height to four decimal places, as DynamoDB stores it."""
+    if not width or not height:
+        return None
+    return Decimal(str(round(width / height, 4)))
+
+
+def _encode_base83(value: int, length: int) -> str:
+    return ''.join(
+        _BASE83[(value // 83 ** (length - index - 1)) % 83]
+        for index in range(length)
+    )
+
+
+def _srgb_to_linear(value: int) -> float:
+    value = value / 255
+    if value <= 0.04045:
+        return value / 12.92
+    return ((value + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value: float) -> int:
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float, exponent: float) -> float:
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def encode_blurhash(img, components: Tuple[int, int] = BLURHASH_COMPONENTS) -> str:
+    """
+    Encode an image as a BlurHash string.
+
+    The image is sampled at BLURHASH_SAMPLE_SIZE pixels on its longer side,
+    which is plenty for the handful of cosine components kept.
+    """
+    x_components, y_components = components
+    sample = img.convert('RGB')
+    sample.thumbnail((BLURHASH_SAMPLE_SIZE, BLURHASH_SAMPLE_SIZE), Image.Resampling.BILINEAR)
+    width, height = sample.size
+
+    linear = [tuple(_srgb_to_linear(channel) for channel in pixel) for pixel in sample.getdata()]
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                basis_y = cos_y[j][y]
+                for x in range(width):
+                    basis = basis_y * cos_x[i][x]
+                    pixel = linear[row + x]
+                    r += basis * pixel[0]
+                    g += basis * pixel[1]
+                    b += basis * pixel[2]
+            scale = normalisation / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode_base83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(value) for factor in ac for value in factor)
+        quantised_max = max(0, min(82, int(math.floor(actual_max * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+        result += _encode_base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _encode_base83(0, 1)
+
+    result += _encode_base83(
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]),
+        4,
+    )
+
+    for factor in ac:
+        quantised = [
+            max(0, min(18, int(math.floor(_sign_pow(value / max_value, 0.5) * 9 + 9.5))))
+            for value in factor
+        ]
+        result += _encode_base83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+
+    return result
+
+
+def dominant_colors(img, count: int = DOMINANT_COLOR_COUNT) -> List[str]:
+    """Return up to count hex colors, most common first."""
+    sample = img.convert('RGB')
+    sample.thumbnail((DOMINANT_COLOR_SAMPLE_SIZE, DOMINANT_COLOR_SAMPLE_SIZE), Image.Resampling.BILINEAR)
+    quantized = sample.quantize(colors=count, method=Image.Quantize.MEDIANCUT)
+    palette = quantized.getpalette()
+
+    colors = []
+    for _, index in sorted(quantized.getcolors(), reverse=True):
+        red, green, blue = palette[index * 3:index * 3 + 3]
+        color = f'#{red:02x}{green:02x}{blue:02x}'
+        if color not in colors:
+            colors.append(color)
+    return colors[:count]
+
+
+def analyze_image(img, width: int, height: int) -> Dict[str, Any]:
+    """
+    Compute placeholder fields for a media record.
+
+    Args:
+        img: Decoded, correctly oriented image; a downscaled copy is enough
+        width: Width of the full-size image
+        height: Height of the full-size image
+
+    Returns:
+        Dict with blurhash, dominant_colors and aspect_ratio
+    """
+    return {
+        'blurhash': encode_blurhash(img),
+        'dominant_colors': dominant_colors(img),
+        'aspect_ratio': aspect_ratio(width, height),
+    }
@@ -0,0 +1,89 @@
+"""
+Media usage reverse index.
+
+Content references media by URL in featured_image and in the s3_url and
+thumbnails of metadata.media entries. Each reference is reduced to a file
+key, the uuid stem shared by an upload and its thumbnails and variants
+(uploads/{stem}.jpg, thumbnails/small/{stem}.jpg, variants/{stem}/...).
+
+The media table keeps one USAGE#{file_key} item per referenced file with the
+set of content ids that use it (see MediaRepository.adjust_media_usage).
+Content writes keep it current by diffing the references before and after
+the write, so "where is this used" and "what is unused" never need a
+content scan.
+"""
+
+import os
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+
+def get_media_file_key(value: str) -> Optional[str]:
+    """
+    Return the file key for a media URL or S3 key.
+
+    Returns:
+        The file key, or None if the value is not one of our media objects
+    """
+    if not isinstance(value, str) or not value:
+        return None
+
+    path = urlparse(value).path if '://' in value else value.split('?', 1)[0]
+    parts = [part for part in path.split('/') if part]
+    # Path-style S3 URLs put the bucket first
+    for index, part in enumerate(parts):
+        if part in ('uploads', 'thumbnails', 'variants'):
+            parts = parts[index:]
+            break
+    else:
+        return None
+
+    if parts[0] == 'uploads' and len(parts) == 2:
+        return os.path.splitext(parts[1])[0] or None
+    if parts[0] == 'thumbnails' and len(parts) == 3:
+        return os.path.splitext(parts[2])[0] or None
+    if parts[0] == 'variants' and len(parts) == 3:
+        return parts[1]
+    return None
+
+
+def _media_urls(content: Dict[str, Any]) -> Iterable[str]:
+    yield content.get('featured_image')
+
+    metadata = content.get('metadata')
+    media_items = metadata.get('media') if isinstance(metadata, dict) else None
+    if not isinstance(media_items, list):
+        return
+    for item in media_items:
+        if not isinstance(item, dict):
+            continue
+        yield item.get('s3_key')
+        yield item.get('s3_url')
+        thumbnails = item.get('thumbnails')
+        if isinstance(thumbnails, dict):
+            yield from thumbnails.values()
+
+
+def content_media_keys(content: Optional[Dict[str, Any]]) -> Set[str]:
+    """Return the file keys of every media file a content item references."""
+    if not content:
+        return set()
+    keys = {get_media_file_key(url) for url in _media_urls(content)}
+    keys.discard(None)
+    return keys
+
+
+def media_usage_changes(
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]]
+) -> Tuple[Set[str], Set[str]]:
+    """
+    Diff the media references of a content write.
+
+    Returns:
+        (added, removed) sets of file keys
+    """
+    old_keys = content_media_keys(before)
+    new_keys = content_media_keys(after)
+    return new_keys - old_keys, old_keys - new_keys
+
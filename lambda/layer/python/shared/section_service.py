@@ -1,8 +1,10 @@
 """
 Section service utilities available via the Lambda Layer.
 
-Contains ROOT_PARENT_ID and build_path, extracted from lambda/sections/service.py
-so that lambda/content/ can import them without cross-package dependencies.
+Contains ROOT_PARENT_ID, the ancestry loader and build_path, extracted from
+lambda/sections/service.py so that lambda/content/ can import them without
+cross-package dependencies, plus the post counter bookkeeping shared by the
+content and scheduler functions.
 """
 
 from __future__ import annotations
@@ -17,6 +19,72 @@ class SectionsRepositoryProtocol(Protocol):
     def get_by_id(self, section_id: str) -> dict | None: ...
 
 
+def load_ancestors(
+    parent_id: str,
+    sections_repo: SectionsRepositoryProtocol,
+    parent: dict | None = None,
+) -> list[dict]:
+    """Load the ancestor chain of a section placed under parent_id.
+
+    The parent's stored path_ids already lists every ancestor, so the chain
+    is fetched with a single batch read when the repository supports
+    ``batch_get_by_ids``. If path_ids is missing, incomplete or stale (the
+    parent links no longer match), the chain is walked one level at a time.
+
+    Args:
+        parent_id: The parent_id of the section being created/moved.
+        sections_repo: Repository instance for looking up ancestors.
+        parent: The parent section, if the caller has already loaded it.
+
+    Returns:
+        List of ancestor sections ordered from root to parent. Empty for a
+        root-level section.
+
+    Raises:
+        ValueError: If a parent is not found or a cycle is detected.
+    """
+    if parent_id == ROOT_PARENT_ID:
+        return []
+
+    if parent is None:
+        parent = sections_repo.get_by_id(parent_id)
+        if parent is None:
+            raise ValueError(f"Parent section '{parent_id}' not found")
+
+    ancestors = _load_ancestors_from_path_ids(parent, sections_repo)
+    if ancestors is None:
+        ancestors = _walk_ancestors(parent, sections_repo)
+
+    return ancestors
+
+
+def build_path_from_ancestors(
+    section_id: str,
+    slug: str,
+    ancestors: list[dict],
+) -> tuple[str, list[str]]:
+    """Build the slug path and path_ids for a section from its ancestors.
+
+    Args:
+        section_id: The section's own ID.
+        slug: The section's slug.
+        ancestors: Ancestor chain from load_ancestors (root first).
+
+    Returns:
+        Tuple of (slash-joined path, list of IDs from root to section).
+
+    Raises:
+        ValueError: If the section appears in its own ancestor chain.
+    """
+    ancestor_ids = [ancestor["id"] for ancestor in ancestors]
+    if section_id in ancestor_ids:
+        raise ValueError("Cycle detected in section parent chain")
+
+    slug_parts = [ancestor["slug"] for ancestor in ancestors] + [slug]
+
+    return "/".join(slug_parts), ancestor_ids + [section_id]
+
+
 def build_path(
     section_id: str,
     parent_id: str,
@@ -37,14 +105,150 @@ def build_path(
     Raises:
         ValueError: If a parent is not found or a cycle is detected.
     """
-    if parent_id == ROOT_PARENT_ID:
-        return slug, [section_id]
+    ancestors = load_ancestors(parent_id, sections_repo)
+    return build_path_from_ancestors(section_id, slug, ancestors)
+
 
-    slug_parts = [slug]
-    path_ids = [section_id]
+def counted_section_id(content: dict | None) -> str | None:
+    """Return the section a content item counts toward, if any.
 
-    current_parent_id = parent_id
-    visited: set[str] = set()
+    Only published content assigned to a section is counted.
+    """
+    if not content or content.get("status") != "published":
+        return None
+
+    return content.get("section_id") or None
+
+
+def post_count_deltas(
+    before: dict | None,
+    after: dict | None,
+    sections_repo: SectionsRepositoryProtocol,
+) -> dict[str, dict[str, int]]:
+    """Compute section post counter deltas for a content change.
+
+    Covers create (before=None), delete (after=None), publish, unpublish and
+    section reassignment. Ancestors shared by the old and new section cancel
+    out, so a move within a subtree leaves the common ancestors untouched.
+
+    Args:
+        before: Content item before the change, or None.
+        after: Content item after the change, or None.
+        sections_repo: Repository instance for looking up ancestors.
+
+    Returns:
+        Mapping of section id to counter deltas, suitable for
+        SectionRepository.adjust_post_counts. Empty when nothing changed.
+
+    Raises:
+        ValueError: If a section in either chain is not found.
+    """
+    old_section_id = counted_section_id(before)
+    new_section_id = counted_section_id(after)
+
+    deltas: dict[str, dict[str, int]] = {}
+
+    if old_section_id == new_section_id:
+        return deltas
+
+    for section_id, delta in ((old_section_id, -1), (new_section_id, 1)):
+        if section_id is None:
+            continue
+
+        for ancestor in load_ancestors(section_id, sections_repo):
+            counters = deltas.setdefault(
+                ancestor["id"],
+                {"direct_post_count": 0, "subtree_post_count": 0},
+            )
+            counters["subtree_post_count"] += delta
+
+        deltas[section_id]["direct_post_count"] += delta
+
+    return {
+        section_id: counters
+        for section_id, counters in deltas.items()
+        if any(counters.values())
+    }
+
+
+def subtree_move_deltas(
+    subtree_post_count: int,
+    old_ancestors: list[dict],
+    new_ancestors: list[dict],
+) -> dict[str, dict[str, int]]:
+    """Compute counter deltas for moving a section and its posts.
+
+    Args:
+        subtree_post_count: The moved section's subtree_post_count.
+        old_ancestors: Ancestor chain under the old parent (root first).
+        new_ancestors: Ancestor chain under the new parent (root first).
+
+    Returns:
+        Mapping of section id to subtree_post_count deltas.
+    """
+    deltas: dict[str, int] = {}
+
+    for ancestor in old_ancestors:
+        deltas[ancestor["id"]] = deltas.get(ancestor["id"], 0) - subtree_post_count
+
+    for ancestor in new_ancestors:
+        deltas[ancestor["id"]] = deltas.get(ancestor["id"], 0) + subtree_post_count
+
+    return {
+        section_id: {"subtree_post_count": delta}
+        for section_id, delta in deltas.items()
+        if delta
+    }
+
+
+def _load_ancestors_from_path_ids(
+    parent: dict,
+    sections_repo: SectionsRepositoryProtocol,
+) -> list[dict] | None:
+    """Fetch the ancestor chain in one batch using the parent's path_ids.
+
+    Returns None when the stored path_ids cannot be trusted, in which case
+    the caller falls back to walking the parent chain.
+    """
+    path_ids = parent.get("path_ids")
+    if not isinstance(path_ids, list) or not path_ids:
+        return None
+
+    if path_ids[-1] != parent["id"] or len(set(path_ids)) != len(path_ids):
+        return None
+
+    upper_ids = path_ids[:-1]
+    if upper_ids:
+        batch_get_by_ids = getattr(sections_repo, "batch_get_by_ids", None)
+        if batch_get_by_ids is None:
+            return None
+
+        found = batch_get_by_ids(upper_ids)
+        if any(ancestor_id not in found for ancestor_id in upper_ids):
+            return None
+
+        ancestors = [found[ancestor_id] for ancestor_id in upper_ids] + [parent]
+    else:
+        ancestors = [parent]
+
+    expected_parent_id = ROOT_PARENT_ID
+    for ancestor in ancestors:
+        if ancestor.get("parent_id", ROOT_PARENT_ID) != expected_parent_id:
+            return None
+        expected_parent_id = ancestor["id"]
+
+    return ancestors
+
+
+def _walk_ancestors(
+    parent: dict,
+    sections_repo: SectionsRepositoryProtocol,
+) -> list[dict]:
+    """Walk the parent chain one get_by_id per level, root first."""
+    ancestors = [parent]
+    visited = {parent["id"]}
+
+    current_parent_id = parent.get("parent_id", ROOT_PARENT_ID)
 
     while current_parent_id != ROOT_PARENT_ID:
         if current_parent_id in visited:
@@ -52,16 +256,13 @@ def build_path(
 
         visited.add(current_parent_id)
 
-        parent = sections_repo.get_by_id(current_parent_id)
-        if parent is None:
+        ancestor = sections_repo.get_by_id(current_parent_id)
+        if ancestor is None:
             raise ValueError(f"Parent section '{current_parent_id}' not found")
 
-        slug_parts.append(parent["slug"])
-        path_ids.append(parent["id"])
-
-        current_parent_id = parent.get("parent_id", ROOT_PARENT_ID)
+        ancestors.append(ancestor)
+        current_parent_id = ancestor.get("parent_id", ROOT_PARENT_ID)
 
-    slug_parts.reverse()
-    path_ids.reverse()
+    ancestors.reverse()
 
-    return "/".join(slug_parts), path_ids
+    return ancestors
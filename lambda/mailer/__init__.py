@@ -0,0 +1 @@
+# Outbound email worker Lambda function
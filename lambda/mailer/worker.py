@@ -0,0 +1,33 @@
+"""
+Outbound email worker Lambda function.
+Consumes email jobs queued with shared.mailer.queue_email and
+queue_notification.
+
+The event source batches messages for up to a minute, so notifications
+queued for one recipient within that window go out as a single digest. Jobs
+whose send is throttled are reported as batch item failures and return to
+the queue; after three receives they move to the dead-letter queue.
+"""
+import json
+import os
+import sys
+from typing import Any, Dict
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.mailer import process_email_jobs
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Send a batch of email jobs from SQS."""
+    jobs = []
+    for record in event.get('Records', []):
+        try:
+            jobs.append((record['messageId'], json.loads(record['body'])))
+        except ValueError:
+            # Malformed messages will not parse on retry either
+            print(f"Dropping malformed email job {record['messageId']}")
+
+    failed = process_email_jobs(jobs)
+    return {'batchItemFailures': [{'itemIdentifier': job_id} for job_id in failed]}
@@ -1,6 +1,7 @@
 """
 Media deletion Lambda function.
-Handles deleting media files from S3 and metadata from DynamoDB.
+Handles deleting media files from S3 and metadata from DynamoDB, one item at
+a time or in bulk.
 """
 import json
 import os
@@ -11,13 +12,20 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.auth import require_auth
 from shared.db import MediaRepository
-from shared.s3 import delete_file
+from shared.s3 import delete_file, delete_media_files
+from shared.media_usage import get_media_file_key
 from shared.plugins import PluginManager
 
 
 media_repo = MediaRepository()
 plugin_manager = PluginManager()
 
+MAX_BULK_DELETE = 1000
+
+# Media fields passed to media_bulk_delete plugins, which keeps the payload
+# of a full batch within the Lambda invoke limits
+BULK_HOOK_FIELDS = ('id', 'filename', 's3_key', 'mime_type', 'size', 'uploaded_by')
+
 
 @require_auth(roles=['admin', 'editor'])
 def handler(event, context, user_id, role):
@@ -26,7 +34,11 @@ def handler(event, context, user_id, role):
     
     DELETE /api/v1/media/{id}
     
-    Removes file from S3 (including thumbnails) and deletes metadata from DynamoDB.
+    Deletes metadata from DynamoDB and removes the file from S3 (including
+    thumbnails) unless other media records share it.
+    
+    Media whose file is used by content is not deleted (409) unless the
+    request passes ?force=true.
     Requires editor or admin role.
     """
     try:
@@ -50,6 +62,19 @@ def handler(event, context, user_id, role):
                 'body': json.dumps({'error': 'Media not found'})
             }
         
+        if not _is_forced(event):
+            file_key = get_media_file_key(media['s3_key'])
+            usage = media_repo.get_media_usage(file_key) if file_key else []
+            if usage and media_repo.is_last_reference(media):
+                return {
+                    'statusCode': 409,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': json.dumps({
+                        'error': 'Media is in use',
+                        'content_ids': usage
+                    })
+                }
+        
         # Execute plugin hook before deletion
         plugin_manager.execute_hook('media_delete', {
             'media_id': media_id,
@@ -57,15 +82,17 @@ def handler(event, context, user_id, role):
             'user_id': user_id
         })
         
-        # Delete file from S3 (including thumbnails)
-        try:
-            delete_file(media['s3_key'])
-        except Exception as e:
-            print(f"Warning: Failed to delete file from S3: {e}")
-            # Continue with metadata deletion even if S3 deletion fails
+        # Delete metadata from DynamoDB. Deduplicated files are shared, so the
+        # S3 objects are only deleted with their last media record.
+        last_reference = media_repo.delete_media(media)
         
-        # Delete metadata from DynamoDB
-        media_repo.delete(media_id)
+        # Delete file from S3 (including thumbnails)
+        if last_reference:
+            try:
+                delete_file(media['s3_key'], media.get('mime_type'), media.get('thumbnails'))
+            except Exception as e:
+                print(f"Warning: Failed to delete file from S3: {e}")
+                # Metadata is already deleted even if S3 deletion fails
         
         return {
             'statusCode': 200,
@@ -86,3 +113,128 @@ def handler(event, context, user_id, role):
             'headers': {'Content-Type': 'application/json'},
             'body': json.dumps({'error': f'Failed to delete media: {str(e)}'})
         }
+
+
+def _is_forced(event):
+    params = event.get('queryStringParameters') or {}
+    return str(params.get('force', '')).lower() == 'true'
+
+
+def _in_use(media_items):
+    """
+    Return {media_id: content ids} for items whose deletion would remove a
+    file that content still uses.
+    
+    A shared file only goes away once all of its records are deleted, so
+    records of a shared file are blocked only if every remaining reference
+    is among media_items.
+    """
+    file_keys = {get_media_file_key(media['s3_key']) for media in media_items}
+    file_keys.discard(None)
+    usage = media_repo.get_media_usage_batch(list(file_keys))
+    groups = {}
+    for media in media_items:
+        content_ids = usage.get(get_media_file_key(media['s3_key']))
+        if content_ids:
+            group = (media.get('content_hash'), media['s3_key'])
+            groups.setdefault(group, []).append(media)
+    
+    blocked = {}
+    for (content_hash, s3_key), items in groups.items():
+        if content_hash:
+            stored = media_repo.get_content_hash(content_hash)
+            if stored and stored.get('s3_key') == s3_key and stored.get('ref_count', 0) > len(items):
+                continue
+        content_ids = usage[get_media_file_key(s3_key)]
+        blocked.update({media['id']: content_ids for media in items})
+    return blocked
+
+
+def _bulk_error(status_code, message):
+    return {
+        'statusCode': status_code,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps({'error': message})
+    }
+
+
+@require_auth(roles=['admin', 'editor'])
+def bulk_handler(event, context, user_id, role):
+    """
+    Delete many media items at once.
+    
+    POST /api/v1/media/bulk-delete
+    Body: {"ids": ["media-id", ...], "force": false}  (at most MAX_BULK_DELETE ids)
+    
+    Records are deleted in BatchWriteItem chunks and files with batched
+    S3 DeleteObjects calls, so the number of requests grows with the
+    number of batches rather than the number of objects. Shared files are
+    kept while other media records still use them. Items whose file is used
+    by content are skipped and reported under in_use unless force is true.
+    Plugins get one media_bulk_delete hook call for the batch instead of a
+    media_delete call per item.
+    Requires editor or admin role.
+    """
+    try:
+        try:
+            body = json.loads(event.get('body') or '{}')
+        except json.JSONDecodeError:
+            return _bulk_error(400, 'Invalid JSON in request body')
+        
+        media_ids = body.get('ids') if isinstance(body, dict) else None
+        if not isinstance(media_ids, list) or not media_ids:
+            return _bulk_error(400, 'ids must be a non-empty list of media IDs')
+        if not all(isinstance(media_id, str) and media_id for media_id in media_ids):
+            return _bulk_error(400, 'ids must be a non-empty list of media IDs')
+        media_ids = list(dict.fromkeys(media_ids))
+        if len(media_ids) > MAX_BULK_DELETE:
+            return _bulk_error(400, f'At most {MAX_BULK_DELETE} media items can be deleted at once')
+        
+        media_items = media_repo.get_by_ids(media_ids)
+        found = {media['id'] for media in media_items}
+        
+        in_use = {} if body.get('force') is True else _in_use(media_items)
+        media_items = [media for media in media_items if media['id'] not in in_use]
+        
+        # One hook call for the whole batch: a call per item could run
+        # plugins up to MAX_BULK_DELETE times and outlast the function timeout
+        if media_items:
+            plugin_manager.execute_hook('media_bulk_delete', {
+                'media_ids': [media['id'] for media in media_items],
+                'media': [
+                    {field: media[field] for field in BULK_HOOK_FIELDS if field in media}
+                    for media in media_items
+                ],
+                'user_id': user_id
+            })
+        
+        released = media_repo.delete_media_batch(media_items)
+        
+        failed_keys = []
+        try:
+            failed_keys = delete_media_files(released)
+        except Exception as e:
+            print(f"Warning: Failed to delete files from S3: {e}")
+            failed_keys = [media['s3_key'] for media in released]
+        if failed_keys:
+            # Metadata is already deleted even if S3 deletion fails
+            print(f"Warning: Failed to delete {len(failed_keys)} object(s) from S3")
+        
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'message': 'Media deleted successfully',
+                'deleted': [media_id for media_id in media_ids if media_id in found and media_id not in in_use],
+                'not_found': [media_id for media_id in media_ids if media_id not in found],
+                'in_use': in_use,
+                'failed_keys': failed_keys,
+            })
+        }
+    
+    except Exception as e:
+        print(f"Error deleting media: {e}")
+        return _bulk_error(500, f'Failed to delete media: {str(e)}')
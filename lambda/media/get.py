@@ -1,7 +1,7 @@
 """
 Media retrieval Lambda function.
 Handles fetching media metadata by ID.
-Updated: 2026-02-15 - Convert S3 URLs to CloudFront URLs
+Media URLs are stored resolved for the CDN at write time (see shared/media_urls.py).
 """
 import json
 import os
@@ -11,7 +11,6 @@ import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.db import MediaRepository
-from shared.s3 import convert_s3_url_to_cdn
 
 
 media_repo = MediaRepository()
@@ -46,13 +45,6 @@ def handler(event, context):
                 'body': json.dumps({'error': 'Media not found'})
             }
         
-        # Convert S3 URLs to CloudFront URLs
-        if 's3_url' in media:
-            media['s3_url'] = convert_s3_url_to_cdn(media['s3_url'])
-        if 'thumbnails' in media:
-            for size, url in media['thumbnails'].items():
-                media['thumbnails'][size] = convert_s3_url_to_cdn(url)
-        
         return {
             'statusCode': 200,
             'headers': {
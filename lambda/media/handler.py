@@ -6,8 +6,16 @@ HTTP method and path.
 Routes:
   GET    /media          -> list media
   GET    /media/{id}     -> get media by ID
+  GET    /media/{id}/image -> resized image variant (public)
+  GET    /media/{id}/usage -> content that uses the media
   POST   /media/upload   -> upload media
+  POST   /media/bulk-delete -> delete many media items
   DELETE /media/{id}     -> delete media
+
+  POST   /media/uploads                      -> start multipart upload session
+  GET    /media/uploads/{upload_id}          -> resume upload session
+  POST   /media/uploads/{upload_id}/complete -> finalize upload session
+  DELETE /media/uploads/{upload_id}          -> abort upload session
 """
 import json
 import traceback
@@ -26,7 +34,24 @@ def handler(event, context):
         path = event.get('path', '') or event.get('rawPath', '')
         path_params = event.get('pathParameters') or {}
 
+        if '/media/uploads' in path:
+            import sessions
+            if http_method == 'POST' and path.rstrip('/').endswith('/complete'):
+                return sessions.complete_handler(event, context)
+            if http_method == 'POST':
+                return sessions.create_handler(event, context)
+            if http_method == 'GET':
+                return sessions.get_handler(event, context)
+            if http_method == 'DELETE':
+                return sessions.abort_handler(event, context)
+
         if http_method == 'GET':
+            if path_params.get('id') and path.rstrip('/').endswith('/image'):
+                from transform import handler as transform_handler
+                return transform_handler(event, context)
+            if path_params.get('id') and path.rstrip('/').endswith('/usage'):
+                from usage import handler as usage_handler
+                return usage_handler(event, context)
             if path_params.get('id'):
                 from get import handler as get_handler
                 return get_handler(event, context)
@@ -34,6 +59,9 @@ def handler(event, context):
             return list_handler(event, context)
 
         elif http_method == 'POST':
+            if path.rstrip('/').endswith('/bulk-delete'):
+                from delete import bulk_handler
+                return bulk_handler(event, context)
             from upload import handler as upload_handler
             return upload_handler(event, context)
 
@@ -1,7 +1,7 @@
 """
 Media listing Lambda function.
 Handles fetching paginated list of media items.
-Updated: 2026-02-15 - Convert S3 URLs to CloudFront URLs
+Media URLs are stored resolved for the CDN at write time (see shared/media_urls.py).
 """
 import json
 import os
@@ -10,8 +10,7 @@ import sys
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from shared.db import MediaRepository
-from shared.s3 import convert_s3_url_to_cdn
+from shared.db import MEDIA_TYPES, MediaRepository
 
 
 media_repo = MediaRepository()
@@ -26,8 +25,12 @@ def handler(event, context):
     Query parameters:
     - limit: Number of items to return (default: 20, max: 100)
     - last_key: Pagination token from previous response
+    - type: Only list one media type: image, video, audio or document
+    - uploaded_by: Only list media uploaded by this user ID
+    - order: "desc" (newest first, default) or "asc"
     
-    Returns paginated list of media items.
+    Returns paginated list of media items, ordered by upload time, with
+    total_count read from the maintained media counters.
     """
     try:
         # Get query parameters
@@ -38,48 +41,49 @@ def handler(event, context):
         if limit > 100:
             limit = 100
         
-        # Parse last_key for pagination
+        media_type = params.get('type') or None
+        if media_type and media_type not in MEDIA_TYPES:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': f"type must be one of: {', '.join(MEDIA_TYPES)}"})
+            }
+        uploaded_by = params.get('uploaded_by') or None
+        order = params.get('order', 'desc')
+        if order not in ('asc', 'desc'):
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': 'order must be asc or desc'})
+            }
+        
+        # Parse last_key for pagination: the uploaded_at and id of the last
+        # item of the previous page
         last_key = None
         if params.get('last_key'):
             try:
                 last_key = json.loads(params['last_key'])
-                # Ensure numeric keys are proper types for DynamoDB
-                if last_key and 'uploaded_at' in last_key:
-                    last_key['uploaded_at'] = int(last_key['uploaded_at'])
-            except (json.JSONDecodeError, ValueError):
+                last_key = {
+                    'uploaded_at': int(last_key['uploaded_at']),
+                    'id': str(last_key['id']),
+                }
+            except (json.JSONDecodeError, ValueError, TypeError, KeyError):
                 return {
                     'statusCode': 400,
                     'headers': {'Content-Type': 'application/json'},
                     'body': json.dumps({'error': 'Invalid last_key format'})
                 }
         
-        # Get total count (separate count query - no data transfer)
-        count_response = media_repo.table.scan(Select='COUNT')
-        total_count = count_response.get('Count', 0)
-        # Handle pagination in count (if table has > 1MB of metadata)
-        while 'LastEvaluatedKey' in count_response:
-            count_response = media_repo.table.scan(
-                Select='COUNT',
-                ExclusiveStartKey=count_response['LastEvaluatedKey']
-            )
-            total_count += count_response.get('Count', 0)
-        
         # Get media list
-        result = media_repo.list_media(limit=limit, last_key=last_key)
+        result = media_repo.list_media(
+            limit=limit,
+            last_key=last_key,
+            media_type=media_type,
+            uploaded_by=uploaded_by,
+            ascending=order == 'asc'
+        )
+        total_count = media_repo.get_media_count(media_type=media_type, uploaded_by=uploaded_by)
         
-        # Convert S3 URLs to CloudFront URLs
-        for item in result['items']:
-            if 's3_url' in item:
-                item['s3_url'] = convert_s3_url_to_cdn(item['s3_url'])
-            if 'thumbnails' in item:
-                for size, url in item['thumbnails'].items():
-                    item['thumbnails'][size] = convert_s3_url_to_cdn(url)
-        
-        # Ensure last_key values are JSON-serializable as correct types
-        response_last_key = result['last_key']
-        if response_last_key and 'uploaded_at' in response_last_key:
-            response_last_key['uploaded_at'] = int(response_last_key['uploaded_at'])
-
         return {
             'statusCode': 200,
             'headers': {
@@ -88,7 +92,7 @@ def handler(event, context):
             },
             'body': json.dumps({
                 'items': result['items'],
-                'last_key': response_last_key,
+                'last_key': result['last_key'],
                 'total_count': total_count
             }, default=str)
         }
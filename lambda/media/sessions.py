@@ -0,0 +1,335 @@
+"""
+Media upload session Lambda functions.
+Handles direct-to-S3 multipart uploads so file bytes never pass through
+API Gateway or Lambda:
+
+  POST   /api/v1/media/uploads                        -> start a session
+  GET    /api/v1/media/uploads/{upload_id}            -> resume a session
+  POST   /api/v1/media/uploads/{upload_id}/complete   -> finalize a session
+  DELETE /api/v1/media/uploads/{upload_id}            -> abort a session
+
+The client declares the file's size and SHA-256 up front, PUTs each part to
+its presigned URL, then calls complete. Finalizing verifies the assembled
+object against the declared size and checksum before the media record is
+created. If the content is already stored, the record references the stored
+file and the new upload is deleted.
+"""
+import json
+import math
+import mimetypes
+import os
+import re
+import sys
+import time
+import uuid
+import traceback
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.auth import require_auth
+from shared.db import MediaRepository
+from shared.s3 import (
+    build_object_key,
+    get_object_url,
+    get_part_size,
+    create_multipart_upload,
+    presign_upload_part,
+    list_uploaded_parts,
+    complete_multipart_upload,
+    abort_multipart_upload,
+    get_file_size,
+    compute_sha256,
+    read_file_head,
+    delete_file,
+    get_file_dimensions,
+)
+from upload import build_media_item, build_reference_item, save_media_item
+
+
+HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+}
+
+# Finalize streams the object once to verify its checksum, which bounds the
+# size that fits in the function timeout.
+MAX_UPLOAD_SIZE = 1024 * 1024 * 1024  # 1 GiB
+SESSION_TTL_SECONDS = 24 * 60 * 60
+# Images above this size are stored without thumbnails rather than being
+# decoded by the media worker.
+THUMBNAIL_SOURCE_LIMIT = 50 * 1024 * 1024  # 50 MiB
+# Enough of the file for Pillow to read image dimensions from the header.
+DIMENSION_PROBE_BYTES = 64 * 1024
+
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+media_repo = MediaRepository()
+
+
+def _response(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': HEADERS,
+        'body': json.dumps(body, default=str),
+    }
+
+
+def _parse_body(event):
+    raw_body = event.get('body') or '{}'
+    if isinstance(raw_body, str):
+        return json.loads(raw_body)
+    return raw_body
+
+
+def _extract_session_id(event):
+    """Extract the session ID from path parameters or the raw path."""
+    path_params = event.get('pathParameters') or {}
+    if path_params.get('upload_id'):
+        return path_params['upload_id']
+
+    path = event.get('path') or ''
+    match = re.search(r'/media/uploads/([^/]+)', path)
+    if match:
+        return match.group(1)
+
+    return None
+
+
+def _load_session(event, user_id, role):
+    """Load the session named in the path if the caller may access it."""
+    session_id = _extract_session_id(event)
+    if not session_id:
+        return None
+
+    session = media_repo.get_upload_session(session_id)
+    if not session:
+        return None
+
+    if session.get('uploaded_by') != user_id and role != 'admin':
+        return None
+
+    return session
+
+
+def validate_session_input(body):
+    """
+    Validate a request to start an upload session.
+
+    Returns:
+        List of error messages, empty if valid
+    """
+    errors = []
+
+    filename = body.get('filename')
+    if not isinstance(filename, str) or not filename.strip():
+        errors.append('filename is required')
+
+    content_type = body.get('content_type')
+    if content_type is not None and (not isinstance(content_type, str) or '/' not in content_type):
+        errors.append('content_type must be a MIME type')
+
+    size = body.get('size')
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        errors.append('size must be a positive integer')
+    elif size > MAX_UPLOAD_SIZE:
+        errors.append(f'size exceeds the {MAX_UPLOAD_SIZE} byte limit')
+
+    sha256 = body.get('sha256')
+    if not isinstance(sha256, str) or not SHA256_PATTERN.match(sha256.lower()):
+        errors.append('sha256 must be a 64 character hex digest')
+
+    return errors
+
+
+def _presigned_parts(session, part_numbers):
+    return [
+        {
+            'part_number': part_number,
+            'url': presign_upload_part(session['s3_key'], session['upload_id'], part_number),
+        }
+        for part_number in part_numbers
+    ]
+
+
+def _session_response(session, uploaded_parts=None):
+    uploaded_parts = uploaded_parts or []
+    uploaded_numbers = {part['PartNumber'] for part in uploaded_parts}
+    part_count = int(session['part_count'])
+    missing = [n for n in range(1, part_count + 1) if n not in uploaded_numbers]
+
+    return {
+        'session_id': session['session_id'],
+        'filename': session['filename'],
+        'size': int(session['size']),
+        'part_size': int(session['part_size']),
+        'part_count': part_count,
+        'expires_at': int(session['expires_at']),
+        'uploaded_parts': [
+            {'part_number': part['PartNumber'], 'size': part['Size']}
+            for part in uploaded_parts
+        ],
+        'parts': _presigned_parts(session, missing),
+    }
+
+
+def _discard(session):
+    """Remove a rejected upload's object and its session."""
+    try:
+        delete_file(session['s3_key'], session['mime_type'])
+    except Exception:
+        print(traceback.format_exc())
+    media_repo.delete_upload_session(session['session_id'])
+
+
+@require_auth(roles=['admin', 'editor', 'author'])
+def create_handler(event, context, user_id, role):
+    """Start a multipart upload session and return presigned part URLs."""
+    try:
+        body = _parse_body(event)
+
+        errors = validate_session_input(body)
+        if errors:
+            return _response(400, {'error': 'Validation error', 'messages': errors})
+
+        filename = body['filename'].strip()
+        content_type = (
+            body.get('content_type')
+            or mimetypes.guess_type(filename)[0]
+            or 'application/octet-stream'
+        )
+        size = body['size']
+
+        s3_key = build_object_key(filename)
+        upload_id = create_multipart_upload(s3_key, content_type)
+
+        part_size = get_part_size(size)
+        now = int(time.time())
+        session = media_repo.create_upload_session({
+            'session_id': str(uuid.uuid4()),
+            'upload_id': upload_id,
+            's3_key': s3_key,
+            'filename': filename,
+            'mime_type': content_type,
+            'size': size,
+            'sha256': body['sha256'].lower(),
+            'part_size': part_size,
+            'part_count': math.ceil(size / part_size),
+            'uploaded_by': user_id,
+            'created_at': now,
+            'expires_at': now + SESSION_TTL_SECONDS,
+        })
+
+        return _response(201, _session_response(session))
+
+    except json.JSONDecodeError:
+        return _response(400, {'error': 'Invalid JSON in request body'})
+    except Exception:
+        print(traceback.format_exc())
+        return _response(500, {'error': 'Failed to create upload session'})
+
+
+@require_auth(roles=['admin', 'editor', 'author'])
+def get_handler(event, context, user_id, role):
+    """Report uploaded parts and re-issue URLs for the missing ones."""
+    try:
+        session = _load_session(event, user_id, role)
+        if not session:
+            return _response(404, {'error': 'Upload session not found'})
+
+        uploaded = list_uploaded_parts(session['s3_key'], session['upload_id'])
+        return _response(200, _session_response(session, uploaded))
+
+    except Exception:
+        print(traceback.format_exc())
+        return _response(500, {'error': 'Failed to get upload session'})
+
+
+@require_auth(roles=['admin', 'editor', 'author'])
+def complete_handler(event, context, user_id, role):
+    """Assemble the parts, verify size and checksum, and create the media record."""
+    try:
+        session = _load_session(event, user_id, role)
+        if not session:
+            return _response(404, {'error': 'Upload session not found'})
+
+        s3_key = session['s3_key']
+        part_count = int(session['part_count'])
+        expected_size = int(session['size'])
+
+        parts = list_uploaded_parts(s3_key, session['upload_id'])
+        uploaded_numbers = {part['PartNumber'] for part in parts}
+        missing = [n for n in range(1, part_count + 1) if n not in uploaded_numbers]
+        if missing:
+            return _response(409, {'error': 'Upload is incomplete', 'missing_parts': missing})
+
+        complete_multipart_upload(s3_key, session['upload_id'], parts)
+
+        if get_file_size(s3_key) != expected_size:
+            _discard(session)
+            return _response(400, {'error': 'Uploaded file size does not match'})
+
+        if compute_sha256(s3_key) != session['sha256']:
+            _discard(session)
+            return _response(400, {'error': 'Uploaded file checksum does not match'})
+
+        content_hash = session['sha256']
+        result = None
+        stored = media_repo.get_content_hash(content_hash)
+        if stored and stored['s3_key'] != s3_key:
+            media_item = build_reference_item(stored, session['filename'], session['uploaded_by'])
+            result = save_media_item(media_item, content_hash, reference=True)
+            if result is not None:
+                # The content was already stored; drop the new copy
+                try:
+                    delete_file(s3_key, session['mime_type'])
+                except Exception:
+                    print(traceback.format_exc())
+
+        if result is None:
+            mime_type = session['mime_type']
+            dimensions = None
+            if mime_type.startswith('image/'):
+                dimensions = get_file_dimensions(
+                    read_file_head(s3_key, DIMENSION_PROBE_BYTES), mime_type
+                )
+
+            media_item = build_media_item(
+                filename=session['filename'],
+                s3_key=s3_key,
+                s3_url=get_object_url(s3_key),
+                mime_type=mime_type,
+                size=expected_size,
+                uploaded_by=session['uploaded_by'],
+                dimensions=dimensions,
+            )
+            if expected_size > THUMBNAIL_SOURCE_LIMIT:
+                media_item['status'] = 'ready'
+
+            result = save_media_item(media_item, content_hash)
+
+        media_repo.delete_upload_session(session['session_id'])
+
+        return _response(201, result)
+
+    except Exception:
+        print(traceback.format_exc())
+        return _response(500, {'error': 'Failed to complete upload'})
+
+
+@require_auth(roles=['admin', 'editor', 'author'])
+def abort_handler(event, context, user_id, role):
+    """Abort the multipart upload and drop the session."""
+    try:
+        session = _load_session(event, user_id, role)
+        if not session:
+            return _response(404, {'error': 'Upload session not found'})
+
+        abort_multipart_upload(session['s3_key'], session['upload_id'])
+        media_repo.delete_upload_session(session['session_id'])
+
+        return _response(200, {'message': 'Upload aborted'})
+
+    except Exception:
+        print(traceback.format_exc())
+        return _response(500, {'error': 'Failed to abort upload'})
@@ -0,0 +1,131 @@
+"""
+Image transformation Lambda function.
+Serves resized and re-encoded variants of uploaded images.
+
+Variants are limited to the presets in shared.s3.IMAGE_PRESETS. Each one is
+rendered on first request, stored in S3 under a deterministic key and
+served from there (through CloudFront when configured) afterwards.
+"""
+import json
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.db import MediaRepository
+from shared.s3 import (
+    IMAGE_PRESETS,
+    IMAGE_VARIANT_FORMATS,
+    ensure_image_variant,
+    get_object_url,
+    image_format_supported,
+    negotiate_image_format,
+)
+
+
+media_repo = MediaRepository()
+
+HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+}
+
+# Variants are immutable, but the chosen format depends on Accept
+REDIRECT_CACHE_CONTROL = 'public, max-age=86400'
+
+PRESET_PARAMS = ('width', 'height', 'fit', 'quality')
+
+
+def _error(status_code: int, message: str, **extra) -> dict:
+    return {
+        'statusCode': status_code,
+        'headers': HEADERS,
+        'body': json.dumps({'error': message, **extra}),
+    }
+
+
+def resolve_preset(params: dict):
+    """
+    Return the preset name a request asks for, or None if it matches none.
+
+    Requests either name a preset (?preset=card) or give width, height, fit
+    and/or quality values; the values given must match exactly one preset.
+    """
+    name = params.get('preset')
+    if name:
+        return name if name in IMAGE_PRESETS else None
+
+    requested = {key: params[key] for key in PRESET_PARAMS if params.get(key)}
+    if not requested:
+        return None
+
+    matches = []
+    for preset_name, preset in IMAGE_PRESETS.items():
+        if all(str(preset[key]) == str(value).lower() for key, value in requested.items()):
+            matches.append(preset_name)
+    return matches[0] if len(matches) == 1 else None
+
+
+def _get_header(event: dict, name: str) -> str:
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value or ''
+    return ''
+
+
+def handler(event, context):
+    """
+    Redirect to an image variant, rendering it on first request.
+
+    GET /api/v1/media/{id}/image?preset=card
+    GET /api/v1/media/{id}/image?width=600&height=400&fit=cover
+
+    Optional format=avif|webp|jpeg|png overrides negotiation from the Accept
+    header.
+    """
+    try:
+        media_id = (event.get('pathParameters') or {}).get('id')
+        if not media_id:
+            return _error(400, 'Media ID is required')
+
+        params = event.get('queryStringParameters') or {}
+        preset_name = resolve_preset(params)
+        if not preset_name:
+            return _error(
+                400,
+                'Unknown image preset',
+                presets={name: preset for name, preset in IMAGE_PRESETS.items()},
+            )
+
+        media = media_repo.get_by_id(media_id)
+        if not media:
+            return _error(404, 'Media not found')
+
+        mime_type = media.get('mime_type', '')
+        if not mime_type.startswith('image/') or mime_type == 'image/svg+xml':
+            return _error(400, 'Media is not a raster image')
+
+        image_format = params.get('format')
+        if image_format:
+            if image_format not in IMAGE_VARIANT_FORMATS or not image_format_supported(image_format):
+                return _error(400, f'Unsupported image format: {image_format}')
+        else:
+            image_format = negotiate_image_format(_get_header(event, 'accept'), mime_type)
+
+        variant_key = ensure_image_variant(media['s3_key'], preset_name, image_format)
+
+        return {
+            'statusCode': 302,
+            'headers': {
+                'Location': get_object_url(variant_key),
+                'Vary': 'Accept',
+                'Cache-Control': REDIRECT_CACHE_CONTROL,
+                'Access-Control-Allow-Origin': '*',
+            },
+            'body': '',
+        }
+
+    except Exception as e:
+        print(f"Error transforming image: {str(e)}")
+        return _error(500, 'Internal server error', message=str(e))
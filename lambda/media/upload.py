@@ -1,12 +1,17 @@
 """
 Media upload Lambda function.
-Handles multipart file uploads, generates thumbnails, and stores metadata.
+Handles multipart file uploads, stores metadata, and queues thumbnail
+generation for images.
+
+Uploads are deduplicated by SHA-256. The media table indexes each stored file
+under HASH#{sha256}; uploading content that is already stored creates a new
+media record that references the existing S3 object and thumbnails instead
+of storing another copy.
 """
 import json
 import uuid
-import base64
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import mimetypes
 import os
 import sys
@@ -16,97 +21,202 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.auth import require_auth
 from shared.db import MediaRepository
-from shared.s3 import upload_file, generate_thumbnails, get_file_dimensions
+from shared.multipart import (
+    BufferSink,
+    FormData,
+    HashingSink,
+    MultipartError,
+    MultipartLimitError,
+    decode_event_body,
+    parse_form,
+)
+from shared.s3 import upload_file, build_object_key, get_object_url, get_file_dimensions
 from shared.plugins import PluginManager
+from worker import enqueue_thumbnails
 
 
 media_repo = MediaRepository()
 plugin_manager = PluginManager()
 
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+# Leaves room for form fields and part headers around the file
+MAX_BODY_SIZE = MAX_FILE_SIZE + 64 * 1024
+MAX_FORM_PARTS = 10
+
+
+def _hashing_buffer_sink(name: str, filename: str, content_type: str) -> HashingSink:
+    return HashingSink(BufferSink())
 
-def parse_multipart_form_data(body: str, content_type: str) -> Optional[Dict[str, Any]]:
+
+def parse_upload_form(event: Dict[str, Any], content_type: str) -> FormData:
     """
-    Parse multipart/form-data from API Gateway.
+    Parse the multipart/form-data body of an upload request.
+    
+    API Gateway delivers binary bodies base64 encoded. The body is decoded
+    once and parsed in place; the file part is not copied until it is read.
+    Each file's SHA-256 is computed as it is parsed (sink.hexdigest()).
     
     Args:
-        body: Base64 encoded body from API Gateway
+        event: API Gateway event
         content_type: Content-Type header value
         
     Returns:
-        Dictionary with file data and metadata
+        Parsed form
+        
+    Raises:
+        MultipartError: If the body is malformed or exceeds the size limits
     """
+    return parse_form(
+        decode_event_body(event),
+        content_type,
+        sink_factory=_hashing_buffer_sink,
+        max_file_size=MAX_FILE_SIZE,
+        max_body_size=MAX_BODY_SIZE,
+        max_parts=MAX_FORM_PARTS,
+    )
+
+
+def parse_upload_metadata(fields: Dict[str, str]) -> Dict[str, str]:
+    """Read alt_text and caption from the form's optional metadata JSON field."""
+    metadata = {'alt_text': '', 'caption': ''}
     try:
-        # Extract boundary from content type
-        if 'boundary=' not in content_type:
-            return None
-        
-        boundary = content_type.split('boundary=')[1].strip()
-        
-        # Remove quotes if present
-        if boundary.startswith('"') and boundary.endswith('"'):
-            boundary = boundary[1:-1]
-        
-        print(f"DEBUG: Boundary: {boundary}")
-        
-        # Decode base64 body
-        decoded_body = base64.b64decode(body)
-        print(f"DEBUG: Decoded body length: {len(decoded_body)}")
-        decoded_body = base64.b64decode(body)
-        
-        # The boundary in the body is prefixed with --
-        boundary_bytes = f'--{boundary}'.encode()
-        
-        # Split by boundary
-        parts = decoded_body.split(boundary_bytes)
-        
-        file_data = None
-        filename = None
-        file_content_type = 'application/octet-stream'
-        
-        for part in parts:
-            if not part or part == b'--\r\n' or part == b'--' or part == b'\r\n':
-                continue
-            
-            # Each part starts with \r\n (except empty first part)
-            if part.startswith(b'\r\n'):
-                part = part[2:]
-            
-            # Split headers and content
-            if b'\r\n\r\n' in part:
-                headers_section, content = part.split(b'\r\n\r\n', 1)
-                headers = headers_section.decode('utf-8', errors='ignore')
-                
-                # Check if this is the file part
-                if 'Content-Disposition' in headers and 'filename=' in headers:
-                    # Extract filename
-                    for line in headers.split('\r\n'):
-                        if 'filename=' in line:
-                            filename_part = line.split('filename=')[1]
-                            filename = filename_part.strip('"').strip("'").split(';')[0]
-                        if 'Content-Type:' in line:
-                            file_content_type = line.split('Content-Type:')[1].strip()
-                    
-                    # Remove trailing \r\n if present (before next boundary)
-                    if content.endswith(b'\r\n'):
-                        file_data = content[:-2]
-                    else:
-                        file_data = content
-                    
-                    print(f"DEBUG: File data length: {len(file_data)}")
-                    print(f"DEBUG: First 20 bytes: {file_data[:20].hex()}")
-        
-        if file_data and filename:
-            return {
-                'file_data': file_data,
-                'filename': filename,
-                'content_type': file_content_type
-            }
+        submitted = json.loads(fields.get('metadata') or '{}')
+    except json.JSONDecodeError:
+        return metadata
+    
+    if isinstance(submitted, dict):
+        for key in metadata:
+            if isinstance(submitted.get(key), str):
+                metadata[key] = submitted[key]
+    return metadata
+
+
+def build_media_item(
+    filename: str,
+    s3_key: str,
+    s3_url: str,
+    mime_type: str,
+    size: int,
+    uploaded_by: str,
+    dimensions: Optional[Tuple[int, int]] = None,
+    metadata: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Build a new media record for a file stored in S3.
+    
+    Args:
+        filename: Original filename
+        s3_key: S3 key of the stored file
+        s3_url: Public URL of the stored file
+        mime_type: MIME type of the file
+        size: File size in bytes
+        uploaded_by: ID of the uploading user
+        dimensions: (width, height) for images, if known
+        metadata: alt_text and caption, if provided
         
-        return None
+    Returns:
+        Media item ready for MediaRepository.create. Images start in the
+        "processing" status until their thumbnails are generated.
+    """
+    media_item = {
+        'id': str(uuid.uuid4()),
+        'filename': filename,
+        's3_key': s3_key,
+        's3_url': s3_url,
+        'mime_type': mime_type,
+        'size': size,
+        'uploaded_by': uploaded_by,
+        'uploaded_at': int(datetime.now().timestamp()),
+        'status': 'processing' if mime_type.startswith('image/') else 'ready',
+        'metadata': metadata or {
+            'alt_text': '',
+            'caption': ''
+        }
+    }
+    
+    # Add dimensions if available
+    if dimensions:
+        media_item['dimensions'] = {
+            'width': dimensions[0],
+            'height': dimensions[1]
+        }
+    
+    return media_item
+
+
+def build_reference_item(
+    stored: Dict[str, Any],
+    filename: str,
+    uploaded_by: str,
+    metadata: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Build a media record that reuses an already stored file.
+    
+    Dimensions, thumbnails, image analysis and processing status are copied
+    from the record that first stored the file. If that record is gone or still processing,
+    the new record is processed again, which rewrites the same thumbnails.
+    
+    Args:
+        stored: Content hash index entry of the stored file
+        filename: Original filename of the new upload
+        uploaded_by: ID of the uploading user
+        metadata: alt_text and caption, if provided
+    """
+    media_item = build_media_item(
+        filename=filename,
+        s3_key=stored['s3_key'],
+        s3_url=get_object_url(stored['s3_key']),
+        mime_type=stored['mime_type'],
+        size=int(stored['size']),
+        uploaded_by=uploaded_by,
+        metadata=metadata,
+    )
+    
+    source = media_repo.get_by_id(stored['media_id'])
+    if source and source.get('s3_key') == stored['s3_key'] and \
+            source.get('status', 'ready') != 'processing':
+        media_item['status'] = source.get('status', 'ready')
+        for key in ('size', 'dimensions', 'thumbnails', 'blurhash', 'dominant_colors', 'aspect_ratio'):
+            if key in source:
+                media_item[key] = source[key]
+    
+    return media_item
+
+
+def save_media_item(
+    media_item: Dict[str, Any],
+    content_hash: Optional[str] = None,
+    reference: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Run the media_upload hook, store the record and queue its thumbnails.
+    
+    Args:
+        media_item: Record from build_media_item or build_reference_item
+        content_hash: SHA-256 of the file, to index it for deduplication
+        reference: True if the record reuses the indexed file of content_hash
         
-    except Exception as e:
-        print(f"Error parsing multipart data: {e}")
-        return None
+    Returns:
+        The stored record, or None if a referenced file was deleted meanwhile
+    """
+    # Execute plugin hook
+    media_item = plugin_manager.execute_hook('media_upload', media_item)
+    
+    if content_hash is None:
+        result = media_repo.create(media_item)
+    elif reference:
+        result = media_repo.create_reference(media_item, content_hash)
+        if result is None:
+            return None
+    else:
+        result = media_repo.create_with_content_hash(media_item, content_hash)
+    
+    # Thumbnails are generated in the background
+    if result.get('status') == 'processing':
+        result['status'] = enqueue_thumbnails(result)
+    
+    return result
 
 
 @require_auth(roles=['admin', 'editor', 'author'])
@@ -117,7 +227,8 @@ def handler(event, context, user_id, role):
     POST /api/v1/media/upload
     
     Accepts multipart/form-data with file upload.
-    Generates thumbnails for images and stores metadata in DynamoDB.
+    Stores metadata in DynamoDB and returns immediately; image thumbnails
+    are generated by the media worker.
     """
     try:
         # Get content type
@@ -132,86 +243,60 @@ def handler(event, context, user_id, role):
             }
         
         # Parse multipart form data
-        body = event.get('body', '')
-        is_base64 = event.get('isBase64Encoded', False)
-        
-        if not is_base64:
-            # If not base64 encoded, encode it
-            body = base64.b64encode(body.encode()).decode()
-        
-        parsed_data = parse_multipart_form_data(body, content_type)
-        
-        if not parsed_data:
+        try:
+            form = parse_upload_form(event, content_type)
+        except MultipartLimitError as e:
             return {
                 'statusCode': 400,
                 'headers': {'Content-Type': 'application/json'},
-                'body': json.dumps({'error': 'Failed to parse file upload'})
+                'body': json.dumps({'error': f'Upload too large: {str(e)}'})
             }
+        except MultipartError as e:
+            print(f"Error parsing multipart data: {e}")
+            form = None
         
-        file_data = parsed_data['file_data']
-        filename = parsed_data['filename']
-        file_content_type = parsed_data['content_type']
-        
-        # Validate file size (max 10MB)
-        max_size = 10 * 1024 * 1024  # 10MB
-        if len(file_data) > max_size:
+        upload = (form.get_file('file') or form.get_file()) if form else None
+        if not upload:
             return {
                 'statusCode': 400,
                 'headers': {'Content-Type': 'application/json'},
-                'body': json.dumps({'error': 'File size exceeds 10MB limit'})
-            }
-        
-        # Upload file to S3
-        s3_url = upload_file(file_data, filename, file_content_type)
-        s3_key = s3_url.split('.s3.amazonaws.com/')[-1]
-        
-        # Get file dimensions if image
-        dimensions = get_file_dimensions(file_data, file_content_type)
-        
-        # Generate thumbnails for images
-        thumbnails = {}
-        if file_content_type.startswith('image/'):
-            try:
-                thumbnails = generate_thumbnails(s3_key, file_content_type)
-            except Exception as e:
-                print(f"Warning: Failed to generate thumbnails: {e}")
-                # Continue without thumbnails
-        
-        # Create media metadata
-        now = int(datetime.now().timestamp())
-        media_id = str(uuid.uuid4())
-        
-        media_item = {
-            'id': media_id,
-            'filename': filename,
-            's3_key': s3_key,
-            's3_url': s3_url,
-            'mime_type': file_content_type,
-            'size': len(file_data),
-            'uploaded_by': user_id,
-            'uploaded_at': now,
-            'metadata': {
-                'alt_text': '',
-                'caption': ''
-            }
-        }
-        
-        # Add dimensions if available
-        if dimensions:
-            media_item['dimensions'] = {
-                'width': dimensions[0],
-                'height': dimensions[1]
+                'body': json.dumps({'error': 'Failed to parse file upload'})
             }
         
-        # Add thumbnails if generated
-        if thumbnails:
-            media_item['thumbnails'] = thumbnails
+        filename = upload.filename
+        metadata = parse_upload_metadata(form.fields)
+        content_hash = upload.sink.hexdigest()
         
-        # Execute plugin hook
-        media_item = plugin_manager.execute_hook('media_upload', media_item)
+        # Reuse the stored copy of identical content
+        result = None
+        stored = media_repo.get_content_hash(content_hash)
+        if stored:
+            media_item = build_reference_item(stored, filename, user_id, metadata)
+            result = save_media_item(media_item, content_hash, reference=True)
         
-        # Save to database
-        result = media_repo.create(media_item)
+        if result is None:
+            file_data = upload.sink.getvalue()
+            file_content_type = upload.content_type
+            
+            # Upload file to S3
+            s3_key = build_object_key(filename)
+            s3_url = upload_file(file_data, filename, file_content_type, key=s3_key)
+            
+            # Get file dimensions if image
+            dimensions = get_file_dimensions(file_data, file_content_type)
+            
+            # Create media metadata
+            media_item = build_media_item(
+                filename=filename,
+                s3_key=s3_key,
+                s3_url=s3_url,
+                mime_type=file_content_type,
+                size=len(file_data),
+                uploaded_by=user_id,
+                dimensions=dimensions,
+                metadata=metadata,
+            )
+            result = save_media_item(media_item, content_hash)
         
         return {
             'statusCode': 201,
@@ -0,0 +1,83 @@
+"""
+Media usage Lambda function.
+Lists the content that uses a media item's file, from the media usage index.
+"""
+import json
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.auth import require_auth
+from shared.db import ContentRepository, MediaRepository
+from shared.media_usage import get_media_file_key
+
+
+media_repo = MediaRepository()
+content_repo = ContentRepository()
+
+
+@require_auth(roles=['admin', 'editor', 'author'])
+def handler(event, context, user_id, role):
+    """
+    Get the content items that use a media item.
+
+    GET /api/v1/media/{id}/usage
+
+    Deduplicated media records share a file, so they share its usage.
+    """
+    try:
+        media_id = (event.get('pathParameters') or {}).get('id')
+
+        if not media_id:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': 'Media ID is required'})
+            }
+
+        media = media_repo.get_by_id(media_id)
+
+        if not media:
+            return {
+                'statusCode': 404,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': 'Media not found'})
+            }
+
+        file_key = get_media_file_key(media['s3_key'])
+        content_ids = media_repo.get_media_usage(file_key) if file_key else []
+
+        content = []
+        for content_id in content_ids:
+            item = content_repo.get_by_id(content_id)
+            if item:
+                content.append({
+                    'id': content_id,
+                    'title': item.get('title', ''),
+                    'slug': item.get('slug', ''),
+                    'type': item.get('type', ''),
+                    'status': item.get('status', ''),
+                })
+
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'media_id': media_id,
+                'in_use': bool(content),
+                'content': content
+            })
+        }
+
+    except Exception as e:
+        print(f"Error getting media usage: {e}")
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({'error': f'Failed to get media usage: {str(e)}'})
+        }
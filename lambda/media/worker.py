@@ -0,0 +1,81 @@
+"""
+Media processing worker Lambda function.
+Consumes thumbnail jobs from the media processing queue.
+
+Uploads create the media record with status "processing" and enqueue a job
+of the form {"media_id", "s3_key", "mime_type", "content_hash"}. The worker runs
+the image pipeline (orientation, metadata stripping, thumbnails and
+placeholder analysis), writes the results onto the record and marks it
+"ready", or "failed" if the image cannot be decoded. Other errors, such as
+S3 throttling or timeouts, are raised so SQS retries the job and finally
+moves it to the dead-letter queue. Without THUMBNAIL_QUEUE_URL the jobs run
+in-process through the local queue stand-in.
+"""
+import os
+import sys
+from typing import Any, Dict
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.db import MediaRepository
+from shared.queue import get_queue, process_sqs_event
+from shared.s3 import ImageDecodeError, process_image, delete_file
+
+
+media_repo = MediaRepository()
+
+
+def process_thumbnail_job(job: Dict[str, Any]) -> None:
+    """Process one media item and record the result."""
+    media_id = job['media_id']
+    s3_key = job['s3_key']
+
+    try:
+        result = process_image(s3_key, job['mime_type'])
+    except ImageDecodeError as e:
+        # Undecodable images will not succeed on retry
+        print(f"Failed to process media {media_id}: {e}")
+        media_repo.set_processing_result(media_id, 'failed')
+        return
+
+    thumbnails = result.pop('thumbnails')
+    if media_repo.set_processing_result(media_id, 'ready', thumbnails, result) is None:
+        # The media was deleted while processing; drop the new thumbnails
+        # unless another media record still shares the file
+        content_hash = job.get('content_hash')
+        stored = media_repo.get_content_hash(content_hash) if content_hash else None
+        if stored and stored.get('s3_key') == s3_key:
+            return
+        print(f"Media {media_id} no longer exists, removing its thumbnails")
+        delete_file(s3_key, job['mime_type'], thumbnails)
+
+
+thumbnail_queue = get_queue('THUMBNAIL_QUEUE_URL', process_thumbnail_job)
+
+
+def enqueue_thumbnails(media_item: Dict[str, Any]) -> str:
+    """
+    Queue thumbnail generation for a newly created media item.
+
+    Returns:
+        The item's resulting status: "processing", or "failed" if the job
+        could not be queued
+    """
+    try:
+        thumbnail_queue.send({
+            'media_id': media_item['id'],
+            's3_key': media_item['s3_key'],
+            'mime_type': media_item['mime_type'],
+            'content_hash': media_item.get('content_hash'),
+        })
+        return 'processing'
+    except Exception as e:
+        print(f"Failed to queue thumbnails for {media_item['id']}: {e}")
+        media_repo.set_processing_result(media_item['id'], 'failed')
+        return 'failed'
+
+
+def handler(event, context):
+    """Process a batch of thumbnail jobs from SQS."""
+    return process_sqs_event(event, process_thumbnail_job)
@@ -7,6 +7,8 @@ from datetime import datetime
 import boto3
 import os
 
+from shared.plugins import bump_plugin_config_version
+
 dynamodb = boto3.resource('dynamodb')
 
 
@@ -67,7 +69,7 @@ def handler(event, context):
                 'body': json.dumps({
                     'message': 'Plugin is already active',
                     'plugin': plugin
-                })
+                }, default=str)
             }
         
         # Update plugin to active
@@ -84,6 +86,11 @@ def handler(event, context):
             )
             
             updated_plugin = response['Attributes']
+            # Warm containers rebuild their hook registries
+            try:
+                bump_plugin_config_version()
+            except Exception as e:
+                print(f"Error bumping plugin config version: {e}")
             
             return {
                 'statusCode': 200,
@@ -91,7 +98,7 @@ def handler(event, context):
                 'body': json.dumps({
                     'message': 'Plugin activated successfully',
                     'plugin': updated_plugin
-                })
+                }, default=str)
             }
         except Exception as e:
             print(f"Error activating plugin: {e}")
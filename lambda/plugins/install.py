@@ -9,6 +9,14 @@ from typing import Dict, Any
 import boto3
 import os
 
+from shared.plugins import (
+    BREAKER_PREFIX,
+    CONFIG_ITEM_ID,
+    HOOK_FILTER,
+    HOOK_TYPES,
+    bump_plugin_config_version,
+)
+
 dynamodb = boto3.resource('dynamodb')
 
 
@@ -38,7 +46,8 @@ def handler(event, context):
         
         # Validate plugin structure
         plugin_id = body['id']
-        if not isinstance(plugin_id, str) or len(plugin_id) < 3:
+        if (not isinstance(plugin_id, str) or len(plugin_id) < 3
+                or plugin_id == CONFIG_ITEM_ID or plugin_id.startswith(BREAKER_PREFIX)):
             return {
                 'statusCode': 400,
                 'headers': {'Content-Type': 'application/json'},
@@ -79,6 +88,26 @@ def handler(event, context):
                         'code': 'INVALID_INPUT'
                     })
                 }
+            if hook.get('type', HOOK_FILTER) not in HOOK_TYPES:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': json.dumps({
+                        'error': f"Hook type must be one of: {', '.join(HOOK_TYPES)}",
+                        'code': 'INVALID_INPUT'
+                    })
+                }
+            timeout_ms = hook.get('timeout_ms')
+            if timeout_ms is not None and (
+                    not isinstance(timeout_ms, int) or isinstance(timeout_ms, bool) or timeout_ms <= 0):
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': json.dumps({
+                        'error': 'Hook timeout_ms must be a positive integer',
+                        'code': 'INVALID_INPUT'
+                    })
+                }
             # Set default priority if not provided
             if 'priority' not in hook:
                 hook['priority'] = 10
@@ -119,6 +148,10 @@ def handler(event, context):
         
         # Store plugin metadata in DynamoDB
         plugins_table.put_item(Item=plugin_item)
+        try:
+            bump_plugin_config_version()
+        except Exception as e:
+            print(f"Error bumping plugin config version: {e}")
         
         return {
             'statusCode': 201,
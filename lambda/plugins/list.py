@@ -32,18 +32,20 @@ def handler(event, context, user_id, role):
         params = event.get('queryStringParameters') or {}
         active_filter = params.get('active')
         
-        # Scan plugins table
+        # Scan plugins table, skipping the plugin config version item
         try:
             if active_filter is not None:
                 # Filter by active status
                 active_bool = active_filter.lower() in ['true', '1', 'yes']
                 response = plugins_table.scan(
-                    FilterExpression='active = :active',
+                    FilterExpression='active = :active AND attribute_not_exists(entity_type)',
                     ExpressionAttributeValues={':active': active_bool}
                 )
             else:
                 # Get all plugins
-                response = plugins_table.scan()
+                response = plugins_table.scan(
+                    FilterExpression='attribute_not_exists(entity_type)'
+                )
             
             plugins = response.get('Items', [])
             
@@ -8,6 +8,8 @@ import boto3
 import os
 from jsonschema import validate, ValidationError
 
+from shared.plugins import bump_plugin_config_version
+
 dynamodb = boto3.resource('dynamodb')
 
 
@@ -131,6 +133,10 @@ def handler(event, context):
             }
             
             settings_table.put_item(Item=settings_item)
+            try:
+                bump_plugin_config_version()
+            except Exception as e:
+                print(f"Error bumping plugin config version: {e}")
             
             return {
                 'statusCode': 200,
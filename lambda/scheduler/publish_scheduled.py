@@ -13,9 +13,12 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.db import ContentRepository
 from shared.logger import create_logger
+from shared.sections_db import SectionRepository
+from shared.section_service import post_count_deltas
 
 
 content_repo = ContentRepository()
+sections_repo = SectionRepository()
 
 
 def handler(event, context):
@@ -64,7 +67,7 @@ def handler(event, context):
                          scheduled_at=item.get('scheduled_at'))
                 
                 # Update status to published and set published_at timestamp
-                content_repo.update(
+                published_item = content_repo.update(
                     content_id=content_id,
                     created_at=created_at,
                     updates={
@@ -74,6 +77,15 @@ def handler(event, context):
                     }
                 )
                 
+                try:
+                    deltas = post_count_deltas(item, published_item, sections_repo)
+                    if deltas:
+                        sections_repo.adjust_post_counts(deltas)
+                except Exception as count_error:
+                    log.warning('Failed to update section post counts',
+                               content_id=content_id,
+                               error=str(count_error))
+                
                 item_duration = (time.time() - item_start) * 1000
                 log.metric('content_publish_duration', item_duration, 'Milliseconds')
                 
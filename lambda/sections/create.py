@@ -17,8 +17,7 @@ from shared.db import ContentRepository
 from service import (
     validate_section_input,
     validate_page_id,
-    compute_depth,
-    build_path,
+    compute_placement,
     ROOT_PARENT_ID,
 )
 
@@ -68,20 +67,17 @@ def handler(event, context, user_id, role):
         parent_id = body.get('parent_id') or ROOT_PARENT_ID
 
         # Check parent exists if not root
+        parent = None
         if parent_id != ROOT_PARENT_ID:
             parent = sections_repo.get_by_id(parent_id)
             if not parent:
                 return _response(400, {'error': 'Parent section not found'})
 
-        # Compute depth
+        # Compute depth and path from a single ancestry load
         try:
-            depth = compute_depth(parent_id, sections_repo)
-        except ValueError as exc:
-            return _response(400, {'error': str(exc)})
-
-        # Build path
-        try:
-            path, path_ids = build_path(section_id, parent_id, body['slug'], sections_repo)
+            depth, path, path_ids = compute_placement(
+                section_id, parent_id, body['slug'], sections_repo, parent=parent,
+            )
         except ValueError as exc:
             return _response(400, {'error': str(exc)})
 
@@ -8,12 +8,14 @@ Routes (authenticated):
   GET    /sections/{id}     -> get section by ID
   POST   /sections          -> create section
   PUT    /sections/{id}     -> update section
+  PUT    /sections/{id}/reorder -> reorder children of section (or ROOT)
   DELETE /sections/{id}     -> delete section
 
 Routes (public, no auth):
   GET    /public/sections/tree         -> get section tree
   GET    /public/sections/path/{path+} -> resolve section by path
   GET    /public/sections/{id}/posts   -> get posts for section
+  GET    /public/sections/page/{path+} -> section, posts and landing page in one payload
 """
 import json
 import traceback
@@ -46,6 +48,12 @@ def handler(event, context):
             from create import handler as create_handler
             return create_handler(event, context)
 
+        elif http_method == 'PUT' and (
+            path.rstrip('/').endswith('/reorder') or resource.endswith('/reorder')
+        ):
+            from reorder import handler as reorder_handler
+            return reorder_handler(event, context)
+
         elif http_method == 'PUT':
             from update import handler as update_handler
             return update_handler(event, context)
@@ -4,13 +4,17 @@ Handles:
   GET /api/v1/public/sections/tree
   GET /api/v1/public/sections/path/{path+}
   GET /api/v1/public/sections/{id}/posts
+  GET /api/v1/public/sections/page/{path+}
 """
 import os
 import sys
 import re
 import json
 import math
+import hashlib
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import unquote
 
 import boto3
@@ -19,7 +23,6 @@ from boto3.dynamodb.conditions import Key, Attr
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.sections_db import SectionRepository
-from shared.db import UserRepository
 from service import build_tree, resolve_path
 
 
@@ -29,13 +32,18 @@ HEADERS = {
 }
 
 CONTENT_TABLE = os.environ.get('CONTENT_TABLE', 'cms-content-dev')
+USERS_TABLE = os.environ.get('USERS_TABLE', 'cms-users-dev')
 CONTENT_SECTION_INDEX = 'section_id-published_at-index'
 POSTS_PER_PAGE = 20
+UNKNOWN_AUTHOR = 'Unknown Author'
+
+# Upper bound on concurrent DynamoDB reads made while building one section
+# page. The pool lives at module level so warm invocations reuse its threads.
+PAGE_FETCH_WORKERS = 4
 
 sections_repo = SectionRepository()
-user_repo = UserRepository()
-dynamodb = boto3.resource('dynamodb')
-content_table = dynamodb.Table(CONTENT_TABLE)
+_executor = ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS)
+_thread_state = threading.local()
 
 
 def _response(status_code, body):
@@ -46,8 +54,28 @@ def _response(status_code, body):
     }
 
 
-def _query_published_posts(section_id):
-    """Query all published posts for a section."""
+def _table(table_name):
+    """Return a DynamoDB table bound to the calling thread.
+
+    boto3 resources are not thread-safe, so every pool thread gets its own
+    session instead of sharing one module-level resource.
+    """
+    tables = getattr(_thread_state, 'tables', None)
+    if tables is None:
+        tables = _thread_state.tables = {}
+        _thread_state.dynamodb = boto3.session.Session().resource('dynamodb')
+
+    if table_name not in tables:
+        tables[table_name] = _thread_state.dynamodb.Table(table_name)
+
+    return tables[table_name]
+
+
+def _query_published_posts(section_id, limit=None):
+    """Query published posts for a section, newest first.
+
+    If limit is given, stop paginating once that many posts are collected.
+    """
     items = []
     query_kwargs = {
         'IndexName': CONTENT_SECTION_INDEX,
@@ -56,10 +84,15 @@ def _query_published_posts(section_id):
         'ScanIndexForward': False,
     }
 
+    content_table = _table(CONTENT_TABLE)
+
     while True:
         result = content_table.query(**query_kwargs)
         items.extend(result.get('Items', []))
 
+        if limit is not None and len(items) >= limit:
+            return items[:limit]
+
         last_key = result.get('LastEvaluatedKey')
         if not last_key:
             break
@@ -79,7 +112,7 @@ def _get_page(event):
     return max(page, 1)
 
 
-def _extract_path_value(event):
+def _extract_path_value(event, prefix='/api/v1/public/sections/path/'):
     """Extract the path value from event for path resolution."""
     path_params = event.get('pathParameters') or {}
 
@@ -91,7 +124,6 @@ def _extract_path_value(event):
 
     # Fallback: extract from raw path
     path = event.get('path') or ''
-    prefix = '/api/v1/public/sections/path/'
     if path.startswith(prefix):
         return unquote(path[len(prefix):]).strip('/')
 
@@ -131,6 +163,15 @@ def _is_path_route(event):
     )
 
 
+def _is_page_route(event):
+    resource = event.get('resource') or ''
+    path = event.get('path') or ''
+    return (
+        resource == '/api/v1/public/sections/page/{path+}'
+        or path.startswith('/api/v1/public/sections/page/')
+    )
+
+
 def _is_posts_route(event):
     resource = event.get('resource') or ''
     path = event.get('path') or ''
@@ -160,10 +201,24 @@ def _handle_path(event):
     return _response(200, section)
 
 
+def _get_author_name(author_id):
+    """Look up a display name for an author, falling back to a placeholder."""
+    try:
+        result = _table(USERS_TABLE).get_item(Key={'id': author_id})
+    except Exception:
+        return UNKNOWN_AUTHOR
+
+    user = result.get('Item')
+    if not user:
+        return UNKNOWN_AUTHOR
+
+    return user.get('name', user.get('display_name', UNKNOWN_AUTHOR))
+
+
 def _fetch_landing_page(page_id):
     """Fetch a landing page by ID if it's still published."""
     try:
-        result = content_table.query(
+        result = _table(CONTENT_TABLE).query(
             KeyConditionExpression=Key('id').eq(page_id),
             Limit=1,
         )
@@ -175,16 +230,8 @@ def _fetch_landing_page(page_id):
         if page.get('status') != 'published':
             return None
 
-        # Look up author name
-        author_name = 'Unknown Author'
         author_id = page.get('author', '')
-        if author_id:
-            try:
-                user = user_repo.get_by_id(author_id)
-                if user:
-                    author_name = user.get('name', user.get('display_name', 'Unknown Author'))
-            except Exception:
-                pass
+        author_name = _get_author_name(author_id) if author_id else UNKNOWN_AUTHOR
 
         return {
             'id': page.get('id', ''),
@@ -201,51 +248,67 @@ def _fetch_landing_page(page_id):
         return None
 
 
-def _handle_posts(event):
-    """Get paginated posts for a section including descendants."""
-    section_id = _extract_section_id_for_posts(event)
-    if not section_id:
-        return _response(400, {'error': 'Section id is required'})
+def _build_section_page(section, page):
+    """Build the posts page and landing page payload for a section.
 
-    section = sections_repo.get_by_id(section_id)
-    if not section:
-        return _response(404, {'error': 'Section not found'})
+    The landing page, the per-section post queries and the author lookups
+    are independent reads, so they run on the shared thread pool and the
+    request takes as long as the slowest of them rather than their sum.
+    Only this (calling) thread waits on futures, so a saturated pool queues
+    work instead of deadlocking.
+    """
+    section_id = section['id']
 
-    page = _get_page(event)
+    page_id = section.get('page_id')
+    landing_future = _executor.submit(_fetch_landing_page, page_id) if page_id else None
 
     # Get all section IDs (this section + descendants)
     descendant_ids = sections_repo.get_descendant_ids(section_id)
     all_section_ids = [section_id] + descendant_ids
 
+    # The maintained subtree counter gives the total for free, so each
+    # section only needs its newest page * POSTS_PER_PAGE posts. Sections
+    # without counters fall back to loading and counting every post.
+    subtree_post_count = section.get('subtree_post_count')
+    fetch_limit = page * POSTS_PER_PAGE if subtree_post_count is not None else None
+
     # Query published posts for all sections
+    post_futures = [
+        _executor.submit(_query_published_posts, sid, fetch_limit)
+        for sid in all_section_ids
+    ]
     posts = []
-    for sid in all_section_ids:
-        posts.extend(_query_published_posts(sid))
+    for future in post_futures:
+        posts.extend(future.result())
 
     # Sort by published_at descending
     posts.sort(key=lambda item: item.get('published_at', 0), reverse=True)
 
     # Paginate
-    total = len(posts)
+    total = int(subtree_post_count) if subtree_post_count is not None else len(posts)
     total_pages = math.ceil(total / POSTS_PER_PAGE) if total else 0
     start = (page - 1) * POSTS_PER_PAGE
     end = start + POSTS_PER_PAGE
     paged_items = posts[start:end]
 
-    # Enrich posts with author names
-    author_cache = {}
+    # Enrich posts with author names, one lookup per distinct author
+    author_futures = {}
+    for post in paged_items:
+        author_id = post.get('author', '')
+        if author_id and author_id not in author_futures:
+            author_futures[author_id] = _executor.submit(_get_author_name, author_id)
+
     for post in paged_items:
         author_id = post.get('author', '')
         if author_id:
-            if author_id not in author_cache:
-                try:
-                    user = user_repo.get_by_id(author_id)
-                    author_cache[author_id] = user.get('name', user.get('display_name', 'Unknown Author')) if user else 'Unknown Author'
-                except Exception:
-                    author_cache[author_id] = 'Unknown Author'
-            post['author_name'] = author_cache[author_id]
-
-    response_body = {
+            post['author_name'] = author_futures[author_id].result()
+
+        # Comment counts come with the post item; the moderation queue
+        # size is not public
+        post.setdefault('approved_comment_count', 0)
+        post.pop('pending_comment_count', None)
+
+    body = {
         'items': paged_items,
         'pagination': {
             'page': page,
@@ -256,13 +319,79 @@ def _handle_posts(event):
     }
 
     # Include landing page if section has one
-    page_id = section.get('page_id')
-    if page_id:
-        landing_page = _fetch_landing_page(page_id)
-        if landing_page:
-            response_body['landing_page'] = landing_page
+    landing_page = landing_future.result() if landing_future else None
+    if landing_page:
+        body['landing_page'] = landing_page
+
+    return body
+
+
+def _etag(body):
+    """Return a strong ETag for a serialized response body."""
+    return '"' + hashlib.sha256(body.encode('utf-8')).hexdigest()[:32] + '"'
+
+
+def _etag_matches(event, etag):
+    """Check an If-None-Match request header against an ETag."""
+    headers = event.get('headers') or {}
+    if_none_match = next(
+        (value for key, value in headers.items() if key.lower() == 'if-none-match'),
+        None,
+    )
+    if not if_none_match:
+        return False
+
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or any(
+        candidate[2:] == etag if candidate.startswith('W/') else candidate == etag
+        for candidate in candidates
+    )
+
 
-    return _response(200, response_body)
+def _handle_posts(event):
+    """Get paginated posts for a section including descendants."""
+    section_id = _extract_section_id_for_posts(event)
+    if not section_id:
+        return _response(400, {'error': 'Section id is required'})
+
+    section = sections_repo.get_by_id(section_id)
+    if not section:
+        return _response(404, {'error': 'Section not found'})
+
+    return _response(200, _build_section_page(section, _get_page(event)))
+
+
+def _handle_page(event):
+    """Resolve a section path and return everything its page renders.
+
+    Combines the path, posts and landing page endpoints into one response
+    carrying an ETag, so clients can revalidate with If-None-Match.
+    """
+    path_value = _extract_path_value(event, prefix='/api/v1/public/sections/page/')
+    if not path_value:
+        return _response(400, {'error': 'Path is required'})
+
+    section = resolve_path(path_value, sections_repo)
+    if not section:
+        return _response(404, {'error': 'Section not found'})
+
+    body = {'section': section, **_build_section_page(section, _get_page(event))}
+    serialized = json.dumps(body, default=str)
+    etag = _etag(serialized)
+    cache_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+    if _etag_matches(event, etag):
+        return {
+            'statusCode': 304,
+            'headers': {**HEADERS, **cache_headers},
+            'body': '',
+        }
+
+    return {
+        'statusCode': 200,
+        'headers': {**HEADERS, **cache_headers},
+        'body': serialized,
+    }
 
 
 def handler(event, context):
@@ -271,6 +400,9 @@ def handler(event, context):
         if _is_tree_route(event):
             return _handle_tree()
 
+        if _is_page_route(event):
+            return _handle_page(event)
+
         if _is_path_route(event):
             return _handle_path(event)
 
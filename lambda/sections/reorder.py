@@ -0,0 +1,74 @@
+"""
+Section reorder Lambda handler.
+Handles PUT /api/v1/sections/{id}/reorder requests.
+
+The path id is the parent section id (ROOT for top-level sections) and the
+body lists all of that parent's children in their new order:
+
+    {"ids": ["child-a", "child-c", "child-b"]}
+
+The new order is written in one DynamoDB transaction, which takes at most
+100 items, so a parent with more than 100 children cannot be reordered.
+"""
+import os
+import sys
+import json
+import time
+import traceback
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.auth import require_auth
+from shared.sections_db import ReorderConflictError, SectionRepository
+from service import validate_reorder_input
+
+
+HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+}
+
+sections_repo = SectionRepository()
+
+
+def _response(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': HEADERS,
+        'body': json.dumps(body, default=str),
+    }
+
+
+@require_auth(roles=['admin', 'editor'])
+def handler(event, context, user_id, role):
+    """Reorder the children of a section in one request."""
+    try:
+        parent_id = (event.get('pathParameters') or {}).get('id')
+        if not parent_id:
+            return _response(400, {'error': 'Section id is required'})
+
+        raw_body = event.get('body') or '{}'
+        if isinstance(raw_body, str):
+            body = json.loads(raw_body)
+        else:
+            body = raw_body
+
+        errors = validate_reorder_input(body)
+        if errors:
+            return _response(400, {'error': 'Validation error', 'messages': errors})
+
+        try:
+            order = sections_repo.reorder_children(parent_id, body['ids'], int(time.time()))
+        except ReorderConflictError as exc:
+            return _response(409, {'error': str(exc)})
+        except Exception:
+            print(traceback.format_exc())
+            return _response(500, {'error': 'Failed to reorder sections'})
+
+        return _response(200, {'parent_id': parent_id, 'items': order})
+
+    except json.JSONDecodeError:
+        return _response(400, {'error': 'Invalid JSON in request body'})
+    except Exception:
+        print(traceback.format_exc())
+        return _response(500, {'error': 'Internal server error'})
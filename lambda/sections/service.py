@@ -10,9 +10,19 @@ from __future__ import annotations
 import re
 from typing import Protocol
 
+from shared.section_service import (
+    ROOT_PARENT_ID,
+    build_path,
+    build_path_from_ancestors,
+    load_ancestors,
+    subtree_move_deltas,
+)
+
 
-ROOT_PARENT_ID = "ROOT"
 MAX_DEPTH = 5
+MAX_SORT_ORDER = 1000
+# A reorder is written in one DynamoDB transaction (at most 100 items)
+MAX_REORDER_IDS = 100
 SLUG_PATTERN = re.compile(r"^[a-z0-9-]+$")
 
 
@@ -67,110 +77,120 @@ def validate_section_input(data: dict, is_update: bool = False) -> list[str]:
 
         if not isinstance(sort_order, int) or isinstance(sort_order, bool):
             errors.append("sort_order must be an integer between 0 and 1000")
-        elif sort_order < 0 or sort_order > 1000:
+        elif sort_order < 0 or sort_order > MAX_SORT_ORDER:
             errors.append("sort_order must be an integer between 0 and 1000")
 
     return errors
 
 
-def compute_depth(parent_id: str, sections_repo: SectionsRepositoryProtocol) -> int:
-    """Compute the depth a new section would have given its parent_id.
+def validate_reorder_input(data: dict) -> list[str]:
+    """Validate a sibling reorder request body.
 
-    A root section (parent_id=='ROOT') has depth=1. Each child level adds 1.
+    Args:
+        data: Request body dict with an 'ids' list of every child section
+            id of the parent, in the new order.
+
+    Returns:
+        List of validation error strings. Empty list means valid.
+    """
+    errors: list[str] = []
+
+    ids = data.get("ids")
+
+    if not isinstance(ids, list) or not ids:
+        errors.append("ids must be a non-empty list of section ids")
+        return errors
+
+    if any(not isinstance(section_id, str) or not section_id for section_id in ids):
+        errors.append("ids must contain only non-empty strings")
+
+    elif len(set(ids)) != len(ids):
+        errors.append("ids must not contain duplicates")
+
+    if len(ids) > MAX_REORDER_IDS:
+        errors.append(
+            f"ids must contain at most {MAX_REORDER_IDS} sections: a reorder is a "
+            f"single transaction, so a parent with more than {MAX_REORDER_IDS} "
+            "children cannot be reordered"
+        )
+
+    return errors
+
+
+def depth_from_ancestors(ancestors: list[dict]) -> int:
+    """Compute the depth of a section from its ancestor chain.
+
+    A root section (no ancestors) has depth=1. Each ancestor adds 1.
 
     Args:
-        parent_id: The parent_id of the section being created/moved.
-        sections_repo: Repository instance for looking up parent sections.
+        ancestors: Ancestor chain from load_ancestors (root first).
 
     Returns:
         The depth this section would occupy.
 
     Raises:
-        ValueError: If depth would exceed 5, parent not found, or cycle detected.
+        ValueError: If depth would exceed 5.
     """
-    if parent_id == ROOT_PARENT_ID:
-        return 1
+    depth = len(ancestors) + 1
 
-    depth = 2
-    current_parent_id = parent_id
-    visited: set[str] = set()
+    if depth > MAX_DEPTH:
+        raise ValueError("Maximum nesting depth of 5 levels exceeded")
 
-    while current_parent_id != ROOT_PARENT_ID:
-        if depth > MAX_DEPTH:
-            raise ValueError("Maximum nesting depth of 5 levels exceeded")
+    return depth
 
-        if current_parent_id in visited:
-            raise ValueError("Cycle detected in section parent chain")
 
-        visited.add(current_parent_id)
+def compute_depth(parent_id: str, sections_repo: SectionsRepositoryProtocol) -> int:
+    """Compute the depth a new section would have given its parent_id.
 
-        parent = sections_repo.get_by_id(current_parent_id)
-        if parent is None:
-            raise ValueError(f"Parent section '{current_parent_id}' not found")
+    A root section (parent_id=='ROOT') has depth=1. Each child level adds 1.
 
-        current_parent_id = parent.get("parent_id", ROOT_PARENT_ID)
+    Args:
+        parent_id: The parent_id of the section being created/moved.
+        sections_repo: Repository instance for looking up parent sections.
 
-        if current_parent_id != ROOT_PARENT_ID:
-            depth += 1
+    Returns:
+        The depth this section would occupy.
 
-    return depth
+    Raises:
+        ValueError: If depth would exceed 5, parent not found, or cycle detected.
+    """
+    return depth_from_ancestors(load_ancestors(parent_id, sections_repo))
 
 
-def build_path(
+def compute_placement(
     section_id: str,
     parent_id: str,
     slug: str,
     sections_repo: SectionsRepositoryProtocol,
-) -> tuple[str, list[str]]:
-    """Build the full slug path and path_ids from root to this section.
+    parent: dict | None = None,
+) -> tuple[int, str, list[str]]:
+    """Compute depth, path and path_ids for a section with one ancestry load.
 
     Args:
         section_id: The section's own ID.
         parent_id: The section's parent_id.
         slug: The section's slug.
         sections_repo: Repository instance for looking up ancestors.
+        parent: The parent section, if the caller has already loaded it.
 
     Returns:
-        Tuple of (slash-joined path, list of IDs from root to section).
+        Tuple of (depth, slash-joined path, list of IDs from root to section).
 
     Raises:
-        ValueError: If a parent is not found or a cycle is detected.
+        ValueError: If depth would exceed 5, parent not found, or cycle detected.
     """
-    if parent_id == ROOT_PARENT_ID:
-        return slug, [section_id]
-
-    slug_parts = [slug]
-    path_ids = [section_id]
-
-    current_parent_id = parent_id
-    visited: set[str] = set()
-
-    while current_parent_id != ROOT_PARENT_ID:
-        if current_parent_id in visited:
-            raise ValueError("Cycle detected in section parent chain")
-
-        visited.add(current_parent_id)
-
-        parent = sections_repo.get_by_id(current_parent_id)
-        if parent is None:
-            raise ValueError(f"Parent section '{current_parent_id}' not found")
-
-        slug_parts.append(parent["slug"])
-        path_ids.append(parent["id"])
-
-        current_parent_id = parent.get("parent_id", ROOT_PARENT_ID)
-
-    slug_parts.reverse()
-    path_ids.reverse()
+    ancestors = load_ancestors(parent_id, sections_repo, parent=parent)
+    path, path_ids = build_path_from_ancestors(section_id, slug, ancestors)
 
-    return "/".join(slug_parts), path_ids
+    return depth_from_ancestors(ancestors), path, path_ids
 
 
 def build_tree(sections: list[dict]) -> list[dict]:
     """Convert a flat list of sections into a nested tree structure.
 
     Filters out slug_lock items. Sorts children by sort_order ASC,
-    name ASC, id ASC for stable deterministic ordering.
+    name ASC, id ASC for stable deterministic ordering. Every node carries
+    direct_post_count and subtree_post_count, defaulting to 0.
 
     Args:
         sections: Flat list of section dicts.
@@ -208,6 +228,8 @@ def build_tree(sections: list[dict]) -> list[dict]:
 
         for section in sorted(grouped.get(parent_id, []), key=sort_key):
             node = dict(section)
+            node.setdefault("direct_post_count", 0)
+            node.setdefault("subtree_post_count", 0)
             node["children"] = build_children(node["id"])
             children.append(node)
 
@@ -292,12 +314,19 @@ def validate_page_id(page_id, content_repo):
 
 __all__ = [
     "validate_section_input",
+    "validate_reorder_input",
+    "depth_from_ancestors",
     "compute_depth",
+    "compute_placement",
+    "load_ancestors",
     "build_path",
+    "build_path_from_ancestors",
+    "subtree_move_deltas",
     "build_tree",
     "resolve_path",
     "validate_page_id",
     "ROOT_PARENT_ID",
     "MAX_DEPTH",
+    "MAX_SORT_ORDER",
     "SLUG_PATTERN",
 ]
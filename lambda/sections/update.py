@@ -16,8 +16,9 @@ from shared.sections_db import SectionRepository
 from service import (
     validate_section_input,
     validate_page_id,
-    compute_depth,
-    build_path,
+    compute_placement,
+    load_ancestors,
+    subtree_move_deltas,
     ROOT_PARENT_ID,
 )
 
@@ -88,6 +89,7 @@ def handler(event, context, user_id, role):
         # Handle parent change
         current_parent_id = existing.get('parent_id', ROOT_PARENT_ID)
         new_parent_id = current_parent_id
+        new_parent = None
         parent_changed = False
 
         if 'parent_id' in body:
@@ -97,17 +99,13 @@ def handler(event, context, user_id, role):
                 return _response(400, {'error': 'Section cannot be its own parent'})
 
             if new_parent_id != ROOT_PARENT_ID:
-                parent = sections_repo.get_by_id(new_parent_id)
-                if not parent:
+                new_parent = sections_repo.get_by_id(new_parent_id)
+                if not new_parent:
                     return _response(400, {'error': 'Parent section not found'})
 
             parent_changed = new_parent_id != current_parent_id
             if parent_changed:
                 updates['parent_id'] = new_parent_id
-                try:
-                    updates['depth'] = compute_depth(new_parent_id, sections_repo)
-                except ValueError as exc:
-                    return _response(400, {'error': str(exc)})
 
         # Handle slug change
         current_slug = existing.get('slug')
@@ -120,15 +118,20 @@ def handler(event, context, user_id, role):
             if slug_changed:
                 updates['slug'] = new_slug
 
-        # Recompute path if parent or slug changed
+        # Recompute depth and path if parent or slug changed
         if parent_changed or slug_changed:
             try:
-                path, path_ids = build_path(section_id, new_parent_id, new_slug, sections_repo)
-                updates['path'] = path
-                updates['path_ids'] = path_ids
+                depth, path, path_ids = compute_placement(
+                    section_id, new_parent_id, new_slug, sections_repo, parent=new_parent,
+                )
             except ValueError as exc:
                 return _response(400, {'error': str(exc)})
 
+            if parent_changed:
+                updates['depth'] = depth
+            updates['path'] = path
+            updates['path_ids'] = path_ids
+
         updates['updated_at'] = now
 
         try:
@@ -139,6 +142,18 @@ def handler(event, context, user_id, role):
             print(traceback.format_exc())
             return _response(500, {'error': 'Failed to update section'})
 
+        # Move this section's posts from the old ancestors to the new ones
+        subtree_post_count = int(existing.get('subtree_post_count', 0))
+        if parent_changed and subtree_post_count:
+            try:
+                old_ancestors = load_ancestors(current_parent_id, sections_repo)
+                new_ancestors = load_ancestors(new_parent_id, sections_repo, parent=new_parent)
+                sections_repo.adjust_post_counts(
+                    subtree_move_deltas(subtree_post_count, old_ancestors, new_ancestors)
+                )
+            except Exception:
+                print(traceback.format_exc())
+
         return _response(200, updated_item)
 
     except json.JSONDecodeError:
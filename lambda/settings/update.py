@@ -54,6 +54,7 @@ def handler(event, context, user_id, role):
             'registration_enabled': bool,
             'comments_enabled': bool,
             'comment_moderation_enabled': bool,
+            'comment_notification_email': str,
             'captcha_enabled': bool,
         }
         
@@ -297,7 +297,7 @@ def extract_user_from_event(event: Dict[str, Any]) -> Optional[Tuple[str, str]]:
     Returns:
         Tuple of (user_id, role) if authenticated, None otherwise
     """
-    headers = event.get('headers', {})
+    headers = event.get('headers') or {}
     
     # Handle case-insensitive headers
     auth_header = None
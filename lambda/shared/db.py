@@ -4,19 +4,48 @@ Provides CRUD operations and query methods for all CMS tables.
 """
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
-from typing import Dict, List, Any, Optional
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+from typing import Dict, Iterable, List, Any, Optional
 import os
+import re
+import uuid
 from decimal import Decimal
 
 
 dynamodb = boto3.resource('dynamodb')
 
+# Mime-type families of the media library, for the media_type attribute
+MEDIA_TYPES = ('image', 'video', 'audio', 'document')
+
 
 def get_dynamodb_resource():
     """Get the DynamoDB resource."""
     return dynamodb
 
 
+def get_media_type(mime_type: str) -> str:
+    """Return the media library family of a mime type, e.g. "image"."""
+    family = (mime_type or '').split('/', 1)[0]
+    return family if family in MEDIA_TYPES else 'document'
+
+
+# Comment ids carry the comment's sort key: "<created_at>-<32 hex digits>".
+# Older comments have plain UUIDs, which never match.
+COMMENT_ID_PATTERN = re.compile(r'^(\d{1,15})-[0-9a-f]{32}$')
+
+
+def new_comment_id(created_at: int) -> str:
+    """Return a new comment id for a comment created at created_at."""
+    return f"{int(created_at)}-{uuid.uuid4().hex}"
+
+
+def get_comment_created_at(comment_id: str) -> Optional[int]:
+    """Return the created_at encoded in a comment id, or None for older ids."""
+    match = COMMENT_ID_PATTERN.match(comment_id or '')
+    return int(match.group(1)) if match else None
+
+
 class ContentRepository:
     """Repository for content management operations."""
     
@@ -160,14 +189,55 @@ class ContentRepository:
 class MediaRepository:
     """Repository for media management operations."""
     
+    # Multipart upload sessions and content hash index entries share the
+    # media table under their own id prefixes and are excluded from media
+    # reads by entity_type.
+    UPLOAD_SESSION_PREFIX = 'UPLOAD#'
+    UPLOAD_SESSION_ENTITY = 'upload_session'
+    CONTENT_HASH_PREFIX = 'HASH#'
+    CONTENT_HASH_ENTITY = 'content_hash'
+    MEDIA_USAGE_PREFIX = 'USAGE#'
+    MEDIA_USAGE_ENTITY = 'media_usage'
+    MEDIA_COUNT_PREFIX = 'COUNT#'
+    MEDIA_COUNT_ENTITY = 'media_count'
+    
+    # Media records carry library and media_type attributes, so only they
+    # appear in the listing indexes, all sorted by uploaded_at. Every record
+    # shares the one library partition, which sees about one write per upload
+    # and is far from a partition's throughput limits.
+    LIBRARY_PARTITION = 'media'
+    LIBRARY_INDEX = 'library-uploaded_at-index'
+    MEDIA_TYPE_INDEX = 'media_type-uploaded_at-index'
+    UPLOADER_INDEX = 'uploaded_by-uploaded_at-index'
+    LISTING_INDEXES = (LIBRARY_INDEX, MEDIA_TYPE_INDEX, UPLOADER_INDEX)
+    
+    # DynamoDB BatchGetItem accepts at most 100 keys per request
+    BATCH_GET_SIZE = 100
+    
     def __init__(self):
         table_name = os.environ.get('MEDIA_TABLE', 'cms-media-dev')
+        self.table_name = table_name
         self.table = dynamodb.Table(table_name)
+        self.client = boto3.client('dynamodb')
+        self.serializer = TypeSerializer()
+        # The listing indexes are deployed one at a time (see
+        # MEDIA_LISTING_INDEXES in lib/constructs/database.ts)
+        listing_indexes = os.environ.get('MEDIA_LISTING_INDEXES')
+        self.listing_indexes = (
+            {name for name in listing_indexes.split(',') if name}
+            if listing_indexes is not None else set(self.LISTING_INDEXES)
+        )
     
     def create(self, item: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new media item."""
+        """Create a new media item and count it."""
+        item = self._with_index_fields(item)
         try:
-            self.table.put_item(Item=item)
+            self.client.transact_write_items(
+                TransactItems=[
+                    {'Put': {'TableName': self.table_name, 'Item': self._serialize_item(item)}},
+                    *self._count_updates(item, 1),
+                ]
+            )
             return item
         except Exception as e:
             raise Exception(f"Failed to create media: {str(e)}")
@@ -176,32 +246,170 @@ class MediaRepository:
         """Get media by ID."""
         try:
             response = self.table.get_item(Key={'id': media_id})
-            return response.get('Item')
+            item = response.get('Item')
+            if item and item.get('entity_type'):
+                return None
+            return item
         except Exception as e:
             raise Exception(f"Failed to get media: {str(e)}")
     
     def list_media(
         self, 
         limit: int = 20, 
-        last_key: Optional[Dict] = None
+        last_key: Optional[Dict] = None,
+        media_type: Optional[str] = None,
+        uploaded_by: Optional[str] = None,
+        ascending: bool = False
     ) -> Dict[str, Any]:
-        """List media with pagination."""
+        """
+        List media by uploaded_at, newest first unless ascending.
+        
+        Each filter has its own index, so a page is a single query. Filtering
+        by both type and uploader queries the uploader's index and filters
+        by type, which may take more than one query to fill a page. A filter
+        whose index is not deployed yet is applied the same way, to the
+        library index.
+        
+        Args:
+            limit: Maximum number of items
+            last_key: Keyset cursor {"uploaded_at", "id"} from the previous page
+            media_type: Only list this family (see MEDIA_TYPES)
+            uploaded_by: Only list media uploaded by this user
+            ascending: List oldest first
+        """
+        conditions = {'uploaded_by': uploaded_by, 'media_type': media_type}
+        conditions = {name: value for name, value in conditions.items() if value}
+        if uploaded_by and self.UPLOADER_INDEX in self.listing_indexes:
+            index_name, partition = self.UPLOADER_INDEX, ('uploaded_by', uploaded_by)
+        elif media_type and self.MEDIA_TYPE_INDEX in self.listing_indexes:
+            index_name, partition = self.MEDIA_TYPE_INDEX, ('media_type', media_type)
+        else:
+            index_name, partition = self.LIBRARY_INDEX, ('library', self.LIBRARY_PARTITION)
+        conditions.pop(partition[0], None)
+        
+        query_params = {
+            'IndexName': index_name,
+            'KeyConditionExpression': Key(partition[0]).eq(partition[1]),
+            'ScanIndexForward': ascending,
+        }
+        filtered = bool(conditions)
+        if filtered:
+            filter_expression = None
+            for name, value in conditions.items():
+                condition = Attr(name).eq(value)
+                filter_expression = condition if filter_expression is None else filter_expression & condition
+            query_params['FilterExpression'] = filter_expression
+        
         try:
-            scan_params = {
-                'Limit': limit
-            }
-            
+            items = []
+            start_key = None
             if last_key:
-                scan_params['ExclusiveStartKey'] = last_key
+                start_key = {
+                    'id': last_key['id'],
+                    'uploaded_at': int(last_key['uploaded_at']),
+                    partition[0]: partition[1],
+                }
+            
+            while True:
+                if start_key:
+                    query_params['ExclusiveStartKey'] = start_key
+                # Limit bounds the items read, so a filtered page never overfills
+                query_params['Limit'] = limit - len(items)
+                response = self.table.query(**query_params)
+                items.extend(response.get('Items', []))
+                start_key = response.get('LastEvaluatedKey')
+                if not filtered or not start_key or len(items) >= limit:
+                    break
             
-            response = self.table.scan(**scan_params)
             return {
-                'items': response.get('Items', []),
-                'last_key': response.get('LastEvaluatedKey')
+                'items': items,
+                'last_key': {
+                    'uploaded_at': int(start_key['uploaded_at']),
+                    'id': start_key['id'],
+                } if start_key else None
             }
         except Exception as e:
             raise Exception(f"Failed to list media: {str(e)}")
     
+    def get_media_count(
+        self,
+        media_type: Optional[str] = None,
+        uploaded_by: Optional[str] = None
+    ) -> int:
+        """Return the number of media items, optionally of a type or uploader."""
+        try:
+            response = self.table.get_item(Key={'id': self._count_id(uploaded_by)})
+            item = response.get('Item') or {}
+            return int(item.get(media_type or 'total', 0))
+        except Exception as e:
+            raise Exception(f"Failed to get media count: {str(e)}")
+    
+    def _with_index_fields(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **item,
+            'library': self.LIBRARY_PARTITION,
+            'media_type': get_media_type(item.get('mime_type', '')),
+        }
+    
+    def _count_id(self, uploaded_by: Optional[str] = None) -> str:
+        if uploaded_by:
+            return f"{self.MEDIA_COUNT_PREFIX}uploader#{uploaded_by}"
+        return f"{self.MEDIA_COUNT_PREFIX}all"
+    
+    def _count_deltas(self, media_items: Iterable[Dict[str, Any]], delta: int) -> Dict[str, Dict[str, int]]:
+        """
+        Return the counter changes for adding or removing media items.
+        
+        Counter items hold a total and one count per media type: one for the
+        whole library and one per uploader. Records without the index
+        fields predate the counters and were never counted.
+        """
+        deltas = {}
+        for media in media_items:
+            if media.get('library') != self.LIBRARY_PARTITION:
+                continue
+            media_type = get_media_type(media.get('mime_type', ''))
+            count_ids = [self._count_id()]
+            if media.get('uploaded_by'):
+                count_ids.append(self._count_id(media['uploaded_by']))
+            for count_id in count_ids:
+                counters = deltas.setdefault(count_id, {})
+                counters['total'] = counters.get('total', 0) + delta
+                counters[media_type] = counters.get(media_type, 0) + delta
+        return deltas
+    
+    def _count_update(self, count_id: str, counters: Dict[str, int]) -> Dict[str, Any]:
+        names = {f'#c{index}': name for index, name in enumerate(counters)}
+        values = {f':c{index}': delta for index, delta in enumerate(counters.values())}
+        adds = ', '.join(f'#c{index} :c{index}' for index in range(len(counters)))
+        return {
+            'Key': {'id': count_id},
+            'UpdateExpression': f'ADD {adds} SET entity_type = :entity',
+            'ExpressionAttributeNames': names,
+            'ExpressionAttributeValues': {**values, ':entity': self.MEDIA_COUNT_ENTITY},
+        }
+    
+    def _count_updates(self, media: Dict[str, Any], delta: int) -> List[Dict[str, Any]]:
+        """Return TransactWriteItems updates that count a media item in or out."""
+        updates = []
+        for count_id, counters in self._count_deltas([media], delta).items():
+            update = self._count_update(count_id, counters)
+            updates.append({
+                'Update': {
+                    'TableName': self.table_name,
+                    'Key': self._serialize_item(update['Key']),
+                    'UpdateExpression': update['UpdateExpression'],
+                    'ExpressionAttributeNames': update['ExpressionAttributeNames'],
+                    'ExpressionAttributeValues': self._serialize_item(update['ExpressionAttributeValues']),
+                }
+            })
+        return updates
+    
+    def _adjust_media_counts(self, media_items: List[Dict[str, Any]], delta: int) -> None:
+        """Apply the counter changes for many media items, one update per counter."""
+        for count_id, counters in self._count_deltas(media_items, delta).items():
+            self.table.update_item(**self._count_update(count_id, counters))
+    
     def update(self, media_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """Update media item."""
         try:
@@ -235,6 +443,433 @@ class MediaRepository:
             self.table.delete_item(Key={'id': media_id})
         except Exception as e:
             raise Exception(f"Failed to delete media: {str(e)}")
+    
+    def set_processing_result(
+        self,
+        media_id: str,
+        status: str,
+        thumbnails: Optional[Dict[str, str]] = None,
+        fields: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Record the outcome of background processing on a media item.
+        
+        Args:
+            media_id: The media item
+            status: "ready" or "failed"
+            thumbnails: Thumbnail URLs by size
+            fields: Other attributes processing computed, such as
+                dimensions and placeholders
+        
+        Returns:
+            The updated item, or None if the media was deleted meanwhile
+        """
+        try:
+            update_expr = "SET #status = :status"
+            expr_attr_names = {'#status': 'status'}
+            expr_attr_values = {':status': status}
+            
+            if thumbnails:
+                update_expr += ", #thumbnails = :thumbnails"
+                expr_attr_names['#thumbnails'] = 'thumbnails'
+                expr_attr_values[':thumbnails'] = thumbnails
+            
+            for key, value in (fields or {}).items():
+                if value is not None:
+                    update_expr += f", #{key} = :{key}"
+                    expr_attr_names[f'#{key}'] = key
+                    expr_attr_values[f':{key}'] = value
+            
+            response = self.table.update_item(
+                Key={'id': media_id},
+                UpdateExpression=update_expr,
+                ConditionExpression='attribute_exists(id)',
+                ExpressionAttributeNames=expr_attr_names,
+                ExpressionAttributeValues=expr_attr_values,
+                ReturnValues='ALL_NEW'
+            )
+            return response.get('Attributes')
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return None
+        except Exception as e:
+            raise Exception(f"Failed to update media processing status: {str(e)}")
+    
+    def _serialize_item(self, item: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        return {key: self.serializer.serialize(value) for key, value in item.items()}
+    
+    def _content_hash_key(self, content_hash: str) -> Dict[str, Dict[str, Any]]:
+        return {'id': {'S': f"{self.CONTENT_HASH_PREFIX}{content_hash}"}}
+    
+    def _is_condition_cancelled(self, error: ClientError) -> bool:
+        """Return True if a transaction was cancelled by a failed condition."""
+        if error.response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+            return False
+        reasons = error.response.get('CancellationReasons', [])
+        return any(reason.get('Code') == 'ConditionalCheckFailed' for reason in reasons)
+    
+    def get_content_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the index entry for a stored file by its SHA-256.
+        
+        Entries hold the shared file's s3_key, mime_type and size, the
+        media_id of the record that first stored it, and ref_count, the
+        number of media records using the file.
+        """
+        try:
+            response = self.table.get_item(
+                Key={'id': f"{self.CONTENT_HASH_PREFIX}{content_hash}"},
+                ConsistentRead=True
+            )
+            return response.get('Item')
+        except Exception as e:
+            raise Exception(f"Failed to get content hash: {str(e)}")
+    
+    def create_with_content_hash(self, item: Dict[str, Any], content_hash: str) -> Dict[str, Any]:
+        """
+        Create a media item that stores new content, and index its file.
+        
+        If another upload indexed the same content first, the item is
+        created without a content hash and keeps its own file.
+        """
+        item = self._with_index_fields({**item, 'content_hash': content_hash})
+        hash_item = {
+            'id': f"{self.CONTENT_HASH_PREFIX}{content_hash}",
+            'entity_type': self.CONTENT_HASH_ENTITY,
+            'media_id': item['id'],
+            's3_key': item['s3_key'],
+            'mime_type': item['mime_type'],
+            'size': item['size'],
+            'ref_count': 1,
+        }
+        try:
+            self.client.transact_write_items(
+                TransactItems=[
+                    {'Put': {'TableName': self.table_name, 'Item': self._serialize_item(item)}},
+                    {
+                        'Put': {
+                            'TableName': self.table_name,
+                            'Item': self._serialize_item(hash_item),
+                            'ConditionExpression': 'attribute_not_exists(id)',
+                        }
+                    },
+                    *self._count_updates(item, 1),
+                ]
+            )
+            return item
+        except ClientError as e:
+            if not self._is_condition_cancelled(e):
+                raise Exception(f"Failed to create media: {str(e)}")
+        
+        item.pop('content_hash')
+        return self.create(item)
+    
+    def create_reference(self, item: Dict[str, Any], content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Create a media item that reuses an indexed file.
+        
+        Returns:
+            The created item, or None if the file's last reference was
+            deleted meanwhile
+        """
+        item = self._with_index_fields({**item, 'content_hash': content_hash})
+        try:
+            self.client.transact_write_items(
+                TransactItems=[
+                    {'Put': {'TableName': self.table_name, 'Item': self._serialize_item(item)}},
+                    {
+                        'Update': {
+                            'TableName': self.table_name,
+                            'Key': self._content_hash_key(content_hash),
+                            'UpdateExpression': 'ADD ref_count :one',
+                            'ConditionExpression': 'attribute_exists(id) AND s3_key = :s3_key',
+                            'ExpressionAttributeValues': {
+                                ':one': {'N': '1'},
+                                ':s3_key': {'S': item['s3_key']},
+                            },
+                        }
+                    },
+                    *self._count_updates(item, 1),
+                ]
+            )
+            return item
+        except ClientError as e:
+            if self._is_condition_cancelled(e):
+                return None
+            raise Exception(f"Failed to create media: {str(e)}")
+    
+    def delete_media(self, media: Dict[str, Any]) -> bool:
+        """
+        Delete a media item and release its reference to a shared file.
+        
+        Returns:
+            True if no other media item uses the item's S3 file, so the
+            caller should delete it
+        """
+        content_hash = media.get('content_hash')
+        if not content_hash:
+            self._delete_counted(media)
+            return True
+        
+        try:
+            self.client.transact_write_items(
+                TransactItems=[
+                    {
+                        'Delete': {
+                            'TableName': self.table_name,
+                            'Key': {'id': {'S': media['id']}},
+                        }
+                    },
+                    {
+                        'Update': {
+                            'TableName': self.table_name,
+                            'Key': self._content_hash_key(content_hash),
+                            'UpdateExpression': 'ADD ref_count :minus_one',
+                            'ConditionExpression': 'attribute_exists(id) AND s3_key = :s3_key',
+                            'ExpressionAttributeValues': {
+                                ':minus_one': {'N': '-1'},
+                                ':s3_key': {'S': media['s3_key']},
+                            },
+                        }
+                    },
+                    *self._count_updates(media, -1),
+                ]
+            )
+        except ClientError as e:
+            if not self._is_condition_cancelled(e):
+                raise Exception(f"Failed to delete media: {str(e)}")
+            # The index no longer tracks this file, so nothing else uses it
+            self._delete_counted(media)
+            return True
+        
+        return self._drop_content_hash(content_hash)
+    
+    def _delete_counted(self, media: Dict[str, Any]) -> None:
+        """Delete a media item and count it out."""
+        try:
+            self.client.transact_write_items(
+                TransactItems=[
+                    {
+                        'Delete': {
+                            'TableName': self.table_name,
+                            'Key': {'id': {'S': media['id']}},
+                        }
+                    },
+                    *self._count_updates(media, -1),
+                ]
+            )
+        except Exception as e:
+            raise Exception(f"Failed to delete media: {str(e)}")
+    
+    def _drop_content_hash(self, content_hash: str) -> bool:
+        """
+        Delete a content hash entry once nothing references it.
+        
+        The condition fails if an upload took a new reference in between,
+        which then keeps the file alive.
+        """
+        try:
+            self.table.delete_item(
+                Key={'id': f"{self.CONTENT_HASH_PREFIX}{content_hash}"},
+                ConditionExpression='ref_count <= :zero',
+                ExpressionAttributeValues={':zero': 0}
+            )
+            return True
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False
+        except Exception as e:
+            raise Exception(f"Failed to release content hash: {str(e)}")
+    
+    def _release_content_hash(self, content_hash: str, s3_key: str, count: int) -> bool:
+        """
+        Release count references to a shared file.
+        
+        Returns:
+            True if no media item uses the file any more
+        """
+        try:
+            response = self.table.update_item(
+                Key={'id': f"{self.CONTENT_HASH_PREFIX}{content_hash}"},
+                UpdateExpression='ADD ref_count :released',
+                ConditionExpression='attribute_exists(id) AND s3_key = :s3_key',
+                ExpressionAttributeValues={':released': -count, ':s3_key': s3_key},
+                ReturnValues='UPDATED_NEW'
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            # The index no longer tracks this file, so nothing else uses it
+            return True
+        except Exception as e:
+            raise Exception(f"Failed to release content hash: {str(e)}")
+        
+        if response['Attributes']['ref_count'] > 0:
+            return False
+        return self._drop_content_hash(content_hash)
+    
+    def get_by_ids(self, media_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get many media items with BatchGetItem, 100 keys per request.
+        
+        Missing ids are skipped; results are not in request order.
+        """
+        try:
+            items = self._batch_get(media_ids)
+            return [item for item in items if not item.get('entity_type')]
+        except Exception as e:
+            raise Exception(f"Failed to get media: {str(e)}")
+    
+    def _batch_get(self, ids: List[str]) -> List[Dict[str, Any]]:
+        items = []
+        for start in range(0, len(ids), self.BATCH_GET_SIZE):
+            keys = [{'id': item_id} for item_id in ids[start:start + self.BATCH_GET_SIZE]]
+            request = {self.table_name: {'Keys': keys, 'ConsistentRead': True}}
+            while request:
+                response = dynamodb.batch_get_item(RequestItems=request)
+                items.extend(response.get('Responses', {}).get(self.table_name, []))
+                request = response.get('UnprocessedKeys')
+        return items
+    
+    def delete_media_batch(self, media_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Delete many media items and release their references to shared files.
+        
+        Records are removed with BatchWriteItem, 25 per request. The media
+        counters and each shared file's reference count are then
+        decremented once for all of the deleted records. Records go first
+        so that an interruption can only leave a count too high, which
+        keeps a file rather than deleting one still in use.
+        
+        Returns:
+            One media item per S3 file that no media item uses any more
+        """
+        try:
+            with self.table.batch_writer() as batch:
+                for media in media_items:
+                    batch.delete_item(Key={'id': media['id']})
+            self._adjust_media_counts(media_items, -1)
+        except Exception as e:
+            raise Exception(f"Failed to delete media: {str(e)}")
+        
+        released = []
+        shared = {}
+        for media in media_items:
+            if media.get('content_hash'):
+                shared.setdefault((media['content_hash'], media['s3_key']), []).append(media)
+            else:
+                released.append(media)
+        
+        for (content_hash, s3_key), items in shared.items():
+            if self._release_content_hash(content_hash, s3_key, len(items)):
+                released.append(items[0])
+        return released
+    
+    def is_last_reference(self, media: Dict[str, Any]) -> bool:
+        """Return True if deleting this media item would delete its S3 file."""
+        content_hash = media.get('content_hash')
+        if not content_hash:
+            return True
+        stored = self.get_content_hash(content_hash)
+        return not stored or stored.get('s3_key') != media['s3_key'] or stored.get('ref_count', 0) <= 1
+    
+    def adjust_media_usage(self, content_id: str, added: Iterable[str], removed: Iterable[str]) -> None:
+        """
+        Record that a content item started or stopped using media files.
+        
+        Args:
+            content_id: The content item
+            added: File keys the content item now references
+            removed: File keys it no longer references
+        """
+        try:
+            for file_key in added:
+                self.table.update_item(
+                    Key={'id': f"{self.MEDIA_USAGE_PREFIX}{file_key}"},
+                    UpdateExpression='ADD content_ids :ids SET entity_type = :entity, file_key = :file_key',
+                    ExpressionAttributeValues={
+                        ':ids': {content_id},
+                        ':entity': self.MEDIA_USAGE_ENTITY,
+                        ':file_key': file_key,
+                    }
+                )
+            for file_key in removed:
+                self._remove_media_usage(file_key, content_id)
+        except Exception as e:
+            raise Exception(f"Failed to update media usage: {str(e)}")
+    
+    def _remove_media_usage(self, file_key: str, content_id: str) -> None:
+        key = {'id': f"{self.MEDIA_USAGE_PREFIX}{file_key}"}
+        try:
+            response = self.table.update_item(
+                Key=key,
+                UpdateExpression='DELETE content_ids :ids',
+                ConditionExpression='attribute_exists(id)',
+                ExpressionAttributeValues={':ids': {content_id}},
+                ReturnValues='ALL_NEW'
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return
+        
+        # DynamoDB drops empty sets; remove the entry once nothing uses the
+        # file, unless a reference was added in between
+        if not response['Attributes'].get('content_ids'):
+            try:
+                self.table.delete_item(
+                    Key=key,
+                    ConditionExpression='attribute_not_exists(content_ids)'
+                )
+            except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+                pass
+    
+    def get_media_usage(self, file_key: str) -> List[str]:
+        """Return the ids of content items that use a media file, sorted."""
+        try:
+            response = self.table.get_item(
+                Key={'id': f"{self.MEDIA_USAGE_PREFIX}{file_key}"},
+                ConsistentRead=True
+            )
+            return sorted(response.get('Item', {}).get('content_ids', []))
+        except Exception as e:
+            raise Exception(f"Failed to get media usage: {str(e)}")
+    
+    def get_media_usage_batch(self, file_keys: List[str]) -> Dict[str, List[str]]:
+        """Return {file_key: content ids} for the given files that are in use."""
+        try:
+            items = self._batch_get([f"{self.MEDIA_USAGE_PREFIX}{file_key}" for file_key in file_keys])
+            return {
+                item['file_key']: sorted(item['content_ids'])
+                for item in items
+                if item.get('content_ids')
+            }
+        except Exception as e:
+            raise Exception(f"Failed to get media usage: {str(e)}")
+    
+    def create_upload_session(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a multipart upload session keyed by its session_id."""
+        try:
+            item = {
+                **session,
+                'id': f"{self.UPLOAD_SESSION_PREFIX}{session['session_id']}",
+                'entity_type': self.UPLOAD_SESSION_ENTITY,
+            }
+            self.table.put_item(Item=item)
+            return item
+        except Exception as e:
+            raise Exception(f"Failed to create upload session: {str(e)}")
+    
+    def get_upload_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a multipart upload session by its session_id."""
+        try:
+            response = self.table.get_item(
+                Key={'id': f"{self.UPLOAD_SESSION_PREFIX}{session_id}"}
+            )
+            return response.get('Item')
+        except Exception as e:
+            raise Exception(f"Failed to get upload session: {str(e)}")
+    
+    def delete_upload_session(self, session_id: str) -> None:
+        """Delete a multipart upload session."""
+        try:
+            self.table.delete_item(Key={'id': f"{self.UPLOAD_SESSION_PREFIX}{session_id}"})
+        except Exception as e:
+            raise Exception(f"Failed to delete upload session: {str(e)}")
 
 
 class UserRepository:
@@ -401,12 +1036,14 @@ class PluginRepository:
     ) -> Dict[str, Any]:
         """List plugins with optional filtering."""
         try:
+            # The plugin config version item has an entity_type
             scan_params = {
-                'Limit': limit
+                'Limit': limit,
+                'FilterExpression': Attr('entity_type').not_exists()
             }
             
             if active_only:
-                scan_params['FilterExpression'] = Attr('active').eq(True)
+                scan_params['FilterExpression'] &= Attr('active').eq(True)
             
             if last_key:
                 scan_params['ExclusiveStartKey'] = last_key
@@ -458,14 +1095,52 @@ class PluginRepository:
 class CommentRepository:
     """Repository for comment management operations (Phase 2)."""
     
+    # Per-content thread version items (id THREAD#<content id>, created_at 0)
+    # count changes to a content item's approved comments, so cached comment
+    # trees can be checked with one GetItem. They have no content_id or status
+    # attribute and stay out of both indexes.
+    THREAD_PREFIX = 'THREAD#'
+    THREAD_ENTITY = 'comment_thread'
+    CONTENT_INDEX = 'content_id-created_at-index'
+    # Sparse index of comments migrated by scripts/migrate_comment_ids.py,
+    # keyed by their old UUID id
+    LEGACY_ID_INDEX = 'legacy_id-index'
+    # DynamoDB limits: keys per BatchGetItem, items per TransactWriteItems
+    BATCH_GET_SIZE = 100
+    TRANSACTION_SIZE = 100
+    # Comment statuses counted on their content item, and the counter of each.
+    # Counters change in the same transaction as the comments themselves.
+    COUNTERS = {
+        'approved': 'approved_comment_count',
+        'pending': 'pending_comment_count',
+    }
+    
     def __init__(self):
-        table_name = os.environ.get('COMMENTS_TABLE', 'cms-comments-dev')
-        self.table = dynamodb.Table(table_name)
+        self.table_name = os.environ.get('COMMENTS_TABLE', 'cms-comments-dev')
+        self.table = dynamodb.Table(self.table_name)
+        self.content_table_name = os.environ.get('CONTENT_TABLE', 'cms-content-dev')
+        self.content_table = dynamodb.Table(self.content_table_name)
     
     def create(self, item: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new comment."""
+        """
+        Create a new comment and count it on its content item.
+        
+        content_created_at, the content item's sort key, saves looking the
+        content item up and is kept on the comment for later moderation.
+        """
         try:
-            self.table.put_item(Item=item)
+            self._transact([
+                {
+                    'Put': {
+                        'TableName': self.table_name,
+                        'Item': item,
+                        'ConditionExpression': 'attribute_not_exists(id)',
+                    }
+                },
+                *self._counter_updates([(item, None, item.get('status'))]),
+            ])
+            if item.get('status') == 'approved':
+                self.bump_thread_version(item['content_id'])
             return item
         except Exception as e:
             raise Exception(f"Failed to create comment: {str(e)}")
@@ -473,11 +1148,17 @@ class CommentRepository:
     def get_by_id(self, comment_id: str, created_at: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
         Get comment by ID.
-        If created_at is not provided, will scan to find the comment (less efficient).
+        created_at is read from the id when not provided, so this is a single
+        GetItem. Comments with older UUID ids, not yet rewritten by
+        scripts/migrate_comment_ids.py, are found by querying their partition;
+        once rewritten, they are found by their legacy_id and returned under
+        their new id.
         """
         try:
+            if created_at is None:
+                created_at = get_comment_created_at(comment_id)
+            
             if created_at is not None:
-                # Efficient get with both keys
                 response = self.table.get_item(
                     Key={
                         'id': comment_id,
@@ -485,20 +1166,30 @@ class CommentRepository:
                     }
                 )
                 return response.get('Item')
-            else:
-                # Fallback: scan to find by ID only (less efficient)
-                # Use query on GSI if available, otherwise scan
-                import logging
-                logger = logging.getLogger()
-                logger.info(f"Scanning for comment_id: {comment_id}")
-                response = self.table.scan(
-                    FilterExpression=Attr('id').eq(comment_id),
-                    Limit=1,
-                    ConsistentRead=False  # Eventually consistent for better performance
-                )
-                items = response.get('Items', [])
-                logger.info(f"Scan response: Count={response.get('Count')}, Items={len(items)}")
-                return items[0] if items else None
+            
+            response = self.table.query(
+                KeyConditionExpression=Key('id').eq(comment_id),
+                Limit=1
+            )
+            items = response.get('Items', [])
+            if items:
+                return items[0]
+            
+            response = self.table.query(
+                IndexName=self.LEGACY_ID_INDEX,
+                KeyConditionExpression=Key('legacy_id').eq(comment_id),
+                Limit=1
+            )
+            keys = response.get('Items', [])
+            if not keys:
+                return None
+            response = self.table.get_item(
+                Key={
+                    'id': keys[0]['id'],
+                    'created_at': keys[0]['created_at']
+                }
+            )
+            return response.get('Item')
         except Exception as e:
             raise Exception(f"Failed to get comment: {str(e)}")
     
@@ -526,6 +1217,48 @@ class CommentRepository:
         except Exception as e:
             raise Exception(f"Failed to list comments by content: {str(e)}")
     
+    def list_approved_by_content(self, content_id: str) -> List[Dict[str, Any]]:
+        """Return every approved comment of a content item, oldest first."""
+        try:
+            items = []
+            query_params = {
+                'IndexName': self.CONTENT_INDEX,
+                'KeyConditionExpression': Key('content_id').eq(content_id),
+                'FilterExpression': Attr('status').eq('approved'),
+                'ScanIndexForward': True,
+            }
+            while True:
+                response = self.table.query(**query_params)
+                items.extend(response.get('Items', []))
+                if 'LastEvaluatedKey' not in response:
+                    return items
+                query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        except Exception as e:
+            raise Exception(f"Failed to list comments by content: {str(e)}")
+    
+    def get_thread_version(self, content_id: str) -> int:
+        """Return the approved comments version of a content item."""
+        try:
+            response = self.table.get_item(
+                Key={'id': f"{self.THREAD_PREFIX}{content_id}", 'created_at': 0}
+            )
+            return int(response.get('Item', {}).get('version', 0))
+        except Exception as e:
+            raise Exception(f"Failed to get comment thread version: {str(e)}")
+    
+    def bump_thread_version(self, content_id: str) -> int:
+        """Record a change to a content item's approved comments."""
+        try:
+            response = self.table.update_item(
+                Key={'id': f"{self.THREAD_PREFIX}{content_id}", 'created_at': 0},
+                UpdateExpression='SET entity_type = :entity ADD version :one',
+                ExpressionAttributeValues={':entity': self.THREAD_ENTITY, ':one': 1},
+                ReturnValues='UPDATED_NEW'
+            )
+            return int(response['Attributes']['version'])
+        except Exception as e:
+            raise Exception(f"Failed to bump comment thread version: {str(e)}")
+    
     def list_by_status(self, status: str, limit: int = 50, last_key: Optional[Dict] = None) -> Dict[str, Any]:
         """List comments by status for moderation."""
         try:
@@ -550,28 +1283,26 @@ class CommentRepository:
     def update(self, comment_id: str, updates: Dict[str, Any], created_at: Optional[int] = None) -> Dict[str, Any]:
         """
         Update comment (typically for moderation).
-        If created_at is not provided, will first fetch the comment to get it.
+        If created_at is not provided it is read from the id, or the comment
+        is fetched first for older ids.
+        
+        A status change reads the comment and moves it between the counters
+        of its content item in one transaction, which fails if the status
+        changed in the meantime.
         """
         try:
-            # If created_at not provided, fetch it first
+            if 'status' in updates:
+                return self._moderate(comment_id, updates, created_at)
+            
+            if created_at is None:
+                created_at = get_comment_created_at(comment_id)
             if created_at is None:
                 comment = self.get_by_id(comment_id)
                 if not comment:
                     raise Exception(f"Comment {comment_id} not found")
                 created_at = comment['created_at']
             
-            update_expr_parts = []
-            expr_attr_names = {}
-            expr_attr_values = {}
-            
-            for key, value in updates.items():
-                attr_name = f"#{key}"
-                attr_value = f":{key}"
-                update_expr_parts.append(f"{attr_name} = {attr_value}")
-                expr_attr_names[attr_name] = key
-                expr_attr_values[attr_value] = value
-            
-            update_expr = "SET " + ", ".join(update_expr_parts)
+            update_expr, expr_attr_names, expr_attr_values = self._set_expression(updates)
             
             response = self.table.update_item(
                 Key={
@@ -579,32 +1310,252 @@ class CommentRepository:
                     'created_at': created_at
                 },
                 UpdateExpression=update_expr,
+                ConditionExpression='attribute_exists(id)',
                 ExpressionAttributeNames=expr_attr_names,
                 ExpressionAttributeValues=expr_attr_values,
                 ReturnValues='ALL_NEW'
             )
-            return response.get('Attributes')
+            comment = response.get('Attributes')
+            # Edits to approved comments change the cached tree
+            if comment and comment.get('content_id') and comment.get('status') == 'approved':
+                self.bump_thread_version(comment['content_id'])
+            return comment
         except Exception as e:
             raise Exception(f"Failed to update comment: {str(e)}")
     
+    def _moderate(self, comment_id: str, updates: Dict[str, Any], created_at: Optional[int]) -> Dict[str, Any]:
+        comment = self.get_by_id(comment_id, created_at)
+        if not comment:
+            raise Exception(f"Comment {comment_id} not found")
+        
+        self._transact([
+            self._comment_update(comment, updates),
+            *self._counter_updates([(comment, comment.get('status'), updates['status'])]),
+        ])
+        
+        # Moderation can add or remove the comment from the approved tree
+        if comment.get('content_id') and 'approved' in (comment.get('status'), updates['status']):
+            self.bump_thread_version(comment['content_id'])
+        return {**comment, **updates}
+    
     def delete(self, comment_id: str, created_at: Optional[int] = None) -> None:
         """
-        Delete comment.
-        If created_at is not provided, will first fetch the comment to get it.
+        Delete comment and uncount it from its content item.
+        If created_at is not provided it is read from the id, or the comment
+        is found by querying its partition for older ids.
         """
         try:
-            # If created_at not provided, fetch it first
-            if created_at is None:
-                comment = self.get_by_id(comment_id)
-                if not comment:
-                    raise Exception(f"Comment {comment_id} not found")
-                created_at = comment['created_at']
+            comment = self.get_by_id(comment_id, created_at)
+            if not comment:
+                return
             
-            self.table.delete_item(
-                Key={
-                    'id': comment_id,
-                    'created_at': created_at
-                }
-            )
+            self._transact([
+                self._comment_delete(comment),
+                *self._counter_updates([(comment, comment.get('status'), None)]),
+            ])
+            if comment.get('status') == 'approved':
+                self.bump_thread_version(comment['content_id'])
         except Exception as e:
             raise Exception(f"Failed to delete comment: {str(e)}")
+    
+    def get_by_ids(self, comment_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get many comments with BatchGetItem, 100 keys per request.
+        
+        Comments with older UUID ids are read one at a time, and migrated ones
+        are returned under their new id (see get_by_id). Missing ids are
+        skipped; each comment is returned once, not in request order.
+        """
+        try:
+            keys = []
+            items = []
+            for comment_id in comment_ids:
+                created_at = get_comment_created_at(comment_id)
+                if created_at is not None:
+                    keys.append({'id': comment_id, 'created_at': created_at})
+                else:
+                    comment = self.get_by_id(comment_id)
+                    if comment:
+                        items.append(comment)
+            
+            for start in range(0, len(keys), self.BATCH_GET_SIZE):
+                request = {self.table_name: {'Keys': keys[start:start + self.BATCH_GET_SIZE]}}
+                while request:
+                    response = dynamodb.batch_get_item(RequestItems=request)
+                    items.extend(response.get('Responses', {}).get(self.table_name, []))
+                    request = response.get('UnprocessedKeys')
+            return list({item['id']: item for item in items}.values())
+        except Exception as e:
+            raise Exception(f"Failed to get comments: {str(e)}")
+    
+    def moderate_batch(self, comments: List[Dict[str, Any]], updates: Dict[str, Any]) -> None:
+        """
+        Apply the same updates, e.g. a new status, to many comments.
+        
+        Comments are updated in TransactWriteItems chunks of up to 100 items,
+        each update conditional on the comment still having the status it was
+        read with, together with the counters of their content items. The
+        thread version of every content item whose approved comments changed
+        is bumped once.
+        """
+        try:
+            new_status = updates.get('status')
+            for chunk in self._transaction_chunks(comments):
+                self._transact([
+                    *(self._comment_update(comment, updates) for comment in chunk),
+                    *self._counter_updates([
+                        (comment, comment.get('status'), new_status or comment.get('status'))
+                        for comment in chunk
+                    ]),
+                ])
+            
+            # Approved comments changed, or comments joined the approved tree
+            self._bump_thread_versions([
+                comment for comment in comments
+                if comment.get('status') == 'approved' or new_status == 'approved'
+            ])
+        except Exception as e:
+            raise Exception(f"Failed to update comments: {str(e)}")
+    
+    def delete_batch(self, comments: List[Dict[str, Any]]) -> None:
+        """
+        Delete many comments.
+        
+        Deletes run in TransactWriteItems chunks like moderate_batch, so
+        counters never miss a deleted comment. The thread version of every
+        content item that lost approved comments is bumped once.
+        """
+        try:
+            for chunk in self._transaction_chunks(comments):
+                self._transact([
+                    *(self._comment_delete(comment) for comment in chunk),
+                    *self._counter_updates([
+                        (comment, comment.get('status'), None) for comment in chunk
+                    ]),
+                ])
+            self._bump_thread_versions([
+                comment for comment in comments if comment.get('status') == 'approved'
+            ])
+        except Exception as e:
+            raise Exception(f"Failed to delete comments: {str(e)}")
+    
+    def _bump_thread_versions(self, comments: List[Dict[str, Any]]) -> None:
+        for content_id in sorted({comment['content_id'] for comment in comments if comment.get('content_id')}):
+            self.bump_thread_version(content_id)
+    
+    def _set_expression(self, updates: Dict[str, Any]):
+        names = {f"#{key}": key for key in updates}
+        values = {f":{key}": value for key, value in updates.items()}
+        return "SET " + ", ".join(f"#{key} = :{key}" for key in updates), names, values
+    
+    def _comment_update(self, comment: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+        update_expr, names, values = self._set_expression(updates)
+        return {
+            'Update': {
+                'TableName': self.table_name,
+                'Key': {'id': comment['id'], 'created_at': comment['created_at']},
+                'UpdateExpression': update_expr,
+                'ConditionExpression': '#status = :expected_status',
+                'ExpressionAttributeNames': {**names, '#status': 'status'},
+                'ExpressionAttributeValues': {**values, ':expected_status': comment.get('status')},
+            }
+        }
+    
+    def _comment_delete(self, comment: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'Delete': {
+                'TableName': self.table_name,
+                'Key': {'id': comment['id'], 'created_at': comment['created_at']},
+                'ConditionExpression': '#status = :expected_status',
+                'ExpressionAttributeNames': {'#status': 'status'},
+                'ExpressionAttributeValues': {':expected_status': comment.get('status')},
+            }
+        }
+    
+    def _content_key(self, comment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the key of a comment's content item, or None if it is gone."""
+        if comment.get('content_created_at') is not None:
+            return {'id': comment['content_id'], 'created_at': comment['content_created_at']}
+        # Comments created before content_created_at was stored
+        response = self.content_table.query(
+            KeyConditionExpression=Key('id').eq(comment['content_id']),
+            ProjectionExpression='id, created_at',
+            Limit=1
+        )
+        items = response.get('Items', [])
+        return {'id': items[0]['id'], 'created_at': items[0]['created_at']} if items else None
+    
+    def _counter_updates(self, changes: List[tuple]) -> List[Dict[str, Any]]:
+        """
+        Return the content item updates for comment status changes.
+        
+        changes holds (comment, old status, new status) tuples, with None as
+        the old status of a new comment and the new status of a deleted one.
+        Deltas are summed into one ADD per content item.
+        """
+        keys = {}
+        deltas = {}
+        for comment, old_status, new_status in changes:
+            content_id = comment.get('content_id')
+            if not content_id or old_status == new_status:
+                continue
+            if content_id not in keys:
+                keys[content_id] = self._content_key(comment)
+            counters = deltas.setdefault(content_id, {})
+            for status, delta in ((old_status, -1), (new_status, 1)):
+                if status in self.COUNTERS:
+                    name = self.COUNTERS[status]
+                    counters[name] = counters.get(name, 0) + delta
+        
+        transact_items = []
+        for content_id, counters in deltas.items():
+            counters = {name: delta for name, delta in counters.items() if delta}
+            if not counters or keys[content_id] is None:
+                continue
+            transact_items.append({
+                'Update': {
+                    'TableName': self.content_table_name,
+                    'Key': keys[content_id],
+                    'UpdateExpression': 'ADD ' + ', '.join(f"#{name} :{name}" for name in counters),
+                    'ConditionExpression': 'attribute_exists(id)',
+                    'ExpressionAttributeNames': {f"#{name}": name for name in counters},
+                    'ExpressionAttributeValues': {f":{name}": delta for name, delta in counters.items()},
+                }
+            })
+        return transact_items
+    
+    def _transaction_chunks(self, comments: List[Dict[str, Any]]):
+        """Split comments into chunks that fit a transaction with their counters."""
+        chunk = []
+        content_ids = set()
+        for comment in sorted(comments, key=lambda comment: comment.get('content_id', '')):
+            if len(chunk) + len(content_ids | {comment.get('content_id')}) >= self.TRANSACTION_SIZE:
+                yield chunk
+                chunk = []
+                content_ids = set()
+            chunk.append(comment)
+            content_ids.add(comment.get('content_id'))
+        if chunk:
+            yield chunk
+    
+    def _transact(self, transact_items: List[Dict[str, Any]]) -> None:
+        """
+        Run TransactWriteItems. Counter updates of deleted content items fail
+        their condition; they are dropped and the rest is written.
+        """
+        while True:
+            try:
+                dynamodb.meta.client.transact_write_items(TransactItems=transact_items)
+                return
+            except ClientError as e:
+                failed = {
+                    index for index, reason in enumerate(e.response.get('CancellationReasons', []))
+                    if reason.get('Code') == 'ConditionalCheckFailed'
+                }
+                counters = {
+                    index for index in failed
+                    if transact_items[index].get('Update', {}).get('TableName') == self.content_table_name
+                }
+                if not failed or failed != counters:
+                    raise
+                transact_items = [item for index, item in enumerate(transact_items) if index not in counters]
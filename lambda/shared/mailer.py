@@ -0,0 +1,233 @@
+"""
+Outbound email queue.
+
+Request handlers queue emails instead of calling SES, so their latency does
+not include SES round trips and an SES throttle does not fail the request.
+Jobs go to the SQS queue named by EMAIL_QUEUE_URL and are sent by the mailer
+worker (lambda/mailer/worker.py); without a queue URL the local queue sends
+them in-process.
+
+Jobs name a template from TEMPLATES and carry its arguments, so messages
+stay small and the worker renders them:
+
+- {"type": "email", "template", "to": [addresses], "data"} is sent as is;
+- {"type": "notification", "template", "to": address, "data"} is coalesced:
+  notifications for one recipient and template in the same worker batch go
+  out as a single digest rendered by DIGESTS.
+
+Emails are sent through a transport: SES, or with EMAIL_TRANSPORT=local a
+LocalTransport that keeps sent messages in memory and, with EMAIL_OUTBOX_DIR
+set, writes each one to a JSON file.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from .email import (
+    render_comment_digest_email,
+    render_comment_notification_email,
+    render_password_reset_email,
+    render_user_registration_email,
+    render_welcome_email,
+    send_email,
+)
+from .queue import get_queue
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES = {
+    'welcome': render_welcome_email,
+    'password_reset': render_password_reset_email,
+    'user_registration': render_user_registration_email,
+    'comment_notification': render_comment_notification_email,
+}
+
+# Templates that can be queued as notifications, and their digest renderers
+DIGESTS = {
+    'comment_notification': render_comment_digest_email,
+}
+
+# Concurrent SES calls per worker, kept under the account's sending rate
+SEND_CONCURRENCY = int(os.environ.get('EMAIL_SEND_CONCURRENCY', '4'))
+
+# Throttled sends are retried with exponential backoff and full jitter;
+# after the last attempt the job goes back to the queue
+SEND_ATTEMPTS = 4
+BACKOFF_BASE = 0.2  # seconds
+BACKOFF_MAX = 5.0  # seconds
+RETRYABLE_ERRORS = {
+    'Throttling',
+    'ThrottlingException',
+    'ServiceUnavailable',
+    'InternalFailure',
+    'RequestTimeout',
+}
+
+
+class SesTransport:
+    """Sends rendered emails with SES."""
+
+    def send(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        return send_email(
+            to_addresses=message['to'],
+            subject=message['subject'],
+            body_text=message['body_text'],
+            body_html=message.get('body_html'),
+        )
+
+
+class LocalTransport:
+    """Stand-in for SES in development and tests.
+
+    Sent messages are kept in memory and, if outbox_dir is given, written
+    there as one JSON file each.
+    """
+
+    def __init__(self, outbox_dir: Optional[str] = None):
+        self.outbox_dir = outbox_dir
+        self.sent: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def send(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        message_id = f"local-{uuid.uuid4().hex}"
+        with self._lock:
+            self.sent.append(message)
+
+        if self.outbox_dir:
+            os.makedirs(self.outbox_dir, exist_ok=True)
+            path = os.path.join(self.outbox_dir, f"{int(time.time() * 1000)}-{message_id}.json")
+            with open(path, 'w') as f:
+                json.dump({'MessageId': message_id, **message}, f, indent=2)
+
+        return {'MessageId': message_id}
+
+
+def _get_transport():
+    if os.environ.get('EMAIL_TRANSPORT') == 'local':
+        return LocalTransport(os.environ.get('EMAIL_OUTBOX_DIR') or None)
+    return SesTransport()
+
+
+transport = _get_transport()
+_executor = ThreadPoolExecutor(max_workers=SEND_CONCURRENCY)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Return whether a failed send may succeed later."""
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') in RETRYABLE_ERRORS
+    return isinstance(error, BotoCoreError)
+
+
+def send_with_retries(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Send one rendered email, backing off while SES throttles."""
+    for attempt in range(SEND_ATTEMPTS):
+        try:
+            return transport.send(message)
+        except Exception as e:
+            if attempt == SEND_ATTEMPTS - 1 or not is_retryable(e):
+                raise
+        time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+
+
+def render(template: str, data: Dict[str, Any]) -> Dict[str, str]:
+    """Render a template to subject, body_text and body_html."""
+    return TEMPLATES[template](**data)
+
+
+def process_email_jobs(jobs: Sequence[Tuple[str, Dict[str, Any]]]) -> List[str]:
+    """
+    Render and send a batch of email jobs.
+
+    Args:
+        jobs: (job id, job) pairs, e.g. SQS message ids and bodies
+
+    Returns:
+        Ids of jobs whose send failed and may succeed on retry. Jobs that
+        cannot be rendered or that SES rejects are logged and dropped.
+    """
+    messages: List[Tuple[List[str], Dict[str, Any]]] = []
+    notifications: Dict[Tuple[str, str], List[Tuple[str, Dict[str, Any]]]] = {}
+
+    for job_id, job in jobs:
+        try:
+            if job.get('type') == 'notification':
+                notifications.setdefault((job['to'], job['template']), []).append((job_id, job['data']))
+            else:
+                messages.append(([job_id], {'to': job['to'], **render(job['template'], job['data'])}))
+        except Exception as e:
+            logger.error(f"Dropping email job {job_id}: {str(e)}")
+
+    for (recipient, template), items in notifications.items():
+        job_ids = [job_id for job_id, _ in items]
+        try:
+            if len(items) == 1:
+                content = render(template, items[0][1])
+            else:
+                content = DIGESTS[template]([data for _, data in items])
+            messages.append((job_ids, {'to': [recipient], **content}))
+        except Exception as e:
+            logger.error(f"Dropping notification jobs {job_ids}: {str(e)}")
+
+    failed = []
+    futures = [(job_ids, _executor.submit(send_with_retries, message)) for job_ids, message in messages]
+    for job_ids, future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            if is_retryable(e):
+                logger.warning(f"Email send failed, retrying jobs {job_ids} later: {str(e)}")
+                failed.extend(job_ids)
+            else:
+                logger.error(f"Email rejected, dropping jobs {job_ids}: {str(e)}")
+
+    return failed
+
+
+def _send_local(job: Dict[str, Any]) -> None:
+    if process_email_jobs([('local', job)]):
+        raise Exception('Email send failed')
+
+
+email_queue = get_queue('EMAIL_QUEUE_URL', _send_local)
+
+
+def queue_email(template: str, to: List[str], **data: Any) -> None:
+    """
+    Queue one email.
+
+    Args:
+        template: Template name from TEMPLATES
+        to: Recipient addresses
+        **data: Template arguments
+    """
+    if template not in TEMPLATES:
+        raise ValueError(f"Unknown email template: {template}")
+    email_queue.send({'type': 'email', 'template': template, 'to': list(to), 'data': data})
+
+
+def queue_notification(template: str, recipients: List[str], **data: Any) -> None:
+    """
+    Queue a notification for each recipient, to be sent singly or as part
+    of a digest.
+
+    Args:
+        template: Template name from DIGESTS
+        recipients: Recipient addresses
+        **data: Template arguments
+    """
+    if template not in DIGESTS:
+        raise ValueError(f"Unknown notification template: {template}")
+    email_queue.send_batch([
+        {'type': 'notification', 'template': template, 'to': recipient, 'data': data}
+        for recipient in recipients
+    ])
@@ -0,0 +1,149 @@
+"""
+Media URLs stored on media and content records.
+
+Records keep the S3 key of each media object next to its URL, and the URL is
+resolved for the current CDN when the record is written, so read paths return
+stored URLs as they are. Keys are recovered only from URLs that point at our
+media: bare keys, S3 virtual-hosted, regional and path-style URLs of the media
+bucket, and URLs on the given CDN hosts. Any other URL, such as an external
+image whose path happens to contain uploads/, is left as it is.
+
+Fields resolved on content: featured_image (with featured_image_key) and the
+s3_key, s3_url and thumbnails of each metadata.media entry. On media records:
+s3_url (from s3_key) and thumbnails.
+"""
+
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+# Top-level prefixes of the objects the media pipeline writes
+MEDIA_KEY_PREFIXES = ('uploads', 'thumbnails', 'variants')
+
+# s3.amazonaws.com, s3.<region>.amazonaws.com and the older
+# s3-<region>.amazonaws.com, with the bucket in front when virtual-hosted
+S3_HOST_PATTERN = re.compile(r'^(?:(?P<bucket>.+)\.)?s3(?:[.-][a-z0-9-]+)?\.amazonaws\.com$')
+
+
+def _path_parts(path: str) -> List[str]:
+    return [part for part in path.split('/') if part]
+
+
+def get_media_object_key(value: str, bucket: str, cdn_urls: Iterable[str] = ()) -> Optional[str]:
+    """
+    Return the S3 key of a media URL or key.
+
+    Args:
+        value: Stored URL or S3 key
+        bucket: Media bucket name
+        cdn_urls: Base URLs of the CDNs that have served the bucket
+
+    Returns:
+        The key, e.g. "uploads/abc.jpg", or None if the value is not one of
+        our media objects
+    """
+    if not isinstance(value, str) or not value:
+        return None
+
+    if '://' not in value:
+        parts = _path_parts(value.split('?', 1)[0])
+    else:
+        parsed = urlparse(value)
+        host = (parsed.hostname or '').lower()
+        parts = _path_parts(parsed.path)
+        s3_host = S3_HOST_PATTERN.match(host)
+        if s3_host and s3_host.group('bucket'):
+            if s3_host.group('bucket') != bucket:
+                return None
+        elif s3_host:
+            # Path-style S3 URLs put the bucket first
+            if not parts or parts[0] != bucket:
+                return None
+            parts = parts[1:]
+        elif host not in {(urlparse(url).hostname or '').lower() for url in cdn_urls if url}:
+            return None
+
+    if len(parts) < 2 or parts[0] not in MEDIA_KEY_PREFIXES:
+        return None
+    return '/'.join(parts)
+
+
+def _resolve_thumbnails(
+    thumbnails: Any,
+    object_url: Callable[[str], str],
+    bucket: str,
+    cdn_urls: Iterable[str]
+) -> Any:
+    if not isinstance(thumbnails, dict):
+        return thumbnails
+    resolved = {}
+    for size, url in thumbnails.items():
+        key = get_media_object_key(url, bucket, cdn_urls)
+        resolved[size] = object_url(key) if key else url
+    return resolved
+
+
+def resolve_content_media_urls(
+    content: Dict[str, Any],
+    object_url: Callable[[str], str],
+    bucket: str,
+    cdn_urls: Iterable[str] = ()
+) -> Dict[str, Any]:
+    """
+    Resolve the media URLs of a content item, or of an update to one.
+
+    Only the fields present are resolved, so an update that does not touch
+    featured_image or metadata is returned unchanged. featured_image_key is
+    cleared when the featured image is not one of our media objects.
+
+    Args:
+        content: Content item or update
+        object_url: Returns the URL to store for an S3 key
+        bucket: Media bucket name
+        cdn_urls: Base URLs of the CDNs that have served the bucket
+
+    Returns:
+        A copy of content with resolved URLs
+    """
+    cdn_urls = tuple(cdn_urls)
+    resolved = dict(content)
+
+    if 'featured_image' in content:
+        key = get_media_object_key(content['featured_image'], bucket, cdn_urls)
+        resolved['featured_image_key'] = key or ''
+        if key:
+            resolved['featured_image'] = object_url(key)
+
+    metadata = content.get('metadata')
+    media_items = metadata.get('media') if isinstance(metadata, dict) else None
+    if isinstance(media_items, list):
+        resolved_items = []
+        for item in media_items:
+            if isinstance(item, dict):
+                key = (get_media_object_key(item.get('s3_key'), bucket, cdn_urls)
+                       or get_media_object_key(item.get('s3_url'), bucket, cdn_urls))
+                item = dict(item)
+                if key:
+                    item['s3_key'] = key
+                    item['s3_url'] = object_url(key)
+                if 'thumbnails' in item:
+                    item['thumbnails'] = _resolve_thumbnails(item['thumbnails'], object_url, bucket, cdn_urls)
+            resolved_items.append(item)
+        resolved['metadata'] = {**metadata, 'media': resolved_items}
+
+    return resolved
+
+
+def resolve_media_record_urls(
+    media: Dict[str, Any],
+    object_url: Callable[[str], str],
+    bucket: str,
+    cdn_urls: Iterable[str] = ()
+) -> Dict[str, Any]:
+    """Return a copy of a media record with its s3_url and thumbnails resolved."""
+    resolved = dict(media)
+    if media.get('s3_key'):
+        resolved['s3_url'] = object_url(media['s3_key'])
+    if 'thumbnails' in media:
+        resolved['thumbnails'] = _resolve_thumbnails(media['thumbnails'], object_url, bucket, tuple(cdn_urls))
+    return resolved
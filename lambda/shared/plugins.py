@@ -3,83 +3,471 @@ Plugin manager for executing hooks and filters.
 Provides functionality for plugin system integration.
 """
 import boto3
+import copy
+import importlib.util
 import json
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Callable, Iterable, List, Dict, Any, Optional
 import os
 
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+# Seconds the Lambda client waits for an invoke. Hook calls are abandoned
+# after their own timeouts; this bounds how long abandoned invokes linger.
+LAMBDA_READ_TIMEOUT = 10
+
 dynamodb = boto3.resource('dynamodb')
-lambda_client = boto3.client('lambda')
+# No retries: a failed or slow plugin counts against its circuit breaker
+# instead of being called again within the same request
+lambda_client = boto3.client('lambda', config=Config(
+    connect_timeout=1,
+    read_timeout=LAMBDA_READ_TIMEOUT,
+    retries={'mode': 'standard', 'max_attempts': 1}
+))
+
+# The plugin config version item lives in the plugins table. Installing,
+# activating, deactivating or configuring a plugin bumps its version, which
+# tells warm containers to rebuild their hook registries.
+CONFIG_ITEM_ID = 'CONFIG#plugins'
+CONFIG_ENTITY = 'plugin_config'
+
+# Seconds a hook registry is used before its version is checked again
+REGISTRY_CHECK_INTERVAL = 30
+# Upper bound on a registry's age, should a version bump have failed
+REGISTRY_MAX_AGE = 900
+
+# Trusted plugins run inside the calling function instead of in their own
+# Lambda: their handler.py is loaded from TRUSTED_PLUGIN_DIR/<plugin id>/,
+# which the trusted plugins layer provides. Other plugins, and trusted ones
+# whose handler cannot be loaded, are invoked through Lambda.
+TRUSTED_PLUGINS = frozenset(
+    plugin_id.strip()
+    for plugin_id in os.environ.get('TRUSTED_PLUGINS', '').split(',')
+    if plugin_id.strip()
+)
+TRUSTED_PLUGIN_DIR = os.environ.get('TRUSTED_PLUGIN_DIR', '/opt')
+
+RUNTIME_LAMBDA = 'lambda'
+RUNTIME_IN_PROCESS = 'in_process'
+
+# Hook registrations are filters, which transform the data and run one after
+# another in priority order, or actions, which only observe it. Actions run
+# after the filters, are dispatched concurrently and Lambda actions are
+# invoked asynchronously, so their number does not add up in request latency.
+HOOK_FILTER = 'filter'
+HOOK_ACTION = 'action'
+HOOK_TYPES = (HOOK_FILTER, HOOK_ACTION)
+
+# Actions dispatched at once per container
+ACTION_CONCURRENCY = 8
+_action_executor = ThreadPoolExecutor(max_workers=ACTION_CONCURRENCY, thread_name_prefix='plugin-action')
+
+# Time limit of one hook call, unless the hook sets timeout_ms
+IN_PROCESS_TIMEOUT_MS = 1000
+LAMBDA_TIMEOUT_MS = 3000
+
+# Latency budget of a whole hook. Each call gets at most what is left of it,
+# and filters reached after it is spent are skipped. Render hooks run on
+# every content read, so they get less.
+HOOK_BUDGET_MS = int(os.environ.get('PLUGIN_HOOK_BUDGET_MS', '3000'))
+HOOK_BUDGETS = {
+    'content_render_post': 1000,
+    'content_render_page': 1000,
+    'content_render_gallery': 1000,
+    'content_render_project': 1000,
+}
+
+# Each plugin has a circuit breaker, kept in a BREAKER#<plugin id> item in
+# the plugins table so all containers share it. BREAKER_THRESHOLD failed or
+# slow calls within one BREAKER_WINDOW open it for BREAKER_COOLDOWN seconds,
+# during which the plugin is skipped. After the cooldown, calls go through
+# again: a failure while the window's count stands reopens the breaker and
+# a success closes it.
+BREAKER_PREFIX = 'BREAKER#'
+BREAKER_ENTITY = 'plugin_breaker'
+BREAKER_THRESHOLD = 5
+BREAKER_WINDOW = 60  # seconds
+BREAKER_COOLDOWN = 30  # seconds
+# Seconds a container uses a breaker state before reading it again
+BREAKER_CHECK_INTERVAL = 10
+# Successful calls slower than this fraction of their timeout count as failures
+SLOW_CALL_FRACTION = 0.5
+
+# plugin id -> handler function, or None if it could not be loaded
+_trusted_handlers: Dict[str, Optional[Callable]] = {}
+
+
+class PluginCallError(Exception):
+    """A plugin function raised, or responded with other than statusCode 200."""
+
+
+class PluginEventError(Exception):
+    """Hook data could not be serialized for a plugin; not the plugin's fault."""
+
+
+def _json_default(value: Any) -> Any:
+    # Hook data often comes from DynamoDB records, whose numbers are Decimals
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_event(event: Dict[str, Any]) -> str:
+    try:
+        return json.dumps(event, default=_json_default)
+    except (TypeError, ValueError) as e:
+        raise PluginEventError(f"Cannot serialize {event.get('hook')} hook data: {e}") from e
+
+
+def _plugins_table():
+    return dynamodb.Table(os.environ.get('PLUGINS_TABLE', 'cms-plugins-dev'))
+
+
+def bump_plugin_config_version() -> int:
+    """Record a change to installed plugins, their hooks or their settings."""
+    try:
+        response = _plugins_table().update_item(
+            Key={'id': CONFIG_ITEM_ID},
+            UpdateExpression='SET entity_type = :entity ADD version :one',
+            ExpressionAttributeValues={':entity': CONFIG_ENTITY, ':one': 1},
+            ReturnValues='UPDATED_NEW'
+        )
+        return int(response['Attributes']['version'])
+    except Exception as e:
+        raise Exception(f"Failed to bump plugin config version: {str(e)}")
+
+
+def load_trusted_plugin(plugin_id: str) -> Optional[Callable]:
+    """
+    Return the handler of a trusted plugin, loading it on first use.
+    
+    Returns None if the plugin is not trusted or its handler cannot be
+    loaded, in which case it runs in its own Lambda.
+    """
+    if plugin_id not in TRUSTED_PLUGINS:
+        return None
+    if plugin_id not in _trusted_handlers:
+        handler = None
+        path = os.path.join(TRUSTED_PLUGIN_DIR, plugin_id, 'handler.py')
+        if os.path.isfile(path):
+            try:
+                module_name = f"cms_plugin_{plugin_id.replace('-', '_')}"
+                spec = importlib.util.spec_from_file_location(module_name, path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                handler = module.handler
+            except Exception as e:
+                print(f"Error loading trusted plugin {plugin_id}: {e}")
+        _trusted_handlers[plugin_id] = handler
+    return _trusted_handlers[plugin_id]
+
+
+class PluginContext:
+    """Lambda context stand-in for in-process plugin calls."""
+    
+    def __init__(self, plugin_id: str, timeout_ms: int):
+        self.function_name = plugin_id
+        self._deadline = time.monotonic() + timeout_ms / 1000
+    
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def _run_with_timeout(target: Callable[[], Any], timeout_ms: int, name: str) -> Any:
+    """
+    Run target on its own daemon thread and return its result.
+    
+    Raises TimeoutError if it runs longer than timeout_ms; the thread is
+    then abandoned rather than waited for.
+    """
+    outcome: Dict[str, Any] = {}
+    
+    def run():
+        try:
+            outcome['result'] = target()
+        except Exception as e:
+            outcome['error'] = e
+    
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    thread.join(timeout_ms / 1000)
+    if thread.is_alive():
+        raise TimeoutError(f"exceeded its {timeout_ms} ms timeout")
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('result')
+
+
+def _is_conditional_check_failure(error: Exception) -> bool:
+    return (isinstance(error, ClientError)
+            and error.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException')
+
+
+class CircuitBreakers:
+    """Per-plugin circuit breakers shared through the plugins table."""
+    
+    def __init__(self, table):
+        self.table = table
+        # plugin id -> {'opened_until': epoch seconds, 'checked_at': monotonic}
+        self._states: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+    
+    def refresh(self, plugin_ids: Iterable[str]) -> None:
+        """Read the breaker states of plugins not checked recently."""
+        now = time.monotonic()
+        stale = sorted({
+            plugin_id for plugin_id in plugin_ids
+            if now - self._states.get(plugin_id, {}).get('checked_at', float('-inf')) >= BREAKER_CHECK_INTERVAL
+        })
+        for start in range(0, len(stale), 100):
+            chunk = stale[start:start + 100]
+            opened = {}
+            request = {
+                self.table.name: {
+                    'Keys': [{'id': BREAKER_PREFIX + plugin_id} for plugin_id in chunk],
+                    'ProjectionExpression': 'plugin_id, opened_until'
+                }
+            }
+            while request:
+                response = dynamodb.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(self.table.name, []):
+                    opened[item['plugin_id']] = int(item.get('opened_until', 0))
+                request = response.get('UnprocessedKeys')
+            with self._lock:
+                for plugin_id in chunk:
+                    self._states[plugin_id] = {'opened_until': opened.get(plugin_id, 0), 'checked_at': now}
+    
+    def allow(self, plugin_id: str) -> bool:
+        """Return whether the plugin's breaker lets calls through."""
+        return time.time() >= self._states.get(plugin_id, {}).get('opened_until', 0)
+    
+    def record_success(self, plugin_id: str) -> None:
+        """Close the breaker if it had opened."""
+        state = self._states.get(plugin_id)
+        if not state or not state.get('opened_until'):
+            return
+        self.table.update_item(
+            Key={'id': BREAKER_PREFIX + plugin_id},
+            UpdateExpression='SET failures = :zero REMOVE opened_until',
+            ExpressionAttributeValues={':zero': 0}
+        )
+        with self._lock:
+            state['opened_until'] = 0
+        print(f"Circuit breaker closed for plugin {plugin_id}")
+    
+    def record_failure(self, plugin_id: str) -> None:
+        """Count a failed or slow call, opening the breaker at the threshold."""
+        now = int(time.time())
+        window = now - now % BREAKER_WINDOW
+        key = {'id': BREAKER_PREFIX + plugin_id}
+        
+        item = None
+        for _ in range(2):
+            try:
+                item = self.table.update_item(
+                    Key=key,
+                    UpdateExpression='ADD failures :one',
+                    ConditionExpression='#window = :window',
+                    ExpressionAttributeNames={'#window': 'window'},
+                    ExpressionAttributeValues={':one': 1, ':window': window},
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
+                break
+            except Exception as e:
+                if not _is_conditional_check_failure(e):
+                    raise
+            # First failure of a new window
+            try:
+                item = self.table.update_item(
+                    Key=key,
+                    UpdateExpression=(
+                        'SET entity_type = :entity, plugin_id = :plugin_id, '
+                        '#window = :window, failures = :one'
+                    ),
+                    ConditionExpression='attribute_not_exists(#window) OR #window < :window',
+                    ExpressionAttributeNames={'#window': 'window'},
+                    ExpressionAttributeValues={
+                        ':entity': BREAKER_ENTITY,
+                        ':plugin_id': plugin_id,
+                        ':window': window,
+                        ':one': 1
+                    },
+                    ReturnValues='ALL_NEW'
+                )['Attributes']
+                break
+            except Exception as e:
+                # Another container started the window first
+                if not _is_conditional_check_failure(e):
+                    raise
+        if item is None or int(item['failures']) < BREAKER_THRESHOLD:
+            return
+        
+        opened_until = int(item.get('opened_until', 0))
+        if opened_until <= now:
+            opened_until = now + BREAKER_COOLDOWN
+            try:
+                self.table.update_item(
+                    Key=key,
+                    UpdateExpression='SET opened_until = :opened_until',
+                    ConditionExpression='attribute_not_exists(opened_until) OR opened_until <= :now',
+                    ExpressionAttributeValues={':opened_until': opened_until, ':now': now}
+                )
+                print(f"Circuit breaker opened for plugin {plugin_id} "
+                      f"after {int(item['failures'])} failures")
+            except Exception as e:
+                # Another container opened it
+                if not _is_conditional_check_failure(e):
+                    raise
+        with self._lock:
+            self._states[plugin_id] = {'opened_until': opened_until, 'checked_at': time.monotonic()}
 
 
 class PluginManager:
     """Manager for plugin hooks and filters."""
     
     def __init__(self):
-        plugins_table_name = os.environ.get('PLUGINS_TABLE', 'cms-plugins-dev')
-        self.plugins_table = dynamodb.Table(plugins_table_name)
+        self.plugins_table = _plugins_table()
+        self.breakers = CircuitBreakers(self.plugins_table)
+        # Hook registry: hook name -> functions in priority order. Managers
+        # are module-level in handlers, so it lasts across warm invocations.
         self._hook_cache: Dict[str, List[Dict[str, Any]]] = {}
+        self._hook_cache_version: Optional[int] = None
+        self._hook_cache_checked_at = 0.0
+        self._hook_cache_built_at = 0.0
     
     def get_active_plugins(self) -> List[Dict[str, Any]]:
         """Get all active plugins."""
         try:
-            response = self.plugins_table.scan(
-                FilterExpression='active = :true',
-                ExpressionAttributeValues={':true': True}
-            )
-            return response.get('Items', [])
+            plugins = []
+            scan_params = {
+                'FilterExpression': 'active = :true',
+                'ExpressionAttributeValues': {':true': True}
+            }
+            while True:
+                response = self.plugins_table.scan(**scan_params)
+                plugins.extend(response.get('Items', []))
+                if 'LastEvaluatedKey' not in response:
+                    return plugins
+                scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
         except Exception as e:
             print(f"Error fetching active plugins: {e}")
             return []
     
+    def get_config_version(self) -> int:
+        """Return the plugin config version."""
+        response = self.plugins_table.get_item(Key={'id': CONFIG_ITEM_ID})
+        return int(response.get('Item', {}).get('version', 0))
+    
+    def get_hook_registry(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Return the hook registry, rebuilding it if the plugin config changed.
+        
+        The version is checked at most every REGISTRY_CHECK_INTERVAL seconds,
+        so most hook executions make no DynamoDB request, and plugin changes
+        reach warm containers within that interval.
+        """
+        now = time.monotonic()
+        if (self._hook_cache_version is not None
+                and now - self._hook_cache_checked_at < REGISTRY_CHECK_INTERVAL):
+            return self._hook_cache
+        
+        try:
+            # Read the version first: a change made during the scan leaves
+            # an older version cached, which the next check catches
+            version = self.get_config_version()
+            if (version != self._hook_cache_version
+                    or now - self._hook_cache_built_at >= REGISTRY_MAX_AGE):
+                self._hook_cache = self._compile_hooks(self.get_active_plugins())
+                self._hook_cache_version = version
+                self._hook_cache_built_at = now
+            self._hook_cache_checked_at = now
+        except Exception as e:
+            print(f"Error loading plugin hook registry: {e}")
+        return self._hook_cache
+    
+    def _compile_hooks(self, plugins: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        registry: Dict[str, List[Dict[str, Any]]] = {}
+        for plugin in plugins:
+            runtime, timeout_ms = RUNTIME_LAMBDA, LAMBDA_TIMEOUT_MS
+            if load_trusted_plugin(plugin['id']):
+                runtime, timeout_ms = RUNTIME_IN_PROCESS, IN_PROCESS_TIMEOUT_MS
+            for hook in plugin.get('hooks', []):
+                registry.setdefault(hook['hook_name'], []).append({
+                    'function_arn': hook['function_arn'],
+                    'priority': int(hook.get('priority', 10)),
+                    'plugin_id': plugin['id'],
+                    'type': hook.get('type', HOOK_FILTER),
+                    'runtime': runtime,
+                    'timeout_ms': int(hook.get('timeout_ms', timeout_ms))
+                })
+        
+        # Sort by priority (lower number = higher priority)
+        for hook_functions in registry.values():
+            hook_functions.sort(key=lambda x: (x['priority'], x['plugin_id']))
+        return registry
+    
     def execute_hook(self, hook_name: str, data: Any) -> Any:
         """
         Execute all plugin functions registered for a hook.
         
+        Filters run in priority order, each on the previous one's result.
+        Actions are then dispatched with the final result. Calls are limited
+        by the hook's latency budget, and plugins whose circuit breaker is
+        open are skipped.
+        
         Args:
             hook_name: Name of the hook to execute
             data: Data to pass to hook functions
             
         Returns:
-            Modified data after all hook functions have been applied
+            Modified data after all filter functions have been applied
         """
         try:
-            plugins = self.get_active_plugins()
+            hook_functions = self.get_hook_registry().get(hook_name)
+            if not hook_functions:
+                return data
             
-            # Get all functions for this hook, sorted by priority
-            hook_functions = []
-            for plugin in plugins:
-                for hook in plugin.get('hooks', []):
-                    if hook['hook_name'] == hook_name:
-                        hook_functions.append({
-                            'function_arn': hook['function_arn'],
-                            'priority': hook.get('priority', 10),
-                            'plugin_id': plugin['id']
-                        })
+            deadline = time.monotonic() + HOOK_BUDGETS.get(hook_name, HOOK_BUDGET_MS) / 1000
+            try:
+                self.breakers.refresh(hook_func['plugin_id'] for hook_func in hook_functions)
+            except Exception as e:
+                print(f"Error reading plugin circuit breakers: {e}")
             
-            # Sort by priority (lower number = higher priority)
-            hook_functions.sort(key=lambda x: x['priority'])
-            
-            # Execute each function in order
+            # Execute each filter in order
             result = data
+            actions = []
             for hook_func in hook_functions:
+                if not self.breakers.allow(hook_func['plugin_id']):
+                    continue
+                if hook_func['type'] == HOOK_ACTION:
+                    actions.append(hook_func)
+                    continue
+                
+                remaining_ms = int((deadline - time.monotonic()) * 1000)
+                if remaining_ms <= 0:
+                    print(f"Hook {hook_name} is over its latency budget, skipping {hook_func['plugin_id']}")
+                    continue
+                timeout_ms = min(hook_func['timeout_ms'], remaining_ms)
+                started = time.monotonic()
                 try:
-                    response = lambda_client.invoke(
-                        FunctionName=hook_func['function_arn'],
-                        InvocationType='RequestResponse',
-                        Payload=json.dumps({'hook': hook_name, 'data': result})
-                    )
-                    payload = json.loads(response['Payload'].read())
-                    if payload.get('statusCode') == 200:
-                        body = payload.get('body', '{}')
-                        if isinstance(body, str):
-                            result = json.loads(body)
-                        else:
-                            result = body
+                    result = self.call_hook_function(hook_func, hook_name, result, timeout_ms)
                 except Exception as e:
                     # Log error but continue with other plugins
                     print(f"Plugin hook error for {hook_func['plugin_id']}: {e}")
+                    # Neither data it could not be sent nor a call cut short
+                    # by the hook's budget is the plugin's fault
+                    cut_short = isinstance(e, TimeoutError) and timeout_ms < hook_func['timeout_ms']
+                    if not (cut_short or isinstance(e, PluginEventError)):
+                        self._record_call(hook_func, None)
                     continue
+                self._record_call(hook_func, time.monotonic() - started)
             
+            if actions:
+                self.dispatch_actions(actions, hook_name, result, deadline)
             return result
         
         except Exception as e:
@@ -87,6 +475,119 @@ class PluginManager:
             # Return original data if hook execution fails
             return data
     
+    def call_hook_function(self, hook_func: Dict[str, Any], hook_name: str, data: Any,
+                           timeout_ms: Optional[int] = None) -> Any:
+        """
+        Call one registered hook function and return its result.
+        
+        Raises PluginCallError when the function raises or responds with
+        other than statusCode 200, PluginEventError when the data cannot be
+        sent to a Lambda plugin, and TimeoutError on running longer than
+        timeout_ms, by default the function's own timeout.
+        """
+        event = {'hook': hook_name, 'data': data}
+        timeout_ms = timeout_ms or hook_func['timeout_ms']
+        if hook_func['runtime'] == RUNTIME_IN_PROCESS:
+            payload = self._call_in_process(hook_func, event, timeout_ms)
+        else:
+            encoded = _encode_event(event)
+            payload = _run_with_timeout(
+                lambda: self._invoke(hook_func, encoded),
+                timeout_ms,
+                f"plugin-{hook_func['plugin_id']}"
+            )
+        
+        status = payload.get('statusCode') if isinstance(payload, dict) else None
+        if status != 200:
+            raise PluginCallError(f"Plugin {hook_func['plugin_id']} responded with statusCode {status}")
+        body = payload.get('body', '{}')
+        if isinstance(body, str):
+            return json.loads(body)
+        return body
+    
+    def dispatch_actions(self, actions: List[Dict[str, Any]], hook_name: str, data: Any,
+                         deadline: Optional[float] = None) -> None:
+        """
+        Dispatch action functions concurrently.
+        
+        Lambda actions are invoked with InvocationType='Event', so waiting
+        only covers Lambda accepting the event; in-process actions run
+        within their timeouts. Waiting, up to the hook's deadline, keeps a
+        frozen container from dropping dispatches. Failures are logged.
+        """
+        event = {'hook': hook_name, 'data': data}
+        futures = [
+            (hook_func, _action_executor.submit(self._run_action, hook_func, event))
+            for hook_func in actions
+        ]
+        for hook_func, future in futures:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                future.result(timeout)
+            except Exception as e:
+                if future.done():
+                    print(f"Plugin action error for {hook_func['plugin_id']}: {e}")
+                else:
+                    print(f"Plugin action {hook_func['plugin_id']} still running after the {hook_name} budget")
+    
+    def call_action_function(self, hook_func: Dict[str, Any], event: Dict[str, Any]) -> None:
+        """Run one action function, ignoring its result."""
+        if hook_func['runtime'] == RUNTIME_IN_PROCESS:
+            self._call_in_process(hook_func, event, hook_func['timeout_ms'])
+            return
+        lambda_client.invoke(
+            FunctionName=hook_func['function_arn'],
+            InvocationType='Event',
+            Payload=_encode_event(event)
+        )
+    
+    def _run_action(self, hook_func: Dict[str, Any], event: Dict[str, Any]) -> None:
+        started = time.monotonic()
+        try:
+            self.call_action_function(hook_func, event)
+        except Exception as e:
+            if not isinstance(e, PluginEventError):
+                self._record_call(hook_func, None)
+            raise
+        self._record_call(hook_func, time.monotonic() - started)
+    
+    def _record_call(self, hook_func: Dict[str, Any], elapsed: Optional[float]) -> None:
+        """Update a plugin's circuit breaker; elapsed is None for failed calls."""
+        plugin_id = hook_func['plugin_id']
+        try:
+            if elapsed is None or elapsed * 1000 > hook_func['timeout_ms'] * SLOW_CALL_FRACTION:
+                self.breakers.record_failure(plugin_id)
+            else:
+                self.breakers.record_success(plugin_id)
+        except Exception as e:
+            print(f"Error updating circuit breaker for plugin {plugin_id}: {e}")
+    
+    def _invoke(self, hook_func: Dict[str, Any], payload: str) -> Any:
+        response = lambda_client.invoke(
+            FunctionName=hook_func['function_arn'],
+            InvocationType='RequestResponse',
+            Payload=payload
+        )
+        result = json.loads(response['Payload'].read())
+        # A plugin that raises still makes a successful invoke
+        if response.get('FunctionError'):
+            message = result.get('errorMessage') if isinstance(result, dict) else result
+            raise PluginCallError(f"Plugin {hook_func['plugin_id']} failed: {message}")
+        return result
+    
+    def _call_in_process(self, hook_func: Dict[str, Any], event: Dict[str, Any], timeout_ms: int) -> Any:
+        """
+        Run a trusted plugin's handler within timeout_ms.
+        
+        The handler gets a copy of the data, so a plugin that overruns its
+        timeout and is abandoned cannot change data it no longer owns.
+        """
+        plugin_id = hook_func['plugin_id']
+        handler = load_trusted_plugin(plugin_id)
+        event = copy.deepcopy(event)
+        context = PluginContext(plugin_id, timeout_ms)
+        return _run_with_timeout(lambda: handler(event, context), timeout_ms, f"plugin-{plugin_id}")
+    
     def apply_content_filters(self, content: str, content_type: str) -> str:
         """
         Apply content filter hooks for rendering.
@@ -0,0 +1,119 @@
+"""
+Work queue utilities for background jobs.
+
+Jobs are JSON messages sent to an SQS queue whose URL comes from an
+environment variable. Without a queue URL (local development and tests) a
+LocalQueue stands in and runs each job in-process as soon as it is sent, so
+producers and workers use the same code paths either way.
+"""
+
+import json
+import os
+import traceback
+from typing import Any, Callable, Dict, List
+
+import boto3
+
+
+# SQS accepts at most 10 entries per SendMessageBatch call.
+SQS_BATCH_LIMIT = 10
+
+JobHandler = Callable[[Dict[str, Any]], None]
+
+
+class SqsQueue:
+    """Queue backed by an SQS queue URL."""
+
+    def __init__(self, queue_url: str):
+        self.queue_url = queue_url
+        self.client = boto3.client('sqs')
+
+    def send(self, message: Dict[str, Any]) -> None:
+        """Send one job message."""
+        try:
+            self.client.send_message(
+                QueueUrl=self.queue_url,
+                MessageBody=json.dumps(message, default=str),
+            )
+        except Exception as e:
+            raise Exception(f"Failed to enqueue job: {str(e)}")
+
+    def send_batch(self, messages: List[Dict[str, Any]]) -> None:
+        """Send job messages in batches of up to SQS_BATCH_LIMIT."""
+        try:
+            for start in range(0, len(messages), SQS_BATCH_LIMIT):
+                chunk = messages[start:start + SQS_BATCH_LIMIT]
+                response = self.client.send_message_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[
+                        {'Id': str(index), 'MessageBody': json.dumps(message, default=str)}
+                        for index, message in enumerate(chunk)
+                    ],
+                )
+                if response.get('Failed'):
+                    raise Exception(f"{len(response['Failed'])} message(s) were rejected")
+        except Exception as e:
+            raise Exception(f"Failed to enqueue jobs: {str(e)}")
+
+
+class LocalQueue:
+    """In-process stand-in that runs each job immediately.
+
+    Job failures are logged rather than raised, matching the producer's view
+    of a real queue, where the send succeeds and the worker fails later.
+    """
+
+    def __init__(self, handler: JobHandler):
+        self.handler = handler
+
+    def send(self, message: Dict[str, Any]) -> None:
+        """Run one job message."""
+        try:
+            # Round-trip through JSON so local jobs see what SQS would deliver
+            self.handler(json.loads(json.dumps(message, default=str)))
+        except Exception:
+            print(f"Local job failed: {traceback.format_exc()}")
+
+    def send_batch(self, messages: List[Dict[str, Any]]) -> None:
+        """Run job messages in order."""
+        for message in messages:
+            self.send(message)
+
+
+def get_queue(url_env_var: str, local_handler: JobHandler):
+    """
+    Return the queue configured by an environment variable.
+
+    Args:
+        url_env_var: Name of the environment variable holding the SQS URL
+        local_handler: Job handler the local stand-in runs when no URL is set
+
+    Returns:
+        SqsQueue when the variable is set, otherwise LocalQueue
+    """
+    queue_url = os.environ.get(url_env_var, '')
+    if queue_url:
+        return SqsQueue(queue_url)
+    return LocalQueue(local_handler)
+
+
+def process_sqs_event(event: Dict[str, Any], handler: JobHandler) -> Dict[str, Any]:
+    """
+    Run a job handler over an SQS event batch.
+
+    Failed messages are reported individually, so only they return to the
+    queue for retry (requires ReportBatchItemFailures on the event source).
+
+    Returns:
+        Lambda partial batch response
+    """
+    failures = []
+    for record in event.get('Records', []):
+        message_id = record['messageId']
+        try:
+            handler(json.loads(record['body']))
+        except Exception:
+            print(f"Job {message_id} failed: {traceback.format_exc()}")
+            failures.append({'itemIdentifier': message_id})
+
+    return {'batchItemFailures': failures}
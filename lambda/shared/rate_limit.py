@@ -0,0 +1,135 @@
+"""
+Token-bucket rate limiting for public write endpoints.
+
+Each (scope, key) pair, e.g. ("comments", <ip address>), has a bucket of
+`limit` tokens in the rate limits table that refills at `limit` tokens per
+`window` seconds, and each request takes one token. A bucket is stored as
+the time in milliseconds at which it will be full again (full_at), so the
+refill needs no background job: a bucket whose full_at has passed is full.
+
+A check is a conditional UpdateItem on the bucket's item, whatever the size
+of the tables being protected:
+
+- an idle or missing bucket is set to full_at = now + one token's refill time
+- otherwise full_at is moved on by one token's refill time, on condition
+  that the bucket would not go below empty
+
+The second update is only tried when the first one's condition fails, for a
+bucket already in use. Concurrent requests are serialized by the conditions,
+and items expire through TTL (expires_at) once their bucket has refilled.
+Errors fail open so a throttled or missing table never blocks legitimate
+users.
+"""
+
+import logging
+import math
+import os
+import time
+from typing import NamedTuple, Optional
+
+from botocore.exceptions import ClientError
+
+from .db import get_dynamodb_resource
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitResult(NamedTuple):
+    """Outcome of a rate limit check."""
+    allowed: bool
+    # Tokens left in the bucket after this request
+    remaining: int
+    # Seconds until a request would be allowed again, 0 when allowed
+    retry_after: int
+
+
+class RateLimiter:
+    """Token-bucket rate limiter for one scope, e.g. comment submissions."""
+
+    def __init__(self, scope: str, limit: int, window: int, table_name: Optional[str] = None):
+        """
+        Args:
+            scope: Name of the limited action, used in bucket ids
+            limit: Bucket size, the number of requests allowed in a burst
+            window: Seconds for an empty bucket to refill completely
+            table_name: Rate limits table (default: RATE_LIMITS_TABLE)
+        """
+        if limit < 1 or window < 1:
+            raise ValueError("Rate limit and window must be positive")
+
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        # Refill time of one token, and of the whole bucket
+        self.interval_ms = math.ceil(window * 1000 / limit)
+        self.capacity_ms = self.interval_ms * limit
+        table_name = table_name or os.environ.get('RATE_LIMITS_TABLE', 'cms-rate-limits-dev')
+        self.table = get_dynamodb_resource().Table(table_name)
+
+    def check(self, key: str) -> RateLimitResult:
+        """
+        Take a token from the bucket of key.
+
+        Args:
+            key: Caller identity within the scope, e.g. an IP address
+
+        Returns:
+            RateLimitResult; allowed is False when the bucket is empty
+        """
+        bucket_id = f"{self.scope}#{key}"
+        now_ms = int(time.time() * 1000)
+        # Full again one refill of the whole bucket from now at the latest
+        expires_at = math.ceil((now_ms + self.capacity_ms) / 1000) + 1
+
+        try:
+            # Idle or new bucket: it is full, take one token
+            self.table.update_item(
+                Key={'id': bucket_id},
+                UpdateExpression='SET full_at = :full_at, expires_at = :expires_at',
+                ConditionExpression='attribute_not_exists(id) OR full_at <= :now',
+                ExpressionAttributeValues={
+                    ':full_at': now_ms + self.interval_ms,
+                    ':expires_at': expires_at,
+                    ':now': now_ms,
+                },
+            )
+            return RateLimitResult(True, self.limit - 1, 0)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                return self._fail_open(bucket_id, e)
+        except Exception as e:
+            return self._fail_open(bucket_id, e)
+
+        try:
+            # Refilling bucket: take one token unless it is empty
+            response = self.table.update_item(
+                Key={'id': bucket_id},
+                UpdateExpression='SET full_at = full_at + :interval, expires_at = :expires_at',
+                ConditionExpression='full_at <= :latest',
+                ExpressionAttributeValues={
+                    ':interval': self.interval_ms,
+                    ':expires_at': expires_at,
+                    ':latest': now_ms + self.capacity_ms - self.interval_ms,
+                },
+                ReturnValues='UPDATED_NEW',
+                ReturnValuesOnConditionCheckFailure='ALL_OLD',
+            )
+            full_at = int(response['Attributes']['full_at'])
+            return RateLimitResult(True, self._tokens(full_at, now_ms), 0)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                return self._fail_open(bucket_id, e)
+            full_at = int(e.response.get('Item', {}).get('full_at', {}).get('N', now_ms + self.capacity_ms))
+            # A token is back once full_at is within the bucket's refill time less one token
+            wait_ms = full_at - (now_ms + self.capacity_ms - self.interval_ms)
+            return RateLimitResult(False, 0, max(1, math.ceil(wait_ms / 1000)))
+        except Exception as e:
+            return self._fail_open(bucket_id, e)
+
+    def _tokens(self, full_at: int, now_ms: int) -> int:
+        """Return the whole tokens in a bucket that is full at full_at."""
+        return max(0, (now_ms + self.capacity_ms - full_at) // self.interval_ms)
+
+    def _fail_open(self, bucket_id: str, error: Exception) -> RateLimitResult:
+        logger.error(f"Rate limit check failed for {bucket_id}: {str(error)}")
+        return RateLimitResult(True, self.limit, 0)
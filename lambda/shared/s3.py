@@ -6,23 +6,60 @@ Updated: 2026-02-15 - Added CloudFront URL conversion
 
 import boto3
 try:
-    from PIL import Image
+    from PIL import Image, ImageOps, features
     PIL_AVAILABLE = True
 except ImportError:
     PIL_AVAILABLE = False
     Image = None
+    ImageOps = None
+    features = None
 import io
 import os
-from typing import Dict, Tuple, Optional
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple, Optional
 from botocore.exceptions import ClientError
+from urllib.parse import urlparse
 import uuid
 import mimetypes
 
+from .image_analysis import analyze_image, get_orientation, oriented_size
+
+
+class ImageDecodeError(Exception):
+    """An image that cannot be decoded, and so will not process on retry."""
+
 s3_client = boto3.client('s3')
 MEDIA_BUCKET = os.environ.get('MEDIA_BUCKET', '')
 
+# Multipart upload sizing. S3 requires every part but the last to be at
+# least 5 MiB and allows at most 10,000 parts per upload.
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+MULTIPART_MAX_PARTS = 10000
+PRESIGNED_URL_EXPIRY = 3600
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def build_object_key(filename: str) -> str:
+    """Return a unique uploads/ key that keeps the filename's extension."""
+    file_extension = os.path.splitext(filename)[1]
+    return f"uploads/{uuid.uuid4()}{file_extension}"
+
+
+def get_object_url(key: str) -> str:
+    """Return the CloudFront URL for a key, or the S3 URL without a CDN."""
+    media_cdn_url = os.environ.get('MEDIA_CDN_URL', '')
+    if media_cdn_url:
+        return f"{media_cdn_url}/{key}"
+    return f"https://{MEDIA_BUCKET}.s3.amazonaws.com/{key}"
 
-def upload_file(file_data: bytes, filename: str, content_type: str) -> str:
+
+def upload_file(
+    file_data: bytes,
+    filename: str,
+    content_type: str,
+    key: Optional[str] = None
+) -> str:
     """
     Upload file to S3 and return CloudFront URL.
     
@@ -30,6 +67,7 @@ def upload_file(file_data: bytes, filename: str, content_type: str) -> str:
         file_data: Binary file content
         filename: Original filename
         content_type: MIME type of the file
+        key: S3 key to store the file under; defaults to a new uploads/ key
         
     Returns:
         CloudFront URL of the uploaded file
@@ -39,9 +77,8 @@ def upload_file(file_data: bytes, filename: str, content_type: str) -> str:
     """
     try:
         # Generate unique filename to avoid collisions
-        file_extension = os.path.splitext(filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        key = f"uploads/{unique_filename}"
+        if key is None:
+            key = build_object_key(filename)
         
         # Upload to S3
         s3_client.put_object(
@@ -53,12 +90,7 @@ def upload_file(file_data: bytes, filename: str, content_type: str) -> str:
         )
         
         # Return CloudFront URL if available, otherwise S3 URL
-        media_cdn_url = os.environ.get('MEDIA_CDN_URL', '')
-        if media_cdn_url:
-            url = f"{media_cdn_url}/{key}"
-        else:
-            url = f"https://{MEDIA_BUCKET}.s3.amazonaws.com/{key}"
-        return url
+        return get_object_url(key)
         
     except ClientError as e:
         raise Exception(f"Failed to upload file to S3: {str(e)}")
@@ -66,13 +98,389 @@ def upload_file(file_data: bytes, filename: str, content_type: str) -> str:
         raise Exception(f"Error uploading file: {str(e)}")
 
 
-def generate_thumbnails(s3_key: str, mime_type: str) -> Dict[str, str]:
+def get_part_size(size: int) -> int:
+    """
+    Choose a multipart part size for a file.
+    
+    Uses MULTIPART_PART_SIZE unless the file is large enough to need more
+    than MULTIPART_MAX_PARTS parts, in which case the part size grows in
+    whole MiB steps.
+    """
+    part_size = MULTIPART_PART_SIZE
+    mib = 1024 * 1024
+    while size > part_size * MULTIPART_MAX_PARTS:
+        part_size += mib
+    return part_size
+
+
+def create_multipart_upload(key: str, content_type: str) -> str:
+    """
+    Start a multipart upload for a key and return its UploadId.
+    
+    Raises:
+        Exception: If the upload cannot be created
+    """
+    try:
+        response = s3_client.create_multipart_upload(
+            Bucket=MEDIA_BUCKET,
+            Key=key,
+            ContentType=content_type,
+            CacheControl='public, max-age=31536000',
+        )
+        return response['UploadId']
+    except ClientError as e:
+        raise Exception(f"Failed to create multipart upload: {str(e)}")
+
+
+def presign_upload_part(
+    key: str,
+    upload_id: str,
+    part_number: int,
+    expires_in: int = PRESIGNED_URL_EXPIRY
+) -> str:
+    """Return a presigned URL the client can PUT one part to."""
+    try:
+        return s3_client.generate_presigned_url(
+            'upload_part',
+            Params={
+                'Bucket': MEDIA_BUCKET,
+                'Key': key,
+                'UploadId': upload_id,
+                'PartNumber': part_number,
+            },
+            ExpiresIn=expires_in,
+        )
+    except ClientError as e:
+        raise Exception(f"Failed to presign upload part: {str(e)}")
+
+
+def list_uploaded_parts(key: str, upload_id: str) -> List[Dict]:
+    """
+    List the parts S3 has received for a multipart upload.
+    
+    Returns:
+        List of {'PartNumber', 'ETag', 'Size'} dicts ordered by part number
+    """
+    try:
+        parts = []
+        params = {'Bucket': MEDIA_BUCKET, 'Key': key, 'UploadId': upload_id}
+        while True:
+            response = s3_client.list_parts(**params)
+            parts.extend(
+                {'PartNumber': part['PartNumber'], 'ETag': part['ETag'], 'Size': part['Size']}
+                for part in response.get('Parts', [])
+            )
+            if not response.get('IsTruncated'):
+                break
+            params['PartNumberMarker'] = response['NextPartNumberMarker']
+        return parts
+    except ClientError as e:
+        raise Exception(f"Failed to list uploaded parts: {str(e)}")
+
+
+def complete_multipart_upload(key: str, upload_id: str, parts: List[Dict]) -> None:
+    """Assemble uploaded parts into the final object."""
+    try:
+        s3_client.complete_multipart_upload(
+            Bucket=MEDIA_BUCKET,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                'Parts': [
+                    {'PartNumber': part['PartNumber'], 'ETag': part['ETag']}
+                    for part in parts
+                ]
+            },
+        )
+    except ClientError as e:
+        raise Exception(f"Failed to complete multipart upload: {str(e)}")
+
+
+def abort_multipart_upload(key: str, upload_id: str) -> None:
+    """Abort a multipart upload and discard its parts."""
+    try:
+        s3_client.abort_multipart_upload(Bucket=MEDIA_BUCKET, Key=key, UploadId=upload_id)
+    except ClientError as e:
+        raise Exception(f"Failed to abort multipart upload: {str(e)}")
+
+
+def get_file_size(key: str) -> int:
+    """Return the stored size of an object in bytes."""
+    try:
+        response = s3_client.head_object(Bucket=MEDIA_BUCKET, Key=key)
+        return response['ContentLength']
+    except ClientError as e:
+        raise Exception(f"Failed to read file metadata: {str(e)}")
+
+
+def compute_sha256(key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> str:
+    """
+    Compute the hex SHA-256 of an object by streaming it from S3.
+    
+    Only one chunk is held in memory at a time, so this is safe for files
+    far larger than the Lambda's memory.
+    """
+    try:
+        response = s3_client.get_object(Bucket=MEDIA_BUCKET, Key=key)
+        digest = hashlib.sha256()
+        for chunk in response['Body'].iter_chunks(chunk_size):
+            digest.update(chunk)
+        return digest.hexdigest()
+    except ClientError as e:
+        raise Exception(f"Failed to read file for checksum: {str(e)}")
+
+
+def read_file_head(key: str, length: int) -> bytes:
+    """Read the first length bytes of an object with a ranged GET."""
+    try:
+        response = s3_client.get_object(
+            Bucket=MEDIA_BUCKET,
+            Key=key,
+            Range=f"bytes=0-{length - 1}",
+        )
+        return response['Body'].read()
+    except ClientError as e:
+        raise Exception(f"Failed to read file: {str(e)}")
+
+
+class S3MultipartWriter:
+    """
+    Sink that streams a file to S3 as it is written.
+
+    Writes are collected until a full part is available, so at most about
+    one part is held in memory. Files that never fill a part are stored with
+    a single PutObject on close(). Usable as a shared.multipart sink.
+    """
+
+    def __init__(self, key: str, content_type: str, part_size: int = MULTIPART_PART_SIZE):
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+        self.size = 0
+        self.completed = False
+        self._upload_id: Optional[str] = None
+        self._parts: List[Dict] = []
+        self._pending: List[memoryview] = []
+        self._pending_size = 0
+
+    def write(self, data: memoryview) -> None:
+        self._pending.append(data)
+        self._pending_size += len(data)
+        self.size += len(data)
+        if self._pending_size >= self.part_size:
+            self._flush_part()
+
+    def _flush_part(self) -> None:
+        if self._upload_id is None:
+            self._upload_id = create_multipart_upload(self.key, self.content_type)
+        body = b''.join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+
+        part_number = len(self._parts) + 1
+        try:
+            response = s3_client.upload_part(
+                Bucket=MEDIA_BUCKET,
+                Key=self.key,
+                UploadId=self._upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+        except ClientError as e:
+            raise Exception(f"Failed to upload part {part_number}: {str(e)}")
+        self._parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+
+    def close(self) -> None:
+        """Store the file: complete the multipart upload, or put it whole."""
+        if self._upload_id is None:
+            upload_file(b''.join(self._pending), self.key, self.content_type, key=self.key)
+            self._pending = []
+            self._pending_size = 0
+        else:
+            if self._pending:
+                self._flush_part()
+            complete_multipart_upload(self.key, self._upload_id, self._parts)
+        self.completed = True
+
+    def abort(self) -> None:
+        """Discard the upload, or delete the object if it was already stored."""
+        self._pending = []
+        self._pending_size = 0
+        try:
+            if self.completed:
+                s3_client.delete_object(Bucket=MEDIA_BUCKET, Key=self.key)
+            elif self._upload_id is not None:
+                abort_multipart_upload(self.key, self._upload_id)
+        finally:
+            self.completed = False
+            self._upload_id = None
+
+    @property
+    def url(self) -> str:
+        return get_object_url(self.key)
+
+
+# Thumbnail sizes, largest first: each size is downscaled from the one
+# before it rather than from the full-resolution original.
+THUMBNAIL_SIZES = (
+    ('large', (1200, 1200)),
+    ('medium', (600, 600)),
+    ('small', (300, 300)),
+)
+
+
+def get_thumbnail_key(s3_key: str, size_name: str, mime_type: str) -> str:
+    """Return the S3 key of one thumbnail size for an original."""
+    extension = '.png' if mime_type == 'image/png' else '.jpg'
+    name_without_ext = os.path.splitext(os.path.basename(s3_key))[0]
+    return f"thumbnails/{size_name}/{name_without_ext}{extension}"
+
+
+def _encode_thumbnail(img, mime_type: str) -> bytes:
+    buffer = io.BytesIO()
+    if mime_type == 'image/png':
+        img.save(buffer, format='PNG', optimize=True)
+    else:
+        img.save(buffer, format='JPEG', quality=85, optimize=True)
+    return buffer.getvalue()
+
+
+def _put_thumbnail(thumb_key: str, body: bytes, mime_type: str) -> None:
+    s3_client.put_object(
+        Bucket=MEDIA_BUCKET,
+        Key=thumb_key,
+        Body=body,
+        ContentType='image/png' if mime_type == 'image/png' else 'image/jpeg',
+        CacheControl='public, max-age=31536000',
+    )
+
+
+# Original formats that are rewritten without metadata, with the Pillow
+# options used to re-encode them
+NORMALIZED_FORMATS = {
+    'JPEG': {'quality': 92, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 92},
+}
+
+# Image.info keys that carry metadata rather than pixel data
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'photoshop', 'comment')
+
+
+def _open_image(image_data: bytes, target_size: Optional[Tuple[int, int]]):
+    """
+    Open and decode an image for downscaling to at most target_size, with
+    its EXIF orientation applied and its metadata dropped, so nothing
+    encoded from it carries EXIF or XMP.
+    
+    JPEGs use Pillow's draft mode to decode at the smallest DCT scale that
+    still covers target_size. Pass None to decode at full size.
+    """
+    img = Image.open(io.BytesIO(image_data))
+    if img.format == 'JPEG' and target_size:
+        img.draft(img.mode, target_size)
+    ImageOps.exif_transpose(img, in_place=True)
+    for key in METADATA_KEYS:
+        img.info.pop(key, None)
+    return img
+
+
+def _flatten(img):
+    """Convert an image to RGB or L, compositing transparency onto white."""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        return background
+    if img.mode not in ('RGB', 'L'):
+        return img.convert('RGB')
+    return img
+
+
+def _needs_normalizing(img) -> bool:
+    """Return True if an opened original carries EXIF or other metadata."""
+    if img.format not in NORMALIZED_FORMATS or getattr(img, 'n_frames', 1) > 1:
+        return False
+    if get_orientation(img) != 1:
+        return True
+    return any(img.info.get(key) for key in METADATA_KEYS)
+
+
+def _normalize_original(img, image_format: str, s3_key: str, mime_type: str) -> int:
+    """
+    Replace a stored original with its oriented, metadata-free re-encoding.
+    
+    The ICC profile is kept so colors do not shift.
+    
+    Returns:
+        The new size of the original in bytes
+    """
+    options = dict(NORMALIZED_FORMATS[image_format])
+    if img.info.get('icc_profile'):
+        options['icc_profile'] = img.info['icc_profile']
+    if image_format == 'JPEG' and img.mode not in ('RGB', 'L', 'CMYK'):
+        img = img.convert('RGB')
+    
+    buffer = io.BytesIO()
+    img.save(buffer, format=image_format, **options)
+    body = buffer.getvalue()
+    s3_client.put_object(
+        Bucket=MEDIA_BUCKET,
+        Key=s3_key,
+        Body=body,
+        ContentType=mime_type,
+        CacheControl='public, max-age=31536000',
+    )
+    return len(body)
+
+
+def _write_thumbnails(img, s3_key: str, mime_type: str) -> Dict[str, str]:
+    """
+    Encode and upload every thumbnail size of a decoded image.
+    
+    Each smaller size is downscaled from the previous one in place, so img
+    ends up at the smallest size. Each thumbnail is uploaded in the
+    background as soon as it is encoded.
+    """
+    thumbnails = {}
+    with ThreadPoolExecutor(max_workers=len(THUMBNAIL_SIZES)) as executor:
+        uploads = []
+        for size_name, dimensions in THUMBNAIL_SIZES:
+            # Create thumbnail (maintains aspect ratio)
+            img.thumbnail(dimensions, Image.Resampling.LANCZOS)
+            
+            thumb_key = get_thumbnail_key(s3_key, size_name, mime_type)
+            body = _encode_thumbnail(img, mime_type)
+            uploads.append(executor.submit(_put_thumbnail, thumb_key, body, mime_type))
+            
+            # Store thumbnail URL (use CloudFront if available)
+            thumbnails[size_name] = get_object_url(thumb_key)
+        
+        for upload in uploads:
+            upload.result()
+    
+    return thumbnails
+
+
+def generate_thumbnails(
+    s3_key: str,
+    mime_type: str,
+    image_data: Optional[bytes] = None
+) -> Dict[str, str]:
     """
     Generate thumbnails for an image in multiple sizes.
     
+    The image is decoded once. JPEGs use Pillow's draft mode to decode at the
+    smallest DCT scale that still covers the largest thumbnail, and each
+    smaller size is downscaled from the previous one in place. Each variant
+    is uploaded in the background as soon as it is encoded.
+    
     Args:
         s3_key: S3 key of the original image
         mime_type: MIME type of the image
+        image_data: Original image bytes, if the caller already has them;
+            otherwise the original is downloaded from S3
         
     Returns:
         Dictionary with thumbnail URLs for each size (small, medium, large)
@@ -85,116 +493,353 @@ def generate_thumbnails(s3_key: str, mime_type: str) -> Dict[str, str]:
         return {}
     
     try:
-        # Get original image from S3
-        response = s3_client.get_object(Bucket=MEDIA_BUCKET, Key=s3_key)
-        image_data = response['Body'].read()
-        
-        # Open image with Pillow
-        img = Image.open(io.BytesIO(image_data))
+        if image_data is None:
+            response = s3_client.get_object(Bucket=MEDIA_BUCKET, Key=s3_key)
+            image_data = response['Body'].read()
         
-        # Convert RGBA to RGB if necessary (for JPEG)
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-            img = background
+        img = _flatten(_open_image(image_data, THUMBNAIL_SIZES[0][1]))
+        return _write_thumbnails(img, s3_key, mime_type)
         
-        # Define thumbnail sizes
-        sizes = {
-            'small': (300, 300),
-            'medium': (600, 600),
-            'large': (1200, 1200)
-        }
+    except ClientError as e:
+        raise Exception(f"Failed to generate thumbnails: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Error generating thumbnails: {str(e)}")
+
+
+def process_image(
+    s3_key: str,
+    mime_type: str,
+    image_data: Optional[bytes] = None
+) -> Dict[str, Any]:
+    """
+    Run the media pipeline for an uploaded image on a single decode.
+    
+    1. Applies the EXIF orientation and strips EXIF, XMP and other metadata
+       from the stored original, if it has any. Only then is the image
+       decoded at full size; otherwise JPEGs use draft mode as in
+       generate_thumbnails.
+    2. Generates the thumbnails.
+    3. Computes placeholder fields from a downscaled copy: a BlurHash, the
+       dominant colors and the aspect ratio.
+    
+    Returns:
+        Dict of media record fields: thumbnails, dimensions, blurhash,
+        dominant_colors, aspect_ratio, and size if the original was
+        rewritten. Non-images only get an empty thumbnails map.
         
-        thumbnails = {}
+    Raises:
+        ImageDecodeError: If the image cannot be decoded
+        Exception: If the image cannot be processed for another reason,
+            such as an S3 error, which may succeed on retry
+    """
+    if not mime_type.startswith('image/'):
+        return {'thumbnails': {}}
+    
+    try:
+        if image_data is None:
+            response = s3_client.get_object(Bucket=MEDIA_BUCKET, Key=s3_key)
+            image_data = response['Body'].read()
         
-        for size_name, dimensions in sizes.items():
-            # Create thumbnail (maintains aspect ratio)
-            thumb = img.copy()
-            thumb.thumbnail(dimensions, Image.Resampling.LANCZOS)
-            
-            # Save to buffer
-            buffer = io.BytesIO()
-            
-            # Determine format based on original mime type
-            if mime_type == 'image/png':
-                thumb.save(buffer, format='PNG', optimize=True)
-                thumb_content_type = 'image/png'
-                extension = '.png'
-            else:
-                thumb.save(buffer, format='JPEG', quality=85, optimize=True)
-                thumb_content_type = 'image/jpeg'
-                extension = '.jpg'
-            
-            buffer.seek(0)
-            
-            # Generate thumbnail key
-            original_filename = os.path.basename(s3_key)
-            name_without_ext = os.path.splitext(original_filename)[0]
-            thumb_key = f"thumbnails/{size_name}/{name_without_ext}{extension}"
+        try:
+            header = Image.open(io.BytesIO(image_data))
+            width, height = oriented_size(header)
+            normalize = _needs_normalizing(header)
+            image_format = header.format
             
-            # Upload thumbnail to S3
-            s3_client.put_object(
-                Bucket=MEDIA_BUCKET,
-                Key=thumb_key,
-                Body=buffer.getvalue(),
-                ContentType=thumb_content_type,
-                CacheControl='public, max-age=31536000',
-            )
-            
-            # Store thumbnail URL (use CloudFront if available)
-            media_cdn_url = os.environ.get('MEDIA_CDN_URL', '')
-            if media_cdn_url:
-                thumbnails[size_name] = f"{media_cdn_url}/{thumb_key}"
-            else:
-                thumbnails[size_name] = f"https://{MEDIA_BUCKET}.s3.amazonaws.com/{thumb_key}"
+            img = _open_image(image_data, None if normalize else THUMBNAIL_SIZES[0][1])
+            # Decode now, so broken image data fails here and not mid-upload
+            img.load()
+        except (OSError, Image.DecompressionBombError) as e:
+            # OSError includes PIL.UnidentifiedImageError and truncated data
+            raise ImageDecodeError(f"Cannot decode image: {str(e)}") from e
         
-        return thumbnails
+        result = {}
+        if normalize:
+            result['size'] = _normalize_original(img, image_format, s3_key, mime_type)
         
+        img = _flatten(img)
+        result['thumbnails'] = _write_thumbnails(img, s3_key, mime_type)
+        result['dimensions'] = {'width': width, 'height': height}
+        result.update(analyze_image(img, width, height))
+        return result
+        
+    except ImageDecodeError:
+        raise
     except ClientError as e:
-        raise Exception(f"Failed to generate thumbnails: {str(e)}")
+        raise Exception(f"Failed to process image: {str(e)}")
     except Exception as e:
-        raise Exception(f"Error generating thumbnails: {str(e)}")
+        raise Exception(f"Error processing image: {str(e)}")
+
 
+# On-demand image variants. Requests must name one of these presets, which
+# bounds how many variants each original can have.
+IMAGE_PRESETS = {
+    'thumb': {'width': 150, 'height': 150, 'fit': 'cover', 'quality': 80},
+    'small': {'width': 400, 'height': 400, 'fit': 'contain', 'quality': 80},
+    'card': {'width': 600, 'height': 400, 'fit': 'cover', 'quality': 80},
+    'medium': {'width': 800, 'height': 800, 'fit': 'contain', 'quality': 82},
+    'large': {'width': 1200, 'height': 1200, 'fit': 'contain', 'quality': 85},
+    'hero': {'width': 1920, 'height': 1080, 'fit': 'cover', 'quality': 85},
+}
 
-def delete_file(s3_key: str) -> None:
+# Output formats: (Pillow format, MIME type, extension, keeps transparency)
+IMAGE_VARIANT_FORMATS = {
+    'avif': ('AVIF', 'image/avif', '.avif', True),
+    'webp': ('WEBP', 'image/webp', '.webp', True),
+    'jpeg': ('JPEG', 'image/jpeg', '.jpg', False),
+    'png': ('PNG', 'image/png', '.png', True),
+}
+
+# Modern formats in order of preference when the client accepts them
+NEGOTIATED_FORMATS = ('avif', 'webp')
+
+
+def image_format_supported(image_format: str) -> bool:
+    """Return True if this Pillow build can encode the variant format."""
+    if not PIL_AVAILABLE or image_format not in IMAGE_VARIANT_FORMATS:
+        return False
+    if image_format in ('avif', 'webp'):
+        try:
+            return bool(features.check(image_format))
+        except Exception:
+            return False
+    return True
+
+
+def negotiate_image_format(accept: str, mime_type: str) -> str:
     """
-    Delete file and all associated thumbnails from S3.
+    Choose a variant format from an Accept header.
+    
+    AVIF, then WebP, are used when the client lists them explicitly and
+    Pillow can encode them. Otherwise PNG originals stay PNG and everything
+    else becomes JPEG.
+    """
+    accepted = set()
+    for entry in (accept or '').split(','):
+        media_type, _, params = entry.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(media_type.strip().lower())
+    
+    for image_format in NEGOTIATED_FORMATS:
+        if IMAGE_VARIANT_FORMATS[image_format][1] in accepted and image_format_supported(image_format):
+            return image_format
+    return 'png' if mime_type == 'image/png' else 'jpeg'
+
+
+def get_variant_key(s3_key: str, preset_name: str, image_format: str) -> str:
+    """
+    Return the S3 key of one image variant.
+    
+    Keys include the preset's parameters, so changing a preset never serves
+    variants rendered with the old settings. All variants of an original
+    share a prefix, so they can be deleted together.
+    """
+    preset = IMAGE_PRESETS[preset_name]
+    extension = IMAGE_VARIANT_FORMATS[image_format][2]
+    name_without_ext = os.path.splitext(os.path.basename(s3_key))[0]
+    signature = f"{preset['width']}x{preset['height']}-{preset['fit']}-q{preset['quality']}"
+    return f"variants/{name_without_ext}/{preset_name}-{signature}{extension}"
+
+
+def render_image_variant(image_data: bytes, preset_name: str, image_format: str) -> bytes:
+    """
+    Resize and encode an image for a preset.
+    
+    "contain" fits the image inside the preset's box; "cover" crops it to
+    the box's aspect ratio. Images are never upscaled.
+    """
+    preset = IMAGE_PRESETS[preset_name]
+    pil_format, _, _, keeps_alpha = IMAGE_VARIANT_FORMATS[image_format]
+    width, height = preset['width'], preset['height']
+    
+    img = _open_image(image_data, (width, height))
+    if not keeps_alpha:
+        img = _flatten(img)
+    elif img.mode in ('P', 'LA'):
+        img = img.convert('RGBA')
+    elif img.mode not in ('RGB', 'RGBA', 'L'):
+        img = img.convert('RGB')
+    
+    if preset['fit'] == 'cover':
+        scale = min(1.0, img.width / width, img.height / height)
+        box = (max(1, round(width * scale)), max(1, round(height * scale)))
+        img = ImageOps.fit(img, box, Image.Resampling.LANCZOS)
+    else:
+        img.thumbnail((width, height), Image.Resampling.LANCZOS)
+    
+    buffer = io.BytesIO()
+    if pil_format == 'PNG':
+        img.save(buffer, format='PNG', optimize=True)
+    elif pil_format == 'JPEG':
+        img.save(buffer, format='JPEG', quality=preset['quality'], optimize=True, progressive=True)
+    else:
+        img.save(buffer, format=pil_format, quality=preset['quality'])
+    return buffer.getvalue()
+
+
+def _object_exists(key: str) -> bool:
+    try:
+        s3_client.head_object(Bucket=MEDIA_BUCKET, Key=key)
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        raise
+
+
+def ensure_image_variant(s3_key: str, preset_name: str, image_format: str) -> str:
+    """
+    Return the key of an image variant, rendering and storing it if needed.
+    
+    Each variant is rendered once; later requests find it in S3.
     
-    Args:
-        s3_key: S3 key of the file to delete
-        
     Raises:
-        Exception: If deletion fails
+        Exception: If the original cannot be read or rendered
     """
+    variant_key = get_variant_key(s3_key, preset_name, image_format)
     try:
-        # Delete original file
-        s3_client.delete_object(Bucket=MEDIA_BUCKET, Key=s3_key)
+        if _object_exists(variant_key):
+            return variant_key
         
-        # Delete thumbnails if they exist
-        original_filename = os.path.basename(s3_key)
-        name_without_ext = os.path.splitext(original_filename)[0]
+        response = s3_client.get_object(Bucket=MEDIA_BUCKET, Key=s3_key)
+        body = render_image_variant(response['Body'].read(), preset_name, image_format)
+        s3_client.put_object(
+            Bucket=MEDIA_BUCKET,
+            Key=variant_key,
+            Body=body,
+            ContentType=IMAGE_VARIANT_FORMATS[image_format][1],
+            CacheControl='public, max-age=31536000',
+        )
+        return variant_key
+    except ClientError as e:
+        raise Exception(f"Failed to create image variant: {str(e)}")
+
+
+# S3 DeleteObjects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+
+
+def get_variant_keys(s3_key: str) -> List[str]:
+    """Return the keys of every image variant an original can have."""
+    return [
+        get_variant_key(s3_key, preset_name, image_format)
+        for preset_name in IMAGE_PRESETS
+        for image_format in IMAGE_VARIANT_FORMATS
+    ]
+
+
+def _key_from_url(url: str) -> str:
+    key = extract_s3_key_from_url(url)
+    if '://' in key:
+        # CloudFront URLs map the path straight to the key
+        key = urlparse(key).path.lstrip('/')
+    return key
+
+
+def get_media_object_keys(
+    s3_key: str,
+    mime_type: Optional[str] = None,
+    thumbnails: Optional[Dict[str, str]] = None
+) -> List[str]:
+    """
+    List the S3 keys of a file and everything derived from it.
+    
+    Thumbnail keys come from the stored thumbnails map. Without one they
+    are derived from the MIME type, or every size and extension is listed
+    if that is unknown too. Images also include every possible variant key,
+    which avoids listing the variants prefix.
+    """
+    keys = [s3_key]
+    if thumbnails:
+        keys.extend(_key_from_url(url) for url in thumbnails.values() if url)
+    elif mime_type:
+        if mime_type.startswith('image/'):
+            keys.extend(get_thumbnail_key(s3_key, size, mime_type) for size, _ in THUMBNAIL_SIZES)
+    else:
+        keys.extend(
+            get_thumbnail_key(s3_key, size, candidate)
+            for size, _ in THUMBNAIL_SIZES
+            for candidate in ('image/jpeg', 'image/png')
+        )
+    
+    if mime_type is None or mime_type.startswith('image/'):
+        keys.extend(get_variant_keys(s3_key))
+    return list(dict.fromkeys(keys))
+
+
+def delete_objects(keys: List[str]) -> List[str]:
+    """
+    Delete keys from the media bucket in batches of DELETE_BATCH_SIZE.
+    
+    Keys that do not exist count as deleted.
+    
+    Returns:
+        Keys S3 failed to delete
         
-        for size in ['small', 'medium', 'large']:
-            # Try both jpg and png extensions
-            for ext in ['.jpg', '.png']:
-                thumb_key = f"thumbnails/{size}/{name_without_ext}{ext}"
-                try:
-                    s3_client.delete_object(Bucket=MEDIA_BUCKET, Key=thumb_key)
-                except ClientError:
-                    # Thumbnail might not exist, continue
-                    pass
-                    
+    Raises:
+        Exception: If a batch request fails
+    """
+    failed = []
+    try:
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[start:start + DELETE_BATCH_SIZE]
+            response = s3_client.delete_objects(
+                Bucket=MEDIA_BUCKET,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+            )
+            failed.extend(error['Key'] for error in response.get('Errors', []))
+        return failed
     except ClientError as e:
-        raise Exception(f"Failed to delete file from S3: {str(e)}")
-    except Exception as e:
-        raise Exception(f"Error deleting file: {str(e)}")
+        raise Exception(f"Failed to delete files from S3: {str(e)}")
+
+
+def delete_file(
+    s3_key: str,
+    mime_type: Optional[str] = None,
+    thumbnails: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Delete file and all associated thumbnails and variants from S3.
+    
+    Args:
+        s3_key: S3 key of the file to delete
+        mime_type: MIME type of the file, if known
+        thumbnails: Stored thumbnails map of the file's media record
+        
+    Raises:
+        Exception: If deletion fails
+    """
+    failed = delete_objects(get_media_object_keys(s3_key, mime_type, thumbnails))
+    if failed:
+        raise Exception(f"Failed to delete {len(failed)} file(s) from S3: {', '.join(failed)}")
+
+
+def delete_media_files(media_items: List[Dict]) -> List[str]:
+    """
+    Delete the files of many media items with batched requests.
+    
+    Returns:
+        Keys S3 failed to delete
+    """
+    keys = []
+    for media in media_items:
+        keys.extend(get_media_object_keys(
+            media['s3_key'], media.get('mime_type'), media.get('thumbnails')
+        ))
+    return delete_objects(list(dict.fromkeys(keys)))
 
 
 def get_file_dimensions(file_data: bytes, mime_type: str) -> Optional[Tuple[int, int]]:
     """
-    Get dimensions of an image file.
+    Get dimensions of an image file as displayed, after EXIF orientation.
     
     Args:
         file_data: Binary image content
@@ -208,7 +853,7 @@ def get_file_dimensions(file_data: bytes, mime_type: str) -> Optional[Tuple[int,
     
     try:
         img = Image.open(io.BytesIO(file_data))
-        return img.size
+        return oriented_size(img)
     except Exception:
         return None
 
@@ -4,7 +4,8 @@ DynamoDB repository for CMS sections.
 This module provides SectionRepository, which uses a DynamoDB table containing
 both section items and slug-lock items. Slug locks are stored in the same table
 with id="SLUG#{slug}" and entity_type="slug_lock" so slug uniqueness can be
-enforced with DynamoDB transactions.
+enforced with DynamoDB transactions. Lock items have no slug attribute, which
+keeps slug-index a sparse, section-only index.
 """
 
 from typing import Dict, List, Any, Optional
@@ -19,12 +20,19 @@ from botocore.exceptions import ClientError
 dynamodb = boto3.resource("dynamodb")
 
 
+class ReorderConflictError(Exception):
+    """A reorder does not match the parent's current children."""
+
+
 class SectionRepository:
     """Repository for CMS section persistence in DynamoDB."""
 
     DEFAULT_TABLE_NAME = "cms-sections-dev"
     SLUG_INDEX = "slug-index"
     CHILDREN_INDEX = "parent_id-sort_order-index"
+    BATCH_GET_LIMIT = 100
+    TRANSACT_WRITE_LIMIT = 100
+    POST_COUNTERS = ("direct_post_count", "subtree_post_count")
 
     def __init__(self, table_name: Optional[str] = None) -> None:
         """
@@ -108,17 +116,64 @@ class SectionRepository:
         except ClientError as exc:
             raise Exception(f"Failed to get section by id '{section_id}': {exc}") from exc
 
+    def batch_get_by_ids(self, section_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch several sections by id with BatchGetItem.
+
+        Requests are chunked to the 100-key BatchGetItem limit and unprocessed
+        keys are retried until DynamoDB returns them all.
+
+        Args:
+            section_ids: Section ids to fetch.
+
+        Returns:
+            Dict mapping section id to section item. Missing ids are omitted.
+
+        Raises:
+            Exception: If the read fails.
+        """
+        for section_id in section_ids:
+            self._validate_id(section_id)
+
+        unique_ids = list(dict.fromkeys(section_ids))
+        sections: Dict[str, Dict[str, Any]] = {}
+
+        try:
+            for start in range(0, len(unique_ids), self.BATCH_GET_LIMIT):
+                chunk = unique_ids[start:start + self.BATCH_GET_LIMIT]
+                request_items: Dict[str, Any] = {
+                    self.table_name: {
+                        "Keys": [{"id": section_id} for section_id in chunk],
+                    }
+                }
+
+                while request_items:
+                    response = dynamodb.batch_get_item(RequestItems=request_items)
+
+                    for item in response.get("Responses", {}).get(self.table_name, []):
+                        sections[item["id"]] = item
+
+                    request_items = response.get("UnprocessedKeys") or {}
+
+            return sections
+        except ClientError as exc:
+            raise Exception(f"Failed to batch get sections: {exc}") from exc
+
     def get_by_slug(self, slug: str) -> Optional[Dict[str, Any]]:
         """
-        Fetch a section by slug using the slug-index GSI.
+        Fetch a section by slug using the sparse slug-index GSI.
 
-        Slug-lock items are filtered out.
+        Slug-lock items carry no slug attribute, so the index only holds
+        sections and a single Limit=1 query answers the lookup. Lock items
+        written before scripts/migrate_section_slug_locks.py ran still carry
+        the attribute; if one is returned, the lookup falls back to a
+        filtered query.
 
         Args:
             slug: Section slug.
 
         Returns:
-            First matching section item if found, otherwise None.
+            Matching section item if found, otherwise None.
 
         Raises:
             Exception: If the query fails.
@@ -126,30 +181,20 @@ class SectionRepository:
         self._validate_slug(slug)
 
         try:
-            exclusive_start_key = None
-
-            while True:
-                query_args: Dict[str, Any] = {
-                    "IndexName": self.SLUG_INDEX,
-                    "KeyConditionExpression": Key("slug").eq(slug),
-                    "FilterExpression": (
-                        Attr("entity_type").not_exists()
-                        | Attr("entity_type").ne("slug_lock")
-                    ),
-                }
-
-                if exclusive_start_key:
-                    query_args["ExclusiveStartKey"] = exclusive_start_key
+            response = self.table.query(
+                IndexName=self.SLUG_INDEX,
+                KeyConditionExpression=Key("slug").eq(slug),
+                Limit=1,
+            )
+            items = response.get("Items", [])
 
-                response = self.table.query(**query_args)
-                items = response.get("Items", [])
+            if not items:
+                return None
 
-                if items:
-                    return items[0]
+            if items[0].get("entity_type") == "slug_lock":
+                return self._get_by_slug_skipping_locks(slug)
 
-                exclusive_start_key = response.get("LastEvaluatedKey")
-                if not exclusive_start_key:
-                    return None
+            return items[0]
         except ClientError as exc:
             raise Exception(f"Failed to get section by slug '{slug}': {exc}") from exc
 
@@ -394,6 +439,191 @@ class SectionRepository:
         except ClientError as exc:
             raise Exception(f"Failed to delete section '{section_id}': {exc}") from exc
 
+    def reorder_children(
+        self,
+        parent_id: str,
+        ordered_ids: List[str],
+        updated_at: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Assign sort_order to sibling sections from their position in a list.
+
+        ordered_ids must list exactly the current children of parent_id, so
+        no sibling keeps a stale sort_order that collides with the new ones.
+        Each child receives its list index as sort_order in a single
+        TransactWriteItems, each write conditioned on the child still
+        belonging to parent_id, so a concurrent move cancels the whole
+        reorder instead of reordering a section under the wrong parent.
+        Parents with more children than fit one transaction cannot be
+        reordered this way.
+
+        Args:
+            parent_id: Parent section id, or ROOT for top-level sections.
+            ordered_ids: All child section ids in their new order.
+            updated_at: Timestamp to record on every reordered section.
+
+        Returns:
+            List of {"id", "sort_order"} dicts in the new order.
+
+        Raises:
+            ReorderConflictError: If ordered_ids is not the current child set,
+                or a child no longer belongs to parent_id.
+            Exception: If there are too many ids or the write fails.
+        """
+        self._validate_id(parent_id)
+        for section_id in ordered_ids:
+            self._validate_id(section_id)
+
+        if len(ordered_ids) > self.TRANSACT_WRITE_LIMIT:
+            raise Exception(
+                f"Cannot reorder more than {self.TRANSACT_WRITE_LIMIT} children at once"
+            )
+
+        child_ids = {child["id"] for child in self.get_children(parent_id)}
+        if set(ordered_ids) != child_ids or len(ordered_ids) != len(child_ids):
+            raise ReorderConflictError(
+                f"ids must list exactly the children of '{parent_id}'"
+            )
+
+        order = [
+            {"id": section_id, "sort_order": index}
+            for index, section_id in enumerate(ordered_ids)
+        ]
+
+        transact_items = [
+            {
+                "Update": {
+                    "TableName": self.table_name,
+                    "Key": {"id": self.serializer.serialize(entry["id"])},
+                    "UpdateExpression": "SET #sort_order = :sort_order, #updated_at = :updated_at",
+                    "ExpressionAttributeNames": {
+                        "#sort_order": "sort_order",
+                        "#updated_at": "updated_at",
+                        "#parent_id": "parent_id",
+                    },
+                    "ExpressionAttributeValues": {
+                        ":sort_order": self.serializer.serialize(entry["sort_order"]),
+                        ":updated_at": self.serializer.serialize(updated_at),
+                        ":parent_id": self.serializer.serialize(parent_id),
+                    },
+                    "ConditionExpression": "#parent_id = :parent_id",
+                }
+            }
+            for entry in order
+        ]
+
+        try:
+            self.client.transact_write_items(TransactItems=transact_items)
+        except ClientError as exc:
+            if self._is_transaction_cancelled(exc):
+                raise ReorderConflictError(
+                    f"One or more sections are not children of '{parent_id}'"
+                ) from exc
+            raise Exception(f"Failed to reorder children of '{parent_id}': {exc}") from exc
+
+        return order
+
+    def adjust_post_counts(self, deltas: Dict[str, Dict[str, int]]) -> None:
+        """
+        Atomically apply post counter deltas to several sections.
+
+        All counters are changed in a single transaction with ADD, so the
+        direct and subtree counts along an ancestor chain never disagree.
+
+        Args:
+            deltas: Mapping of section id to counter deltas, e.g.
+                {"sec-1": {"direct_post_count": 1, "subtree_post_count": 1}}.
+                Zero deltas are skipped.
+
+        Raises:
+            Exception: If a section does not exist or the update fails.
+        """
+        transact_items: List[Dict[str, Any]] = []
+
+        for section_id, counters in deltas.items():
+            self._validate_id(section_id)
+
+            changes = {
+                name: delta
+                for name, delta in counters.items()
+                if name in self.POST_COUNTERS and delta
+            }
+            if not changes:
+                continue
+
+            names: Dict[str, str] = {}
+            values: Dict[str, Any] = {}
+            additions: List[str] = []
+
+            for index, (name, delta) in enumerate(changes.items()):
+                names[f"#attr{index}"] = name
+                values[f":val{index}"] = self.serializer.serialize(delta)
+                additions.append(f"#attr{index} :val{index}")
+
+            transact_items.append(
+                {
+                    "Update": {
+                        "TableName": self.table_name,
+                        "Key": {"id": self.serializer.serialize(section_id)},
+                        "UpdateExpression": "ADD " + ", ".join(additions),
+                        "ExpressionAttributeNames": names,
+                        "ExpressionAttributeValues": values,
+                        "ConditionExpression": "attribute_exists(id)",
+                    }
+                }
+            )
+
+        if not transact_items:
+            return
+
+        try:
+            self.client.transact_write_items(TransactItems=transact_items)
+        except ClientError as exc:
+            if self._is_transaction_cancelled(exc):
+                raise Exception(
+                    f"Failed to adjust post counts: section not found ({exc})"
+                ) from exc
+            raise Exception(f"Failed to adjust post counts: {exc}") from exc
+
+    def set_post_counts(
+        self,
+        section_id: str,
+        direct_post_count: int,
+        subtree_post_count: int,
+    ) -> None:
+        """
+        Overwrite a section's post counters, used by reconciliation jobs.
+
+        Args:
+            section_id: Section id.
+            direct_post_count: Published posts assigned to this section.
+            subtree_post_count: Published posts in this section and descendants.
+
+        Raises:
+            Exception: If the section does not exist or the update fails.
+        """
+        self._validate_id(section_id)
+
+        try:
+            self.table.update_item(
+                Key={"id": section_id},
+                UpdateExpression="SET #direct = :direct, #subtree = :subtree",
+                ExpressionAttributeNames={
+                    "#direct": "direct_post_count",
+                    "#subtree": "subtree_post_count",
+                },
+                ExpressionAttributeValues={
+                    ":direct": direct_post_count,
+                    ":subtree": subtree_post_count,
+                },
+                ConditionExpression=Attr("id").exists(),
+            )
+        except ClientError as exc:
+            error_code = exc.response.get("Error", {}).get("Code")
+            if error_code == "ConditionalCheckFailedException":
+                raise Exception(f"Section '{section_id}' not found") from exc
+            raise Exception(f"Failed to set post counts for '{section_id}': {exc}") from exc
+
     def get_descendant_ids(self, section_id: str) -> List[str]:
         """
         Return all descendant section ids using breadth-first traversal.
@@ -516,16 +746,47 @@ class SectionRepository:
 
         return "SET " + ", ".join(assignments), names, values
 
+    def _get_by_slug_skipping_locks(self, slug: str) -> Optional[Dict[str, Any]]:
+        """Query slug-index while filtering out legacy slug-lock items."""
+        exclusive_start_key = None
+
+        while True:
+            query_args: Dict[str, Any] = {
+                "IndexName": self.SLUG_INDEX,
+                "KeyConditionExpression": Key("slug").eq(slug),
+                "FilterExpression": (
+                    Attr("entity_type").not_exists()
+                    | Attr("entity_type").ne("slug_lock")
+                ),
+            }
+
+            if exclusive_start_key:
+                query_args["ExclusiveStartKey"] = exclusive_start_key
+
+            response = self.table.query(**query_args)
+            items = response.get("Items", [])
+
+            if items:
+                return items[0]
+
+            exclusive_start_key = response.get("LastEvaluatedKey")
+            if not exclusive_start_key:
+                return None
+
     def _slug_lock_id(self, slug: str) -> str:
         """Return the primary key id for a slug-lock item."""
         return f"SLUG#{slug}"
 
     def _slug_lock_item(self, slug: str) -> Dict[str, Any]:
-        """Return a slug-lock item for the given slug."""
+        """
+        Return a slug-lock item for the given slug.
+
+        The slug lives only in the key; lock items deliberately omit the
+        slug attribute so they stay out of the sparse slug-index.
+        """
         return {
             "id": self._slug_lock_id(slug),
             "entity_type": "slug_lock",
-            "slug": slug,
         }
 
     def _is_transaction_cancelled(self, exc: ClientError) -> bool:
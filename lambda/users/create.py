@@ -17,7 +17,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.auth import require_auth
 from shared.db import UserRepository
-from shared.email import send_welcome_email
+from shared.mailer import queue_email
 
 
 user_repo = UserRepository()
@@ -204,11 +204,11 @@ def handler(event, context, user_id, role):
                 })
             }
         
-        # Send welcome email
+        # Queue welcome email
         try:
-            send_welcome_email(email, name, temp_password)
+            queue_email('welcome', [email], user_name=name, temporary_password=temp_password)
         except Exception as e:
-            print(f"Error sending welcome email: {e}")
+            print(f"Error queueing welcome email: {e}")
             # Don't fail the request if email fails
         
         return {
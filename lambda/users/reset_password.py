@@ -13,7 +13,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.auth import require_auth
 from shared.db import UserRepository
-from shared.email import send_password_reset_email
+from shared.mailer import queue_email
 
 
 user_repo = UserRepository()
@@ -104,13 +104,14 @@ def handler(event, context, user_id, role):
         # Note: The actual reset code is sent by Cognito
         # This is an additional notification for better UX
         try:
-            send_password_reset_email(
-                existing_user['email'],
-                existing_user['name'],
-                'Check your email for the password reset code from Cognito'
+            queue_email(
+                'password_reset',
+                [existing_user['email']],
+                user_name=existing_user['name'],
+                reset_code='Check your email for the password reset code from Cognito'
             )
         except Exception as e:
-            print(f"Error sending password reset email: {e}")
+            print(f"Error queueing password reset email: {e}")
             # Don't fail the request if email fails
         
         return {
@@ -3,19 +3,43 @@ import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import { Construct } from 'constructs';
 import { preserveLogicalId } from '../utils/logical-id';
 
+/**
+ * Media table listing indexes, in rollout order. DynamoDB creates only one
+ * GSI per table update, so an existing table gets them one deploy at a time:
+ * raise mediaListingIndexes by one, deploy, and wait for the deploy to finish
+ * (the index is backfilled and ACTIVE) before the next step. Lambdas are told
+ * which indexes exist and filter the library index for the rest.
+ *
+ * The library index puts every media record in one partition ('media').
+ * That partition takes one index write per upload or delete and one query
+ * per admin page of the library, far below the 1,000 writes and 3,000 reads
+ * per second a partition serves, so it is not sharded. Sharding would turn
+ * every newest-first page into a merge of one query per shard.
+ */
+export const MEDIA_LISTING_INDEXES = [
+  'library-uploaded_at-index',
+  'media_type-uploaded_at-index',
+  'uploaded_by-uploaded_at-index',
+];
+
 export interface DatabaseConstructProps {
   environment: string;
+  /** How many of MEDIA_LISTING_INDEXES to create, in order (default: all) */
+  mediaListingIndexes?: number;
 }
 
 export class DatabaseConstruct extends Construct {
   public readonly contentTable: dynamodb.Table;
   public readonly mediaTable: dynamodb.Table;
+  /** Names of the media listing indexes this deploy creates */
+  public readonly mediaListingIndexes: string[];
   public readonly usersTable: dynamodb.Table;
   public readonly settingsTable: dynamodb.Table;
   public readonly pluginsTable: dynamodb.Table;
   public readonly commentsTable: dynamodb.Table;
   public readonly sectionsTable: dynamodb.Table;
   public readonly themesTable: dynamodb.Table;
+  public readonly rateLimitsTable: dynamodb.Table;
 
   constructor(scope: Construct, id: string, props: DatabaseConstructProps) {
     super(scope, id);
@@ -64,9 +88,28 @@ export class DatabaseConstruct extends Construct {
       removalPolicy: cdk.RemovalPolicy.RETAIN,
       pointInTimeRecovery: true,
       encryption: dynamodb.TableEncryption.AWS_MANAGED,
+      // Expires abandoned multipart upload sessions
+      timeToLiveAttribute: 'expires_at',
     });
     preserveLogicalId(this.mediaTable, 'MediaTableCFC93525');
 
+    // Media library listing, newest first. Only media records carry library,
+    // media_type and uploaded_by, so sessions, counters and other entities
+    // stay out.
+    const mediaListingIndexes = props.mediaListingIndexes ?? MEDIA_LISTING_INDEXES.length;
+    if (!Number.isInteger(mediaListingIndexes) || mediaListingIndexes < 1
+        || mediaListingIndexes > MEDIA_LISTING_INDEXES.length) {
+      throw new Error(`mediaListingIndexes must be 1 to ${MEDIA_LISTING_INDEXES.length}`);
+    }
+    this.mediaListingIndexes = MEDIA_LISTING_INDEXES.slice(0, mediaListingIndexes);
+    for (const indexName of this.mediaListingIndexes) {
+      this.mediaTable.addGlobalSecondaryIndex({
+        indexName,
+        partitionKey: { name: indexName.split('-')[0], type: dynamodb.AttributeType.STRING },
+        sortKey: { name: 'uploaded_at', type: dynamodb.AttributeType.NUMBER },
+      });
+    }
+
     // Users Table
     this.usersTable = new dynamodb.Table(this, 'UsersTable', {
       tableName: `cms-users-${props.environment}`,
@@ -129,6 +172,15 @@ export class DatabaseConstruct extends Construct {
       sortKey: { name: 'created_at', type: dynamodb.AttributeType.NUMBER },
     });
 
+    // Sparse: only comments rewritten by scripts/migrate_comment_ids.py have
+    // a legacy_id, so their old UUID ids keep resolving. Deploy this before
+    // running the migration.
+    this.commentsTable.addGlobalSecondaryIndex({
+      indexName: 'legacy_id-index',
+      partitionKey: { name: 'legacy_id', type: dynamodb.AttributeType.STRING },
+      projectionType: dynamodb.ProjectionType.KEYS_ONLY,
+    });
+
     // Sections Table
     this.sectionsTable = new dynamodb.Table(this, 'SectionsTable', {
       tableName: `cms-sections-${props.environment}`,
@@ -139,6 +191,8 @@ export class DatabaseConstruct extends Construct {
       encryption: dynamodb.TableEncryption.AWS_MANAGED,
     });
 
+    // Sparse: slug-lock items (id SLUG#<slug>) have no slug attribute, so only
+    // sections are indexed and slug lookups are a single Limit=1 query.
     this.sectionsTable.addGlobalSecondaryIndex({
       indexName: 'slug-index',
       partitionKey: { name: 'slug', type: dynamodb.AttributeType.STRING },
@@ -159,5 +213,18 @@ export class DatabaseConstruct extends Construct {
       pointInTimeRecovery: true,
       encryption: dynamodb.TableEncryption.AWS_MANAGED,
     });
+
+    // Rate Limits Table
+    // One token bucket per (scope, key), see lambda/shared/rate_limit.py.
+    // Buckets are short-lived and expire through TTL once they have refilled,
+    // so the table is neither backed up nor retained.
+    this.rateLimitsTable = new dynamodb.Table(this, 'RateLimitsTable', {
+      tableName: `cms-rate-limits-${props.environment}`,
+      partitionKey: { name: 'id', type: dynamodb.AttributeType.STRING },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+      encryption: dynamodb.TableEncryption.AWS_MANAGED,
+      timeToLiveAttribute: 'expires_at',
+    });
   }
 }
@@ -6,6 +6,8 @@ import * as s3 from 'aws-cdk-lib/aws-s3';
 import * as cognito from 'aws-cdk-lib/aws-cognito';
 import * as apigateway from 'aws-cdk-lib/aws-apigateway';
 import * as iam from 'aws-cdk-lib/aws-iam';
+import * as sqs from 'aws-cdk-lib/aws-sqs';
+import * as lambdaEventSources from 'aws-cdk-lib/aws-lambda-event-sources';
 import * as events from 'aws-cdk-lib/aws-events';
 import * as targets from 'aws-cdk-lib/aws-events-targets';
 import { Construct, IConstruct } from 'constructs';
@@ -15,12 +17,14 @@ export interface LambdaApiConstructProps {
   environment: string;
   contentTable: dynamodb.ITable;
   mediaTable: dynamodb.ITable;
+  mediaListingIndexes: string[];
   usersTable: dynamodb.ITable;
   settingsTable: dynamodb.ITable;
   pluginsTable: dynamodb.ITable;
   commentsTable: dynamodb.ITable;
   sectionsTable: dynamodb.ITable;
   themesTable: dynamodb.ITable;
+  rateLimitsTable: dynamodb.ITable;
   mediaBucket: s3.Bucket;
   userPool: cognito.IUserPool;
   userPoolClient: cognito.IUserPoolClient;
@@ -68,16 +72,47 @@ export class LambdaApiConstruct extends Construct {
     });
     preserveLogicalId(this.sharedLayer, 'SharedLayer27DFABF0');
 
+    // First-party plugins run in-process by the content and media handlers
+    // (see TRUSTED_PLUGINS); the layer puts each at /opt/<plugin id>/handler.py
+    const trustedPluginsLayer = new lambda.LayerVersion(this, 'TrustedPluginsLayer', {
+      code: lambda.Code.fromAsset('plugins', {
+        exclude: ['*.md', '*/package.sh', '*/requirements.txt'],
+      }),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_12],
+      description: 'Trusted first-party CMS plugins',
+    });
+    const trustedPluginsEnv = {
+      TRUSTED_PLUGINS: 'syntax-highlighter,gallery-enhancer',
+      TRUSTED_PLUGIN_DIR: '/opt',
+    };
+
+    // ─── Outbound email queue (sent by the mailer worker) ───────────────
+    const emailDeadLetterQueue = new sqs.Queue(this, 'EmailDeadLetterQueue', {
+      queueName: `cms-email-jobs-dlq-${props.environment}`,
+      retentionPeriod: Duration.days(14),
+      encryption: sqs.QueueEncryption.SQS_MANAGED,
+    });
+    const emailQueue = new sqs.Queue(this, 'EmailQueue', {
+      queueName: `cms-email-jobs-${props.environment}`,
+      // Six times the worker timeout, plus the batching window
+      visibilityTimeout: Duration.seconds(420),
+      // Jobs can carry temporary passwords
+      encryption: sqs.QueueEncryption.SQS_MANAGED,
+      deadLetterQueue: { queue: emailDeadLetterQueue, maxReceiveCount: 3 },
+    });
+
     // Common environment variables
     this.commonEnv = {
       CONTENT_TABLE: props.contentTable.tableName,
       MEDIA_TABLE: props.mediaTable.tableName,
+      MEDIA_LISTING_INDEXES: props.mediaListingIndexes.join(','),
       USERS_TABLE: props.usersTable.tableName,
       SETTINGS_TABLE: props.settingsTable.tableName,
       PLUGINS_TABLE: props.pluginsTable.tableName,
       COMMENTS_TABLE: props.commentsTable.tableName,
       SECTIONS_TABLE: props.sectionsTable.tableName,
       THEMES_TABLE: props.themesTable.tableName,
+      RATE_LIMITS_TABLE: props.rateLimitsTable.tableName,
       MEDIA_BUCKET: props.mediaBucket.bucketName,
       MEDIA_CDN_URL: props.mediaCdnUrl,
       COGNITO_REGION: cdk.Stack.of(this).region,
@@ -87,22 +122,70 @@ export class LambdaApiConstruct extends Construct {
       SES_FROM_EMAIL: props.sesFromEmail,
       SES_CONFIGURATION_SET: props.sesConfigurationSetName,
       SES_REGION: cdk.Stack.of(this).region,
+      EMAIL_QUEUE_URL: emailQueue.queueUrl,
     };
 
     // ─── Content Lambda Function (unified handler) ────────────────────
     const contentHandler = this.createFunction({
       id: 'ContentHandlerFunction', nameSuffix: 'content-handler',
       handler: 'handler', codePath: 'lambda/content',
+      extraEnv: trustedPluginsEnv,
       logicalId: 'ContentHandlerFunction',
     });
+    contentHandler.addLayers(trustedPluginsLayer);
+
+    // ─── Media processing queue (thumbnail jobs) ───────────────────────
+    const thumbnailDeadLetterQueue = new sqs.Queue(this, 'ThumbnailDeadLetterQueue', {
+      queueName: `cms-thumbnail-jobs-dlq-${props.environment}`,
+      retentionPeriod: Duration.days(14),
+    });
+    const thumbnailQueue = new sqs.Queue(this, 'ThumbnailQueue', {
+      queueName: `cms-thumbnail-jobs-${props.environment}`,
+      // Six times the worker timeout, per the Lambda SQS guidance
+      visibilityTimeout: Duration.seconds(360),
+      deadLetterQueue: { queue: thumbnailDeadLetterQueue, maxReceiveCount: 3 },
+    });
 
     // ─── Media Lambda Function (unified handler) ────────────────────────
     const mediaHandler = this.createFunction({
       id: 'MediaHandlerFunction', nameSuffix: 'media-handler',
       handler: 'handler', codePath: 'lambda/media',
       timeout: 60, memorySize: 1024,
+      extraEnv: { THUMBNAIL_QUEUE_URL: thumbnailQueue.queueUrl, ...trustedPluginsEnv },
       logicalId: 'MediaHandlerFunction',
     });
+    mediaHandler.addLayers(trustedPluginsLayer);
+
+    // ─── Media Worker Lambda Function (thumbnail jobs) ──────────────────
+    const mediaWorker = this.createFunction({
+      id: 'MediaWorkerFunction', nameSuffix: 'media-worker',
+      handler: 'worker', codePath: 'lambda/media',
+      timeout: 60, memorySize: 1536,
+      description: 'Generates media thumbnails from the thumbnail job queue',
+      logicalId: 'MediaWorkerFunction',
+    });
+    mediaWorker.addEventSource(new lambdaEventSources.SqsEventSource(thumbnailQueue, {
+      batchSize: 5,
+      reportBatchItemFailures: true,
+    }));
+
+    // ─── Mailer Worker Lambda Function (email jobs) ─────────────────────
+    const mailerWorker = this.createFunction({
+      id: 'MailerWorkerFunction', nameSuffix: 'mailer-worker',
+      handler: 'worker', codePath: 'lambda/mailer',
+      timeout: 60, memorySize: 256,
+      description: 'Sends queued emails and notification digests with SES',
+      logicalId: 'MailerWorkerFunction',
+    });
+    mailerWorker.addEventSource(new lambdaEventSources.SqsEventSource(emailQueue, {
+      batchSize: 100,
+      // Notifications for one recipient within the window become one digest
+      maxBatchingWindow: Duration.seconds(60),
+      // Bounds concurrent SES calls with EMAIL_SEND_CONCURRENCY per worker
+      maxConcurrency: 2,
+      reportBatchItemFailures: true,
+    }));
+    this.grantSesSendEmail(mailerWorker);
 
     // ─── Users Lambda Function (unified handler) ────────────────────────
     const usersHandler = this.createFunction({
@@ -163,6 +246,7 @@ export class LambdaApiConstruct extends Construct {
       memorySize: 256,
       environment: {
         CONTENT_TABLE: props.contentTable.tableName,
+        SECTIONS_TABLE: props.sectionsTable.tableName,
         ENVIRONMENT: props.environment,
       },
       description: 'Publishes scheduled content when scheduled_at time is reached',
@@ -178,6 +262,7 @@ export class LambdaApiConstruct extends Construct {
     this.pendingPolicyOverrides.set(this.schedulerFunction, 'SchedulerFunctionServiceRoleDefaultPolicyA8621E37');
 
     props.contentTable.grantReadWriteData(this.schedulerFunction);
+    props.sectionsTable.grantReadWriteData(this.schedulerFunction);
 
     // EventBridge Rule to trigger scheduler every 5 minutes
     const schedulerRule = new events.Rule(this, 'SchedulerRule', {
@@ -208,8 +293,10 @@ export class LambdaApiConstruct extends Construct {
     props.contentTable.grantReadWriteData(contentHandler);
     this.grantDynamoDbIndexQuery(contentHandler, props.contentTable);
     props.pluginsTable.grantReadData(contentHandler);
+    this.grantPluginBreakerUpdates(contentHandler, props.pluginsTable);
     props.usersTable.grantReadWriteData(contentHandler);
-    props.sectionsTable.grantReadData(contentHandler);
+    props.sectionsTable.grantReadWriteData(contentHandler);
+    props.mediaTable.grantReadWriteData(contentHandler);
     this.grantCognito(contentHandler, ['cognito-idp:AdminGetUser']);
 
     // Media handler permissions
@@ -217,7 +304,13 @@ export class LambdaApiConstruct extends Construct {
     props.mediaBucket.grantReadWrite(mediaHandler);
     props.mediaBucket.grantDelete(mediaHandler);
     props.pluginsTable.grantReadData(mediaHandler);
+    this.grantPluginBreakerUpdates(mediaHandler, props.pluginsTable);
     props.usersTable.grantReadData(mediaHandler);
+    props.contentTable.grantReadData(mediaHandler);
+    thumbnailQueue.grantSendMessages(mediaHandler);
+    props.mediaTable.grantReadWriteData(mediaWorker);
+    props.mediaBucket.grantReadWrite(mediaWorker);
+    props.mediaBucket.grantDelete(mediaWorker);
 
     // Users handler permissions
     props.usersTable.grantReadWriteData(usersHandler);
@@ -226,7 +319,7 @@ export class LambdaApiConstruct extends Construct {
       'cognito-idp:AdminCreateUser', 'cognito-idp:AdminSetUserPassword',
       'cognito-idp:AdminDeleteUser', 'cognito-idp:AdminResetUserPassword',
     ]);
-    this.grantSesSendEmail(usersHandler);
+    emailQueue.grantSendMessages(usersHandler);
     this.grantCloudWatchPutMetricData(usersHandler);
 
     // Settings handler permissions
@@ -241,19 +334,23 @@ export class LambdaApiConstruct extends Construct {
     // Comments handler permissions
     props.commentsTable.grantReadWriteData(commentsHandler);
     this.grantDynamoDbIndexQuery(commentsHandler, props.commentsTable);
-    props.contentTable.grantReadData(commentsHandler);
+    // Comment counts on content items change with the comments
+    props.contentTable.grantReadWriteData(commentsHandler);
     props.settingsTable.grantReadData(commentsHandler);
     props.usersTable.grantReadData(commentsHandler);
+    props.rateLimitsTable.grantReadWriteData(commentsHandler);
+    emailQueue.grantSendMessages(commentsHandler);
     this.grantCloudWatchPutMetricData(commentsHandler);
 
     // Auth handler permissions
     props.usersTable.grantReadWriteData(authHandler);
+    props.rateLimitsTable.grantReadWriteData(authHandler);
     this.grantCognito(authHandler, [
       'cognito-idp:AdminCreateUser', 'cognito-idp:AdminSetUserPassword',
       'cognito-idp:AdminUpdateUserAttributes', 'cognito-idp:ListUsers',
       'cognito-idp:AdminConfirmSignUp',
     ]);
-    this.grantSesSendEmail(authHandler);
+    emailQueue.grantSendMessages(authHandler);
     this.grantCloudWatchPutMetricData(authHandler);
 
     // Section function permissions
@@ -306,6 +403,35 @@ export class LambdaApiConstruct extends Construct {
       authorizationType: apigateway.AuthorizationType.COGNITO,
     });
 
+    const mediaBulkDeleteResource = mediaResource.addResource('bulk-delete');
+    mediaBulkDeleteResource.addMethod('POST', new apigateway.LambdaIntegration(mediaHandler), {
+      authorizer: props.authorizer,
+      authorizationType: apigateway.AuthorizationType.COGNITO,
+    });
+
+    // Direct-to-S3 multipart upload sessions
+    const mediaUploadsResource = mediaResource.addResource('uploads');
+    mediaUploadsResource.addMethod('POST', new apigateway.LambdaIntegration(mediaHandler), {
+      authorizer: props.authorizer,
+      authorizationType: apigateway.AuthorizationType.COGNITO,
+    });
+
+    const mediaUploadSessionResource = mediaUploadsResource.addResource('{upload_id}');
+    mediaUploadSessionResource.addMethod('GET', new apigateway.LambdaIntegration(mediaHandler), {
+      authorizer: props.authorizer,
+      authorizationType: apigateway.AuthorizationType.COGNITO,
+    });
+    mediaUploadSessionResource.addMethod('DELETE', new apigateway.LambdaIntegration(mediaHandler), {
+      authorizer: props.authorizer,
+      authorizationType: apigateway.AuthorizationType.COGNITO,
+    });
+
+    const mediaUploadCompleteResource = mediaUploadSessionResource.addResource('complete');
+    mediaUploadCompleteResource.addMethod('POST', new apigateway.LambdaIntegration(mediaHandler), {
+      authorizer: props.authorizer,
+      authorizationType: apigateway.AuthorizationType.COGNITO,
+    });
+
     const mediaIdResource = mediaResource.addResource('{id}');
     mediaIdResource.addMethod('GET', new apigateway.LambdaIntegration(mediaHandler), {
       authorizer: props.authorizer,
@@ -316,6 +442,16 @@ export class LambdaApiConstruct extends Construct {
       authorizationType: apigateway.AuthorizationType.COGNITO,
     });
 
+    // Public resized image variants, e.g. /media/{id}/image?preset=card
+    const mediaImageResource = mediaIdResource.addResource('image');
+    mediaImageResource.addMethod('GET', new apigateway.LambdaIntegration(mediaHandler));
+
+    const mediaUsageResource = mediaIdResource.addResource('usage');
+    mediaUsageResource.addMethod('GET', new apigateway.LambdaIntegration(mediaHandler), {
+      authorizer: props.authorizer,
+      authorizationType: apigateway.AuthorizationType.COGNITO,
+    });
+
     // User endpoints: /api/v1/users
     const usersResource = apiV1.addResource('users');
     usersResource.addMethod('GET', new apigateway.LambdaIntegration(usersHandler), {
@@ -415,6 +551,12 @@ export class LambdaApiConstruct extends Construct {
       authorizationType: apigateway.AuthorizationType.COGNITO,
     });
 
+    const commentsBulkResource = commentsResource.addResource('bulk');
+    commentsBulkResource.addMethod('POST', new apigateway.LambdaIntegration(commentsHandler), {
+      authorizer: props.authorizer,
+      authorizationType: apigateway.AuthorizationType.COGNITO,
+    });
+
     const commentIdResource = commentsResource.addResource('{id}');
     commentIdResource.addMethod('PUT', new apigateway.LambdaIntegration(commentsHandler), {
       authorizer: props.authorizer,
@@ -458,6 +600,12 @@ export class LambdaApiConstruct extends Construct {
       authorizationType: apigateway.AuthorizationType.COGNITO,
     });
 
+    const sectionReorderResource = sectionIdResource.addResource('reorder');
+    sectionReorderResource.addMethod('PUT', new apigateway.LambdaIntegration(sectionHandler), {
+      authorizer: props.authorizer,
+      authorizationType: apigateway.AuthorizationType.COGNITO,
+    });
+
     // Public section endpoints: /api/v1/public/sections (unauthenticated)
     const publicResource = apiV1.addResource('public');
     const publicSectionsResource = publicResource.addResource('sections');
@@ -469,6 +617,10 @@ export class LambdaApiConstruct extends Construct {
     const publicSectionsPathProxy = publicSectionsPathResource.addResource('{path+}');
     publicSectionsPathProxy.addMethod('GET', new apigateway.LambdaIntegration(sectionHandler));
 
+    const publicSectionsPageResource = publicSectionsResource.addResource('page');
+    const publicSectionsPageProxy = publicSectionsPageResource.addResource('{path+}');
+    publicSectionsPageProxy.addMethod('GET', new apigateway.LambdaIntegration(sectionHandler));
+
     const publicSectionIdResource = publicSectionsResource.addResource('{id}');
     const publicSectionPostsResource = publicSectionIdResource.addResource('posts');
     publicSectionPostsResource.addMethod('GET', new apigateway.LambdaIntegration(sectionHandler));
@@ -639,6 +791,20 @@ export class LambdaApiConstruct extends Construct {
     }));
   }
 
+  // Handlers that run plugin hooks record circuit breaker state in the
+  // BREAKER#<plugin-id> items of the plugins table, and may not write any
+  // other item there.
+  private grantPluginBreakerUpdates(fn: lambda.Function, table: dynamodb.ITable): void {
+    fn.addToRolePolicy(new iam.PolicyStatement({
+      effect: iam.Effect.ALLOW,
+      actions: ['dynamodb:UpdateItem'],
+      resources: [table.tableArn],
+      conditions: {
+        'ForAllValues:StringLike': { 'dynamodb:LeadingKeys': ['BREAKER#*'] },
+      },
+    }));
+  }
+
   private grantCognito(fn: lambda.Function, actions: string[]): void {
     fn.addToRolePolicy(new iam.PolicyStatement({
       effect: iam.Effect.ALLOW,
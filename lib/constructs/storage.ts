@@ -37,6 +37,13 @@ export class StorageConstruct extends Construct {
         },
       ],
       blockPublicAccess: s3.BlockPublicAccess.BLOCK_ALL,
+      lifecycleRules: [
+        {
+          // Clean up parts left behind by abandoned upload sessions
+          id: 'AbortIncompleteMultipartUploads',
+          abortIncompleteMultipartUploadAfter: cdk.Duration.days(1),
+        },
+      ],
     });
     preserveLogicalId(this.mediaBucket, 'MediaBucketBCBB02BA');
 
@@ -29,6 +29,8 @@ export interface ServerlessCmsStackProps extends cdk.StackProps {
   rootDomainAliases?: string[];
   alarmEmail?: string;
   sesFromEmail?: string;
+  /** Media listing indexes to create, see MEDIA_LISTING_INDEXES */
+  mediaListingIndexes?: number;
 }
 
 export class ServerlessCmsStack extends cdk.Stack {
@@ -96,6 +98,7 @@ export class ServerlessCmsStack extends cdk.Stack {
     // ─── Infrastructure Constructs ────────────────────────────────────
     const database = new DatabaseConstruct(this, 'Database', {
       environment: props.environment,
+      mediaListingIndexes: props.mediaListingIndexes,
     });
 
     const storage = new StorageConstruct(this, 'Storage', {
@@ -195,6 +198,7 @@ export class ServerlessCmsStack extends cdk.Stack {
       environment: props.environment,
       contentTable: database.contentTable,
       mediaTable: database.mediaTable,
+      mediaListingIndexes: database.mediaListingIndexes,
       usersTable: database.usersTable,
       settingsTable: database.settingsTable,
       commentsTable: database.commentsTable,
@@ -218,6 +222,7 @@ export class ServerlessCmsStack extends cdk.Stack {
       commentsTable: database.commentsTable,
       sectionsTable: database.sectionsTable,
       themesTable: database.themesTable,
+      rateLimitsTable: database.rateLimitsTable,
       mediaBucket: storage.mediaBucket,
       userPool: auth.userPool,
       userPoolClient: auth.userPoolClient,
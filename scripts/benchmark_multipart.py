@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of multipart/form-data parsing for media uploads.
+
+Builds a base64-encoded upload body, the way API Gateway delivers it, and
+measures the peak memory allocated while turning it into form parts:
+
+  legacy     the previous media/upload.py approach: decode the body twice,
+             split on the boundary, then split each part on its headers
+  streaming  media/upload.py now: decode once, without copying the base64
+             string to bytes first, and parse in place
+  chunked    shared.multipart fed in chunks, as from a streamed source
+
+Peak memory is reported as a multiple of the decoded payload size. The
+base64 string itself is allocated before measuring starts.
+
+Usage:
+    python scripts/benchmark_multipart.py
+    python scripts/benchmark_multipart.py --size-mb 25 --files 3
+"""
+
+import argparse
+import base64
+import binascii
+import os
+import sys
+import time
+import tracemalloc
+
+REGION = "us-west-2"
+
+# Importing the shared package creates boto3 clients, which need a region
+# even though the benchmark makes no AWS calls.
+os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from shared.multipart import MultipartParser, parse_form  # noqa: E402
+
+
+BOUNDARY = '----BenchmarkBoundary'
+CONTENT_TYPE = f'multipart/form-data; boundary={BOUNDARY}'
+
+
+class Colors:
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+
+
+def bold(message):
+    return f"{Colors.BOLD}{message}{Colors.RESET}"
+
+
+def build_body(size_mb, files):
+    parts = [
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="metadata"\r\n\r\n'
+        '{"alt_text": "benchmark"}\r\n'.encode()
+    ]
+    file_size = size_mb * 1024 * 1024 // files
+    for index in range(files):
+        parts.append(
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; '
+            f'filename="file-{index}.bin"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode()
+        )
+        parts.append(os.urandom(file_size))
+        parts.append(b'\r\n')
+    parts.append(f'--{BOUNDARY}--\r\n'.encode())
+    return b''.join(parts)
+
+
+def legacy_parse(body):
+    decoded_body = base64.b64decode(body)
+    decoded_body = base64.b64decode(body)
+    files = []
+    for part in decoded_body.split(f'--{BOUNDARY}'.encode()):
+        if part.startswith(b'\r\n'):
+            part = part[2:]
+        if b'\r\n\r\n' in part:
+            headers, content = part.split(b'\r\n\r\n', 1)
+            if 'filename=' in headers.decode('utf-8', errors='ignore'):
+                files.append(content[:-2] if content.endswith(b'\r\n') else content)
+    return files
+
+
+def streaming_parse(body):
+    return parse_form(binascii.a2b_base64(body), CONTENT_TYPE).files
+
+
+def chunked_parse(body, chunk_size):
+    # Decode a 4-byte aligned slice at a time, as a streamed source would
+    # deliver the body, so the full decoded body never exists at once.
+    parser = MultipartParser(CONTENT_TYPE)
+    step = chunk_size // 3 * 4
+    for start in range(0, len(body), step):
+        parser.feed(binascii.a2b_base64(body[start:start + step]))
+    return parser.close().files
+
+
+def measure(label, func, payload_size):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    ratio = peak / payload_size
+    color = Colors.GREEN if ratio < 1.5 else Colors.YELLOW
+    print(f"  {label:<10} peak {peak / 1024 / 1024:8.1f} MiB  "
+          f"{color}{ratio:5.2f}x payload{Colors.RESET}  {elapsed * 1000:8.1f} ms")
+    return ratio
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark peak memory of multipart upload parsing."
+    )
+    parser.add_argument("--size-mb", type=int, default=10, help="Total file payload in MiB.")
+    parser.add_argument("--files", type=int, default=1, help="Number of file parts.")
+    parser.add_argument(
+        "--chunk-kb",
+        type=int,
+        default=1024,
+        help="Chunk size for the chunked run, in KiB.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    payload = build_body(args.size_mb, args.files)
+    body = base64.b64encode(payload).decode()
+    payload_size = len(payload)
+    del payload
+
+    print(bold(f"=== {args.files} file(s), {payload_size / 1024 / 1024:.1f} MiB payload ==="))
+    measure("legacy", lambda: legacy_parse(body), payload_size)
+    measure("streaming", lambda: streaming_parse(body), payload_size)
+    measure("chunked", lambda: chunked_parse(body, args.chunk_kb * 1024), payload_size)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
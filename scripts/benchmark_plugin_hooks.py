@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Benchmark plugin hook latency by execution mode.
+
+Runs each bundled plugin's hook with sample content, through the same
+PluginManager code path content and media handlers use:
+
+  in_process  the trusted plugin's handler.py loaded from plugins/ and run
+              inside this process, with its time budget
+  lambda      a RequestResponse invoke of the plugin function registered in
+              the environment's plugins table (only with --env)
+
+Latency is reported per hook and mode as p50, p95 and mean over the
+iterations, after one warm-up call. Without --env, in-process plugins use
+their default settings instead of reading them from DynamoDB, so only the
+in-process mode is measured.
+
+Usage:
+    python scripts/benchmark_plugin_hooks.py
+    python scripts/benchmark_plugin_hooks.py --iterations 200 --blocks 20
+    python scripts/benchmark_plugin_hooks.py --env staging
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REGION = "us-west-2"
+PLUGINS_DIR = os.path.join(os.path.dirname(__file__), '..', 'plugins')
+
+# Importing the shared package creates boto3 clients, which need a region
+# even when the benchmark makes no AWS calls.
+os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+import boto3  # noqa: E402
+from botocore.exceptions import ClientError  # noqa: E402
+
+from shared import plugins  # noqa: E402
+from shared.plugins import RUNTIME_IN_PROCESS, RUNTIME_LAMBDA, PluginManager  # noqa: E402
+
+
+PLUGINS_TABLE_TEMPLATE = "cms-plugins-{env}"
+# Budget for benchmark calls, high enough that no call is abandoned
+BENCHMARK_TIMEOUT_MS = 30000
+
+
+class Colors:
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    RED = "\033[31m"
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+
+
+def print_warning(message):
+    print(f"{Colors.YELLOW}{message}{Colors.RESET}")
+
+
+def print_error(message):
+    print(f"{Colors.RED}{message}{Colors.RESET}")
+
+
+def bold(message):
+    return f"{Colors.BOLD}{message}{Colors.RESET}"
+
+
+def format_client_error(error):
+    response = getattr(error, "response", {}) or {}
+    err = response.get("Error", {}) or {}
+    code = err.get("Code", "UnknownError")
+    message = err.get("Message", str(error))
+    return f"{code}: {message}"
+
+
+def post_content(blocks):
+    code = 'def greet(name):\n    return f&quot;Hello, {name}!&quot;\n\nprint(greet(&quot;world&quot;))'
+    parts = []
+    for index in range(blocks):
+        parts.append(f'<h2>Section {index}</h2><p>Some prose before the example.</p>')
+        parts.append(f'<pre><code class="language-python">{code}</code></pre>')
+    return ''.join(parts)
+
+
+def gallery_content(images):
+    tags = ''.join(
+        f'<img src="https://cdn.example.com/photo-{index}.jpg" alt="Photo {index}" />'
+        for index in range(images)
+    )
+    return f'<p>Trip photos</p><div class="gallery">{tags}</div>'
+
+
+# plugin id -> (hook name, sample content builder)
+BENCHMARKS = {
+    'syntax-highlighter': ('content_render_post', post_content),
+    'gallery-enhancer': ('content_render_gallery', gallery_content),
+}
+
+
+def load_function_arns(env):
+    """Return {plugin id: {hook name: function arn}} from the plugins table."""
+    table = boto3.resource("dynamodb", region_name=REGION).Table(PLUGINS_TABLE_TEMPLATE.format(env=env))
+    arns = {}
+    for plugin_id in BENCHMARKS:
+        item = table.get_item(Key={"id": plugin_id}).get("Item")
+        if item:
+            arns[plugin_id] = {hook["hook_name"]: hook["function_arn"] for hook in item.get("hooks", [])}
+    return arns
+
+
+def measure(label, func, iterations):
+    func()  # Warm-up: module imports, cold starts
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    p50 = timings[len(timings) // 2]
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"  {label:<11} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms  "
+          f"mean {statistics.mean(timings):8.2f} ms")
+    return p50
+
+
+def benchmark_plugin(plugin_id, function_arns, args):
+    hook_name, build_content = BENCHMARKS[plugin_id]
+    content = build_content(args.blocks)
+    manager = PluginManager()
+
+    print()
+    print(bold(f"=== {plugin_id}: {hook_name}, {len(content) / 1024:.1f} KiB content ==="))
+
+    handler = plugins.load_trusted_plugin(plugin_id)
+    if handler is None:
+        print_error(f"  ERROR: Could not load {PLUGINS_DIR}/{plugin_id}/handler.py")
+        return 1
+    if not args.env:
+        # Default settings instead of a DynamoDB read per call
+        handler.__globals__['get_plugin_settings'] = lambda plugin_id: {}
+
+    hook_func = {
+        'plugin_id': plugin_id,
+        'function_arn': None,
+        'runtime': RUNTIME_IN_PROCESS,
+        'timeout_ms': BENCHMARK_TIMEOUT_MS,
+    }
+    in_process = measure(
+        RUNTIME_IN_PROCESS,
+        lambda: manager.call_hook_function(hook_func, hook_name, content),
+        args.iterations,
+    )
+
+    function_arn = function_arns.get(plugin_id, {}).get(hook_name)
+    if not args.env:
+        return 0
+    if not function_arn:
+        print_warning(f"  {RUNTIME_LAMBDA:<11} skipped: {plugin_id} has no {hook_name} hook in {args.env}")
+        return 0
+
+    hook_func = {**hook_func, 'function_arn': function_arn, 'runtime': RUNTIME_LAMBDA}
+    try:
+        remote = measure(
+            RUNTIME_LAMBDA,
+            lambda: manager.call_hook_function(hook_func, hook_name, content),
+            args.iterations,
+        )
+    except ClientError as error:
+        print_error(f"  ERROR: Failed to invoke {function_arn}: {format_client_error(error)}")
+        return 1
+    except plugins.PluginCallError as error:
+        print_error(f"  ERROR: {error}")
+        return 1
+
+    color = Colors.GREEN if in_process < remote else Colors.YELLOW
+    print(f"  {color}in-process p50 is {remote / in_process:.1f}x faster{Colors.RESET}")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark plugin hook latency in-process and through Lambda."
+    )
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per hook and mode.")
+    parser.add_argument(
+        "--blocks",
+        type=int,
+        default=5,
+        help="Code blocks or gallery images in the sample content.",
+    )
+    parser.add_argument(
+        "--env",
+        metavar="ENV",
+        help="Also invoke the plugin functions registered in this environment, e.g. staging.",
+    )
+    parser.add_argument(
+        "--plugin",
+        action="append",
+        choices=sorted(BENCHMARKS),
+        help="Plugin to benchmark (repeatable). Defaults to all bundled plugins.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    plugin_ids = args.plugin or sorted(BENCHMARKS)
+
+    plugins.TRUSTED_PLUGINS = frozenset(plugin_ids)
+    plugins.TRUSTED_PLUGIN_DIR = PLUGINS_DIR
+
+    function_arns = {}
+    if args.env:
+        try:
+            function_arns = load_function_arns(args.env)
+        except ClientError as error:
+            print_error(f"ERROR: Failed to read plugins table: {format_client_error(error)}")
+            return 1
+
+    failures = [benchmark_plugin(plugin_id, function_arns, args) for plugin_id in plugin_ids]
+    return 1 if any(failures) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
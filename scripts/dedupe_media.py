@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Batch deduplication of stored media files.
+
+Uploads are deduplicated by SHA-256 as they arrive, but media uploaded
+before that (and bulk imports such as migrate_wordpress.py) can store the
+same file many times. This script hashes every media file in S3 that is not
+yet indexed, groups identical files and keeps one copy of each:
+
+  1. The canonical copy is the file already in the content hash index, or
+     else the oldest upload.
+  2. Duplicate media records are repointed at the canonical file and its
+     thumbnails, and linked to the index (HASH#{sha256} in the media table).
+  3. Content that references a duplicate's URLs through featured_image or
+     metadata.media is rewritten to the canonical URLs.
+  4. The duplicate S3 objects are deleted.
+
+Media records are kept, so their ids, filenames and metadata do not change.
+
+Usage:
+    python scripts/dedupe_media.py staging prod
+    python scripts/dedupe_media.py staging --dry-run
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+
+REGION = "us-west-2"
+ACCOUNT_ID = "776053071238"
+MEDIA_TABLE_TEMPLATE = "cms-media-{env}"
+CONTENT_TABLE_TEMPLATE = "cms-content-{env}"
+MEDIA_BUCKET_TEMPLATE = "serverless-cms-media-{env}-{account_id}"
+CONTENT_HASH_PREFIX = "HASH#"
+CONTENT_HASH_ENTITY = "content_hash"
+CHUNK_SIZE = 1024 * 1024
+DELETE_BATCH_LIMIT = 1000
+
+
+class Colors:
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    RED = "\033[31m"
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+
+
+def print_success(message):
+    print(f"{Colors.GREEN}{message}{Colors.RESET}")
+
+
+def print_warning(message):
+    print(f"{Colors.YELLOW}{message}{Colors.RESET}")
+
+
+def print_error(message):
+    print(f"{Colors.RED}{message}{Colors.RESET}")
+
+
+def bold(message):
+    return f"{Colors.BOLD}{message}{Colors.RESET}"
+
+
+def format_client_error(error):
+    response = getattr(error, "response", {}) or {}
+    err = response.get("Error", {}) or {}
+    code = err.get("Code", "UnknownError")
+    message = err.get("Message", str(error))
+    return f"{code}: {message}"
+
+
+def scan_all(table, **scan_kwargs):
+    while True:
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        scan_kwargs["ExclusiveStartKey"] = last_key
+
+
+def item_key(table, item):
+    return {key["AttributeName"]: item[key["AttributeName"]] for key in table.key_schema}
+
+
+def compute_sha256(s3, bucket, key):
+    """Hash an S3 object by streaming it, one chunk in memory at a time."""
+    response = s3.get_object(Bucket=bucket, Key=key)
+    digest = hashlib.sha256()
+    for chunk in response["Body"].iter_chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def key_from_url(url):
+    """Return the object key a media URL points at (CDN or S3 form)."""
+    return urlparse(url).path.lstrip("/")
+
+
+def media_urls(media):
+    """Yield (name, url) for a media item's original and thumbnails."""
+    if media.get("s3_url"):
+        yield "original", media["s3_url"]
+    for size, url in (media.get("thumbnails") or {}).items():
+        if url:
+            yield size, url
+
+
+def media_keys(media):
+    keys = [media["s3_key"]]
+    keys.extend(key_from_url(url) for name, url in media_urls(media) if name != "original")
+    return keys
+
+
+def variant_keys(s3, bucket, media):
+    """List on-demand image variants rendered from a media item's file."""
+    name = os.path.splitext(os.path.basename(media["s3_key"]))[0]
+    keys = []
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=f"variants/{name}/"):
+        keys.extend(obj["Key"] for obj in page.get("Contents", []))
+    return keys
+
+
+def build_url_map(duplicate, canonical):
+    """Map each of a duplicate's object keys to the canonical URL for it."""
+    canonical_urls = dict(media_urls(canonical))
+    url_map = {}
+    for name, url in media_urls(duplicate):
+        replacement = canonical_urls.get(name) or canonical_urls.get("original")
+        if replacement:
+            url_map[key_from_url(url)] = replacement
+    url_map[duplicate["s3_key"]] = canonical_urls.get("original", canonical["s3_url"])
+    return url_map
+
+
+def rewrite_url(url, url_map):
+    if not isinstance(url, str) or not url:
+        return url
+    path = key_from_url(url)
+    # Path-style S3 URLs put the bucket before the key
+    return url_map.get(path) or url_map.get(path.partition("/")[2]) or url
+
+
+def rewrite_content(content, url_map):
+    """
+    Rewrite a content item's media URLs.
+
+    Returns:
+        Dict of changed top-level attributes, empty if nothing changed
+    """
+    updates = {}
+
+    featured_image = content.get("featured_image")
+    rewritten = rewrite_url(featured_image, url_map)
+    if rewritten != featured_image:
+        updates["featured_image"] = rewritten
+
+    metadata = content.get("metadata")
+    if isinstance(metadata, dict) and isinstance(metadata.get("media"), list):
+        changed = False
+        media_items = []
+        for item in metadata["media"]:
+            if isinstance(item, dict):
+                item = dict(item)
+                rewritten = rewrite_url(item.get("s3_url"), url_map)
+                if rewritten != item.get("s3_url"):
+                    item["s3_url"] = rewritten
+                    changed = True
+                thumbnails = item.get("thumbnails")
+                if isinstance(thumbnails, dict):
+                    new_thumbnails = {size: rewrite_url(url, url_map) for size, url in thumbnails.items()}
+                    if new_thumbnails != thumbnails:
+                        item["thumbnails"] = new_thumbnails
+                        changed = True
+            media_items.append(item)
+        if changed:
+            updates["metadata"] = {**metadata, "media": media_items}
+
+    return updates
+
+
+def delete_objects(s3, bucket, keys):
+    for start in range(0, len(keys), DELETE_BATCH_LIMIT):
+        batch = keys[start:start + DELETE_BATCH_LIMIT]
+        response = s3.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+        )
+        if response.get("Errors"):
+            raise RuntimeError(f"{len(response['Errors'])} object(s) could not be deleted")
+
+
+def hash_media(s3, bucket, media_items, result):
+    """Group unindexed media by the SHA-256 of their files."""
+    groups = defaultdict(list)
+    for media in media_items:
+        try:
+            groups[compute_sha256(s3, bucket, media["s3_key"])].append(media)
+        except ClientError as error:
+            result["errors"] += 1
+            print_error(f"    ERROR: Failed to hash {media['s3_key']}: {format_client_error(error)}")
+    return groups
+
+
+def dedupe_group(content_hash, group, indexed, tables, s3, bucket, contents, dry_run, result):
+    media_table, content_table = tables
+    hash_id = f"{CONTENT_HASH_PREFIX}{content_hash}"
+    entry = indexed.get(hash_id)
+
+    if entry:
+        canonical = media_table.get_item(Key={"id": entry["media_id"]}).get("Item")
+        if not canonical or canonical.get("s3_key") != entry["s3_key"]:
+            print_warning(f"  {content_hash[:12]}: indexed file has no media record, skipping")
+            return
+    else:
+        canonical = min(group, key=lambda media: int(media.get("uploaded_at", 0)))
+
+    duplicates = [media for media in group if media["s3_key"] != canonical["s3_key"]]
+    if duplicates:
+        print(f"  {content_hash[:12]}: keeping {canonical['s3_key']}, "
+              f"{len(duplicates)} duplicate(s)")
+
+    if dry_run:
+        result["duplicates"] += len(duplicates)
+        for duplicate in duplicates:
+            print_warning(f"    [DRY RUN] Would repoint {duplicate['id']} and delete {duplicate['s3_key']}")
+        return
+
+    # Link every record to the index before touching content or S3, so an
+    # interrupted run leaves no content pointing at a deleted file
+    shared = {
+        "s3_key": canonical["s3_key"],
+        "s3_url": canonical["s3_url"],
+        "content_hash": content_hash,
+    }
+    for key in ("thumbnails", "dimensions", "status"):
+        if key in canonical:
+            shared[key] = canonical[key]
+
+    for media in group:
+        names = {f"#{name}": name for name in shared}
+        values = {f":{name}": value for name, value in shared.items()}
+        media_table.update_item(
+            Key=item_key(media_table, media),
+            UpdateExpression="SET " + ", ".join(f"#{name} = :{name}" for name in shared),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+
+    if entry:
+        media_table.update_item(
+            Key={"id": hash_id},
+            UpdateExpression="ADD ref_count :count",
+            ExpressionAttributeValues={":count": len(group)},
+        )
+    else:
+        media_table.put_item(Item={
+            "id": hash_id,
+            "entity_type": CONTENT_HASH_ENTITY,
+            "media_id": canonical["id"],
+            "s3_key": canonical["s3_key"],
+            "mime_type": canonical["mime_type"],
+            "size": canonical["size"],
+            "ref_count": len(group),
+        })
+
+    url_map = {}
+    for duplicate in duplicates:
+        url_map.update(build_url_map(duplicate, canonical))
+
+    for content in contents:
+        updates = rewrite_content(content, url_map)
+        if not updates:
+            continue
+        content_table.update_item(
+            Key=item_key(content_table, content),
+            UpdateExpression="SET " + ", ".join(f"#{name} = :{name}" for name in updates),
+            ExpressionAttributeNames={f"#{name}": name for name in updates},
+            ExpressionAttributeValues={f":{name}": value for name, value in updates.items()},
+        )
+        content.update(updates)
+        result["content_rewritten"] += 1
+        print_success(f"    Rewrote media URLs in content {content['id']}")
+
+    delete_objects(s3, bucket, [
+        key
+        for duplicate in duplicates
+        for key in media_keys(duplicate) + variant_keys(s3, bucket, duplicate)
+    ])
+    result["duplicates"] += len(duplicates)
+    for duplicate in duplicates:
+        print_success(f"    Repointed {duplicate['id']} and deleted {duplicate['s3_key']}")
+
+
+def process_environment(env, dry_run):
+    dynamodb = boto3.resource("dynamodb", region_name=REGION)
+    s3 = boto3.client("s3", region_name=REGION)
+    media_table = dynamodb.Table(MEDIA_TABLE_TEMPLATE.format(env=env))
+    content_table = dynamodb.Table(CONTENT_TABLE_TEMPLATE.format(env=env))
+    bucket = MEDIA_BUCKET_TEMPLATE.format(env=env, account_id=ACCOUNT_ID)
+
+    result = {"env": env, "status": "success", "duplicates": 0, "content_rewritten": 0, "errors": 0}
+
+    print()
+    print(bold(f"=== Environment: {env} ==="))
+
+    try:
+        media_items = list(scan_all(media_table, FilterExpression=Attr("entity_type").not_exists()))
+        indexed = {
+            item["id"]: item
+            for item in scan_all(media_table, FilterExpression=Attr("entity_type").eq(CONTENT_HASH_ENTITY))
+        }
+        contents = list(scan_all(content_table))
+    except ClientError as error:
+        print_error(f"  ERROR: Failed to scan tables: {format_client_error(error)}")
+        result["status"] = "failed"
+        return result
+
+    unindexed = [media for media in media_items if not media.get("content_hash")]
+    print(f"  Hashing {len(unindexed)} of {len(media_items)} media file(s) in {bucket}")
+
+    groups = hash_media(s3, bucket, unindexed, result)
+    for content_hash, group in groups.items():
+        try:
+            dedupe_group(
+                content_hash, group, indexed, (media_table, content_table),
+                s3, bucket, contents, dry_run, result,
+            )
+        except (ClientError, RuntimeError) as error:
+            result["errors"] += 1
+            message = format_client_error(error) if isinstance(error, ClientError) else str(error)
+            print_error(f"    ERROR: Failed to deduplicate {content_hash[:12]}: {message}")
+
+    if result["errors"]:
+        result["status"] = "failed"
+
+    verb = "Would remove" if dry_run else "Removed"
+    print(f"  {verb} {result['duplicates']} duplicate file(s), "
+          f"rewrote {result['content_rewritten']} content item(s), errors: {result['errors']}")
+
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Deduplicate stored media files by SHA-256."
+    )
+    parser.add_argument(
+        "environments",
+        nargs="+",
+        metavar="ENV",
+        help="Environment(s) to deduplicate, e.g. staging prod",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report duplicates without changing DynamoDB or S3.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.dry_run:
+        print_warning("Running in DRY RUN mode. No DynamoDB or S3 changes will be made.")
+
+    results = [process_environment(env, args.dry_run) for env in args.environments]
+
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Orphaned media report and rebuild job for the media usage index.
+
+Content create, update and delete keep a USAGE#{file_key} item in the media
+table for every media file that content references (see
+lambda/shared/media_usage.py). The report reads the media table only:
+media whose file has no usage item is unused. Content is never scanned.
+
+--rebuild recomputes the index from a content scan and rewrites any usage
+item that has drifted. Run it once after deploying the index to backfill
+existing content, and again after jobs that write content directly to the
+table, such as dedupe_media.py and migrate_wordpress.py.
+
+Usage:
+    python scripts/media_usage_report.py staging prod
+    python scripts/media_usage_report.py staging --rebuild
+    python scripts/media_usage_report.py staging --rebuild --dry-run
+"""
+
+import argparse
+import os
+import sys
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+
+REGION = "us-west-2"
+MEDIA_TABLE_TEMPLATE = "cms-media-{env}"
+CONTENT_TABLE_TEMPLATE = "cms-content-{env}"
+MEDIA_USAGE_PREFIX = "USAGE#"
+MEDIA_USAGE_ENTITY = "media_usage"
+
+# Importing the shared package creates boto3 clients, which need a region.
+os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from shared.media_usage import content_media_keys, get_media_file_key  # noqa: E402
+
+
+class Colors:
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    RED = "\033[31m"
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+
+
+def print_success(message):
+    print(f"{Colors.GREEN}{message}{Colors.RESET}")
+
+
+def print_warning(message):
+    print(f"{Colors.YELLOW}{message}{Colors.RESET}")
+
+
+def print_error(message):
+    print(f"{Colors.RED}{message}{Colors.RESET}")
+
+
+def bold(message):
+    return f"{Colors.BOLD}{message}{Colors.RESET}"
+
+
+def format_client_error(error):
+    response = getattr(error, "response", {}) or {}
+    err = response.get("Error", {}) or {}
+    code = err.get("Code", "UnknownError")
+    message = err.get("Message", str(error))
+    return f"{code}: {message}"
+
+
+def scan_all(table, **scan_kwargs):
+    exclusive_start_key = None
+
+    while True:
+        if exclusive_start_key:
+            scan_kwargs["ExclusiveStartKey"] = exclusive_start_key
+
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+
+        exclusive_start_key = response.get("LastEvaluatedKey")
+        if not exclusive_start_key:
+            break
+
+
+def format_size(size):
+    size = float(size)
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def find_orphans(media_items, usage):
+    """Return media records whose file no content uses, oldest first."""
+    orphans = [
+        media
+        for media in media_items
+        if get_media_file_key(media.get("s3_key", "")) not in usage
+    ]
+    return sorted(orphans, key=lambda media: media.get("uploaded_at", 0))
+
+
+def expected_usage(content_items):
+    """Compute {file_key: set(content ids)} from content."""
+    usage = {}
+    for content in content_items:
+        for file_key in content_media_keys(content):
+            usage.setdefault(file_key, set()).add(content["id"])
+    return usage
+
+
+def report(media_items, usage):
+    orphans = find_orphans(media_items, usage)
+    total = sum(int(media.get("size", 0)) for media in orphans)
+
+    for media in orphans:
+        print(f"    {media['id']}  {media.get('filename', '')}  {format_size(int(media.get('size', 0)))}")
+
+    print(f"  Media: {len(media_items)}, unused: {len(orphans)} ({format_size(total)})")
+    return orphans
+
+
+def rebuild(media_table, content_table, usage, dry_run, result):
+    """Rewrite usage items that differ from the content table."""
+    expected = expected_usage(scan_all(
+        content_table,
+        ProjectionExpression="#id, featured_image, #metadata",
+        ExpressionAttributeNames={"#id": "id", "#metadata": "metadata"},
+    ))
+
+    for file_key in sorted(set(expected) | set(usage)):
+        content_ids = expected.get(file_key, set())
+        if content_ids == set(usage.get(file_key, ())):
+            result["unchanged"] += 1
+            continue
+
+        label = f"{file_key}: {len(usage.get(file_key, ()))} -> {len(content_ids)} content item(s)"
+        result["updated"] += 1
+
+        if dry_run:
+            print_warning(f"    [DRY RUN] Would update {label}")
+            continue
+
+        try:
+            key = {"id": f"{MEDIA_USAGE_PREFIX}{file_key}"}
+            if content_ids:
+                media_table.put_item(Item={
+                    **key,
+                    "entity_type": MEDIA_USAGE_ENTITY,
+                    "file_key": file_key,
+                    "content_ids": content_ids,
+                })
+            else:
+                media_table.delete_item(Key=key)
+            print_success(f"    Updated {label}")
+        except ClientError as error:
+            result["updated"] -= 1
+            result["errors"] += 1
+            print_error(f"    ERROR: Failed to update {file_key}: {format_client_error(error)}")
+
+    return {file_key: content_ids for file_key, content_ids in expected.items()}
+
+
+def process_environment(env, rebuild_index, dry_run):
+    dynamodb = boto3.resource("dynamodb", region_name=REGION)
+    media_table = dynamodb.Table(MEDIA_TABLE_TEMPLATE.format(env=env))
+    content_table = dynamodb.Table(CONTENT_TABLE_TEMPLATE.format(env=env))
+
+    result = {"env": env, "status": "success", "updated": 0, "unchanged": 0, "errors": 0}
+
+    print()
+    print(bold(f"=== Environment: {env} ==="))
+
+    try:
+        media_items = []
+        usage = {}
+        for item in scan_all(media_table, FilterExpression=(
+            Attr("entity_type").not_exists() | Attr("entity_type").eq(MEDIA_USAGE_ENTITY)
+        )):
+            if item.get("entity_type") == MEDIA_USAGE_ENTITY:
+                if item.get("content_ids"):
+                    usage[item["file_key"]] = set(item["content_ids"])
+            else:
+                media_items.append(item)
+
+        if rebuild_index:
+            usage = rebuild(media_table, content_table, usage, dry_run, result)
+            verb = "Would update" if dry_run else "Updated"
+            print(f"  {verb}: {result['updated']}, unchanged: {result['unchanged']}, "
+                  f"errors: {result['errors']}")
+    except ClientError as error:
+        result["status"] = "failed"
+        result["errors"] += 1
+        print_error(f"  ERROR: Failed to scan tables: {format_client_error(error)}")
+        return result
+
+    result["orphans"] = report(media_items, usage)
+
+    if result["errors"]:
+        result["status"] = "failed"
+
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Report media that no content uses, from the media usage index."
+    )
+    parser.add_argument(
+        "environments",
+        nargs="+",
+        metavar="ENV",
+        help="Environment(s) to report on, e.g. staging prod",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Recompute the usage index from content before reporting.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="With --rebuild, show what would be updated without making DynamoDB changes.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.dry_run:
+        print_warning("Running in DRY RUN mode. No DynamoDB updates will be made.")
+
+    results = [
+        process_environment(env, args.rebuild, args.dry_run)
+        for env in args.environments
+    ]
+
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Migrate comments to self-addressing ids.
+
+Comment ids now carry the comment's created_at sort key
+("<created_at>-<32 hex digits>", see new_comment_id in lambda/shared/db.py),
+so a comment is read, moderated or deleted by id with a single GetItem.
+Comments created before that have plain UUID ids and are found by querying
+their partition instead.
+
+This job gives each older comment a new id: the comment is copied under the
+new id with its old id kept in legacy_id, and the old item deleted, in one
+transaction. Replies are pointed at the new ids of their parents, and the
+thread version of each affected content item is bumped so cached comment
+trees are rebuilt. Comment ids held by clients, e.g. an open moderation
+page, keep resolving through the legacy_id-index of the comments table, so
+deploy that index before running the job.
+
+The job can be run again after an interruption: comments already migrated
+are recognized by their legacy_id.
+
+Usage:
+    python scripts/migrate_comment_ids.py staging prod
+    python scripts/migrate_comment_ids.py staging --dry-run
+"""
+
+import argparse
+import os
+import sys
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+
+REGION = "us-west-2"
+COMMENTS_TABLE_TEMPLATE = "cms-comments-{env}"
+THREAD_PREFIX = "THREAD#"
+
+# Importing the shared package creates boto3 clients, which need a region.
+os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from shared.db import get_comment_created_at, new_comment_id  # noqa: E402
+
+
+class Colors:
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    RED = "\033[31m"
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+
+
+def print_success(message):
+    print(f"{Colors.GREEN}{message}{Colors.RESET}")
+
+
+def print_warning(message):
+    print(f"{Colors.YELLOW}{message}{Colors.RESET}")
+
+
+def print_error(message):
+    print(f"{Colors.RED}{message}{Colors.RESET}")
+
+
+def bold(message):
+    return f"{Colors.BOLD}{message}{Colors.RESET}"
+
+
+def format_client_error(error):
+    response = getattr(error, "response", {}) or {}
+    err = response.get("Error", {}) or {}
+    code = err.get("Code", "UnknownError")
+    message = err.get("Message", str(error))
+    return f"{code}: {message}"
+
+
+def scan_all(table, **scan_kwargs):
+    exclusive_start_key = None
+
+    while True:
+        if exclusive_start_key:
+            scan_kwargs["ExclusiveStartKey"] = exclusive_start_key
+
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+
+        exclusive_start_key = response.get("LastEvaluatedKey")
+        if not exclusive_start_key:
+            break
+
+
+def plan_ids(comments):
+    """Return {old id: new id} for comments without self-addressing ids."""
+    id_map = {
+        comment["legacy_id"]: comment["id"]
+        for comment in comments
+        if comment.get("legacy_id")
+    }
+    for comment in comments:
+        if get_comment_created_at(comment["id"]) is None:
+            id_map[comment["id"]] = new_comment_id(comment["created_at"])
+    return id_map
+
+
+def migrate(table, comments, id_map, dry_run, result):
+    """Re-key older comments and repoint replies at their parents' new ids."""
+    client = table.meta.client
+    touched_content = set()
+
+    for comment in comments:
+        old_id = comment["id"]
+        parent_id = comment.get("parent_id")
+
+        if old_id in id_map:
+            new_id = id_map[old_id]
+            label = f"{old_id} -> {new_id}"
+            if dry_run:
+                print_warning(f"    [DRY RUN] Would migrate {label}")
+                result["migrated"] += 1
+                continue
+            try:
+                client.transact_write_items(TransactItems=[
+                    {
+                        "Put": {
+                            "TableName": table.name,
+                            "Item": {
+                                **comment,
+                                "id": new_id,
+                                "legacy_id": old_id,
+                                "parent_id": id_map.get(parent_id, parent_id),
+                            },
+                            "ConditionExpression": "attribute_not_exists(id)",
+                        }
+                    },
+                    {
+                        "Delete": {
+                            "TableName": table.name,
+                            "Key": {"id": old_id, "created_at": comment["created_at"]},
+                            "ConditionExpression": "attribute_exists(id)",
+                        }
+                    },
+                ])
+                result["migrated"] += 1
+                touched_content.add(comment.get("content_id"))
+                print_success(f"    Migrated {label}")
+            except ClientError as error:
+                result["errors"] += 1
+                print_error(f"    ERROR: Failed to migrate {old_id}: {format_client_error(error)}")
+
+        elif parent_id in id_map:
+            label = f"{old_id}: parent {parent_id} -> {id_map[parent_id]}"
+            if dry_run:
+                print_warning(f"    [DRY RUN] Would repoint {label}")
+                result["repointed"] += 1
+                continue
+            try:
+                table.update_item(
+                    Key={"id": old_id, "created_at": comment["created_at"]},
+                    UpdateExpression="SET parent_id = :parent_id",
+                    ConditionExpression="attribute_exists(id)",
+                    ExpressionAttributeValues={":parent_id": id_map[parent_id]},
+                )
+                result["repointed"] += 1
+                touched_content.add(comment.get("content_id"))
+                print_success(f"    Repointed {label}")
+            except ClientError as error:
+                result["errors"] += 1
+                print_error(f"    ERROR: Failed to repoint {old_id}: {format_client_error(error)}")
+
+    for content_id in sorted(filter(None, touched_content)):
+        try:
+            table.update_item(
+                Key={"id": f"{THREAD_PREFIX}{content_id}", "created_at": 0},
+                UpdateExpression="SET entity_type = :entity ADD version :one",
+                ExpressionAttributeValues={":entity": "comment_thread", ":one": 1},
+            )
+        except ClientError as error:
+            result["errors"] += 1
+            print_error(f"    ERROR: Failed to bump thread version of {content_id}: "
+                        f"{format_client_error(error)}")
+
+
+def process_environment(env, dry_run):
+    dynamodb = boto3.resource("dynamodb", region_name=REGION)
+    table = dynamodb.Table(COMMENTS_TABLE_TEMPLATE.format(env=env))
+
+    result = {"env": env, "status": "success", "migrated": 0, "repointed": 0, "errors": 0}
+
+    print()
+    print(bold(f"=== Environment: {env} ==="))
+
+    try:
+        comments = list(scan_all(table, FilterExpression=Attr("entity_type").not_exists()))
+    except ClientError as error:
+        result["status"] = "failed"
+        result["errors"] += 1
+        print_error(f"  ERROR: Failed to scan comments table: {format_client_error(error)}")
+        return result
+
+    id_map = plan_ids(comments)
+    pending = sum(1 for comment in comments if comment["id"] in id_map)
+    print(f"  Comments: {len(comments)}, to migrate: {pending}")
+
+    migrate(table, comments, id_map, dry_run, result)
+
+    if result["errors"]:
+        result["status"] = "failed"
+
+    verb = "Would migrate" if dry_run else "Migrated"
+    print(f"  {verb}: {result['migrated']}, replies repointed: {result['repointed']}, "
+          f"errors: {result['errors']}")
+
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Give older comments self-addressing ids."
+    )
+    parser.add_argument(
+        "environments",
+        nargs="+",
+        metavar="ENV",
+        help="Environment(s) to migrate, e.g. staging prod",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show what would be migrated without making DynamoDB changes.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.dry_run:
+        print_warning("Running in DRY RUN mode. No DynamoDB updates will be made.")
+
+    results = [process_environment(env, args.dry_run) for env in args.environments]
+
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
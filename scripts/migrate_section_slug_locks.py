@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Migration script to remove the slug attribute from section slug-lock items.
+
+Slug locks (id="SLUG#{slug}", entity_type="slug_lock") used to repeat the
+slug as a plain attribute, which put them in slug-index next to the sections
+they guard. New locks omit it so slug-index only holds sections. This script
+rewrites existing lock items to match; the SLUG# key, and therefore slug
+uniqueness, is left untouched.
+
+Usage:
+    python scripts/migrate_section_slug_locks.py staging prod
+    python scripts/migrate_section_slug_locks.py staging --dry-run
+"""
+
+import argparse
+import sys
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+
+REGION = "us-west-2"
+SECTIONS_TABLE_TEMPLATE = "cms-sections-{env}"
+
+
+class Colors:
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    RED = "\033[31m"
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+
+
+def print_success(message):
+    print(f"{Colors.GREEN}{message}{Colors.RESET}")
+
+
+def print_warning(message):
+    print(f"{Colors.YELLOW}{message}{Colors.RESET}")
+
+
+def print_error(message):
+    print(f"{Colors.RED}{message}{Colors.RESET}")
+
+
+def bold(message):
+    return f"{Colors.BOLD}{message}{Colors.RESET}"
+
+
+def format_client_error(error):
+    response = getattr(error, "response", {}) or {}
+    err = response.get("Error", {}) or {}
+    code = err.get("Code", "UnknownError")
+    message = err.get("Message", str(error))
+    return f"{code}: {message}"
+
+
+def scan_legacy_locks(table):
+    scan_kwargs = {
+        "FilterExpression": Attr("entity_type").eq("slug_lock") & Attr("slug").exists(),
+        "ProjectionExpression": "id",
+    }
+
+    while True:
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        scan_kwargs["ExclusiveStartKey"] = last_key
+
+
+def process_environment(env, dry_run):
+    dynamodb = boto3.resource("dynamodb", region_name=REGION)
+    table_name = SECTIONS_TABLE_TEMPLATE.format(env=env)
+    table = dynamodb.Table(table_name)
+
+    result = {"env": env, "status": "success", "migrated": 0, "errors": 0}
+
+    print()
+    print(bold(f"=== Environment: {env} ==="))
+    print(f"  Scanning {table_name} for slug locks with a slug attribute")
+
+    try:
+        for lock in scan_legacy_locks(table):
+            lock_id = lock["id"]
+
+            if dry_run:
+                result["migrated"] += 1
+                print_warning(f"    [DRY RUN] Would remove slug from {lock_id}")
+                continue
+
+            try:
+                table.update_item(
+                    Key={"id": lock_id},
+                    UpdateExpression="REMOVE slug",
+                    ConditionExpression=Attr("entity_type").eq("slug_lock"),
+                )
+                result["migrated"] += 1
+                print_success(f"    Removed slug from {lock_id}")
+            except ClientError as error:
+                result["errors"] += 1
+                print_error(f"    ERROR: Failed to update {lock_id}: {format_client_error(error)}")
+    except ClientError as error:
+        result["errors"] += 1
+        print_error(f"  ERROR: Failed to scan '{table_name}': {format_client_error(error)}")
+
+    if result["errors"]:
+        result["status"] = "failed"
+
+    verb = "Would migrate" if dry_run else "Migrated"
+    print(f"  {verb}: {result['migrated']}, errors: {result['errors']}")
+
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Remove the slug attribute from section slug-lock items."
+    )
+    parser.add_argument(
+        "environments",
+        nargs="+",
+        metavar="ENV",
+        help="Environment(s) to migrate, e.g. staging prod",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show what would be updated without making DynamoDB changes.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.dry_run:
+        print_warning("Running in DRY RUN mode. No DynamoDB updates will be made.")
+
+    results = [process_environment(env, args.dry_run) for env in args.environments]
+
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
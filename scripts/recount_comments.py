@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Reconciliation script for content comment counters.
+
+Recomputes approved_comment_count and pending_comment_count for every
+content item from the comments in DynamoDB and rewrites any counter that
+has drifted. Run it once after deploying the counters to backfill existing
+content, and again after imports or scripts that write comments directly to
+the table. Counters are overwritten, so comments moderated while the job runs
+may need another run.
+
+Usage:
+    python scripts/recount_comments.py staging prod
+    python scripts/recount_comments.py staging --dry-run
+"""
+
+import argparse
+import sys
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+
+REGION = "us-west-2"
+CONTENT_TABLE_TEMPLATE = "cms-content-{env}"
+COMMENTS_TABLE_TEMPLATE = "cms-comments-{env}"
+COUNTERS = {
+    "approved": "approved_comment_count",
+    "pending": "pending_comment_count",
+}
+
+
+class Colors:
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    RED = "\033[31m"
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+
+
+def print_success(message):
+    print(f"{Colors.GREEN}{message}{Colors.RESET}")
+
+
+def print_warning(message):
+    print(f"{Colors.YELLOW}{message}{Colors.RESET}")
+
+
+def print_error(message):
+    print(f"{Colors.RED}{message}{Colors.RESET}")
+
+
+def bold(message):
+    return f"{Colors.BOLD}{message}{Colors.RESET}"
+
+
+def format_client_error(error):
+    response = getattr(error, "response", {}) or {}
+    err = response.get("Error", {}) or {}
+    code = err.get("Code", "UnknownError")
+    message = err.get("Message", str(error))
+    return f"{code}: {message}"
+
+
+def scan_all(table, **scan_kwargs):
+    exclusive_start_key = None
+
+    while True:
+        if exclusive_start_key:
+            scan_kwargs["ExclusiveStartKey"] = exclusive_start_key
+
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+
+        exclusive_start_key = response.get("LastEvaluatedKey")
+        if not exclusive_start_key:
+            break
+
+
+def compute_counts(content_items, comments):
+    """Return {content_id: (approved_comment_count, pending_comment_count)}."""
+    counts = {item["id"]: {"approved": 0, "pending": 0} for item in content_items}
+
+    for comment in comments:
+        content_id = comment.get("content_id")
+        status = comment.get("status")
+        if content_id in counts and status in COUNTERS:
+            counts[content_id][status] += 1
+
+    return {
+        content_id: (statuses["approved"], statuses["pending"])
+        for content_id, statuses in counts.items()
+    }
+
+
+def process_environment(env, dry_run):
+    dynamodb = boto3.resource("dynamodb", region_name=REGION)
+    content_table = dynamodb.Table(CONTENT_TABLE_TEMPLATE.format(env=env))
+    comments_table = dynamodb.Table(COMMENTS_TABLE_TEMPLATE.format(env=env))
+
+    result = {"env": env, "status": "success", "updated": 0, "unchanged": 0, "errors": 0}
+
+    print()
+    print(bold(f"=== Environment: {env} ==="))
+
+    try:
+        content_items = list(scan_all(
+            content_table,
+            ProjectionExpression="id, created_at, approved_comment_count, pending_comment_count",
+        ))
+        # Thread version items have no content_id or status
+        comments = list(scan_all(
+            comments_table,
+            FilterExpression=Attr("entity_type").not_exists(),
+            ProjectionExpression="content_id, #status",
+            ExpressionAttributeNames={"#status": "status"},
+        ))
+    except ClientError as error:
+        result["status"] = "failed"
+        result["errors"] += 1
+        print_error(f"  ERROR: Failed to scan tables: {format_client_error(error)}")
+        return result
+
+    print(f"  Content items: {len(content_items)}, comments: {len(comments)}")
+
+    counts = compute_counts(content_items, comments)
+
+    for item in content_items:
+        content_id = item["id"]
+        approved_count, pending_count = counts[content_id]
+        current = (
+            item.get(COUNTERS["approved"]),
+            item.get(COUNTERS["pending"]),
+        )
+
+        if current == (approved_count, pending_count):
+            result["unchanged"] += 1
+            continue
+
+        label = f"{content_id}: {current} -> {(approved_count, pending_count)}"
+
+        if dry_run:
+            result["updated"] += 1
+            print_warning(f"    [DRY RUN] Would update {label}")
+            continue
+
+        try:
+            content_table.update_item(
+                Key={"id": content_id, "created_at": item["created_at"]},
+                UpdateExpression="SET approved_comment_count = :approved, pending_comment_count = :pending",
+                ExpressionAttributeValues={
+                    ":approved": approved_count,
+                    ":pending": pending_count,
+                },
+                ConditionExpression="attribute_exists(id)",
+            )
+            result["updated"] += 1
+            print_success(f"    Updated {label}")
+        except ClientError as error:
+            result["errors"] += 1
+            print_error(f"    ERROR: Failed to update {content_id}: {format_client_error(error)}")
+
+    if result["errors"]:
+        result["status"] = "failed"
+
+    verb = "Would update" if dry_run else "Updated"
+    print(f"  {verb}: {result['updated']}, unchanged: {result['unchanged']}, errors: {result['errors']}")
+
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Recompute content approved/pending comment counters from the comments table."
+    )
+    parser.add_argument(
+        "environments",
+        nargs="+",
+        metavar="ENV",
+        help="Environment(s) to reconcile, e.g. staging prod",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show what would be updated without making DynamoDB changes.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.dry_run:
+        print_warning("Running in DRY RUN mode. No DynamoDB updates will be made.")
+
+    results = [process_environment(env, args.dry_run) for env in args.environments]
+
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Reconciliation script for section post counters.
+
+Recomputes direct_post_count and subtree_post_count for every section from
+the published content in DynamoDB and rewrites any counter that has drifted.
+Run it once after deploying the counters to backfill existing sections, and
+again after bulk imports that write content directly to the table.
+
+Usage:
+    python scripts/recount_section_posts.py staging prod
+    python scripts/recount_section_posts.py staging --dry-run
+"""
+
+import argparse
+import sys
+
+import boto3
+from botocore.exceptions import ClientError
+
+
+REGION = "us-west-2"
+CONTENT_TABLE_TEMPLATE = "cms-content-{env}"
+SECTIONS_TABLE_TEMPLATE = "cms-sections-{env}"
+ROOT_PARENT_ID = "ROOT"
+
+
+class Colors:
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    RED = "\033[31m"
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+
+
+def print_success(message):
+    print(f"{Colors.GREEN}{message}{Colors.RESET}")
+
+
+def print_warning(message):
+    print(f"{Colors.YELLOW}{message}{Colors.RESET}")
+
+
+def print_error(message):
+    print(f"{Colors.RED}{message}{Colors.RESET}")
+
+
+def bold(message):
+    return f"{Colors.BOLD}{message}{Colors.RESET}"
+
+
+def format_client_error(error):
+    response = getattr(error, "response", {}) or {}
+    err = response.get("Error", {}) or {}
+    code = err.get("Code", "UnknownError")
+    message = err.get("Message", str(error))
+    return f"{code}: {message}"
+
+
+def scan_all(table, **scan_kwargs):
+    exclusive_start_key = None
+
+    while True:
+        if exclusive_start_key:
+            scan_kwargs["ExclusiveStartKey"] = exclusive_start_key
+
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+
+        exclusive_start_key = response.get("LastEvaluatedKey")
+        if not exclusive_start_key:
+            break
+
+
+def compute_counts(sections, content_items):
+    """Return {section_id: (direct_post_count, subtree_post_count)}."""
+    parents = {
+        section["id"]: section.get("parent_id", ROOT_PARENT_ID)
+        for section in sections
+    }
+    direct = {section_id: 0 for section_id in parents}
+    subtree = {section_id: 0 for section_id in parents}
+
+    for item in content_items:
+        section_id = item.get("section_id")
+        if item.get("status") != "published" or section_id not in parents:
+            continue
+
+        direct[section_id] += 1
+
+        visited = set()
+        current_id = section_id
+        while current_id in parents and current_id not in visited:
+            visited.add(current_id)
+            subtree[current_id] += 1
+            current_id = parents[current_id]
+
+    return {
+        section_id: (direct[section_id], subtree[section_id])
+        for section_id in parents
+    }
+
+
+def process_environment(env, dry_run):
+    dynamodb = boto3.resource("dynamodb", region_name=REGION)
+    content_table = dynamodb.Table(CONTENT_TABLE_TEMPLATE.format(env=env))
+    sections_table = dynamodb.Table(SECTIONS_TABLE_TEMPLATE.format(env=env))
+
+    result = {"env": env, "status": "success", "updated": 0, "unchanged": 0, "errors": 0}
+
+    print()
+    print(bold(f"=== Environment: {env} ==="))
+
+    try:
+        sections = [
+            section
+            for section in scan_all(sections_table)
+            if section.get("entity_type") != "slug_lock"
+        ]
+        content_items = list(scan_all(
+            content_table,
+            ProjectionExpression="#status, section_id",
+            ExpressionAttributeNames={"#status": "status"},
+        ))
+    except ClientError as error:
+        result["status"] = "failed"
+        result["errors"] += 1
+        print_error(f"  ERROR: Failed to scan tables: {format_client_error(error)}")
+        return result
+
+    print(f"  Sections: {len(sections)}, content items: {len(content_items)}")
+
+    counts = compute_counts(sections, content_items)
+    sections_by_id = {section["id"]: section for section in sections}
+
+    for section_id, (direct_count, subtree_count) in counts.items():
+        section = sections_by_id[section_id]
+        current = (
+            section.get("direct_post_count"),
+            section.get("subtree_post_count"),
+        )
+
+        if current == (direct_count, subtree_count):
+            result["unchanged"] += 1
+            continue
+
+        label = f"{section.get('path', section_id)}: {current} -> {(direct_count, subtree_count)}"
+
+        if dry_run:
+            result["updated"] += 1
+            print_warning(f"    [DRY RUN] Would update {label}")
+            continue
+
+        try:
+            sections_table.update_item(
+                Key={"id": section_id},
+                UpdateExpression="SET direct_post_count = :direct, subtree_post_count = :subtree",
+                ExpressionAttributeValues={
+                    ":direct": direct_count,
+                    ":subtree": subtree_count,
+                },
+                ConditionExpression="attribute_exists(id)",
+            )
+            result["updated"] += 1
+            print_success(f"    Updated {label}")
+        except ClientError as error:
+            result["errors"] += 1
+            print_error(f"    ERROR: Failed to update {section_id}: {format_client_error(error)}")
+
+    if result["errors"]:
+        result["status"] = "failed"
+
+    verb = "Would update" if dry_run else "Updated"
+    print(f"  {verb}: {result['updated']}, unchanged: {result['unchanged']}, errors: {result['errors']}")
+
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Recompute section direct/subtree post counters from published content."
+    )
+    parser.add_argument(
+        "environments",
+        nargs="+",
+        metavar="ENV",
+        help="Environment(s) to reconcile, e.g. staging prod",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show what would be updated without making DynamoDB changes.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.dry_run:
+        print_warning("Running in DRY RUN mode. No DynamoDB updates will be made.")
+
+    results = [process_environment(env, args.dry_run) for env in args.environments]
+
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
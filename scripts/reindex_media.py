@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Backfill and reconciliation job for the media library indexes and counters.
+
+The media library is listed from the media table's library, media_type and
+uploaded_by indexes (see MediaRepository.list_media), which only contain
+records with the library and media_type attributes, and its totals come from
+COUNT# counter items that media creates and deletes keep current.
+
+This job sets the index attributes on media records that lack them, then
+recomputes every counter from the records and rewrites any that has drifted.
+Run it once after deploying the indexes to backfill existing media, and again
+after jobs that write media directly to the table, such as dedupe_media.py.
+Counters are overwritten, so run it while no uploads are in progress.
+
+Usage:
+    python scripts/reindex_media.py staging prod
+    python scripts/reindex_media.py staging --dry-run
+"""
+
+import argparse
+import os
+import sys
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+
+REGION = "us-west-2"
+MEDIA_TABLE_TEMPLATE = "cms-media-{env}"
+LIBRARY_PARTITION = "media"
+MEDIA_COUNT_PREFIX = "COUNT#"
+MEDIA_COUNT_ENTITY = "media_count"
+
+# Importing the shared package creates boto3 clients, which need a region.
+os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from shared.db import MEDIA_TYPES, get_media_type  # noqa: E402
+
+COUNTERS = ("total",) + MEDIA_TYPES
+
+
+class Colors:
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    RED = "\033[31m"
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+
+
+def print_success(message):
+    print(f"{Colors.GREEN}{message}{Colors.RESET}")
+
+
+def print_warning(message):
+    print(f"{Colors.YELLOW}{message}{Colors.RESET}")
+
+
+def print_error(message):
+    print(f"{Colors.RED}{message}{Colors.RESET}")
+
+
+def bold(message):
+    return f"{Colors.BOLD}{message}{Colors.RESET}"
+
+
+def format_client_error(error):
+    response = getattr(error, "response", {}) or {}
+    err = response.get("Error", {}) or {}
+    code = err.get("Code", "UnknownError")
+    message = err.get("Message", str(error))
+    return f"{code}: {message}"
+
+
+def scan_all(table, **scan_kwargs):
+    exclusive_start_key = None
+
+    while True:
+        if exclusive_start_key:
+            scan_kwargs["ExclusiveStartKey"] = exclusive_start_key
+
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+
+        exclusive_start_key = response.get("LastEvaluatedKey")
+        if not exclusive_start_key:
+            break
+
+
+def count_id(uploaded_by=None):
+    if uploaded_by:
+        return f"{MEDIA_COUNT_PREFIX}uploader#{uploaded_by}"
+    return f"{MEDIA_COUNT_PREFIX}all"
+
+
+def missing_index_fields(media):
+    """Return the index attributes a media record lacks or has wrong."""
+    expected = {
+        "library": LIBRARY_PARTITION,
+        "media_type": get_media_type(media.get("mime_type", "")),
+    }
+    return {name: value for name, value in expected.items() if media.get(name) != value}
+
+
+def compute_counts(media_items):
+    """Return {counter id: {counter: count}} for the library and each uploader."""
+    counts = {}
+    for media in media_items:
+        media_type = get_media_type(media.get("mime_type", ""))
+        ids = [count_id()]
+        if media.get("uploaded_by"):
+            ids.append(count_id(media["uploaded_by"]))
+        for counter_id in ids:
+            counters = counts.setdefault(counter_id, dict.fromkeys(COUNTERS, 0))
+            counters["total"] += 1
+            counters[media_type] += 1
+    return counts
+
+
+def backfill(media_table, media_items, dry_run, result):
+    """Set the index attributes on media records that lack them."""
+    for media in media_items:
+        fields = missing_index_fields(media)
+        if not fields:
+            continue
+
+        result["indexed"] += 1
+        label = f"{media['id']} ({media.get('filename', '')}): {fields}"
+
+        if dry_run:
+            print_warning(f"    [DRY RUN] Would index {label}")
+            continue
+
+        try:
+            media_table.update_item(
+                Key={"id": media["id"]},
+                UpdateExpression="SET " + ", ".join(f"#{name} = :{name}" for name in fields),
+                ConditionExpression="attribute_exists(id)",
+                ExpressionAttributeNames={f"#{name}": name for name in fields},
+                ExpressionAttributeValues={f":{name}": value for name, value in fields.items()},
+            )
+            print_success(f"    Indexed {label}")
+        except ClientError as error:
+            result["indexed"] -= 1
+            result["errors"] += 1
+            print_error(f"    ERROR: Failed to index {media['id']}: {format_client_error(error)}")
+
+
+def recount(media_table, media_items, counters, dry_run, result):
+    """Rewrite counter items that differ from the media records."""
+    expected = compute_counts(media_items)
+
+    for counter_id in sorted(set(expected) | set(counters)):
+        current = {name: int(counters.get(counter_id, {}).get(name, 0)) for name in COUNTERS}
+        counts = expected.get(counter_id, dict.fromkeys(COUNTERS, 0))
+        if current == counts:
+            result["unchanged"] += 1
+            continue
+
+        label = f"{counter_id}: {current['total']} -> {counts['total']}"
+        result["updated"] += 1
+
+        if dry_run:
+            print_warning(f"    [DRY RUN] Would update {label}")
+            continue
+
+        try:
+            if counts["total"]:
+                media_table.put_item(Item={
+                    "id": counter_id,
+                    "entity_type": MEDIA_COUNT_ENTITY,
+                    **counts,
+                })
+            else:
+                media_table.delete_item(Key={"id": counter_id})
+            print_success(f"    Updated {label}")
+        except ClientError as error:
+            result["updated"] -= 1
+            result["errors"] += 1
+            print_error(f"    ERROR: Failed to update {counter_id}: {format_client_error(error)}")
+
+
+def process_environment(env, dry_run):
+    dynamodb = boto3.resource("dynamodb", region_name=REGION)
+    media_table = dynamodb.Table(MEDIA_TABLE_TEMPLATE.format(env=env))
+
+    result = {"env": env, "status": "success", "indexed": 0, "updated": 0, "unchanged": 0, "errors": 0}
+
+    print()
+    print(bold(f"=== Environment: {env} ==="))
+
+    try:
+        media_items = []
+        counters = {}
+        for item in scan_all(media_table, FilterExpression=(
+            Attr("entity_type").not_exists() | Attr("entity_type").eq(MEDIA_COUNT_ENTITY)
+        )):
+            if item.get("entity_type") == MEDIA_COUNT_ENTITY:
+                counters[item["id"]] = item
+            else:
+                media_items.append(item)
+    except ClientError as error:
+        result["status"] = "failed"
+        result["errors"] += 1
+        print_error(f"  ERROR: Failed to scan media table: {format_client_error(error)}")
+        return result
+
+    print(f"  Media: {len(media_items)}, counters: {len(counters)}")
+
+    backfill(media_table, media_items, dry_run, result)
+    recount(media_table, media_items, counters, dry_run, result)
+
+    if result["errors"]:
+        result["status"] = "failed"
+
+    verb = "Would update" if dry_run else "Updated"
+    print(f"  Indexed: {result['indexed']}, {verb.lower()} counters: {result['updated']}, "
+          f"unchanged: {result['unchanged']}, errors: {result['errors']}")
+
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Backfill the media library indexes and recompute the media counters."
+    )
+    parser.add_argument(
+        "environments",
+        nargs="+",
+        metavar="ENV",
+        help="Environment(s) to reconcile, e.g. staging prod",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show what would be updated without making DynamoDB changes.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.dry_run:
+        print_warning("Running in DRY RUN mode. No DynamoDB updates will be made.")
+
+    results = [process_environment(env, args.dry_run) for env in args.environments]
+
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
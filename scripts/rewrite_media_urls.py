@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Backfill and CDN domain rewrite job for stored media URLs.
+
+Media and content records store each media URL resolved for the CDN when
+they are written (see lambda/shared/media_urls.py), and read paths return
+them as they are. This job rewrites every stored media URL from its S3 key
+for the given CDN URL:
+
+- media records: s3_url and thumbnails
+- content: featured_image (and featured_image_key) and the s3_key, s3_url
+  and thumbnails of metadata.media entries
+
+Run it once to backfill records written with S3 URLs, and whenever the CDN
+domain changes, after updating MEDIA_CDN_URL on the Lambda functions. Keys
+are only recovered from URLs of the environment's media bucket, the new CDN
+URL and any --old-cdn-url, so pass every CDN URL the records may still hold.
+Other URLs are left as they are. URLs in content bodies are not rewritten.
+
+Usage:
+    python scripts/rewrite_media_urls.py staging --cdn-url https://d111111abcdef8.cloudfront.net
+    python scripts/rewrite_media_urls.py staging prod --cdn-url https://media.example.com --dry-run
+    python scripts/rewrite_media_urls.py prod --cdn-url https://media.example.com \
+        --old-cdn-url https://d111111abcdef8.cloudfront.net
+"""
+
+import argparse
+import os
+import sys
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+
+REGION = "us-west-2"
+ACCOUNT_ID = "776053071238"
+MEDIA_BUCKET_TEMPLATE = "serverless-cms-media-{env}-{account_id}"
+MEDIA_TABLE_TEMPLATE = "cms-media-{env}"
+CONTENT_TABLE_TEMPLATE = "cms-content-{env}"
+CONTENT_URL_FIELDS = ("featured_image", "featured_image_key", "metadata")
+MEDIA_URL_FIELDS = ("s3_url", "thumbnails")
+
+# Importing the shared package creates boto3 clients, which need a region.
+os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from shared.media_urls import resolve_content_media_urls, resolve_media_record_urls  # noqa: E402
+
+
+class Colors:
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    RED = "\033[31m"
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+
+
+def print_success(message):
+    print(f"{Colors.GREEN}{message}{Colors.RESET}")
+
+
+def print_warning(message):
+    print(f"{Colors.YELLOW}{message}{Colors.RESET}")
+
+
+def print_error(message):
+    print(f"{Colors.RED}{message}{Colors.RESET}")
+
+
+def bold(message):
+    return f"{Colors.BOLD}{message}{Colors.RESET}"
+
+
+def format_client_error(error):
+    response = getattr(error, "response", {}) or {}
+    err = response.get("Error", {}) or {}
+    code = err.get("Code", "UnknownError")
+    message = err.get("Message", str(error))
+    return f"{code}: {message}"
+
+
+def scan_all(table, **scan_kwargs):
+    exclusive_start_key = None
+
+    while True:
+        if exclusive_start_key:
+            scan_kwargs["ExclusiveStartKey"] = exclusive_start_key
+
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+
+        exclusive_start_key = response.get("LastEvaluatedKey")
+        if not exclusive_start_key:
+            break
+
+
+def changed_fields(item, resolved, fields):
+    """Return {field: new value} for the fields that resolving changed."""
+    return {
+        field: resolved[field]
+        for field in fields
+        if field in resolved and resolved[field] != item.get(field)
+    }
+
+
+def rewrite_items(table, items, key_fields, fields, resolve, dry_run, result):
+    """Write the resolved URL fields of items that changed."""
+    for item in items:
+        changes = changed_fields(item, resolve(item), fields)
+        if not changes:
+            result["unchanged"] += 1
+            continue
+
+        label = f"{item['id']}: {', '.join(sorted(changes))}"
+        result["updated"] += 1
+
+        if dry_run:
+            print_warning(f"    [DRY RUN] Would update {label}")
+            continue
+
+        try:
+            table.update_item(
+                Key={field: item[field] for field in key_fields},
+                UpdateExpression="SET " + ", ".join(f"#{field} = :{field}" for field in changes),
+                ConditionExpression="attribute_exists(id)",
+                ExpressionAttributeNames={f"#{field}": field for field in changes},
+                ExpressionAttributeValues={f":{field}": value for field, value in changes.items()},
+            )
+            print_success(f"    Updated {label}")
+        except ClientError as error:
+            result["updated"] -= 1
+            result["errors"] += 1
+            print_error(f"    ERROR: Failed to update {item['id']}: {format_client_error(error)}")
+
+
+def process_environment(env, cdn_url, old_cdn_urls, dry_run):
+    dynamodb = boto3.resource("dynamodb", region_name=REGION)
+    media_table = dynamodb.Table(MEDIA_TABLE_TEMPLATE.format(env=env))
+    content_table = dynamodb.Table(CONTENT_TABLE_TEMPLATE.format(env=env))
+    bucket = MEDIA_BUCKET_TEMPLATE.format(env=env, account_id=ACCOUNT_ID)
+    cdn_urls = [cdn_url, *old_cdn_urls]
+
+    def object_url(key):
+        return f"{cdn_url}/{key}"
+
+    result = {"env": env, "status": "success", "updated": 0, "unchanged": 0, "errors": 0}
+
+    print()
+    print(bold(f"=== Environment: {env} ==="))
+
+    try:
+        media_items = list(scan_all(media_table, FilterExpression=Attr("entity_type").not_exists()))
+        content_items = list(scan_all(
+            content_table,
+            ProjectionExpression="#id, created_at, featured_image, featured_image_key, #metadata",
+            ExpressionAttributeNames={"#id": "id", "#metadata": "metadata"},
+        ))
+    except ClientError as error:
+        result["status"] = "failed"
+        result["errors"] += 1
+        print_error(f"  ERROR: Failed to scan tables: {format_client_error(error)}")
+        return result
+
+    print(f"  Media: {len(media_items)}, content items: {len(content_items)}")
+
+    rewrite_items(
+        media_table, media_items, ("id",), MEDIA_URL_FIELDS,
+        lambda item: resolve_media_record_urls(item, object_url, bucket, cdn_urls), dry_run, result,
+    )
+    rewrite_items(
+        content_table, content_items, ("id", "created_at"), CONTENT_URL_FIELDS,
+        lambda item: resolve_content_media_urls(item, object_url, bucket, cdn_urls), dry_run, result,
+    )
+
+    if result["errors"]:
+        result["status"] = "failed"
+
+    verb = "Would update" if dry_run else "Updated"
+    print(f"  {verb}: {result['updated']}, unchanged: {result['unchanged']}, errors: {result['errors']}")
+
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Rewrite stored media URLs for a CDN URL."
+    )
+    parser.add_argument(
+        "environments",
+        nargs="+",
+        metavar="ENV",
+        help="Environment(s) to rewrite, e.g. staging prod",
+    )
+    parser.add_argument(
+        "--cdn-url",
+        required=True,
+        help="Media CDN base URL, the MEDIA_CDN_URL of the environment.",
+    )
+    parser.add_argument(
+        "--old-cdn-url",
+        action="append",
+        default=[],
+        metavar="URL",
+        help="Previous media CDN base URL whose stored URLs should be rewritten (repeatable).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show what would be updated without making DynamoDB changes.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.dry_run:
+        print_warning("Running in DRY RUN mode. No DynamoDB updates will be made.")
+
+    cdn_url = args.cdn_url.rstrip("/")
+    old_cdn_urls = [url.rstrip("/") for url in args.old_cdn_url]
+    results = [
+        process_environment(env, cdn_url, old_cdn_urls, args.dry_run)
+        for env in args.environments
+    ]
+
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
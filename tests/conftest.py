@@ -19,12 +19,14 @@ os.environ['USERS_TABLE'] = 'test-cms-users'
 os.environ['SETTINGS_TABLE'] = 'test-cms-settings'
 os.environ['PLUGINS_TABLE'] = 'test-cms-plugins'
 os.environ['COMMENTS_TABLE'] = 'test-cms-comments'
+os.environ['RATE_LIMITS_TABLE'] = 'test-cms-rate-limits'
 os.environ['MEDIA_BUCKET'] = 'test-cms-media-bucket'
 os.environ['COGNITO_REGION'] = 'us-east-1'
 os.environ['USER_POOL_ID'] = 'test-pool-id'
 os.environ['USER_POOL_CLIENT_ID'] = 'test-client-id'
 os.environ['SES_FROM_EMAIL'] = 'test@example.com'
 os.environ['SES_CONFIGURATION_SET'] = 'test-config-set'
+os.environ['EMAIL_TRANSPORT'] = 'local'
 
 
 @pytest.fixture(scope='session', autouse=True)
@@ -96,6 +98,36 @@ def aws_mock():
             ],
             AttributeDefinitions=[
                 {'AttributeName': 'id', 'AttributeType': 'S'},
+                {'AttributeName': 'uploaded_at', 'AttributeType': 'N'},
+                {'AttributeName': 'library', 'AttributeType': 'S'},
+                {'AttributeName': 'media_type', 'AttributeType': 'S'},
+                {'AttributeName': 'uploaded_by', 'AttributeType': 'S'},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': 'library-uploaded_at-index',
+                    'KeySchema': [
+                        {'AttributeName': 'library', 'KeyType': 'HASH'},
+                        {'AttributeName': 'uploaded_at', 'KeyType': 'RANGE'},
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'},
+                },
+                {
+                    'IndexName': 'media_type-uploaded_at-index',
+                    'KeySchema': [
+                        {'AttributeName': 'media_type', 'KeyType': 'HASH'},
+                        {'AttributeName': 'uploaded_at', 'KeyType': 'RANGE'},
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'},
+                },
+                {
+                    'IndexName': 'uploaded_by-uploaded_at-index',
+                    'KeySchema': [
+                        {'AttributeName': 'uploaded_by', 'KeyType': 'HASH'},
+                        {'AttributeName': 'uploaded_at', 'KeyType': 'RANGE'},
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'},
+                },
             ],
             BillingMode='PAY_PER_REQUEST'
         )
@@ -148,6 +180,7 @@ def aws_mock():
                 {'AttributeName': 'created_at', 'AttributeType': 'N'},
                 {'AttributeName': 'content_id', 'AttributeType': 'S'},
                 {'AttributeName': 'status', 'AttributeType': 'S'},
+                {'AttributeName': 'legacy_id', 'AttributeType': 'S'},
             ],
             GlobalSecondaryIndexes=[
                 {
@@ -166,6 +199,25 @@ def aws_mock():
                     ],
                     'Projection': {'ProjectionType': 'ALL'},
                 },
+                {
+                    'IndexName': 'legacy_id-index',
+                    'KeySchema': [
+                        {'AttributeName': 'legacy_id', 'KeyType': 'HASH'},
+                    ],
+                    'Projection': {'ProjectionType': 'KEYS_ONLY'},
+                },
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        
+        # Create rate limits table
+        dynamodb.create_table(
+            TableName=os.environ['RATE_LIMITS_TABLE'],
+            KeySchema=[
+                {'AttributeName': 'id', 'KeyType': 'HASH'},
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'id', 'AttributeType': 'S'},
             ],
             BillingMode='PAY_PER_REQUEST'
         )
@@ -878,6 +930,28 @@ def author_token():
     return "mock-author-token"
 
 
+@pytest.fixture
+def mock_require_auth(monkeypatch):
+    """
+    Patch require_auth to pass every request through as an editor.
+
+    The user id is 'test-editor-id', or the X-Test-User header when set.
+    Handlers apply require_auth at import, so reload handler modules after
+    requesting this fixture.
+    """
+    from shared import auth
+
+    def mock_require_auth(roles=None):
+        def decorator(func):
+            def wrapper(event, context, *args, **kwargs):
+                user_id = (event.get('headers') or {}).get('X-Test-User', 'test-editor-id')
+                return func(event, context, user_id, 'editor', *args, **kwargs)
+            return wrapper
+        return decorator
+
+    monkeypatch.setattr(auth, 'require_auth', mock_require_auth)
+
+
 @pytest.fixture
 def disable_comments(dynamodb_mock):
     """Disable comments in settings."""
@@ -0,0 +1,88 @@
+"""
+Integration tests for bulk comment moderation.
+Tests bulk approve and delete, validation and cache invalidation.
+"""
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from shared.db import CommentRepository, new_comment_id
+
+
+@pytest.fixture
+def bulk(dynamodb_mock, mock_require_auth):
+    """Load the bulk moderation module with require_auth patched."""
+    import comments.bulk
+    importlib.reload(comments.bulk)
+    return comments.bulk
+
+
+def _create(repo, created_at, content_id, status='pending'):
+    comment_id = new_comment_id(created_at)
+    repo.create({
+        'id': comment_id,
+        'content_id': content_id,
+        'author_name': 'Spammer',
+        'comment_text': 'Buy now',
+        'status': status,
+        'created_at': created_at,
+        'updated_at': created_at,
+    })
+    return comment_id
+
+
+def _moderate(bulk, body):
+    response = bulk.handler({'body': json.dumps(body)}, {})
+    return response['statusCode'], json.loads(response['body'])
+
+
+class TestBulkModeration:
+    """Test moderating many comments at once."""
+
+    def test_bulk_approve(self, bulk):
+        repo = CommentRepository()
+        ids = [_create(repo, 100 + index, f'post-{index % 2}') for index in range(120)]
+
+        status, body = _moderate(bulk, {'action': 'approve', 'ids': ids + ['missing']})
+
+        assert status == 200
+        assert body['updated'] == ids
+        assert body['not_found'] == ['missing']
+        assert body['content_ids'] == ['post-0', 'post-1']
+        for comment in repo.get_by_ids(ids):
+            assert comment['status'] == 'approved'
+            assert comment['moderated_by'] == 'test-editor-id'
+        # One cache invalidation per content item
+        assert repo.get_thread_version('post-0') == 1
+        assert repo.get_thread_version('post-1') == 1
+
+    def test_bulk_delete(self, bulk):
+        repo = CommentRepository()
+        spam = [_create(repo, 100 + index, 'post-1') for index in range(30)]
+        kept = _create(repo, 200, 'post-1', status='approved')
+        version = repo.get_thread_version('post-1')
+
+        status, body = _moderate(bulk, {'action': 'delete', 'ids': spam})
+
+        assert status == 200
+        assert len(body['updated']) == 30
+        assert repo.get_by_ids(spam + [kept]) == [repo.get_by_id(kept)]
+        # Only pending comments were deleted, so cached trees stay current
+        assert repo.get_thread_version('post-1') == version
+
+    def test_validation(self, bulk):
+        for body in (
+            {'action': 'approve'},
+            {'action': 'approve', 'ids': []},
+            {'action': 'approve', 'ids': [1]},
+            {'action': 'publish', 'ids': ['a']},
+            {'action': 'delete', 'ids': [str(index) for index in range(bulk.MAX_BULK_COMMENTS + 1)]},
+        ):
+            status, _ = _moderate(bulk, body)
+            assert status == 400
@@ -0,0 +1,158 @@
+"""
+Tests for comment counts on content items.
+Tests counters on create, moderation and delete, bulk moderation, deleted
+content and the reconciliation job.
+"""
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Add lambda and scripts directories to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+
+from shared.db import CommentRepository, ContentRepository, new_comment_id
+
+
+@pytest.fixture
+def repo(dynamodb_mock):
+    ContentRepository().create({
+        'id': 'post-1',
+        'created_at': 50,
+        'type': 'post',
+        'status': 'published',
+        'title': 'Post',
+    })
+    return CommentRepository()
+
+
+def _counts(content_id='post-1'):
+    item = ContentRepository().get_by_id(content_id)
+    return (item.get('approved_comment_count', 0), item.get('pending_comment_count', 0))
+
+
+def _create(repo, created_at, status='pending', content_id='post-1', **fields):
+    comment = {
+        'id': new_comment_id(created_at),
+        'content_id': content_id,
+        'author_name': 'Reader',
+        'comment_text': 'Hello',
+        'status': status,
+        'created_at': created_at,
+        'updated_at': created_at,
+        **fields,
+    }
+    return repo.create(comment)
+
+
+class TestCommentCounts:
+    """Test counters kept on the content item."""
+
+    def test_create_moderate_delete(self, repo):
+        pending = _create(repo, 100, content_created_at=50)
+        approved = _create(repo, 101, status='approved')
+        assert _counts() == (1, 1)
+
+        repo.update(pending['id'], {'status': 'approved'})
+        assert _counts() == (2, 0)
+
+        # Repeated and non-status updates leave the counts alone
+        repo.update(pending['id'], {'status': 'approved'})
+        repo.update(approved['id'], {'comment_text': 'Edited'})
+        assert _counts() == (2, 0)
+
+        repo.update(approved['id'], {'status': 'spam'})
+        assert _counts() == (1, 0)
+
+        repo.delete(approved['id'])
+        repo.delete(pending['id'])
+        assert _counts() == (0, 0)
+
+    def test_older_comments_are_counted(self, repo):
+        legacy_id = str(uuid.uuid4())
+        repo.create({
+            'id': legacy_id,
+            'content_id': 'post-1',
+            'status': 'pending',
+            'created_at': 100,
+        })
+
+        repo.update(legacy_id, {'status': 'approved'})
+        assert _counts() == (1, 0)
+        repo.delete(legacy_id)
+        assert _counts() == (0, 0)
+
+    def test_bulk_moderation(self, repo):
+        comments = [_create(repo, 100 + index, content_created_at=50) for index in range(150)]
+        assert _counts() == (0, 150)
+
+        repo.moderate_batch(repo.get_by_ids([c['id'] for c in comments[:120]]), {'status': 'approved'})
+        assert _counts() == (120, 30)
+
+        repo.delete_batch(repo.get_by_ids([c['id'] for c in comments[100:]]))
+        assert _counts() == (100, 0)
+
+    def test_comments_of_deleted_content(self, repo):
+        comment = _create(repo, 100, content_created_at=50)
+        ContentRepository().delete('post-1', 50)
+
+        repo.update(comment['id'], {'status': 'approved'})
+        repo.delete(comment['id'])
+
+        assert repo.get_by_id(comment['id']) is None
+        assert ContentRepository().get_by_id('post-1') is None
+
+    def test_stale_status_is_not_counted_twice(self, repo):
+        comment = _create(repo, 100)
+        repo.update(comment['id'], {'status': 'approved'})
+
+        with pytest.raises(Exception, match='Failed to update comments'):
+            repo.moderate_batch([comment], {'status': 'rejected'})
+        assert _counts() == (1, 0)
+
+
+class TestContentListCounts:
+    """Test the comment counts on the content listing."""
+
+    def _list(self, monkeypatch, user_info):
+        import json
+        import content.list as content_list
+
+        monkeypatch.setattr(content_list, 'extract_user_from_event', lambda event: user_info)
+        response = content_list.handler({'queryStringParameters': {}}, {})
+        assert response['statusCode'] == 200
+        return json.loads(response['body'])['items'][0]
+
+    def test_pending_count_is_only_shown_to_moderators(self, repo, monkeypatch):
+        _create(repo, 100, content_created_at=50)
+
+        item = self._list(monkeypatch, ('editor-1', 'editor'))
+        assert int(item['pending_comment_count']) == 1
+
+        for user_info in (None, ('author-1', 'author')):
+            item = self._list(monkeypatch, user_info)
+            assert item['approved_comment_count'] == 0
+            assert 'pending_comment_count' not in item
+
+
+class TestRecountComments:
+    """Test the reconciliation job."""
+
+    def test_compute_counts(self):
+        import recount_comments
+
+        counts = recount_comments.compute_counts(
+            [{'id': 'post-1'}, {'id': 'post-2'}],
+            [
+                {'content_id': 'post-1', 'status': 'approved'},
+                {'content_id': 'post-1', 'status': 'approved'},
+                {'content_id': 'post-1', 'status': 'pending'},
+                {'content_id': 'post-1', 'status': 'spam'},
+                {'content_id': 'deleted-post', 'status': 'approved'},
+            ],
+        )
+
+        assert counts == {'post-1': (2, 1), 'post-2': (0, 0)}
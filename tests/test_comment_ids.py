@@ -0,0 +1,134 @@
+"""
+Tests for self-addressing comment ids.
+Tests id encoding, by-id reads without scans and the id migration job.
+"""
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Add lambda and scripts directories to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+
+from shared.db import CommentRepository, get_comment_created_at, new_comment_id
+
+
+def _comment(comment_id, created_at, parent_id=None, status='approved'):
+    return {
+        'id': comment_id,
+        'content_id': 'post-1',
+        'author_name': 'Reader',
+        'comment_text': 'Hello',
+        'parent_id': parent_id,
+        'status': status,
+        'created_at': created_at,
+        'updated_at': created_at,
+    }
+
+
+@pytest.fixture
+def repo(dynamodb_mock, monkeypatch):
+    repo = CommentRepository()
+
+    def no_scan(**kwargs):
+        raise AssertionError('comments table scanned')
+
+    monkeypatch.setattr(repo.table, 'scan', no_scan)
+    return repo
+
+
+class TestCommentIds:
+    """Test encoding created_at in comment ids."""
+
+    def test_round_trip(self):
+        comment_id = new_comment_id(1735689600)
+
+        assert get_comment_created_at(comment_id) == 1735689600
+        assert get_comment_created_at(str(uuid.uuid4())) is None
+        assert get_comment_created_at('12345678-1234-4234-8234-123456789012') is None
+        assert get_comment_created_at('THREAD#post-1') is None
+        assert get_comment_created_at(None) is None
+
+    def test_by_id_operations(self, repo):
+        comment_id = new_comment_id(100)
+        repo.create(_comment(comment_id, 100, status='pending'))
+
+        assert repo.get_by_id(comment_id)['comment_text'] == 'Hello'
+        assert repo.update(comment_id, {'status': 'approved'})['status'] == 'approved'
+        repo.delete(comment_id)
+        assert repo.get_by_id(comment_id) is None
+
+        with pytest.raises(Exception, match='Failed to update comment'):
+            repo.update(new_comment_id(100), {'status': 'approved'})
+
+    def test_older_ids_are_queried(self, repo):
+        legacy_id = str(uuid.uuid4())
+        repo.create(_comment(legacy_id, 100))
+
+        assert repo.get_by_id(legacy_id)['id'] == legacy_id
+        repo.delete(legacy_id)
+        assert repo.get_by_id(legacy_id) is None
+
+
+class TestMigrateCommentIds:
+    """Test re-keying older comments."""
+
+    def test_migrates_and_repoints_replies(self, dynamodb_mock):
+        import migrate_comment_ids as script
+
+        repo = CommentRepository()
+        table = repo.table
+        parent_id = str(uuid.uuid4())
+        reply_id = str(uuid.uuid4())
+        new_reply_id = new_comment_id(300)
+        repo.create(_comment(parent_id, 100))
+        repo.create(_comment(reply_id, 200, parent_id))
+        repo.create(_comment(new_reply_id, 300, parent_id))
+        version = repo.get_thread_version('post-1')
+
+        def comments():
+            return [item for item in table.scan()['Items'] if 'entity_type' not in item]
+
+        items = comments()
+        id_map = script.plan_ids(items)
+        result = {'migrated': 0, 'repointed': 0, 'errors': 0}
+        script.migrate(table, items, id_map, False, result)
+
+        assert result == {'migrated': 2, 'repointed': 1, 'errors': 0}
+        parent = repo.get_by_id(id_map[parent_id])
+        assert parent['legacy_id'] == parent_id
+        # Old ids keep resolving, to the migrated comment
+        assert repo.get_by_id(parent_id) == parent
+        assert repo.get_by_ids([parent_id, parent['id']]) == [parent]
+        assert repo.get_by_id(id_map[reply_id])['parent_id'] == parent['id']
+        assert repo.get_by_id(new_reply_id)['parent_id'] == parent['id']
+        assert repo.get_thread_version('post-1') == version + 1
+
+        # Nothing is left to do on a second run
+        items = comments()
+        result = {'migrated': 0, 'repointed': 0, 'errors': 0}
+        script.migrate(table, items, script.plan_ids(items), False, result)
+        assert result == {'migrated': 0, 'repointed': 0, 'errors': 0}
+
+    def test_moderation_accepts_old_ids(self, api_client, editor_token, pending_comment):
+        import migrate_comment_ids as script
+
+        repo = CommentRepository()
+        items = [item for item in repo.table.scan()['Items'] if 'entity_type' not in item]
+        result = {'migrated': 0, 'repointed': 0, 'errors': 0}
+        script.migrate(repo.table, items, script.plan_ids(items), False, result)
+        old_id = pending_comment['id']
+        headers = {'Authorization': f'Bearer {editor_token}'}
+
+        response = api_client.put(f'/api/v1/comments/{old_id}', json={'status': 'approved'}, headers=headers)
+        assert response.status_code == 200
+        comment = response.json()
+        assert comment['legacy_id'] == old_id
+        assert repo.get_by_id(comment['id'])['status'] == 'approved'
+
+        response = api_client.delete(f'/api/v1/comments/{old_id}', headers=headers)
+        assert response.status_code == 200
+        assert repo.get_by_id(comment['id']) is None
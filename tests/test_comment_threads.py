@@ -0,0 +1,152 @@
+"""
+Tests for threaded comment trees.
+Tests tree assembly, thread pagination, caching by thread version and
+version bumps on moderation.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from comments import threads
+from comments.threads import build_comment_tree, paginate_threads
+from shared.db import CommentRepository
+
+
+@pytest.fixture
+def comments_list(dynamodb_mock):
+    from comments import list as comments_list
+    threads.clear_thread_cache()
+    yield comments_list
+    threads.clear_thread_cache()
+
+
+def _comment(comment_id, created_at, parent_id=None, status='approved', content_id='post-1'):
+    return {
+        'id': comment_id,
+        'content_id': content_id,
+        'author_name': 'Reader',
+        'author_email': 'reader@example.com',
+        'ip_address': '1.2.3.4',
+        'comment_text': f'Comment {comment_id}',
+        'parent_id': parent_id,
+        'status': status,
+        'created_at': created_at,
+        'updated_at': created_at,
+    }
+
+
+def _list(comments_list, content_id='post-1', **params):
+    response = comments_list.handler({
+        'pathParameters': {'id': content_id},
+        'queryStringParameters': params,
+    }, {})
+    assert response['statusCode'] == 200
+    return json.loads(response['body'])
+
+
+def _ids(nodes):
+    return [(node['id'], _ids(node['replies'])) for node in nodes]
+
+
+class TestBuildCommentTree:
+    """Test assembling threads from comments."""
+
+    def test_nests_replies(self):
+        tree = build_comment_tree([
+            _comment('a', 1),
+            _comment('b', 2),
+            _comment('a1', 3, 'a'),
+            _comment('a1x', 4, 'a1'),
+            _comment('a2', 5, 'a'),
+            _comment('orphan', 6, 'pending-parent'),
+        ])
+
+        assert _ids(tree) == [
+            ('orphan', []),
+            ('b', []),
+            ('a', [('a1', [('a1x', [])]), ('a2', [])]),
+        ]
+        assert 'author_email' not in tree[0]
+        assert 'ip_address' not in tree[0]
+
+    def test_reply_in_same_second_as_parent(self):
+        tree = build_comment_tree([_comment('reply', 1, 'parent'), _comment('parent', 1)])
+
+        assert _ids(tree) == [('parent', [('reply', [])])]
+
+    def test_paginate_threads(self):
+        tree = build_comment_tree([_comment(str(index), index) for index in range(5)])
+
+        page, next_key = paginate_threads(tree, 2)
+        assert [node['id'] for node in page] == ['4', '3']
+        assert next_key == {'id': '3', 'created_at': 3}
+
+        # A new thread does not shift the next page
+        tree = build_comment_tree([_comment(str(index), index) for index in range(6)])
+        page, next_key = paginate_threads(tree, 2, next_key)
+        assert [node['id'] for node in page] == ['2', '1']
+
+        page, next_key = paginate_threads(tree, 2, next_key)
+        assert [node['id'] for node in page] == ['0']
+        assert next_key is None
+
+
+class TestThreadedListing:
+    """Test the public listing, its cache and version bumps."""
+
+    def test_lists_threads_by_page(self, comments_list):
+        repo = CommentRepository()
+        for comment in [
+            _comment('a', 1), _comment('b', 2), _comment('c', 3),
+            _comment('b1', 4, 'b'), _comment('p', 5, status='pending'),
+            _comment('other', 6, content_id='post-2'),
+        ]:
+            repo.create(comment)
+
+        result = _list(comments_list, limit='2')
+        assert _ids(result['comments']) == [('c', []), ('b', [('b1', [])])]
+        assert result['total_threads'] == 3
+        assert result['total_comments'] == 4
+
+        result = _list(comments_list, limit='2', last_key=result['last_key'])
+        assert _ids(result['comments']) == [('a', [])]
+        assert 'last_key' not in result
+
+    def test_cached_until_moderation(self, comments_list, monkeypatch):
+        repo = CommentRepository()
+        repo.create(_comment('a', 1))
+        repo.create(_comment('p', 2, status='pending'))
+        assert _ids(_list(comments_list)['comments']) == [('a', [])]
+
+        queries = []
+        original = CommentRepository.list_approved_by_content
+
+        def counting(self, content_id):
+            queries.append(content_id)
+            return original(self, content_id)
+
+        monkeypatch.setattr(CommentRepository, 'list_approved_by_content', counting)
+
+        _list(comments_list)
+        assert queries == []
+
+        # Approving and deleting comments bump the version
+        repo.update('p', {'status': 'approved'}, created_at=2)
+        assert _ids(_list(comments_list)['comments']) == [('p', []), ('a', [])]
+        repo.delete('a', created_at=1)
+        assert _ids(_list(comments_list)['comments']) == [('p', [])]
+        assert len(queries) == 2
+        assert repo.get_thread_version('post-1') == 3
+
+    def test_moderation_listing_skips_version_items(self, comments_list):
+        repo = CommentRepository()
+        repo.create(_comment('a', 1))
+
+        response = comments_list.handler({'queryStringParameters': {}}, {})
+
+        assert [item['id'] for item in json.loads(response['body'])['comments']] == ['a']
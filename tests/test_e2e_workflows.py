@@ -156,6 +156,7 @@ class TestMediaManagementWorkflow:
                 'caption': 'Beautiful landscape'
             },
             'uploaded_by': test_user_id,
+            'uploaded_at': now,
             'created_at': now
         }
         created_media = media_repo.create(media_data)
@@ -0,0 +1,135 @@
+"""
+Tests for the outbound email queue.
+Tests queueing, digest coalescing, retries with backoff, the worker's
+partial batch failures and the local transport.
+"""
+import json
+import os
+import sys
+
+import pytest
+from botocore.exceptions import ClientError
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from shared import mailer
+from shared.mailer import LocalTransport, process_email_jobs, queue_email, queue_notification
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    transport = LocalTransport()
+    monkeypatch.setattr(mailer, 'transport', transport)
+    monkeypatch.setattr(mailer.time, 'sleep', lambda seconds: None)
+    return transport
+
+
+def _notification(recipient, comment_id, title='Post'):
+    return {
+        'type': 'notification',
+        'template': 'comment_notification',
+        'to': recipient,
+        'data': {
+            'commenter_name': 'Reader',
+            'commenter_email': 'reader@example.com',
+            'content_title': title,
+            'comment_text': f'Comment {comment_id}',
+            'comment_id': comment_id,
+        },
+    }
+
+
+def _client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'SendEmail')
+
+
+class FlakyTransport(LocalTransport):
+    """Fails the first sends with the given error codes."""
+
+    def __init__(self, *codes):
+        super().__init__()
+        self.codes = list(codes)
+
+    def send(self, message):
+        if self.codes:
+            raise _client_error(self.codes.pop(0))
+        return super().send(message)
+
+
+class TestQueueing:
+    """Test queueing emails through the local queue."""
+
+    def test_queue_email(self, transport):
+        queue_email('welcome', ['new@example.com'], user_name='New User', temporary_password='Temp123!')
+
+        [message] = transport.sent
+        assert message['to'] == ['new@example.com']
+        assert 'Welcome to Celestium CMS' in message['subject']
+        assert 'Temp123!' in message['body_text']
+
+    def test_unknown_templates(self, transport):
+        with pytest.raises(ValueError):
+            queue_email('newsletter', ['a@example.com'])
+        with pytest.raises(ValueError):
+            queue_notification('welcome', ['a@example.com'], user_name='A')
+        assert transport.sent == []
+
+    def test_outbox_dir(self, tmp_path):
+        LocalTransport(str(tmp_path)).send({'to': ['a@example.com'], 'subject': 'Hi', 'body_text': 'Hello'})
+
+        [path] = tmp_path.iterdir()
+        assert json.loads(path.read_text())['subject'] == 'Hi'
+
+
+class TestProcessing:
+    """Test the worker side."""
+
+    def test_notifications_coalesce_per_recipient(self, transport):
+        failed = process_email_jobs([
+            ('1', _notification('admin@example.com', 'c1', 'First post')),
+            ('2', _notification('admin@example.com', 'c2', 'Second post')),
+            ('3', _notification('editor@example.com', 'c3')),
+            ('4', {'type': 'email', 'template': 'password_reset', 'to': ['user@example.com'],
+                   'data': {'user_name': 'User', 'reset_code': 'ABC123'}}),
+            ('5', {'type': 'email', 'template': 'missing', 'to': ['x@example.com'], 'data': {}}),
+        ])
+
+        assert failed == []
+        sent = {tuple(message['to']): message for message in transport.sent}
+        assert len(transport.sent) == 3
+        digest = sent[('admin@example.com',)]
+        assert digest['subject'] == '2 New Comments'
+        assert 'First post' in digest['body_text'] and 'Second post' in digest['body_text']
+        assert sent[('editor@example.com',)]['subject'] == "New Comment on 'Post'"
+        assert 'ABC123' in sent[('user@example.com',)]['body_text']
+
+    def test_throttling_is_retried(self, monkeypatch):
+        monkeypatch.setattr(mailer.time, 'sleep', lambda seconds: None)
+
+        transport = FlakyTransport('Throttling', 'Throttling')
+        monkeypatch.setattr(mailer, 'transport', transport)
+        assert process_email_jobs([('1', _notification('a@example.com', 'c1'))]) == []
+        assert len(transport.sent) == 1
+
+        # Still throttled after every attempt: back to the queue
+        monkeypatch.setattr(mailer, 'transport', FlakyTransport(*['Throttling'] * mailer.SEND_ATTEMPTS))
+        jobs = [('1', _notification('a@example.com', 'c1')), ('2', _notification('a@example.com', 'c2'))]
+        assert sorted(process_email_jobs(jobs)) == ['1', '2']
+
+        # Rejected messages are dropped
+        monkeypatch.setattr(mailer, 'transport', FlakyTransport('MessageRejected'))
+        assert process_email_jobs([('1', _notification('a@example.com', 'c1'))]) == []
+
+    def test_worker_reports_failures(self, monkeypatch):
+        from mailer import worker
+
+        monkeypatch.setattr(mailer.time, 'sleep', lambda seconds: None)
+        monkeypatch.setattr(mailer, 'transport', FlakyTransport(*['Throttling'] * mailer.SEND_ATTEMPTS))
+
+        response = worker.handler({'Records': [
+            {'messageId': 'm1', 'body': json.dumps(_notification('a@example.com', 'c1'))},
+            {'messageId': 'm2', 'body': 'not json'},
+        ]}, None)
+
+        assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
@@ -0,0 +1,152 @@
+"""
+Integration tests for batched media deletion.
+Tests single deletes with DeleteObjects and the bulk delete endpoint.
+"""
+import base64
+import importlib
+import io
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+# Add lambda and media directories to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'media'))
+
+BOUNDARY = 'bulk-delete-boundary'
+
+
+@pytest.fixture
+def media(mock_require_auth):
+    """Load the media upload and delete modules with require_auth patched."""
+    import media.upload
+    import media.delete
+    importlib.reload(media.upload)
+    importlib.reload(media.delete)
+    return media
+
+
+def _png_bytes(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (400, 300), color=color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _upload(media, data, filename='photo.png'):
+    body = (
+        f'--{BOUNDARY}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: image/png\r\n\r\n'
+    ).encode() + data + f'\r\n--{BOUNDARY}--\r\n'.encode()
+    response = media.upload.handler({
+        'httpMethod': 'POST',
+        'headers': {'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'},
+        'body': base64.b64encode(body).decode(),
+        'isBase64Encoded': True,
+    }, {})
+    assert response['statusCode'] == 201
+    return json.loads(response['body'])
+
+
+def _bulk_delete(media, ids):
+    return media.delete.bulk_handler({'body': json.dumps({'ids': ids})}, {})
+
+
+def _keys(s3_mock, prefix):
+    listed = s3_mock.list_objects_v2(Bucket=os.environ['MEDIA_BUCKET'], Prefix=prefix)
+    return sorted(obj['Key'] for obj in listed.get('Contents', []))
+
+
+class TestDeleteFile:
+    """Test deleting one file and its derived objects."""
+
+    def test_delete_uses_one_batched_request(self, media, s3_mock):
+        from shared import s3
+
+        item = _upload(media, _png_bytes('red'))
+        thumbnails = media.delete.media_repo.get_by_id(item['id'])['thumbnails']
+        assert len(_keys(s3_mock, 'thumbnails/')) == 3
+
+        with patch.object(s3.s3_client, 'delete_objects', wraps=s3.s3_client.delete_objects) as batch, \
+                patch.object(s3.s3_client, 'delete_object') as single:
+            response = media.delete.handler({'pathParameters': {'id': item['id']}}, {})
+
+        assert response['statusCode'] == 200
+        assert batch.call_count == 1
+        assert single.call_count == 0
+        deleted = [obj['Key'] for obj in batch.call_args.kwargs['Delete']['Objects']]
+        assert set(deleted) >= {
+            item['s3_key'],
+            *(s3._key_from_url(url) for url in thumbnails.values()),
+        }
+        assert _keys(s3_mock, '') == []
+
+    def test_media_object_keys(self):
+        from shared.s3 import get_media_object_keys, get_variant_keys
+
+        thumbnails = {'small': 'https://cdn.example.com/thumbnails/small/a.jpg'}
+        assert get_media_object_keys('uploads/a.jpg', 'image/jpeg', thumbnails) == \
+            ['uploads/a.jpg', 'thumbnails/small/a.jpg'] + get_variant_keys('uploads/a.jpg')
+        assert get_media_object_keys('uploads/a.pdf', 'application/pdf') == ['uploads/a.pdf']
+
+
+class TestBulkDelete:
+    """Test POST /media/bulk-delete."""
+
+    def test_bulk_delete_respects_shared_files(self, media, s3_mock):
+        red, blue = _png_bytes('red'), _png_bytes('blue')
+        first = _upload(media, red)
+        first_copy = _upload(media, red)
+        second = _upload(media, blue)
+        second_copy = _upload(media, blue)
+
+        from shared import s3
+        with patch.object(s3.s3_client, 'delete_objects', wraps=s3.s3_client.delete_objects) as batch:
+            response = _bulk_delete(media, [first['id'], first_copy['id'], second['id'], 'missing'])
+
+        assert response['statusCode'] == 200
+        result = json.loads(response['body'])
+        assert sorted(result['deleted']) == sorted([first['id'], first_copy['id'], second['id']])
+        assert result['not_found'] == ['missing']
+        assert result['failed_keys'] == []
+        assert batch.call_count == 1
+
+        repo = media.delete.media_repo
+        assert repo.get_by_id(first['id']) is None
+        assert repo.get_by_id(second_copy['id']) is not None
+        assert repo.get_content_hash(first['content_hash']) is None
+        assert repo.get_content_hash(second['content_hash'])['ref_count'] == 1
+        assert _keys(s3_mock, 'uploads/') == [second['s3_key']]
+        assert len(_keys(s3_mock, 'thumbnails/')) == 3
+
+    def test_bulk_delete_batches_many_items(self, media, dynamodb_mock, s3_mock):
+        table = dynamodb_mock.Table(os.environ['MEDIA_TABLE'])
+        for index in range(60):
+            key = f'uploads/file-{index}.pdf'
+            s3_mock.put_object(Bucket=os.environ['MEDIA_BUCKET'], Key=key, Body=b'x')
+            table.put_item(Item={'id': f'media-{index}', 's3_key': key, 'mime_type': 'application/pdf'})
+
+        with patch.object(media.delete.plugin_manager, 'execute_hook') as execute_hook:
+            response = _bulk_delete(media, [f'media-{index}' for index in range(60)])
+
+        assert response['statusCode'] == 200
+        assert len(json.loads(response['body'])['deleted']) == 60
+        execute_hook.assert_called_once()
+        hook_name, data = execute_hook.call_args.args
+        assert hook_name == 'media_bulk_delete'
+        assert sorted(data['media_ids']) == sorted(f'media-{index}' for index in range(60))
+        assert data['media'][0].keys() == {'id', 's3_key', 'mime_type'}
+        assert table.scan()['Count'] == 0
+        assert _keys(s3_mock, 'uploads/') == []
+
+    def test_bulk_delete_validates_ids(self, media, monkeypatch):
+        monkeypatch.setattr(media.delete, 'MAX_BULK_DELETE', 2)
+
+        assert _bulk_delete(media, [])['statusCode'] == 400
+        assert _bulk_delete(media, ['a', 5])['statusCode'] == 400
+        assert _bulk_delete(media, ['a', 'b', 'c'])['statusCode'] == 400
+        assert media.delete.bulk_handler({'body': 'not json'}, {})['statusCode'] == 400
@@ -0,0 +1,209 @@
+"""
+Integration tests for content-hash deduplication of media uploads.
+Tests duplicate uploads, shared-file deletion and the batch dedupe job.
+"""
+import base64
+import hashlib
+import importlib
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+# Add lambda, media and scripts directories to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'media'))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+
+BOUNDARY = 'dedupe-boundary'
+
+
+@pytest.fixture
+def media(mock_require_auth):
+    """Load the media upload, delete and session modules with require_auth patched."""
+    import media.upload
+    import media.delete
+    import media.sessions
+    importlib.reload(media.upload)
+    importlib.reload(media.delete)
+    importlib.reload(media.sessions)
+    return media
+
+
+def _png_bytes(color='green'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (400, 300), color=color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _upload(media, data, filename='photo.png'):
+    body = (
+        f'--{BOUNDARY}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: image/png\r\n\r\n'
+    ).encode() + data + f'\r\n--{BOUNDARY}--\r\n'.encode()
+    response = media.upload.handler({
+        'httpMethod': 'POST',
+        'headers': {'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'},
+        'body': base64.b64encode(body).decode(),
+        'isBase64Encoded': True,
+    }, {})
+    assert response['statusCode'] == 201
+    return json.loads(response['body'])
+
+
+def _delete(media, media_id):
+    response = media.delete.handler({'pathParameters': {'id': media_id}}, {})
+    assert response['statusCode'] == 200
+
+
+def _keys(s3_mock, prefix):
+    listed = s3_mock.list_objects_v2(Bucket=os.environ['MEDIA_BUCKET'], Prefix=prefix)
+    return [obj['Key'] for obj in listed.get('Contents', [])]
+
+
+class TestUploadDeduplication:
+    """Test uploads of content that is already stored."""
+
+    def test_duplicate_upload_references_stored_file(self, media, s3_mock):
+        data = _png_bytes()
+
+        first = _upload(media, data, 'first.png')
+        second = _upload(media, data, 'second.png')
+
+        assert second['id'] != first['id']
+        assert second['filename'] == 'second.png'
+        assert second['s3_key'] == first['s3_key']
+        assert second['content_hash'] == hashlib.sha256(data).hexdigest()
+        assert second['status'] == 'ready'
+        assert second['thumbnails'] == media.upload.media_repo.get_by_id(first['id'])['thumbnails']
+        assert _keys(s3_mock, 'uploads/') == [first['s3_key']]
+        assert len(_keys(s3_mock, 'thumbnails/')) == 3
+
+        stored = media.upload.media_repo.get_content_hash(second['content_hash'])
+        assert stored['ref_count'] == 2
+        assert media.upload.media_repo.get_by_id(stored['id']) is None
+
+    def test_shared_file_is_deleted_with_last_reference(self, media, s3_mock):
+        data = _png_bytes()
+        first = _upload(media, data)
+        second = _upload(media, data)
+
+        _delete(media, first['id'])
+        assert _keys(s3_mock, 'uploads/') == [first['s3_key']]
+        assert media.upload.media_repo.get_content_hash(first['content_hash'])['ref_count'] == 1
+
+        _delete(media, second['id'])
+        assert _keys(s3_mock, 'uploads/') == []
+        assert _keys(s3_mock, 'thumbnails/') == []
+        assert media.upload.media_repo.get_content_hash(first['content_hash']) is None
+
+        # The content can be uploaded again after its last reference is gone
+        third = _upload(media, data)
+        assert _keys(s3_mock, 'uploads/') == [third['s3_key']]
+
+    def test_session_finalize_deduplicates(self, media, s3_mock):
+        data = _png_bytes('purple')
+        first = _upload(media, data)
+
+        response = media.sessions.create_handler({
+            'headers': {},
+            'body': json.dumps({
+                'filename': 'again.png',
+                'content_type': 'image/png',
+                'size': len(data),
+                'sha256': hashlib.sha256(data).hexdigest(),
+            }),
+        }, {})
+        session_id = json.loads(response['body'])['session_id']
+        session = media.sessions.media_repo.get_upload_session(session_id)
+        s3_mock.upload_part(
+            Bucket=os.environ['MEDIA_BUCKET'], Key=session['s3_key'],
+            UploadId=session['upload_id'], PartNumber=1, Body=data,
+        )
+
+        response = media.sessions.complete_handler({
+            'path': f'/api/v1/media/uploads/{session_id}/complete',
+            'pathParameters': {'upload_id': session_id},
+            'headers': {},
+        }, {})
+
+        assert response['statusCode'] == 201
+        result = json.loads(response['body'])
+        assert result['filename'] == 'again.png'
+        assert result['s3_key'] == first['s3_key']
+        assert _keys(s3_mock, 'uploads/') == [first['s3_key']]
+
+
+class TestDedupeJob:
+    """Test the batch dedupe job for media stored before deduplication."""
+
+    def _store(self, s3_mock, dynamodb_mock, media_id, data, uploaded_at):
+        key = f'uploads/{media_id}.png'
+        thumbnails = {}
+        for size in ('small', 'medium', 'large'):
+            thumb_key = f'thumbnails/{size}/{media_id}.jpg'
+            s3_mock.put_object(Bucket=os.environ['MEDIA_BUCKET'], Key=thumb_key, Body=b'thumb')
+            thumbnails[size] = f'https://cdn.example.com/{thumb_key}'
+        s3_mock.put_object(Bucket=os.environ['MEDIA_BUCKET'], Key=key, Body=data)
+        item = {
+            'id': media_id,
+            's3_key': key,
+            's3_url': f'https://cdn.example.com/{key}',
+            'thumbnails': thumbnails,
+            'mime_type': 'image/png',
+            'size': len(data),
+            'uploaded_at': uploaded_at,
+        }
+        dynamodb_mock.Table(os.environ['MEDIA_TABLE']).put_item(Item=item)
+        return item
+
+    def test_dedupe_repoints_media_and_rewrites_content(self, s3_mock, dynamodb_mock):
+        import dedupe_media
+
+        data = _png_bytes()
+        original = self._store(s3_mock, dynamodb_mock, 'original', data, 100)
+        copy = self._store(s3_mock, dynamodb_mock, 'copy', data, 200)
+        other = self._store(s3_mock, dynamodb_mock, 'other', _png_bytes('red'), 300)
+
+        content_table = dynamodb_mock.Table(os.environ['CONTENT_TABLE'])
+        post = {
+            'id': 'post-1',
+            'created_at': 1,
+            'featured_image': copy['s3_url'],
+            'metadata': {'media': [{'id': 'copy', 's3_url': copy['s3_url'],
+                                    'thumbnails': copy['thumbnails']}]},
+        }
+        content_table.put_item(Item=post)
+
+        media_table = dynamodb_mock.Table(os.environ['MEDIA_TABLE'])
+        result = {'duplicates': 0, 'content_rewritten': 0, 'errors': 0}
+        groups = dedupe_media.hash_media(
+            s3_mock, os.environ['MEDIA_BUCKET'], [original, copy, other], result
+        )
+        for content_hash, group in groups.items():
+            dedupe_media.dedupe_group(
+                content_hash, group, {}, (media_table, content_table), s3_mock,
+                os.environ['MEDIA_BUCKET'], [post], False, result,
+            )
+
+        assert result == {'duplicates': 1, 'content_rewritten': 1, 'errors': 0}
+        repointed = media_table.get_item(Key={'id': 'copy'})['Item']
+        assert repointed['s3_key'] == original['s3_key']
+        assert repointed['thumbnails'] == original['thumbnails']
+
+        stored = content_table.get_item(Key={'id': 'post-1', 'created_at': 1})['Item']
+        assert stored['featured_image'] == original['s3_url']
+        assert stored['metadata']['media'][0]['thumbnails'] == original['thumbnails']
+
+        assert sorted(_keys(s3_mock, 'uploads/')) == [original['s3_key'], other['s3_key']]
+        assert len(_keys(s3_mock, 'thumbnails/')) == 6
+
+        content_hash = hashlib.sha256(data).hexdigest()
+        entry = media_table.get_item(Key={'id': f'HASH#{content_hash}'})['Item']
+        assert entry['ref_count'] == 2
+        assert entry['media_id'] == 'original'
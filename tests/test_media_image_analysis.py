@@ -0,0 +1,139 @@
+"""
+Integration tests for the image analysis stage of the media pipeline.
+Tests EXIF orientation, metadata stripping and the placeholder fields.
+"""
+import base64
+import importlib
+import io
+import json
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+from PIL import Image
+
+# Add lambda and media directories to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'media'))
+
+from shared.image_analysis import aspect_ratio, dominant_colors, encode_blurhash
+
+BOUNDARY = 'analysis-boundary'
+EXIF_ORIENTATION = 0x0112
+EXIF_GPS_IFD = 0x8825
+
+
+@pytest.fixture
+def media(mock_require_auth):
+    """Load the media upload module with require_auth patched."""
+    import media.upload
+    importlib.reload(media.upload)
+    return media
+
+
+def _rotated_jpeg():
+    """A 400x200 JPEG, red on the left half, tagged to display rotated 90 degrees clockwise."""
+    img = Image.new('RGB', (400, 200), color='blue')
+    img.paste(Image.new('RGB', (200, 200), color='red'), (0, 0))
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 6
+    exif.get_ifd(EXIF_GPS_IFD)[2] = (47.0, 36.0, 0.0)
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', exif=exif, comment=b'taken at home')
+    return buffer.getvalue()
+
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (300, 100), color='green').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _upload(media, data, filename, content_type):
+    body = (
+        f'--{BOUNDARY}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode() + data + f'\r\n--{BOUNDARY}--\r\n'.encode()
+    response = media.upload.handler({
+        'httpMethod': 'POST',
+        'headers': {'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'},
+        'body': base64.b64encode(body).decode(),
+        'isBase64Encoded': True,
+    }, {})
+    assert response['statusCode'] == 201
+    return json.loads(response['body'])
+
+
+def _stored_image(s3_mock, key):
+    body = s3_mock.get_object(Bucket=os.environ['MEDIA_BUCKET'], Key=key)['Body'].read()
+    return Image.open(io.BytesIO(body))
+
+
+class TestImageAnalysis:
+    """Test the placeholder computations."""
+
+    def test_blurhash(self):
+        blurhash = encode_blurhash(Image.new('RGB', (64, 48), color='red'))
+
+        # 4x3 components: 1 size + 1 max + 4 DC + 2 per AC component
+        assert len(blurhash) == 6 + 2 * 11
+        assert encode_blurhash(Image.new('RGB', (64, 48), color='red')) == blurhash
+        assert encode_blurhash(Image.new('RGB', (64, 48), color='blue')) != blurhash
+
+    def test_dominant_colors_and_aspect_ratio(self):
+        img = Image.new('RGB', (60, 20), color=(0, 0, 255))
+        img.paste(Image.new('RGB', (20, 20), color=(255, 0, 0)), (0, 0))
+
+        assert dominant_colors(img) == ['#0000ff', '#ff0000']
+        assert aspect_ratio(1920, 1080) == Decimal('1.7778')
+        assert aspect_ratio(100, 0) is None
+
+
+class TestImagePipeline:
+    """Test the analysis stage run by the media worker."""
+
+    def test_rotated_photo_is_oriented_and_stripped(self, media, s3_mock):
+        uploaded = _upload(media, _rotated_jpeg(), 'photo.jpg', 'image/jpeg')
+        item = media.upload.media_repo.get_by_id(uploaded['id'])
+
+        assert item['status'] == 'ready'
+        assert item['dimensions'] == {'width': 200, 'height': 400}
+        assert item['aspect_ratio'] == Decimal('0.5')
+        assert isinstance(item['blurhash'], str) and len(item['blurhash']) == 28
+        assert all(color.startswith('#') and len(color) == 7 for color in item['dominant_colors'])
+
+        original = _stored_image(s3_mock, item['s3_key'])
+        assert original.size == (200, 400)
+        assert not original.getexif()
+        assert 'comment' not in original.info
+        assert item['size'] != uploaded['size']
+        # Red was on the left, so it is on top once rotated clockwise
+        red, green, blue = original.getpixel((100, 50))
+        assert red > 200 and blue < 60
+
+        thumbnail_key = item['thumbnails']['small'].split('.amazonaws.com/', 1)[1]
+        thumbnail = _stored_image(s3_mock, thumbnail_key)
+        assert thumbnail.height > thumbnail.width
+
+    def test_clean_image_is_not_rewritten(self, media, s3_mock):
+        data = _png()
+        uploaded = _upload(media, data, 'banner.png', 'image/png')
+        item = media.upload.media_repo.get_by_id(uploaded['id'])
+
+        body = s3_mock.get_object(Bucket=os.environ['MEDIA_BUCKET'], Key=item['s3_key'])['Body'].read()
+        assert body == data
+        assert item['size'] == len(data)
+        assert item['aspect_ratio'] == Decimal('3')
+        assert item['dominant_colors'] == ['#008000']
+
+    def test_duplicate_upload_copies_analysis(self, media):
+        first = _upload(media, _rotated_jpeg(), 'photo.jpg', 'image/jpeg')
+        second = _upload(media, _rotated_jpeg(), 'copy.jpg', 'image/jpeg')
+
+        source = media.upload.media_repo.get_by_id(first['id'])
+        copy = media.upload.media_repo.get_by_id(second['id'])
+        assert copy['s3_key'] == source['s3_key']
+        for key in ('size', 'dimensions', 'blurhash', 'dominant_colors', 'aspect_ratio'):
+            assert copy[key] == source[key]
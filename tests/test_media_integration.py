@@ -81,6 +81,64 @@ class TestMediaManagement:
             )
             assert response['ContentLength'] > 0
     
+    def test_generate_thumbnails_from_bytes_cascades_sizes(self, s3_mock):
+        """Thumbnails come from the caller's bytes and fit each size box."""
+        img = Image.new('RGB', (4000, 3000), color='green')
+        img_buffer = io.BytesIO()
+        img.save(img_buffer, format='JPEG')
+        
+        # The original is never uploaded, so it cannot be re-downloaded
+        s3_key = 'uploads/never-stored.jpg'
+        thumbnails = generate_thumbnails(s3_key, 'image/jpeg', img_buffer.getvalue())
+        
+        s3 = boto3.client('s3', region_name='us-east-1')
+        expected = {'large': (1200, 900), 'medium': (600, 450), 'small': (300, 225)}
+        for size, dimensions in expected.items():
+            assert thumbnails[size].endswith(f'thumbnails/{size}/never-stored.jpg')
+            body = s3.get_object(
+                Bucket=os.environ['MEDIA_BUCKET'],
+                Key=f'thumbnails/{size}/never-stored.jpg'
+            )['Body'].read()
+            assert Image.open(io.BytesIO(body)).size == dimensions
+    
+    def test_thumbnail_worker_updates_media_record(self, dynamodb_mock, s3_mock, test_user_id):
+        """The worker writes thumbnails onto the record and marks it ready."""
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'media'))
+        from media.worker import handler as worker_handler, media_repo
+        
+        img_buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), color='blue').save(img_buffer, format='PNG')
+        s3 = boto3.client('s3', region_name='us-east-1')
+        s3.put_object(Bucket=os.environ['MEDIA_BUCKET'], Key='uploads/worker.png',
+                      Body=img_buffer.getvalue())
+        
+        # Truncated PNG: the header parses, the pixel data does not
+        s3.put_object(Bucket=os.environ['MEDIA_BUCKET'], Key='uploads/corrupt.png',
+                      Body=img_buffer.getvalue()[:200])
+        
+        for media_id, s3_key in (('media-ok', 'uploads/worker.png'),
+                                 ('media-bad', 'uploads/corrupt.png'),
+                                 ('media-missing', 'uploads/missing.png')):
+            media_repo.create({'id': media_id, 's3_key': s3_key,
+                               'mime_type': 'image/png', 'status': 'processing'})
+        
+        result = worker_handler({'Records': [
+            {'messageId': '1', 'body': json.dumps(
+                {'media_id': 'media-ok', 's3_key': 'uploads/worker.png', 'mime_type': 'image/png'})},
+            {'messageId': '2', 'body': json.dumps(
+                {'media_id': 'media-bad', 's3_key': 'uploads/corrupt.png', 'mime_type': 'image/png'})},
+            {'messageId': '3', 'body': json.dumps(
+                {'media_id': 'media-missing', 's3_key': 'uploads/missing.png', 'mime_type': 'image/png'})},
+        ]}, None)
+        
+        # S3 errors go back to the queue for retry; undecodable images fail
+        assert result == {'batchItemFailures': [{'itemIdentifier': '3'}]}
+        ready = media_repo.get_by_id('media-ok')
+        assert ready['status'] == 'ready'
+        assert set(ready['thumbnails']) == {'small', 'medium', 'large'}
+        assert media_repo.get_by_id('media-bad')['status'] == 'failed'
+        assert media_repo.get_by_id('media-missing')['status'] == 'processing'
+    
     def test_delete_file_and_thumbnails(self, s3_mock):
         """Test deleting a file and its thumbnails."""
         s3 = boto3.client('s3', region_name='us-east-1')
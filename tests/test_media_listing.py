@@ -0,0 +1,171 @@
+"""
+Integration tests for the indexed media library listing.
+Tests ordering, filters, keyset pagination, the media counters and the
+reindex job.
+"""
+import importlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add lambda and scripts directories to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+
+from shared.db import get_media_type
+
+
+@pytest.fixture
+def media_list(dynamodb_mock):
+    import media.list
+    importlib.reload(media.list)
+    return media.list
+
+
+def _media(media_id, uploaded_at, mime_type='image/png', uploaded_by='user-1'):
+    return {
+        'id': media_id,
+        'filename': f'{media_id}.bin',
+        's3_key': f'uploads/{media_id}.bin',
+        's3_url': f'https://bucket.s3.amazonaws.com/uploads/{media_id}.bin',
+        'mime_type': mime_type,
+        'size': 100,
+        'uploaded_by': uploaded_by,
+        'uploaded_at': uploaded_at,
+    }
+
+
+def _list(media_list, **params):
+    response = media_list.handler({'queryStringParameters': params}, {})
+    assert response['statusCode'] == 200
+    return json.loads(response['body'])
+
+
+def _assert_filters(media_list):
+    result = _list(media_list, type='image')
+    assert [item['id'] for item in result['items']] == ['e', 'c', 'a']
+    assert result['total_count'] == 3
+
+    result = _list(media_list, uploaded_by='user-2')
+    assert [item['id'] for item in result['items']] == ['d', 'c']
+    assert result['total_count'] == 2
+
+    result = _list(media_list, uploaded_by='user-1', type='image', limit='1')
+    assert [item['id'] for item in result['items']] == ['e']
+    assert result['total_count'] == 2
+    result = _list(media_list, uploaded_by='user-1', type='image', last_key=json.dumps(result['last_key']))
+    assert [item['id'] for item in result['items']] == ['a']
+
+
+@pytest.fixture
+def library(media_list):
+    repo = media_list.media_repo
+    items = [
+        _media('a', 100),
+        _media('b', 200, 'video/mp4'),
+        _media('c', 300, 'image/jpeg', 'user-2'),
+        _media('d', 400, 'application/pdf', 'user-2'),
+        _media('e', 500, 'image/webp'),
+    ]
+    for item in items:
+        repo.create(item)
+    # Upload sessions and other entities stay out of the listing
+    repo.create_upload_session({'session_id': 's', 'uploaded_by': 'user-1', 'created_at': 1})
+    return items
+
+
+class TestMediaListing:
+    """Test listing, filtering and counting media."""
+
+    def test_get_media_type(self):
+        assert get_media_type('image/svg+xml') == 'image'
+        assert get_media_type('audio/mpeg') == 'audio'
+        assert get_media_type('application/pdf') == 'document'
+        assert get_media_type('') == 'document'
+
+    def test_lists_newest_first_with_total(self, media_list, library):
+        result = _list(media_list)
+
+        assert [item['id'] for item in result['items']] == ['e', 'd', 'c', 'b', 'a']
+        assert result['total_count'] == 5
+        assert result['last_key'] is None
+
+        result = _list(media_list, order='asc', limit='2')
+        assert [item['id'] for item in result['items']] == ['a', 'b']
+
+    def test_keyset_pagination(self, media_list, library):
+        seen = []
+        last_key = None
+        while True:
+            params = {'limit': '2'}
+            if last_key:
+                params['last_key'] = json.dumps(last_key)
+            result = _list(media_list, **params)
+            seen.extend(item['id'] for item in result['items'])
+            last_key = result['last_key']
+            if not last_key:
+                break
+
+        assert seen == ['e', 'd', 'c', 'b', 'a']
+
+    def test_filters(self, media_list, library):
+        _assert_filters(media_list)
+
+    def test_filters_before_their_indexes_are_deployed(self, media_list, library, monkeypatch):
+        repo = media_list.media_repo
+        monkeypatch.setattr(repo, 'listing_indexes', {repo.LIBRARY_INDEX})
+        query = repo.table.query
+
+        def library_query(**params):
+            assert params['IndexName'] == repo.LIBRARY_INDEX
+            return query(**params)
+
+        monkeypatch.setattr(repo.table, 'query', library_query)
+        _assert_filters(media_list)
+
+    def test_invalid_parameters(self, media_list):
+        for params in ({'type': 'spreadsheet'}, {'order': 'sideways'}, {'last_key': '{"id": "a"}'}):
+            response = media_list.handler({'queryStringParameters': params}, {})
+            assert response['statusCode'] == 400
+
+    def test_deletes_update_counters(self, media_list, library):
+        repo = media_list.media_repo
+        repo.delete_media(repo.get_by_id('a'))
+        repo.delete_media_batch([repo.get_by_id('c'), repo.get_by_id('d')])
+
+        assert repo.get_media_count() == 2
+        assert repo.get_media_count(media_type='image') == 1
+        assert repo.get_media_count(uploaded_by='user-2') == 0
+        assert [item['id'] for item in _list(media_list)['items']] == ['e', 'b']
+
+
+class TestReindexMedia:
+    """Test the index backfill and counter reconciliation job."""
+
+    def test_backfills_and_recounts(self, media_list, library, dynamodb_mock):
+        import reindex_media
+
+        table = dynamodb_mock.Table(os.environ['MEDIA_TABLE'])
+        # Media written before the indexes existed, and a drifted counter
+        table.put_item(Item=_media('old', 50, 'audio/mpeg'))
+        table.update_item(Key={'id': 'COUNT#all'}, UpdateExpression='ADD #total :n',
+                          ExpressionAttributeNames={'#total': 'total'}, ExpressionAttributeValues={':n': 7})
+
+        media_items = [media_list.media_repo.get_by_id(item_id) for item_id in 'abcde'] + [
+            table.get_item(Key={'id': 'old'})['Item']]
+        counters = {
+            item['id']: item for item in table.scan()['Items']
+            if item.get('entity_type') == 'media_count'
+        }
+        result = {'indexed': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+        reindex_media.backfill(table, media_items, False, result)
+        reindex_media.recount(table, media_items, counters, False, result)
+
+        assert result == {'indexed': 1, 'updated': 2, 'unchanged': 1, 'errors': 0}
+        listing = _list(media_list, type='audio')
+        assert [item['id'] for item in listing['items']] == ['old']
+        assert listing['total_count'] == 1
+        assert _list(media_list)['total_count'] == 6
@@ -0,0 +1,131 @@
+"""
+Tests for on-demand image variants.
+Tests preset validation, format negotiation, variant caching and deletion.
+"""
+import io
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+# Add lambda and media directories to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'media'))
+
+
+@pytest.fixture
+def stored_image(s3_mock, dynamodb_mock):
+    """Store a 1000x800 PNG with transparency and its media record."""
+    buffer = io.BytesIO()
+    Image.new('RGBA', (1000, 800), color=(255, 0, 0, 128)).save(buffer, format='PNG')
+    s3_mock.put_object(
+        Bucket=os.environ['MEDIA_BUCKET'], Key='uploads/photo.png', Body=buffer.getvalue()
+    )
+    item = {'id': 'media-1', 's3_key': 'uploads/photo.png', 'mime_type': 'image/png'}
+    dynamodb_mock.Table(os.environ['MEDIA_TABLE']).put_item(Item=item)
+    return item
+
+
+def _keys(s3_mock, prefix):
+    listed = s3_mock.list_objects_v2(Bucket=os.environ['MEDIA_BUCKET'], Prefix=prefix)
+    return [obj['Key'] for obj in listed.get('Contents', [])]
+
+
+def _request(params, accept='', media_id='media-1'):
+    from media import handler
+
+    return handler.handler({
+        'httpMethod': 'GET',
+        'path': f'/api/v1/media/{media_id}/image',
+        'pathParameters': {'id': media_id},
+        'queryStringParameters': params,
+        'headers': {'Accept': accept},
+    }, {})
+
+
+class TestImageVariants:
+    """Test the shared.s3 variant helpers."""
+
+    def test_negotiate_image_format(self):
+        from shared.s3 import negotiate_image_format
+
+        assert negotiate_image_format('image/avif,image/webp,*/*', 'image/jpeg') == 'avif'
+        assert negotiate_image_format('image/avif;q=0,image/webp', 'image/jpeg') == 'webp'
+        assert negotiate_image_format('image/*', 'image/png') == 'png'
+        assert negotiate_image_format('', 'image/gif') == 'jpeg'
+
+    def test_variant_key_is_deterministic(self):
+        from shared.s3 import get_variant_key
+
+        assert get_variant_key('uploads/abc.png', 'card', 'webp') == \
+            'variants/abc/card-600x400-cover-q80.webp'
+
+    def test_render_fits_without_upscaling(self):
+        from shared.s3 import render_image_variant
+
+        cover = Image.open(io.BytesIO(render_image_variant(_png(1000, 800), 'card', 'jpeg')))
+        assert (cover.format, cover.size) == ('JPEG', (600, 400))
+
+        contain = Image.open(io.BytesIO(render_image_variant(_png(1000, 800), 'small', 'png')))
+        assert contain.size == (400, 320)
+
+        small = Image.open(io.BytesIO(render_image_variant(_png(300, 100), 'card', 'webp')))
+        assert small.size == (150, 100)
+
+
+def _png(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color='blue').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class TestTransformEndpoint:
+    """Test GET /media/{id}/image."""
+
+    def test_redirects_to_stored_variant(self, stored_image, s3_mock):
+        response = _request({'preset': 'card'}, accept='image/webp,*/*')
+
+        assert response['statusCode'] == 302
+        assert response['headers']['Vary'] == 'Accept'
+        key = 'variants/photo/card-600x400-cover-q80.webp'
+        assert response['headers']['Location'].endswith(key)
+        stored = s3_mock.get_object(Bucket=os.environ['MEDIA_BUCKET'], Key=key)
+        assert stored['ContentType'] == 'image/webp'
+        image = Image.open(io.BytesIO(stored['Body'].read()))
+        assert image.size == (600, 400)
+        assert image.mode == 'RGBA'
+
+    def test_variant_is_rendered_once(self, stored_image):
+        from shared import s3
+
+        with patch.object(s3, 'render_image_variant', wraps=s3.render_image_variant) as render:
+            first = _request({'width': '600', 'height': '400', 'fit': 'cover'})
+            second = _request({'preset': 'card'})
+
+        assert first['headers']['Location'] == second['headers']['Location']
+        assert first['headers']['Location'].endswith('.png')
+        assert render.call_count == 1
+
+    def test_rejects_requests_outside_presets(self, stored_image):
+        response = _request({'width': '637'})
+        assert response['statusCode'] == 400
+        assert 'card' in json.loads(response['body'])['presets']
+
+        assert _request({'preset': 'huge'})['statusCode'] == 400
+        assert _request({'fit': 'cover'})['statusCode'] == 400
+        assert _request({'preset': 'card', 'format': 'tiff'})['statusCode'] == 400
+        assert _request({'preset': 'card'}, media_id='missing')['statusCode'] == 404
+
+    def test_variants_are_deleted_with_original(self, stored_image, s3_mock):
+        from shared.s3 import delete_file
+
+        _request({'preset': 'thumb'})
+        _request({'preset': 'hero'}, accept='image/webp')
+        assert len(_keys(s3_mock, 'variants/photo/')) == 2
+
+        delete_file('uploads/photo.png')
+
+        assert _keys(s3_mock, 'variants/') == []
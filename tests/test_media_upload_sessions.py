@@ -0,0 +1,187 @@
+"""
+Integration tests for direct-to-S3 multipart upload sessions.
+Tests session creation, resume, finalize verification and abort.
+"""
+import hashlib
+import importlib
+import io
+import json
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+# Add lambda and media directories to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'media'))
+
+
+@pytest.fixture
+def sessions(mock_require_auth):
+    """Load media.sessions with require_auth patched to an editor."""
+    import media.sessions
+    importlib.reload(media.sessions)
+    return media.sessions
+
+
+def _event(method, path, body=None, session_id=None, user='test-editor-id'):
+    event = {
+        'httpMethod': method,
+        'path': path,
+        'pathParameters': {'upload_id': session_id} if session_id else {},
+        'headers': {'X-Test-User': user},
+    }
+    if body is not None:
+        event['body'] = json.dumps(body)
+    return event
+
+
+def _start(sessions, data, filename='photo.png', content_type='image/png', sha256=None):
+    response = sessions.create_handler(_event('POST', '/api/v1/media/uploads', {
+        'filename': filename,
+        'content_type': content_type,
+        'size': len(data),
+        'sha256': sha256 or hashlib.sha256(data).hexdigest(),
+    }), {})
+    assert response['statusCode'] == 201
+    return json.loads(response['body'])
+
+
+def _upload_part(s3_mock, sessions, session_id, part_number, data):
+    session = sessions.media_repo.get_upload_session(session_id)
+    s3_mock.upload_part(
+        Bucket=os.environ['MEDIA_BUCKET'],
+        Key=session['s3_key'],
+        UploadId=session['upload_id'],
+        PartNumber=part_number,
+        Body=data,
+    )
+    return session
+
+
+def _complete(sessions, session_id):
+    return sessions.complete_handler(
+        _event('POST', f'/api/v1/media/uploads/{session_id}/complete', session_id=session_id),
+        {},
+    )
+
+
+def _png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), color='blue').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class TestMediaUploadSessions:
+    """Test the multipart upload session lifecycle."""
+
+    def test_create_session_presigns_every_part(self, sessions, s3_mock):
+        """A new session returns one presigned URL per part."""
+        size = 20 * 1024 * 1024
+        response = sessions.create_handler(_event('POST', '/api/v1/media/uploads', {
+            'filename': 'video.mp4',
+            'size': size,
+            'sha256': 'a' * 64,
+        }), {})
+
+        assert response['statusCode'] == 201
+        body = json.loads(response['body'])
+        assert body['part_count'] == 3
+        assert [part['part_number'] for part in body['parts']] == [1, 2, 3]
+        assert 'uploadId=' in body['parts'][0]['url']
+
+        session = sessions.media_repo.get_upload_session(body['session_id'])
+        assert session['mime_type'] == 'video/mp4'
+        assert session['s3_key'].startswith('uploads/') and session['s3_key'].endswith('.mp4')
+
+    def test_create_session_validation(self, sessions):
+        response = sessions.create_handler(_event('POST', '/api/v1/media/uploads', {
+            'filename': '',
+            'size': sessions.MAX_UPLOAD_SIZE + 1,
+            'sha256': 'not-a-digest',
+        }), {})
+
+        assert response['statusCode'] == 400
+        assert len(json.loads(response['body'])['messages']) == 3
+
+    def test_complete_creates_media_record(self, sessions, s3_mock):
+        """Finalizing verifies the object and creates the media record."""
+        data = _png_bytes()
+        started = _start(sessions, data)
+        session = _upload_part(s3_mock, sessions, started['session_id'], 1, data)
+
+        response = _complete(sessions, started['session_id'])
+
+        assert response['statusCode'] == 201
+        media = json.loads(response['body'])
+        assert media['s3_key'] == session['s3_key']
+        assert media['size'] == len(data)
+        assert media['dimensions'] == {'width': 640, 'height': 480}
+        assert media['status'] == 'processing'
+
+        # The local queue stand-in has already run the thumbnail job
+        stored = sessions.media_repo.get_by_id(media['id'])
+        assert stored['uploaded_by'] == 'test-editor-id'
+        assert stored['status'] == 'ready'
+        assert set(stored['thumbnails']) == {'small', 'medium', 'large'}
+        assert sessions.media_repo.get_upload_session(started['session_id']) is None
+
+    def test_complete_rejects_incomplete_upload(self, sessions, s3_mock):
+        """Missing parts are reported and the session stays resumable."""
+        started = _start(sessions, b'x' * (20 * 1024 * 1024))
+
+        response = _complete(sessions, started['session_id'])
+        assert response['statusCode'] == 409
+        assert json.loads(response['body'])['missing_parts'] == [1, 2, 3]
+
+        resumed = sessions.get_handler(_event(
+            'GET', f"/api/v1/media/uploads/{started['session_id']}",
+            session_id=started['session_id'],
+        ), {})
+        assert resumed['statusCode'] == 200
+        assert len(json.loads(resumed['body'])['parts']) == 3
+
+    def test_complete_rejects_checksum_mismatch(self, sessions, s3_mock):
+        """A checksum mismatch deletes the object and the session."""
+        data = b'hello world'
+        started = _start(sessions, data, filename='notes.txt', content_type='text/plain',
+                         sha256=hashlib.sha256(b'something else').hexdigest())
+        session = _upload_part(s3_mock, sessions, started['session_id'], 1, data)
+
+        response = _complete(sessions, started['session_id'])
+
+        assert response['statusCode'] == 400
+        assert 'checksum' in json.loads(response['body'])['error']
+        listed = s3_mock.list_objects_v2(Bucket=os.environ['MEDIA_BUCKET'], Prefix=session['s3_key'])
+        assert listed.get('KeyCount', 0) == 0
+        assert sessions.media_repo.get_upload_session(started['session_id']) is None
+
+    def test_session_is_private_to_uploader(self, sessions):
+        started = _start(sessions, b'data', filename='notes.txt', content_type='text/plain')
+
+        response = sessions.abort_handler(_event(
+            'DELETE', f"/api/v1/media/uploads/{started['session_id']}",
+            session_id=started['session_id'], user='someone-else',
+        ), {})
+
+        assert response['statusCode'] == 404
+
+    def test_abort_removes_session(self, sessions, s3_mock):
+        started = _start(sessions, b'data', filename='notes.txt', content_type='text/plain')
+
+        response = sessions.abort_handler(_event(
+            'DELETE', f"/api/v1/media/uploads/{started['session_id']}",
+            session_id=started['session_id'],
+        ), {})
+
+        assert response['statusCode'] == 200
+        assert sessions.media_repo.get_upload_session(started['session_id']) is None
+        uploads = s3_mock.list_multipart_uploads(Bucket=os.environ['MEDIA_BUCKET'])
+        assert not uploads.get('Uploads')
+
+    def test_sessions_are_hidden_from_media_reads(self, sessions):
+        started = _start(sessions, b'data', filename='notes.txt', content_type='text/plain')
+
+        assert sessions.media_repo.get_by_id(f"UPLOAD#{started['session_id']}") is None
+        assert sessions.media_repo.list_media()['items'] == []
@@ -0,0 +1,178 @@
+"""
+Tests for media URLs resolved at write time.
+Tests key extraction, resolving content and media records, and the URL
+rewrite job.
+"""
+import os
+import sys
+from pathlib import Path
+
+# Add lambda and scripts directories to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+
+from shared.media_urls import (
+    get_media_object_key,
+    resolve_content_media_urls,
+    resolve_media_record_urls,
+)
+
+CDN = 'https://cdn.example.com'
+OLD_CDN = 'https://old-cdn.example.com'
+BUCKET = 'bucket'
+
+
+def _cdn_url(key):
+    return f'{CDN}/{key}'
+
+
+def _content(featured_image, media_items=None):
+    return {
+        'id': 'post-1',
+        'created_at': 1,
+        'title': 'Post',
+        'featured_image': featured_image,
+        'metadata': {'tags': ['a'], 'media': media_items or []},
+    }
+
+
+class TestMediaObjectKeys:
+    """Test recovering S3 keys from stored URLs."""
+
+    def test_get_media_object_key(self):
+        def key(value):
+            return get_media_object_key(value, BUCKET, [CDN, OLD_CDN])
+
+        assert key('https://bucket.s3.amazonaws.com/uploads/abc.jpg') == 'uploads/abc.jpg'
+        assert key('https://bucket.s3.us-west-2.amazonaws.com/uploads/abc.jpg') == 'uploads/abc.jpg'
+        assert key('https://s3.amazonaws.com/bucket/thumbnails/small/abc.jpg') == 'thumbnails/small/abc.jpg'
+        assert key('https://old-cdn.example.com/uploads/abc.jpg?v=2') == 'uploads/abc.jpg'
+        assert key('https://cdn.example.com/variants/abc/640.webp') == 'variants/abc/640.webp'
+        assert key('uploads/abc.jpg') == 'uploads/abc.jpg'
+        assert key('https://example.com/images/abc.jpg') is None
+        assert key('https://cdn.example.com/uploads') is None
+        assert key(None) is None
+
+    def test_other_hosts_are_not_media_objects(self):
+        def key(value):
+            return get_media_object_key(value, BUCKET, [CDN])
+
+        assert key('https://example.com/wp-content/uploads/2020/05/cat.jpg') is None
+        assert key('https://example.com/uploads/abc.jpg') is None
+        assert key('https://old-cdn.example.com/uploads/abc.jpg') is None
+        assert key('https://other.s3.amazonaws.com/uploads/abc.jpg') is None
+        assert key('https://s3.us-west-2.amazonaws.com/other/uploads/abc.jpg') is None
+        assert key('https://cdn.example.com/wp-content/uploads/abc.jpg') is None
+        assert key('wp-content/uploads/abc.jpg') is None
+
+
+class TestResolveUrls:
+    """Test resolving media URLs on content and media records."""
+
+    def test_resolve_content(self):
+        content = _content('https://bucket.s3.amazonaws.com/uploads/one.jpg', [
+            {'s3_url': 'https://bucket.s3.us-west-2.amazonaws.com/uploads/two.png',
+             'thumbnails': {'small': 'https://bucket.s3.amazonaws.com/thumbnails/small/two.png'}},
+            {'s3_url': 'https://example.com/external.png'},
+        ])
+
+        resolved = resolve_content_media_urls(content, _cdn_url, BUCKET)
+
+        assert resolved['featured_image'] == f'{CDN}/uploads/one.jpg'
+        assert resolved['featured_image_key'] == 'uploads/one.jpg'
+        assert resolved['metadata']['tags'] == ['a']
+        assert resolved['metadata']['media'] == [
+            {'s3_key': 'uploads/two.png', 's3_url': f'{CDN}/uploads/two.png',
+             'thumbnails': {'small': f'{CDN}/thumbnails/small/two.png'}},
+            {'s3_url': 'https://example.com/external.png'},
+        ]
+        # The input is left as it was
+        assert content['featured_image'].startswith('https://bucket.')
+
+    def test_resolve_update_touches_only_given_fields(self):
+        assert resolve_content_media_urls({'title': 'New'}, _cdn_url, BUCKET) == {'title': 'New'}
+
+        resolved = resolve_content_media_urls({'featured_image': 'https://example.com/a.png'}, _cdn_url, BUCKET)
+        assert resolved == {'featured_image': 'https://example.com/a.png', 'featured_image_key': ''}
+
+    def test_resolve_leaves_external_uploads_urls(self):
+        external = 'https://example.com/wp-content/uploads/2020/05/cat.jpg'
+        content = _content(external, [{'s3_url': external, 'thumbnails': {'small': external}}])
+
+        resolved = resolve_content_media_urls(content, _cdn_url, BUCKET, [CDN])
+
+        assert resolved['featured_image'] == external
+        assert resolved['featured_image_key'] == ''
+        assert resolved['metadata']['media'] == [{'s3_url': external, 'thumbnails': {'small': external}}]
+
+    def test_resolve_media_record(self):
+        media = {
+            'id': 'm',
+            's3_key': 'uploads/abc.jpg',
+            's3_url': 'https://bucket.s3.amazonaws.com/uploads/abc.jpg',
+            'thumbnails': {'small': 'https://bucket.s3.amazonaws.com/thumbnails/small/abc.jpg'},
+        }
+
+        resolved = resolve_media_record_urls(media, _cdn_url, BUCKET)
+
+        assert resolved['s3_url'] == f'{CDN}/uploads/abc.jpg'
+        assert resolved['thumbnails'] == {'small': f'{CDN}/thumbnails/small/abc.jpg'}
+
+    def test_content_writes_use_media_cdn_url(self, monkeypatch):
+        from content.media_helpers import resolve_media_urls
+
+        monkeypatch.setenv('MEDIA_CDN_URL', CDN)
+        bucket = os.environ['MEDIA_BUCKET']
+        resolved = resolve_media_urls(_content(f'https://{bucket}.s3.amazonaws.com/uploads/one.jpg'))
+        assert resolved['featured_image'] == f'{CDN}/uploads/one.jpg'
+
+        resolved = resolve_media_urls(_content(f'{CDN}/uploads/one.jpg'))
+        assert resolved['featured_image_key'] == 'uploads/one.jpg'
+
+        external = 'https://example.com/wp-content/uploads/2020/05/cat.jpg'
+        resolved = resolve_media_urls(_content(external))
+        assert resolved == {**_content(external), 'featured_image_key': ''}
+
+
+class TestRewriteJob:
+    """Test the backfill and CDN domain rewrite job."""
+
+    def test_rewrite_media_and_content(self, dynamodb_mock, capsys):
+        import rewrite_media_urls as script
+
+        media_table = dynamodb_mock.Table(os.environ['MEDIA_TABLE'])
+        content_table = dynamodb_mock.Table(os.environ['CONTENT_TABLE'])
+        media_table.put_item(Item={
+            'id': 'm',
+            's3_key': 'uploads/abc.jpg',
+            's3_url': 'https://bucket.s3.amazonaws.com/uploads/abc.jpg',
+            'thumbnails': {'small': 'https://bucket.s3.amazonaws.com/thumbnails/small/abc.jpg'},
+        })
+        content_table.put_item(Item=_content('https://old-cdn.example.com/uploads/abc.jpg'))
+        content_table.put_item(Item={**_content(''), 'id': 'post-2'})
+
+        def resolve_media(item):
+            return resolve_media_record_urls(item, _cdn_url, BUCKET, [CDN])
+
+        def resolve_content(item):
+            return resolve_content_media_urls(item, _cdn_url, BUCKET, [CDN, OLD_CDN])
+
+        result = {'updated': 0, 'unchanged': 0, 'errors': 0}
+        script.rewrite_items(media_table, list(media_table.scan()['Items']), ('id',),
+                             script.MEDIA_URL_FIELDS, resolve_media, False, result)
+        script.rewrite_items(content_table, list(content_table.scan()['Items']), ('id', 'created_at'),
+                             script.CONTENT_URL_FIELDS, resolve_content, False, result)
+
+        assert result == {'updated': 3, 'unchanged': 0, 'errors': 0}
+        media = media_table.get_item(Key={'id': 'm'})['Item']
+        assert media['s3_url'] == f'{CDN}/uploads/abc.jpg'
+        assert media['thumbnails']['small'] == f'{CDN}/thumbnails/small/abc.jpg'
+        content = content_table.get_item(Key={'id': 'post-1', 'created_at': 1})['Item']
+        assert content['featured_image'] == f'{CDN}/uploads/abc.jpg'
+        assert content['featured_image_key'] == 'uploads/abc.jpg'
+        assert content['title'] == 'Post'
+
+        result = {'updated': 0, 'unchanged': 0, 'errors': 0}
+        script.rewrite_items(content_table, list(content_table.scan()['Items']), ('id', 'created_at'),
+                             script.CONTENT_URL_FIELDS, resolve_content, True, result)
+        assert result == {'updated': 0, 'unchanged': 2, 'errors': 0}
@@ -0,0 +1,202 @@
+"""
+Integration tests for the media usage reverse index.
+Tests index maintenance, the usage endpoint, delete enforcement and the
+orphaned media report.
+"""
+import base64
+import importlib
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+# Add lambda, media and scripts directories to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'media'))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+
+from shared.media_usage import content_media_keys, get_media_file_key
+
+BOUNDARY = 'usage-boundary'
+
+
+@pytest.fixture
+def media(mock_require_auth):
+    """Load the media upload, delete and usage modules with require_auth patched."""
+    import media.upload
+    import media.delete
+    import media.usage
+    importlib.reload(media.upload)
+    importlib.reload(media.delete)
+    importlib.reload(media.usage)
+    return media
+
+
+@pytest.fixture
+def sync_media_usage(dynamodb_mock):
+    from content import media_helpers
+
+    media_helpers._media_repository = None
+    return media_helpers.sync_media_usage
+
+
+def _upload(media, color='green'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), color=color).save(buffer, format='PNG')
+    body = (
+        f'--{BOUNDARY}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="photo.png"\r\n'
+        f'Content-Type: image/png\r\n\r\n'
+    ).encode() + buffer.getvalue() + f'\r\n--{BOUNDARY}--\r\n'.encode()
+    response = media.upload.handler({
+        'httpMethod': 'POST',
+        'headers': {'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'},
+        'body': base64.b64encode(body).decode(),
+        'isBase64Encoded': True,
+    }, {})
+    assert response['statusCode'] == 201
+    return json.loads(response['body'])
+
+
+def _post(content_id, featured_image='', media_items=None):
+    return {
+        'id': content_id,
+        'created_at': 1,
+        'title': f'Post {content_id}',
+        'slug': content_id,
+        'status': 'published',
+        'featured_image': featured_image,
+        'metadata': {'media': media_items or []},
+    }
+
+
+class TestMediaReferences:
+    """Test extracting media references from content."""
+
+    def test_get_media_file_key(self):
+        assert get_media_file_key('https://cdn.example.com/uploads/abc.jpg') == 'abc'
+        assert get_media_file_key('https://bucket.s3.amazonaws.com/thumbnails/small/abc.jpg') == 'abc'
+        assert get_media_file_key('https://s3.amazonaws.com/bucket/uploads/abc.png?v=1') == 'abc'
+        assert get_media_file_key('variants/abc/card-600x400-cover-q80.webp') == 'abc'
+        assert get_media_file_key('https://example.com/images/abc.jpg') is None
+        assert get_media_file_key('') is None
+
+    def test_content_media_keys(self):
+        content = _post('p', 'https://cdn.example.com/uploads/one.jpg', [
+            {'s3_url': 'https://cdn.example.com/uploads/two.png',
+             'thumbnails': {'small': 'https://cdn.example.com/thumbnails/small/two.png'}},
+            'not-a-dict',
+        ])
+
+        assert content_media_keys(content) == {'one', 'two'}
+        assert content_media_keys(None) == set()
+
+
+class TestUsageIndex:
+    """Test index maintenance and enforcement."""
+
+    def test_content_writes_maintain_index(self, media, sync_media_usage):
+        first, second = _upload(media, 'red'), _upload(media, 'blue')
+        repo = media.delete.media_repo
+        first_key = get_media_file_key(first['s3_key'])
+        second_key = get_media_file_key(second['s3_key'])
+
+        post = _post('post-1', first['s3_url'])
+        sync_media_usage(None, post)
+        sync_media_usage(None, _post('post-2', media_items=[{'s3_url': first['s3_url']}]))
+        assert repo.get_media_usage(first_key) == ['post-1', 'post-2']
+
+        updated = _post('post-1', second['s3_url'])
+        sync_media_usage(post, updated)
+        assert repo.get_media_usage(first_key) == ['post-2']
+        assert repo.get_media_usage(second_key) == ['post-1']
+
+        sync_media_usage(updated, None)
+        assert repo.get_media_usage(second_key) == []
+        assert repo.table.get_item(Key={'id': f'USAGE#{second_key}'}).get('Item') is None
+
+        response = media.usage.handler({'pathParameters': {'id': first['id']}}, {})
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['in_use'] is False
+
+    def test_usage_endpoint_lists_content(self, media, sync_media_usage, dynamodb_mock):
+        item = _upload(media)
+        post = _post('post-1', item['s3_url'])
+        dynamodb_mock.Table(os.environ['CONTENT_TABLE']).put_item(Item=post)
+        sync_media_usage(None, post)
+
+        response = media.usage.handler({'pathParameters': {'id': item['id']}}, {})
+
+        assert response['statusCode'] == 200
+        result = json.loads(response['body'])
+        assert result['in_use'] is True
+        assert result['content'] == [{
+            'id': 'post-1', 'title': 'Post post-1', 'slug': 'post-1',
+            'type': '', 'status': 'published',
+        }]
+        assert media.usage.handler({'pathParameters': {'id': 'missing'}}, {})['statusCode'] == 404
+
+    def test_delete_refuses_media_in_use(self, media, sync_media_usage, s3_mock):
+        item = _upload(media)
+        sync_media_usage(None, _post('post-1', item['s3_url']))
+
+        response = media.delete.handler({'pathParameters': {'id': item['id']}}, {})
+        assert response['statusCode'] == 409
+        assert json.loads(response['body'])['content_ids'] == ['post-1']
+
+        response = media.delete.handler({
+            'pathParameters': {'id': item['id']},
+            'queryStringParameters': {'force': 'true'},
+        }, {})
+        assert response['statusCode'] == 200
+        assert media.delete.media_repo.get_by_id(item['id']) is None
+
+    def test_shared_file_in_use_blocks_only_last_reference(self, media, sync_media_usage):
+        first = _upload(media, 'red')
+        copy = _upload(media, 'red')
+        unused = _upload(media, 'blue')
+        sync_media_usage(None, _post('post-1', first['s3_url']))
+
+        # Deleting one of two records keeps the file, so it is allowed
+        assert media.delete.handler({'pathParameters': {'id': copy['id']}}, {})['statusCode'] == 200
+        assert media.delete.handler({'pathParameters': {'id': first['id']}}, {})['statusCode'] == 409
+
+        copy = _upload(media, 'red')
+        response = media.delete.bulk_handler({
+            'body': json.dumps({'ids': [first['id'], copy['id'], unused['id']]}),
+        }, {})
+        result = json.loads(response['body'])
+        assert result['deleted'] == [unused['id']]
+        assert result['in_use'] == {first['id']: ['post-1'], copy['id']: ['post-1']}
+
+
+class TestOrphanReport:
+    """Test the orphaned media report and index rebuild."""
+
+    def test_report_and_rebuild(self, media, dynamodb_mock, sync_media_usage, capsys):
+        import media_usage_report as script
+
+        used, unused = _upload(media, 'red'), _upload(media, 'blue')
+        post = _post('post-1', used['s3_url'])
+        dynamodb_mock.Table(os.environ['CONTENT_TABLE']).put_item(Item=post)
+        media_table = dynamodb_mock.Table(os.environ['MEDIA_TABLE'])
+        content_table = dynamodb_mock.Table(os.environ['CONTENT_TABLE'])
+
+        # Content written directly to the table is missing from the index
+        result = {'updated': 0, 'unchanged': 0, 'errors': 0}
+        usage = script.rebuild(media_table, content_table, {}, False, result)
+        assert result == {'updated': 1, 'unchanged': 0, 'errors': 0}
+        assert media.delete.media_repo.get_media_usage(get_media_file_key(used['s3_key'])) == ['post-1']
+
+        media_items = [media.delete.media_repo.get_by_id(item['id']) for item in (used, unused)]
+        orphans = script.report(media_items, usage)
+        assert [orphan['id'] for orphan in orphans] == [unused['id']]
+        assert unused['id'] in capsys.readouterr().out
+
+        result = {'updated': 0, 'unchanged': 0, 'errors': 0}
+        script.rebuild(media_table, content_table, usage, False, result)
+        assert result == {'updated': 0, 'unchanged': 1, 'errors': 0}
@@ -0,0 +1,272 @@
+"""
+Tests for the streaming multipart/form-data parser and its sinks.
+"""
+import base64
+import importlib
+import io
+import json
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+# Add lambda and media directories to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'media'))
+
+from shared.multipart import (
+    BufferSink,
+    MultipartError,
+    MultipartLimitError,
+    MultipartParser,
+    parse_boundary,
+    parse_form,
+)
+
+BOUNDARY = '----FormBoundary7MA4YWxkTrZu0gW'
+CONTENT_TYPE = f'multipart/form-data; boundary={BOUNDARY}'
+
+
+def _field(name, value):
+    return (
+        f'--{BOUNDARY}\r\n'
+        f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+    ).encode() + value + b'\r\n'
+
+
+def _file(name, filename, data, content_type='application/octet-stream'):
+    return (
+        f'--{BOUNDARY}\r\n'
+        f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode() + data + b'\r\n'
+
+
+def _body(*parts):
+    return b''.join(parts) + f'--{BOUNDARY}--\r\n'.encode()
+
+
+# Binary content that contains CRLFs and a near-miss of the delimiter
+TRICKY_DATA = b'\x89PNG\r\n\x1a\n\r\n--' + BOUNDARY[:-1].encode() + b'\r\n\r\n\x00' * 50
+
+
+class RecordingSink(BufferSink):
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+        self.aborted = False
+
+    def close(self):
+        self.closed = True
+
+    def abort(self):
+        super().abort()
+        self.aborted = True
+
+
+class TestMultipartParser:
+    """Test parsing, chunked input and limits."""
+
+    def test_parses_fields_and_files(self):
+        body = _body(
+            _field('title', 'Caf\u00e9'.encode()),
+            _file('file', 'photo.png', TRICKY_DATA, 'image/png'),
+            _file('extra', 'notes.txt', b'', 'text/plain'),
+        )
+
+        form = parse_form(body, CONTENT_TYPE)
+
+        assert form.fields == {'title': 'Caf\u00e9'}
+        assert [f.filename for f in form.files] == ['photo.png', 'notes.txt']
+        photo = form.get_file('file')
+        assert photo.content_type == 'image/png'
+        assert photo.size == len(TRICKY_DATA)
+        assert photo.sink.getvalue() == TRICKY_DATA
+        assert form.get_file('extra').sink.getvalue() == b''
+
+    @pytest.mark.parametrize('chunk_size', [1, 3, 17, 64, 4096])
+    def test_chunked_feed_matches_single_feed(self, chunk_size):
+        body = _body(
+            _field('metadata', b'{"alt_text": "x"}'),
+            _file('file', 'a.bin', TRICKY_DATA * 20),
+            _file('file', 'b.bin', b'second'),
+        )
+
+        parser = MultipartParser(CONTENT_TYPE)
+        for start in range(0, len(body), chunk_size):
+            parser.feed(body[start:start + chunk_size])
+        form = parser.close()
+
+        assert form.fields == {'metadata': '{"alt_text": "x"}'}
+        assert [f.sink.getvalue() for f in form.files] == [TRICKY_DATA * 20, b'second']
+
+    def test_file_parts_are_not_copied(self):
+        body = _body(_file('file', 'a.bin', b'x' * 1024))
+
+        form = parse_form(body, CONTENT_TYPE)
+
+        chunks = form.files[0].sink._chunks
+        assert len(chunks) == 1
+        assert chunks[0].obj is body
+
+    def test_filename_handling(self):
+        body = _body(
+            _file('file', 'C:\\Users\\me\\photo.jpg', b'a'),
+            b'--' + BOUNDARY.encode() + b'\r\n'
+            b'Content-Disposition: form-data; name="file"; filename*=UTF-8\'\'na%C3%AFve.txt\r\n\r\n'
+            b'b\r\n',
+            # An empty file input
+            _file('file', '', b''),
+        )
+
+        form = parse_form(body, CONTENT_TYPE)
+
+        assert [f.filename for f in form.files] == ['photo.jpg', 'na\u00efve.txt']
+
+    def test_file_limit_is_enforced_while_parsing(self):
+        sinks = []
+
+        def factory(name, filename, content_type):
+            sinks.append(RecordingSink())
+            return sinks[-1]
+
+        parser = MultipartParser(CONTENT_TYPE, sink_factory=factory, max_file_size=1000)
+        parser.feed(_file('small', 'small.bin', b's' * 10))
+        parser.feed(_file('file', 'big.bin', b'x' * 600))
+
+        with pytest.raises(MultipartLimitError):
+            parser.feed(b'x' * 600)
+
+        # The oversized bytes never reach a sink and every sink is aborted
+        assert sinks[1].size == 0
+        assert all(sink.aborted for sink in sinks)
+        with pytest.raises(MultipartError):
+            parser.close()
+
+    def test_other_limits(self):
+        with pytest.raises(MultipartLimitError):
+            parse_form(_body(_field('a', b'x' * 100)), CONTENT_TYPE, max_field_size=50)
+        with pytest.raises(MultipartLimitError):
+            parse_form(_body(_field('a', b'1'), _field('b', b'2')), CONTENT_TYPE, max_parts=1)
+        with pytest.raises(MultipartLimitError):
+            parse_form(_body(_file('f', 'f.bin', b'x' * 100)), CONTENT_TYPE, max_body_size=100)
+
+    def test_malformed_bodies(self):
+        with pytest.raises(MultipartError):
+            MultipartParser('multipart/form-data')
+        with pytest.raises(MultipartError):
+            parse_form(_file('file', 'a.bin', b'truncated'), CONTENT_TYPE)
+        with pytest.raises(MultipartError):
+            parse_form(_body(
+                f'--{BOUNDARY}\r\nContent-Type: text/plain\r\n\r\nx\r\n'.encode()
+            ), CONTENT_TYPE)
+
+    def test_parse_boundary(self):
+        assert parse_boundary('multipart/form-data; boundary="a b"') == b'a b'
+        assert parse_boundary('multipart/form-data; charset=utf-8; BOUNDARY=xyz') == b'xyz'
+        assert parse_boundary('multipart/form-data') is None
+
+
+class TestS3MultipartWriter:
+    """Test streaming file parts to S3."""
+
+    def _read(self, s3_mock, key):
+        return s3_mock.get_object(Bucket=os.environ['MEDIA_BUCKET'], Key=key)['Body'].read()
+
+    def test_small_file_is_put_whole(self, s3_mock):
+        from shared.s3 import S3MultipartWriter
+
+        writer = S3MultipartWriter('uploads/small.txt', 'text/plain')
+        form = parse_form(
+            _body(_file('file', 'small.txt', b'hello')),
+            CONTENT_TYPE,
+            sink_factory=lambda name, filename, content_type: writer,
+        )
+
+        assert form.files[0].sink is writer
+        assert self._read(s3_mock, 'uploads/small.txt') == b'hello'
+
+    def test_large_file_streams_in_parts(self, s3_mock):
+        from shared.s3 import S3MultipartWriter
+
+        data = os.urandom(1024) * (11 * 1024)  # 11 MiB, three 5 MiB parts
+        writer = S3MultipartWriter('uploads/large.bin', 'application/octet-stream',
+                                   part_size=5 * 1024 * 1024)
+        parser = MultipartParser(
+            CONTENT_TYPE, sink_factory=lambda name, filename, content_type: writer
+        )
+        body = _body(_file('file', 'large.bin', data))
+        for start in range(0, len(body), 1024 * 1024):
+            parser.feed(body[start:start + 1024 * 1024])
+        parser.close()
+
+        assert len(writer._parts) == 3
+        assert self._read(s3_mock, 'uploads/large.bin') == data
+
+    def test_abort_removes_stored_file(self, s3_mock):
+        from shared.s3 import S3MultipartWriter
+
+        writer = S3MultipartWriter('uploads/gone.txt', 'text/plain')
+        writer.write(memoryview(b'data'))
+        writer.close()
+        writer.abort()
+
+        listed = s3_mock.list_objects_v2(Bucket=os.environ['MEDIA_BUCKET'], Prefix='uploads/')
+        assert listed.get('KeyCount', 0) == 0
+
+
+@pytest.fixture
+def upload_module(mock_require_auth):
+    """Load media.upload with require_auth patched to an editor."""
+    import media.upload
+    importlib.reload(media.upload)
+    return media.upload
+
+
+def _upload_event(body):
+    return {
+        'httpMethod': 'POST',
+        'path': '/api/v1/media/upload',
+        'headers': {'Content-Type': CONTENT_TYPE},
+        'body': base64.b64encode(body).decode(),
+        'isBase64Encoded': True,
+    }
+
+
+class TestUploadHandler:
+    """Test the upload handler on top of the parser."""
+
+    def test_upload_stores_file_and_metadata(self, upload_module, s3_mock):
+        buffer = io.BytesIO()
+        Image.new('RGB', (320, 200), color='red').save(buffer, format='PNG')
+        image = buffer.getvalue()
+
+        response = upload_module.handler(_upload_event(_body(
+            _file('file', 'red.png', image, 'image/png'),
+            _field('metadata', b'{"alt_text": "A red square", "caption": 5}'),
+        )), {})
+
+        assert response['statusCode'] == 201
+        media = json.loads(response['body'])
+        assert media['size'] == len(image)
+        assert media['dimensions'] == {'width': 320, 'height': 200}
+        assert media['metadata'] == {'alt_text': 'A red square', 'caption': ''}
+        stored = s3_mock.get_object(Bucket=os.environ['MEDIA_BUCKET'], Key=media['s3_key'])
+        assert stored['Body'].read() == image
+
+    def test_upload_rejects_oversized_file(self, upload_module, monkeypatch):
+        monkeypatch.setattr(upload_module, 'MAX_FILE_SIZE', 1024)
+
+        response = upload_module.handler(_upload_event(_body(
+            _file('file', 'big.bin', b'x' * 2048),
+        )), {})
+
+        assert response['statusCode'] == 400
+        assert 'too large' in json.loads(response['body'])['error']
+
+    def test_upload_requires_a_file(self, upload_module):
+        response = upload_module.handler(_upload_event(_body(_field('metadata', b'{}'))), {})
+
+        assert response['statusCode'] == 400
+        assert json.loads(response['body'])['error'] == 'Failed to parse file upload'
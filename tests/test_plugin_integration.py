@@ -2,10 +2,12 @@
 Integration tests for plugin system.
 Tests plugin installation, activation, deactivation, and hook execution.
 """
+import io
 import json
 import sys
 import os
 from datetime import datetime
+import time
 import uuid
 
 # Add lambda directory to path
@@ -297,3 +299,407 @@ class TestPluginHooks:
         
         # Without active plugins, content should be unchanged
         assert filtered == content
+
+
+class TestHookRegistry:
+    """Test the cached hook registry and its config version."""
+    
+    def _install(self, plugin_id, priority, active=True):
+        PluginRepository().create({
+            'id': plugin_id,
+            'name': plugin_id,
+            'version': '1.0.0',
+            'description': 'Registry test plugin',
+            'author': 'Test Author',
+            'active': active,
+            'hooks': [
+                {
+                    'hook_name': 'content_render_post',
+                    'function_arn': f'arn:aws:lambda:us-east-1:123456789:function:{plugin_id}',
+                    'priority': priority
+                }
+            ]
+        })
+    
+    def test_registry_is_sorted_and_cached(self, dynamodb_mock, monkeypatch):
+        """Hooks are compiled once and not read again while cached."""
+        self._install('late-plugin', 20)
+        self._install('early-plugin', 5)
+        self._install('inactive-plugin', 1, active=False)
+        plugin_manager = PluginManager()
+        
+        registry = plugin_manager.get_hook_registry()
+        assert [f['plugin_id'] for f in registry['content_render_post']] == ['early-plugin', 'late-plugin']
+        
+        def no_reads(**kwargs):
+            raise AssertionError('plugins table read')
+        
+        monkeypatch.setattr(plugin_manager.plugins_table, 'scan', no_reads)
+        monkeypatch.setattr(plugin_manager.plugins_table, 'get_item', no_reads)
+        
+        data = {'content': '<p>Test</p>'}
+        assert plugin_manager.execute_hook('media_upload', data) == data
+        assert plugin_manager.get_hook_registry() is registry
+    
+    def test_config_changes_rebuild_registry(self, dynamodb_mock, monkeypatch):
+        """Activating a plugin bumps the version and reaches warm managers."""
+        from plugins import activate
+        import shared.plugins as plugins_module
+        
+        self._install('new-plugin', 10, active=False)
+        plugin_manager = PluginManager()
+        assert plugin_manager.get_hook_registry() == {}
+        
+        response = activate.handler({'pathParameters': {'id': 'new-plugin'}}, None)
+        assert response['statusCode'] == 200
+        assert plugin_manager.get_config_version() == 1
+        
+        # Cached until the next version check
+        assert plugin_manager.get_hook_registry() == {}
+        monkeypatch.setattr(plugins_module, 'REGISTRY_CHECK_INTERVAL', 0)
+        assert [f['plugin_id'] for f in plugin_manager.get_hook_registry()['content_render_post']] == ['new-plugin']
+        
+        # The version item is not listed as a plugin
+        assert [p['id'] for p in PluginRepository().list_plugins()['items']] == ['new-plugin']
+
+
+class TestInProcessPlugins:
+    """Test running trusted plugins inside the calling function."""
+    
+    def _install(self, plugin_id, priority, **hook_fields):
+        PluginRepository().create({
+            'id': plugin_id,
+            'name': plugin_id,
+            'version': '1.0.0',
+            'description': 'In-process test plugin',
+            'author': 'Test Author',
+            'active': True,
+            'hooks': [
+                {
+                    'hook_name': 'content_render_post',
+                    'function_arn': f'arn:aws:lambda:us-east-1:123456789:function:{plugin_id}',
+                    'priority': priority,
+                    **hook_fields
+                }
+            ]
+        })
+    
+    def _trust(self, monkeypatch, plugin_dir, *plugin_ids):
+        import shared.plugins as plugins_module
+        
+        monkeypatch.setattr(plugins_module, 'TRUSTED_PLUGINS', frozenset(plugin_ids))
+        monkeypatch.setattr(plugins_module, 'TRUSTED_PLUGIN_DIR', str(plugin_dir))
+        monkeypatch.setattr(plugins_module, '_trusted_handlers', {})
+        return plugins_module
+    
+    def test_bundled_plugin_runs_in_process(self, dynamodb_mock, monkeypatch):
+        """The syntax highlighter is loaded from the plugin directory, not invoked."""
+        plugins_dir = os.path.join(os.path.dirname(__file__), '..', 'plugins')
+        plugins_module = self._trust(monkeypatch, plugins_dir, 'syntax-highlighter')
+        
+        def no_invoke(**kwargs):
+            raise AssertionError('Lambda invoked')
+        
+        monkeypatch.setattr(plugins_module.lambda_client, 'invoke', no_invoke)
+        self._install('syntax-highlighter', 10)
+        plugin_manager = PluginManager()
+        
+        [hook_func] = plugin_manager.get_hook_registry()['content_render_post']
+        assert hook_func['runtime'] == plugins_module.RUNTIME_IN_PROCESS
+        
+        content = '<pre><code class="language-python">print("hi")</code></pre>'
+        result = plugin_manager.apply_content_filters(content, 'post')
+        assert 'syntax-highlight' in result
+    
+    def test_budgets_and_isolation(self, dynamodb_mock, monkeypatch, tmp_path):
+        """Slow and failing trusted plugins are skipped; untrusted ones use Lambda."""
+        handlers = {
+            'slow-plugin': "import time\ndef handler(event, context):\n    time.sleep(2)\n"
+                           "    return {'statusCode': 200, 'body': 'late'}\n",
+            'broken-plugin': "def handler(event, context):\n    raise ValueError('broken')\n",
+            'upper-plugin': "import json\ndef handler(event, context):\n"
+                            "    return {'statusCode': 200, 'body': json.dumps(event['data'].upper())}\n",
+        }
+        for plugin_id, source in handlers.items():
+            (tmp_path / plugin_id).mkdir()
+            (tmp_path / plugin_id / 'handler.py').write_text(source)
+        plugins_module = self._trust(monkeypatch, tmp_path, *handlers, 'missing-plugin')
+        
+        invoked = []
+        
+        def invoke(FunctionName, InvocationType, Payload):
+            invoked.append(FunctionName.rsplit(':', 1)[-1])
+            data = json.loads(Payload)['data']
+            body = json.dumps({'statusCode': 200, 'body': json.dumps(data + '!')})
+            return {'Payload': io.BytesIO(body.encode())}
+        
+        monkeypatch.setattr(plugins_module.lambda_client, 'invoke', invoke)
+        self._install('slow-plugin', 1, timeout_ms=50)
+        self._install('broken-plugin', 2)
+        self._install('upper-plugin', 3)
+        self._install('missing-plugin', 4)
+        self._install('remote-plugin', 5)
+        plugin_manager = PluginManager()
+        
+        started = time.monotonic()
+        assert plugin_manager.execute_hook('content_render_post', 'hello') == 'HELLO!!'
+        assert time.monotonic() - started < 1
+        # Untrusted plugins and trusted ones without a handler use Lambda
+        assert invoked == ['missing-plugin', 'remote-plugin']
+
+
+class TestActionHooks:
+    """Test filter and action hook registrations."""
+    
+    def _install(self, plugin_id, priority, hook_type):
+        PluginRepository().create({
+            'id': plugin_id,
+            'name': plugin_id,
+            'version': '1.0.0',
+            'description': 'Action test plugin',
+            'author': 'Test Author',
+            'active': True,
+            'hooks': [
+                {
+                    'hook_name': 'media_upload',
+                    'function_arn': f'arn:aws:lambda:us-east-1:123456789:function:{plugin_id}',
+                    'priority': priority,
+                    'type': hook_type
+                }
+            ]
+        })
+    
+    def test_actions_are_dispatched_concurrently(self, dynamodb_mock, monkeypatch):
+        """Filters run in order; actions get the final data as async events."""
+        import shared.plugins as plugins_module
+        
+        calls = []
+        
+        def invoke(FunctionName, InvocationType, Payload):
+            plugin_id = FunctionName.rsplit(':', 1)[-1]
+            event = json.loads(Payload)
+            calls.append((plugin_id, InvocationType, event['data']))
+            if InvocationType == 'Event':
+                time.sleep(0.2)
+                return {'StatusCode': 202}
+            body = json.dumps({'statusCode': 200, 'body': json.dumps(event['data'] + '!')})
+            return {'Payload': io.BytesIO(body.encode())}
+        
+        monkeypatch.setattr(plugins_module.lambda_client, 'invoke', invoke)
+        for index in range(4):
+            self._install(f'notify-{index}', index, 'action')
+        self._install('first-filter', 10, 'filter')
+        self._install('second-filter', 20, 'filter')
+        plugin_manager = PluginManager()
+        
+        started = time.monotonic()
+        assert plugin_manager.execute_hook('media_upload', 'photo') == 'photo!!'
+        assert time.monotonic() - started < 0.6
+        
+        assert calls[:2] == [
+            ('first-filter', 'RequestResponse', 'photo'),
+            ('second-filter', 'RequestResponse', 'photo!'),
+        ]
+        assert sorted(calls[2:]) == [(f'notify-{index}', 'Event', 'photo!!') for index in range(4)]
+    
+    def test_action_failures_are_isolated(self, dynamodb_mock, monkeypatch):
+        """A failing action does not affect the hook result."""
+        import shared.plugins as plugins_module
+        
+        def invoke(**kwargs):
+            raise Exception('throttled')
+        
+        monkeypatch.setattr(plugins_module.lambda_client, 'invoke', invoke)
+        self._install('notify', 1, 'action')
+        
+        data = {'id': 'media-1'}
+        assert PluginManager().execute_hook('media_upload', data) == data
+
+
+class TestHookLatency:
+    """Test hook latency budgets, call timeouts and circuit breakers."""
+    
+    def _install(self, plugin_id, priority, **hook_fields):
+        PluginRepository().create({
+            'id': plugin_id,
+            'name': plugin_id,
+            'version': '1.0.0',
+            'description': 'Latency test plugin',
+            'author': 'Test Author',
+            'active': True,
+            'hooks': [
+                {
+                    'hook_name': 'content_render_post',
+                    'function_arn': f'arn:aws:lambda:us-east-1:123456789:function:{plugin_id}',
+                    'priority': priority,
+                    **hook_fields
+                }
+            ]
+        })
+    
+    def _mock_invoke(self, monkeypatch, behaviours):
+        """
+        Patch Lambda invokes: plugin id -> seconds to sleep, an exception,
+        'crash' for a handler that raises or 'error' for a statusCode 500.
+        """
+        import shared.plugins as plugins_module
+        
+        invoked = []
+        
+        def invoke(FunctionName, InvocationType, Payload):
+            plugin_id = FunctionName.rsplit(':', 1)[-1]
+            invoked.append(plugin_id)
+            behaviour = behaviours.get(plugin_id, 0)
+            if isinstance(behaviour, Exception):
+                raise behaviour
+            if behaviour == 'crash':
+                body = json.dumps({'errorMessage': 'boom', 'errorType': 'ValueError'})
+                return {'FunctionError': 'Unhandled', 'Payload': io.BytesIO(body.encode())}
+            if behaviour == 'error':
+                body = json.dumps({'statusCode': 500, 'body': json.dumps('boom')})
+                return {'Payload': io.BytesIO(body.encode())}
+            time.sleep(behaviour)
+            data = json.loads(Payload)['data']
+            body = json.dumps({'statusCode': 200, 'body': json.dumps(data + f'[{plugin_id}]')})
+            return {'Payload': io.BytesIO(body.encode())}
+        
+        monkeypatch.setattr(plugins_module.lambda_client, 'invoke', invoke)
+        return invoked
+    
+    def _breaker(self, plugin_id):
+        return PluginRepository().get_by_id(f'BREAKER#{plugin_id}')
+    
+    def test_timeouts_and_budget(self, dynamodb_mock, monkeypatch):
+        """Slow plugins are abandoned and the hook stays within its budget."""
+        import shared.plugins as plugins_module
+        
+        monkeypatch.setitem(plugins_module.HOOK_BUDGETS, 'content_render_post', 400)
+        self._mock_invoke(monkeypatch, {'slow': 1, 'late': 1})
+        self._install('fast', 1)
+        self._install('slow', 2, timeout_ms=100)
+        self._install('late', 3)
+        self._install('skipped', 4)
+        plugin_manager = PluginManager()
+        
+        started = time.monotonic()
+        assert plugin_manager.execute_hook('content_render_post', 'post') == 'post[fast]'
+        assert time.monotonic() - started < 0.6
+        
+        # Only the plugin that overran its own timeout is counted
+        assert self._breaker('slow')['failures'] == 1
+        assert self._breaker('late') is None
+        assert self._breaker('fast') is None
+    
+    def test_breaker_opens_and_closes(self, dynamodb_mock, monkeypatch):
+        """Repeated failures open the breaker for every container until a trial succeeds."""
+        import shared.plugins as plugins_module
+        
+        monkeypatch.setattr(plugins_module, 'BREAKER_THRESHOLD', 3)
+        monkeypatch.setattr(plugins_module, 'BREAKER_WINDOW', 10 ** 9)
+        monkeypatch.setattr(plugins_module, 'BREAKER_COOLDOWN', 1)
+        behaviours = {'flaky': Exception('boom')}
+        invoked = self._mock_invoke(monkeypatch, behaviours)
+        self._install('flaky', 1)
+        self._install('healthy', 2)
+        plugin_manager = PluginManager()
+        
+        for _ in range(4):
+            assert plugin_manager.execute_hook('content_render_post', 'post') == 'post[healthy]'
+        assert invoked.count('flaky') == 3
+        assert self._breaker('flaky')['opened_until'] > 0
+        
+        # Other containers read the open breaker
+        other_manager = PluginManager()
+        other_manager.execute_hook('content_render_post', 'post')
+        assert invoked.count('flaky') == 3
+        
+        # After the cooldown a successful call closes it
+        time.sleep(1.1)
+        del behaviours['flaky']
+        assert plugin_manager.execute_hook('content_render_post', 'post') == 'post[flaky][healthy]'
+        breaker = self._breaker('flaky')
+        assert breaker['failures'] == 0 and 'opened_until' not in breaker
+        
+        # Breaker items are not listed as plugins
+        assert sorted(p['id'] for p in PluginRepository().list_plugins()['items']) == ['flaky', 'healthy']
+    
+    def test_breaker_refresh_retries_unprocessed_keys(self, dynamodb_mock, monkeypatch):
+        """Breaker keys DynamoDB leaves unprocessed are read again."""
+        import shared.plugins as plugins_module
+        
+        table = dynamodb_mock.Table(os.environ['PLUGINS_TABLE'])
+        table.put_item(Item={
+            'id': 'BREAKER#flaky',
+            'entity_type': 'plugin_breaker',
+            'plugin_id': 'flaky',
+            'opened_until': int(time.time()) + 60
+        })
+        batch_get_item = plugins_module.dynamodb.batch_get_item
+        calls = []
+        
+        def throttled_batch_get_item(RequestItems):
+            calls.append(RequestItems)
+            if len(calls) == 1:
+                return {'Responses': {}, 'UnprocessedKeys': RequestItems}
+            return batch_get_item(RequestItems=RequestItems)
+        
+        monkeypatch.setattr(plugins_module.dynamodb, 'batch_get_item', throttled_batch_get_item)
+        breakers = plugins_module.CircuitBreakers(table)
+        breakers.refresh(['flaky', 'healthy'])
+        
+        assert len(calls) == 2
+        assert not breakers.allow('flaky')
+        assert breakers.allow('healthy')
+    
+    def test_function_errors_open_the_breaker(self, dynamodb_mock, monkeypatch):
+        """Plugins that raise or respond with an error count as failures."""
+        import shared.plugins as plugins_module
+        
+        monkeypatch.setattr(plugins_module, 'BREAKER_THRESHOLD', 2)
+        monkeypatch.setattr(plugins_module, 'BREAKER_WINDOW', 10 ** 9)
+        invoked = self._mock_invoke(monkeypatch, {'crashing': 'crash', 'erroring': 'error'})
+        self._install('crashing', 1)
+        self._install('erroring', 2)
+        self._install('healthy', 3)
+        plugin_manager = PluginManager()
+        
+        for _ in range(3):
+            assert plugin_manager.execute_hook('content_render_post', 'post') == 'post[healthy]'
+        assert invoked.count('crashing') == 2
+        assert invoked.count('erroring') == 2
+        assert self._breaker('crashing')['opened_until'] > 0
+        assert self._breaker('erroring')['opened_until'] > 0
+        assert self._breaker('healthy') is None
+    
+    def test_decimal_data_is_sent(self, dynamodb_mock, monkeypatch):
+        """DynamoDB numbers in hook data reach the plugin as JSON numbers."""
+        import shared.plugins as plugins_module
+        from decimal import Decimal
+        
+        payloads = []
+        
+        def invoke(FunctionName, InvocationType, Payload):
+            payloads.append(json.loads(Payload))
+            body = json.dumps({'statusCode': 200, 'body': Payload})
+            return {'Payload': io.BytesIO(body.encode())}
+        
+        monkeypatch.setattr(plugins_module.lambda_client, 'invoke', invoke)
+        self._install('sizes', 1)
+        plugin_manager = PluginManager()
+        data = {'size': Decimal('2048'), 'aspect_ratio': Decimal('1.5')}
+        
+        plugin_manager.execute_hook('content_render_post', data)
+        
+        assert payloads[0]['data'] == {'size': 2048, 'aspect_ratio': 1.5}
+        assert self._breaker('sizes') is None
+    
+    def test_unserializable_data_is_not_the_plugins_fault(self, dynamodb_mock, monkeypatch):
+        """Hook data that cannot be sent is skipped without a breaker failure."""
+        invoked = self._mock_invoke(monkeypatch, {})
+        self._install('picky', 1)
+        plugin_manager = PluginManager()
+        data = {'value': object()}
+        
+        assert plugin_manager.execute_hook('content_render_post', data) is data
+        assert invoked == []
+        assert self._breaker('picky') is None
@@ -0,0 +1,79 @@
+"""
+Tests for the DynamoDB token-bucket rate limiter.
+Tests bursts, refills, retry times, scopes and bucket expiry.
+"""
+import os
+import sys
+
+import pytest
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
+
+from shared import rate_limit
+from shared.rate_limit import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time for the rate limiter."""
+    now = {'time': 1_700_000_000.0}
+    monkeypatch.setattr(rate_limit.time, 'time', lambda: now['time'])
+    return now
+
+
+class TestRateLimiter:
+    """Test taking and refilling tokens."""
+
+    def test_allows_burst_then_denies(self, dynamodb_mock, clock):
+        limiter = RateLimiter('comments', 3, 60)
+
+        results = [limiter.check('1.2.3.4') for _ in range(4)]
+
+        assert [result.allowed for result in results] == [True, True, True, False]
+        assert [result.remaining for result in results] == [2, 1, 0, 0]
+        assert results[3].retry_after == 20
+
+    def test_refills_over_window(self, dynamodb_mock, clock):
+        limiter = RateLimiter('comments', 3, 60)
+        for _ in range(3):
+            limiter.check('1.2.3.4')
+
+        clock['time'] += 19
+        assert not limiter.check('1.2.3.4').allowed
+
+        # One token back every 20 seconds
+        clock['time'] += 1
+        result = limiter.check('1.2.3.4')
+        assert result.allowed
+        assert result.remaining == 0
+        assert not limiter.check('1.2.3.4').allowed
+
+        # An idle bucket refills completely, and no further
+        clock['time'] += 3600
+        assert [limiter.check('1.2.3.4').allowed for _ in range(4)] == [True, True, True, False]
+
+    def test_scopes_and_keys_are_independent(self, dynamodb_mock, clock):
+        comments = RateLimiter('comments', 1, 60)
+        register = RateLimiter('register', 1, 60)
+
+        assert comments.check('1.2.3.4').allowed
+        assert not comments.check('1.2.3.4').allowed
+        assert comments.check('5.6.7.8').allowed
+        assert register.check('1.2.3.4').allowed
+
+    def test_bucket_expires_once_refilled(self, dynamodb_mock, clock):
+        limiter = RateLimiter('comments', 2, 60)
+        limiter.check('1.2.3.4')
+        limiter.check('1.2.3.4')
+
+        table = dynamodb_mock.Table(os.environ['RATE_LIMITS_TABLE'])
+        item = table.get_item(Key={'id': 'comments#1.2.3.4'})['Item']
+        assert item['full_at'] == int(clock['time'] * 1000) + 60_000
+        assert item['expires_at'] == int(clock['time']) + 61
+
+    def test_fails_open(self, dynamodb_mock, clock):
+        limiter = RateLimiter('comments', 1, 60, table_name='missing-table')
+
+        assert limiter.check('1.2.3.4').allowed
+        assert limiter.check('1.2.3.4').allowed
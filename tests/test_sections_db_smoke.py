@@ -9,8 +9,12 @@ os.environ['SECTIONS_TABLE'] = 'cms-sections-test'
 
 import boto3
 import pytest
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
 from moto import mock_aws
 
+from shared.sections_db import ReorderConflictError
+
 
 @pytest.fixture
 def sections_table():
@@ -76,6 +80,132 @@ def test_get_by_slug(sections_table):
     assert result['id'] == 'sec-1'
 
 
+def test_batch_get_by_ids(sections_table):
+    repo = sections_table
+    for index in range(3):
+        repo.create({
+            'id': f'sec-{index}',
+            'slug': f'slug-{index}',
+            'name': f'Section {index}',
+            'parent_id': 'ROOT',
+            'sort_order': index,
+        })
+
+    result = repo.batch_get_by_ids(['sec-0', 'sec-2', 'missing'])
+    assert set(result) == {'sec-0', 'sec-2'}
+    assert result['sec-2']['name'] == 'Section 2'
+
+
+def test_reorder_children(sections_table):
+    repo = sections_table
+    for index in range(3):
+        repo.create({
+            'id': f'child-{index}',
+            'slug': f'child-{index}',
+            'name': f'Child {index}',
+            'parent_id': 'ROOT',
+            'sort_order': index,
+        })
+
+    order = repo.reorder_children('ROOT', ['child-2', 'child-0', 'child-1'], 1234)
+
+    assert [entry['id'] for entry in order] == ['child-2', 'child-0', 'child-1']
+    assert [child['id'] for child in repo.get_children('ROOT')] == ['child-2', 'child-0', 'child-1']
+    assert repo.get_by_id('child-2')['updated_at'] == 1234
+
+
+def test_reorder_children_rejects_foreign_section(sections_table):
+    repo = sections_table
+    repo.create({'id': 'parent', 'slug': 'parent', 'name': 'Parent', 'parent_id': 'ROOT', 'sort_order': 0})
+    repo.create({'id': 'child', 'slug': 'child', 'name': 'Child', 'parent_id': 'parent', 'sort_order': 0})
+    repo.create({'id': 'other', 'slug': 'other', 'name': 'Other', 'parent_id': 'ROOT', 'sort_order': 1})
+
+    with pytest.raises(ReorderConflictError, match="exactly the children of"):
+        repo.reorder_children('parent', ['other', 'child'], 1234)
+
+    assert repo.get_by_id('child')['sort_order'] == 0
+
+
+def test_reorder_children_requires_every_child(sections_table):
+    repo = sections_table
+    for index in range(3):
+        repo.create({
+            'id': f'child-{index}',
+            'slug': f'child-{index}',
+            'name': f'Child {index}',
+            'parent_id': 'ROOT',
+            'sort_order': index,
+        })
+
+    # A partial list would leave child-2 with a stale sort_order
+    with pytest.raises(ReorderConflictError, match="exactly the children of"):
+        repo.reorder_children('ROOT', ['child-1', 'child-0'], 1234)
+
+    assert [child['sort_order'] for child in repo.get_children('ROOT')] == [0, 1, 2]
+
+
+def test_reorder_handler_maps_only_conflicts_to_409(sections_table, mock_require_auth, monkeypatch):
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'sections'))
+    import importlib
+    import json
+    import sections.reorder as reorder
+    importlib.reload(reorder)
+    sections_table.create({'id': 'child', 'slug': 'child', 'name': 'Child', 'parent_id': 'ROOT', 'sort_order': 0})
+
+    def reorder_request(ids):
+        return reorder.handler({'pathParameters': {'id': 'ROOT'}, 'body': json.dumps({'ids': ids})}, {})
+
+    assert reorder_request(['child'])['statusCode'] == 200
+    assert reorder_request(['child', 'missing'])['statusCode'] == 409
+
+    def throttled(**kwargs):
+        raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}},
+                          'TransactWriteItems')
+
+    monkeypatch.setattr(reorder.sections_repo.client, 'transact_write_items', throttled)
+    response = reorder_request(['child'])
+    assert response['statusCode'] == 500
+    assert 'Rate exceeded' not in response['body']
+
+
+def test_slug_lock_stays_out_of_slug_index(sections_table):
+    repo = sections_table
+    repo.create({
+        'id': 'sec-1',
+        'slug': 'technology',
+        'name': 'Technology',
+        'parent_id': 'ROOT',
+        'sort_order': 0,
+    })
+
+    lock = repo.table.get_item(Key={'id': 'SLUG#technology'})['Item']
+    assert lock['entity_type'] == 'slug_lock'
+    assert 'slug' not in lock
+
+    response = repo.table.query(
+        IndexName='slug-index',
+        KeyConditionExpression=Key('slug').eq('technology'),
+    )
+    assert [item['id'] for item in response['Items']] == ['sec-1']
+
+
+def test_get_by_slug_skips_legacy_slug_lock(sections_table):
+    repo = sections_table
+    # Lock written before the sparse-index migration, sharing the slug attribute
+    repo.table.put_item(Item={'id': 'SLUG#legacy', 'entity_type': 'slug_lock', 'slug': 'legacy'})
+    repo.table.put_item(Item={
+        'id': 'sec-legacy',
+        'slug': 'legacy',
+        'name': 'Legacy',
+        'parent_id': 'ROOT',
+        'sort_order': 0,
+    })
+
+    result = repo.get_by_slug('legacy')
+    assert result is not None
+    assert result['id'] == 'sec-legacy'
+
+
 def test_duplicate_slug_rejected(sections_table):
     repo = sections_table
     repo.create({
@@ -6,6 +6,8 @@ existing mock context.
 """
 import sys
 import os
+import json
+import threading
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda'))
 
@@ -246,3 +248,178 @@ def test_pagination_logic(sections_and_content):
     assert len(page1) == 20
     assert len(page2) == 5
     assert len(posts) == 25
+
+
+# ─── Section post counters ──────────────────────────────────────────────────
+
+
+@pytest.fixture
+def counted_sections(sections_and_content):
+    """Point section_helpers at this module's sections table."""
+    import content.section_helpers as sh
+
+    sections_repo, _ = sections_and_content
+    sh._sections_repository = sections_repo
+    yield sections_repo
+    sh._sections_repository = None
+
+
+def _counts(sections_repo, section_id):
+    section = sections_repo.get_by_id(section_id)
+    return (
+        int(section.get('direct_post_count', 0)),
+        int(section.get('subtree_post_count', 0)),
+    )
+
+
+def _post(section_id, status='published'):
+    return {'id': 'p1', 'section_id': section_id, 'status': status}
+
+
+def test_post_counts_follow_publish_and_unpublish(counted_sections):
+    """Publishing increments the whole ancestor chain; unpublishing reverts it."""
+    from content.section_helpers import sync_section_post_counts
+
+    sections_repo = counted_sections
+    _create_section(sections_repo, 'parent', 'tech', 'Technology')
+    _create_section(sections_repo, 'child', 'web', 'Web Dev', parent_id='parent')
+
+    sync_section_post_counts(None, _post('child', status='draft'))
+    assert _counts(sections_repo, 'child') == (0, 0)
+
+    sync_section_post_counts(_post('child', status='draft'), _post('child'))
+    assert _counts(sections_repo, 'child') == (1, 1)
+    assert _counts(sections_repo, 'parent') == (0, 1)
+
+    sync_section_post_counts(_post('child'), _post('child', status='draft'))
+    assert _counts(sections_repo, 'child') == (0, 0)
+    assert _counts(sections_repo, 'parent') == (0, 0)
+
+
+def test_post_counts_follow_reassignment_and_delete(counted_sections):
+    """Moving a post between siblings leaves the shared parent unchanged."""
+    from content.section_helpers import sync_section_post_counts
+
+    sections_repo = counted_sections
+    _create_section(sections_repo, 'parent', 'tech', 'Technology')
+    _create_section(sections_repo, 'child-a', 'web', 'Web', parent_id='parent', sort_order=0)
+    _create_section(sections_repo, 'child-b', 'mobile', 'Mobile', parent_id='parent', sort_order=1)
+
+    sync_section_post_counts(None, _post('child-a'))
+    sync_section_post_counts(_post('child-a'), _post('child-b'))
+
+    assert _counts(sections_repo, 'child-a') == (0, 0)
+    assert _counts(sections_repo, 'child-b') == (1, 1)
+    assert _counts(sections_repo, 'parent') == (0, 1)
+
+    sync_section_post_counts(_post('child-b'), None)
+    assert _counts(sections_repo, 'child-b') == (0, 0)
+    assert _counts(sections_repo, 'parent') == (0, 0)
+
+
+def test_tree_includes_post_counts(counted_sections):
+    """The tree snapshot carries counters, defaulting to zero."""
+    from content.section_helpers import sync_section_post_counts
+    from sections.service import build_tree
+
+    sections_repo = counted_sections
+    _create_section(sections_repo, 'parent', 'tech', 'Technology')
+    _create_section(sections_repo, 'child', 'web', 'Web Dev', parent_id='parent')
+    _create_section(sections_repo, 'other', 'misc', 'Misc', sort_order=1)
+
+    sync_section_post_counts(None, _post('child'))
+
+    tree = build_tree(sections_repo.get_all_sections())
+    by_id = {node['id']: node for node in tree}
+
+    assert by_id['parent']['subtree_post_count'] == 1
+    assert by_id['parent']['children'][0]['direct_post_count'] == 1
+    assert by_id['other']['direct_post_count'] == 0
+    assert by_id['other']['subtree_post_count'] == 0
+
+
+# ─── Composite section page endpoint ────────────────────────────────────────
+
+
+@pytest.fixture
+def public_module(sections_and_content, monkeypatch):
+    """Load sections/public.py against this module's tables."""
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'sections'))
+    import sections.public as public
+
+    sections_repo, _ = sections_and_content
+    monkeypatch.setattr(public, 'sections_repo', sections_repo)
+    monkeypatch.setattr(public, 'CONTENT_TABLE', 'test-content-with-sections')
+    monkeypatch.setattr(public, '_thread_state', threading.local())
+
+    boto3.resource('dynamodb', region_name='us-east-1').Table(
+        os.environ['USERS_TABLE']
+    ).put_item(Item={'id': 'author-1', 'email': 'a@example.com', 'name': 'Ada'})
+
+    yield public
+
+
+def _page_event(path, page=1, headers=None):
+    return {
+        'httpMethod': 'GET',
+        'resource': '/api/v1/public/sections/page/{path+}',
+        'path': f'/api/v1/public/sections/page/{path}',
+        'pathParameters': {'path': path},
+        'queryStringParameters': {'page': str(page)},
+        'headers': headers or {},
+    }
+
+
+def test_section_page_combines_section_posts_and_landing_page(public_module, sections_and_content):
+    """One request returns the resolved section, its posts and landing page."""
+    sections_repo, content_table = sections_and_content
+
+    _create_section(sections_repo, 'parent', 'tech', 'Technology')
+    _create_section(sections_repo, 'child', 'web', 'Web Dev', parent_id='parent')
+    _create_post(content_table, 'p1', 'parent', published_at=1000)
+    _create_post(content_table, 'p2', 'child', published_at=2000)
+    _create_post(content_table, 'p3', 'child', status='draft', published_at=3000)
+    content_table.update_item(
+        Key={'id': 'p2', 'created_at': 2000},
+        UpdateExpression='SET author = :author',
+        ExpressionAttributeValues={':author': 'author-1'},
+    )
+    _create_post(content_table, 'landing', 'other', published_at=500)
+    sections_repo.update('parent', {'page_id': 'landing'})
+
+    response = public_module.handler(_page_event('tech'), None)
+
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert body['section']['id'] == 'parent'
+    assert [item['id'] for item in body['items']] == ['p2', 'p1']
+    assert body['items'][0]['author_name'] == 'Ada'
+    assert body['pagination']['total'] == 2
+    assert body['landing_page']['id'] == 'landing'
+    assert response['headers']['ETag']
+
+
+def test_section_page_etag_revalidation(public_module):
+    """A matching If-None-Match yields 304; a changed page yields a new ETag."""
+    sections_repo = public_module.sections_repo
+    _create_section(sections_repo, 'parent', 'tech', 'Technology')
+
+    first = public_module.handler(_page_event('tech'), None)
+    etag = first['headers']['ETag']
+
+    cached = public_module.handler(_page_event('tech', headers={'If-None-Match': etag}), None)
+    assert cached['statusCode'] == 304
+    assert cached['body'] == ''
+
+    weak = public_module.handler(_page_event('tech', headers={'if-none-match': f'W/{etag}'}), None)
+    assert weak['statusCode'] == 304
+
+    sections_repo.update('parent', {'name': 'Tech'})
+    changed = public_module.handler(_page_event('tech', headers={'If-None-Match': etag}), None)
+    assert changed['statusCode'] == 200
+    assert changed['headers']['ETag'] != etag
+
+
+def test_section_page_unknown_path(public_module):
+    response = public_module.handler(_page_event('missing/path'), None)
+    assert response['statusCode'] == 404
@@ -9,8 +9,13 @@ import pytest
 from sections.service import (
     ROOT_PARENT_ID,
     MAX_DEPTH,
+    MAX_REORDER_IDS,
     validate_section_input,
+    validate_reorder_input,
     compute_depth,
+    compute_placement,
+    load_ancestors,
+    subtree_move_deltas,
     build_path,
     build_tree,
     resolve_path,
@@ -28,6 +33,35 @@ class FakeRepo:
         return [s for s in self._sections.values() if s.get('parent_id') == parent_id]
 
 
+class BatchFakeRepo(FakeRepo):
+    def __init__(self, sections: list[dict]):
+        super().__init__(sections)
+        self.get_calls = 0
+        self.batch_calls = 0
+
+    def get_by_id(self, section_id):
+        self.get_calls += 1
+        return super().get_by_id(section_id)
+
+    def batch_get_by_ids(self, section_ids):
+        self.batch_calls += 1
+        return {sid: self._sections[sid] for sid in section_ids if sid in self._sections}
+
+
+def stored_chain(depth: int) -> list[dict]:
+    sections = []
+    path_ids = []
+    for i in range(1, depth + 1):
+        path_ids = path_ids + [f"s{i}"]
+        sections.append({
+            "id": f"s{i}",
+            "slug": f"s{i}",
+            "parent_id": ROOT_PARENT_ID if i == 1 else f"s{i - 1}",
+            "path_ids": list(path_ids),
+        })
+    return sections
+
+
 def assert_error_contains(errors, *needles):
     assert errors
     error_text = "\n".join(errors).lower()
@@ -94,6 +128,23 @@ def test_validate_sort_order_bool_rejected():
     assert_error_contains(errors, "sort")
 
 
+# ─── validate_reorder_input ──────────────────────────────────────────────────
+
+
+def test_validate_reorder_valid():
+    assert validate_reorder_input({"ids": ["a", "b", "c"]}) == []
+
+
+@pytest.mark.parametrize("body", [{}, {"ids": []}, {"ids": "a,b"}, {"ids": ["a", ""]}, {"ids": ["a", "a"]}])
+def test_validate_reorder_invalid(body):
+    assert_error_contains(validate_reorder_input(body), "ids")
+
+
+def test_validate_reorder_too_many():
+    ids = [f"s{i}" for i in range(MAX_REORDER_IDS + 1)]
+    assert_error_contains(validate_reorder_input({"ids": ids}), "at most")
+
+
 # ─── compute_depth ───────────────────────────────────────────────────────────
 
 
@@ -168,6 +219,80 @@ def test_build_path_three_levels():
     assert path_ids == ["root", "mid", "leaf"]
 
 
+# ─── load_ancestors / compute_placement ──────────────────────────────────────
+
+
+def test_load_ancestors_uses_single_batch_from_path_ids():
+    repo = BatchFakeRepo(stored_chain(4))
+    ancestors = load_ancestors("s4", repo)
+    assert [a["id"] for a in ancestors] == ["s1", "s2", "s3", "s4"]
+    assert repo.get_calls == 1
+    assert repo.batch_calls == 1
+
+
+def test_load_ancestors_reuses_loaded_parent():
+    sections = stored_chain(3)
+    repo = BatchFakeRepo(sections)
+    load_ancestors("s3", repo, parent=sections[-1])
+    assert repo.get_calls == 0
+    assert repo.batch_calls == 1
+
+
+def test_load_ancestors_falls_back_to_walk_for_stale_path_ids():
+    sections = stored_chain(3)
+    # s2 was moved to the root but s3 still records the old chain
+    sections[1]["parent_id"] = ROOT_PARENT_ID
+    repo = BatchFakeRepo(sections)
+    ancestors = load_ancestors("s3", repo)
+    assert [a["id"] for a in ancestors] == ["s2", "s3"]
+
+
+def test_load_ancestors_walks_without_path_ids():
+    repo = FakeRepo([
+        {"id": "root", "slug": "tech", "parent_id": ROOT_PARENT_ID},
+        {"id": "mid", "slug": "web-dev", "parent_id": "root"},
+    ])
+    assert [a["id"] for a in load_ancestors("mid", repo)] == ["root", "mid"]
+
+
+def test_load_ancestors_detects_cycle():
+    repo = FakeRepo([
+        {"id": "a", "slug": "a", "parent_id": "b"},
+        {"id": "b", "slug": "b", "parent_id": "a"},
+    ])
+    with pytest.raises(ValueError, match="Cycle"):
+        load_ancestors("a", repo)
+
+
+def test_compute_placement_returns_depth_and_path():
+    repo = BatchFakeRepo(stored_chain(2))
+    depth, path, path_ids = compute_placement("leaf", "s2", "leaf-slug", repo)
+    assert depth == 3
+    assert path == "s1/s2/leaf-slug"
+    assert path_ids == ["s1", "s2", "leaf"]
+
+
+def test_compute_placement_rejects_move_under_descendant():
+    repo = BatchFakeRepo(stored_chain(3))
+    with pytest.raises(ValueError, match="Cycle"):
+        compute_placement("s1", "s3", "s1", repo)
+
+
+def test_compute_placement_exceeds_max_depth():
+    repo = BatchFakeRepo(stored_chain(MAX_DEPTH))
+    with pytest.raises(ValueError, match="depth"):
+        compute_placement("leaf", f"s{MAX_DEPTH}", "leaf", repo)
+
+
+def test_subtree_move_deltas_cancel_shared_ancestors():
+    chain = stored_chain(3)
+    old_ancestors = chain[:2]
+    new_ancestors = chain[:1]
+    assert subtree_move_deltas(4, old_ancestors, new_ancestors) == {
+        "s2": {"subtree_post_count": -4},
+    }
+
+
 # ─── build_tree ──────────────────────────────────────────────────────────────
 
 